@@ -0,0 +1,140 @@
+"""
+In-process concurrency benchmark: the async API (CtmAsgiServer) versus the Flask app behind a bounded pool of
+request threads, as a threaded WSGI server would run it. Clients issue a mix of cheap lookups and slow documents
+with a random think time in between; latency percentiles are reported per client count, separately for the cheap
+requests. Latency is measured from the moment a request was due, so time spent waiting for the event loop or
+for a free request thread is included.
+
+Usage: python -m benchmarks.bench_asgi_concurrency [--clients 50 200 500] [--duration S] [--slow-ratio R]
+"""
+import argparse
+import asyncio
+import logging
+import os
+import random
+import tempfile
+import threading
+import time
+import yaml
+from werkzeug.test import EnvironBuilder
+from benchmarks.synthetic_export import write_synthetic_export, write_synthetic_nodes_csv
+from controlm.rest_server import CtmRestServer
+from controlm.rest_server.ctm_asgi_server import CtmAsgiServer
+
+
+FAST_ROUTES = ['/server-names', '/servers/SRV00/stats', '/servers/SRV01/nodes', '/cache/state']
+SLOW_ROUTES = ['/servers/SRV00/nodes/stats', '/servers/SRV01/folders/active']
+
+
+def percentiles(values: [float]) -> str:
+    if not values:
+        return 'n/a'
+    values = sorted(values)
+    p50 = values[len(values) // 2] * 1000
+    p99 = values[max(0, int(len(values) * 0.99) - 1)] * 1000
+    return f"p50 {p50:8.2f} ms  p99 {p99:8.2f} ms"
+
+
+def pick_route(rnd: random.Random, slow_ratio: float):
+    if rnd.random() < slow_ratio:
+        return rnd.choice(SLOW_ROUTES), False
+    return rnd.choice(FAST_ROUTES), True
+
+
+async def run_asgi(app: CtmAsgiServer, clients: int, duration: float, slow_ratio: float, think: float):
+    fast, slow, count = [], [], [0]
+    stop_at = time.monotonic() + duration
+
+    async def receive():
+        return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+    async def client(idx: int):
+        rnd = random.Random(idx)
+        while time.monotonic() < stop_at:
+            path, is_fast = pick_route(rnd, slow_ratio)
+            chunks = []
+
+            async def send(message):
+                chunks.append(message)
+
+            delay = rnd.expovariate(1 / think)
+            start = time.perf_counter() + delay
+            await asyncio.sleep(delay)
+            await app({'type': 'http', 'method': 'GET', 'path': path, 'query_string': b''}, receive, send)
+            (fast if is_fast else slow).append(time.perf_counter() - start)
+            count[0] += 1
+
+    started = time.monotonic()
+    await asyncio.gather(*(client(i) for i in range(clients)))
+    return count[0] / (time.monotonic() - started), fast, slow
+
+
+def run_wsgi(app, clients: int, threads: int, duration: float, slow_ratio: float, think: float):
+    fast, slow, count = [], [], [0]
+    lock = threading.Lock()
+    slots = threading.BoundedSemaphore(threads)
+    stop_at = time.monotonic() + duration
+
+    def client(idx: int):
+        rnd = random.Random(idx)
+        local_fast, local_slow = [], []
+        while time.monotonic() < stop_at:
+            path, is_fast = pick_route(rnd, slow_ratio)
+            environ = EnvironBuilder(path=path).get_environ()
+            delay = rnd.expovariate(1 / think)
+            start = time.perf_counter() + delay
+            time.sleep(delay)
+            with slots:
+                b''.join(app(environ, lambda status, headers, exc_info=None: None))
+            (local_fast if is_fast else local_slow).append(time.perf_counter() - start)
+        with lock:
+            fast.extend(local_fast)
+            slow.extend(local_slow)
+            count[0] += len(local_fast) + len(local_slow)
+
+    workers = [threading.Thread(target=client, args=(i,)) for i in range(clients)]
+    started = time.monotonic()
+    for t in workers:
+        t.start()
+    for t in workers:
+        t.join()
+    return count[0] / (time.monotonic() - started), fast, slow
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__)
+    arg_parser.add_argument('--clients', type=int, nargs='+', default=[50, 200, 500])
+    arg_parser.add_argument('--duration', type=float, default=5)
+    arg_parser.add_argument('--slow-ratio', type=float, default=0.05)
+    arg_parser.add_argument('--think', type=float, default=0.2, help='Mean think time between requests, seconds.')
+    arg_parser.add_argument('--threads', type=int, default=8, help='Request threads of the WSGI baseline.')
+    arg_parser.add_argument('--folders', type=int, default=300, help='Folders per server.')
+    args = arg_parser.parse_args()
+    logging.disable(logging.CRITICAL)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        config_path = os.path.join(tmp, 'config.yml')
+        with open(config_path, 'w') as out:
+            yaml.safe_dump({'cache_manager': {
+                'xml_path': write_synthetic_export(os.path.join(tmp, 'export.xml'), servers=2,
+                                                   folders_per_server=args.folders, jobs_per_folder=10),
+                'csv_path': write_synthetic_nodes_csv(os.path.join(tmp, 'nodes.csv'), servers=2),
+            }}, out)
+        flask_server = CtmRestServer(config_path=config_path)
+        flask_server.di.shared_cache_manager().preload_cache()
+        asgi_server = CtmAsgiServer(config_path=config_path)
+        asgi_server.di.shared_cache_manager().preload_cache()
+
+    print(f"duration={args.duration}s slow ratio={args.slow_ratio} think={args.think}s wsgi threads={args.threads} "
+          f"cpus={os.cpu_count()}")
+    for clients in args.clients:
+        rps, fast, slow = run_wsgi(flask_server.app, clients, args.threads, args.duration, args.slow_ratio,
+                                   args.think)
+        print(f"wsgi  clients={clients:4d} {rps:8.1f} req/s  fast: {percentiles(fast)}  slow: {percentiles(slow)}")
+        rps, fast, slow = asyncio.run(run_asgi(asgi_server, clients, args.duration, args.slow_ratio, args.think))
+        print(f"asgi  clients={clients:4d} {rps:8.1f} req/s  fast: {percentiles(fast)}  slow: {percentiles(slow)}")
+    asgi_server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,74 @@
+"""
+Mirror sync cost: re-downloading /servers after a refresh, versus fetching only the folders and jobs that changed
+from /changes?since=<generation>. One job in every ``--every`` has its command line edited between the two
+generations; the time the change feed adds to publishing a generation is reported too.
+
+Usage: python -m benchmarks.bench_change_feed [--folders N] [--jobs N] [--every N]
+"""
+import argparse
+import copy
+import logging
+import os
+import tempfile
+import time
+import yaml
+from controlm.model import CtmSimpleFolder, CtmSmartFolder
+from controlm.services import CtmCacheManagerKeys, CtmChangeFeed
+from benchmarks.synthetic_export import write_synthetic_export, write_synthetic_nodes_csv
+
+
+def edit_every_nth_job(def_table, every: int):
+    def_table = copy.deepcopy(def_table)
+    jobs = [job for item in def_table.items if isinstance(item, (CtmSimpleFolder, CtmSmartFolder)) for job in item.jobs]
+    for job in jobs[::every]:
+        job.cmd_line = f"nice {job.cmd_line}"
+    return def_table
+
+
+def get(client, path: str):
+    start = time.perf_counter()
+    response = client.get(path)
+    return response.status_code, len(response.data), (time.perf_counter() - start) * 1000
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__)
+    arg_parser.add_argument('--servers', type=int, default=2)
+    arg_parser.add_argument('--folders', type=int, default=500, help='Folders per server.')
+    arg_parser.add_argument('--jobs', type=int, default=20, help='Jobs per folder.')
+    arg_parser.add_argument('--every', type=int, default=1000, help='Edit every Nth job.')
+    args = arg_parser.parse_args()
+    logging.disable(logging.CRITICAL)
+
+    from controlm.rest_server import CtmRestServer
+    with tempfile.TemporaryDirectory() as tmp:
+        config_path = os.path.join(tmp, 'config.yml')
+        with open(config_path, 'w') as out:
+            yaml.safe_dump({'cache_manager': {
+                'xml_path': write_synthetic_export(os.path.join(tmp, 'export.xml'), servers=args.servers,
+                                                   folders_per_server=args.folders, jobs_per_folder=args.jobs),
+                'csv_path': write_synthetic_nodes_csv(os.path.join(tmp, 'nodes.csv'), servers=args.servers),
+            }}, out)
+        server = CtmRestServer(config_path=config_path)
+        cache_manager = server.di.shared_cache_manager()
+        cache_manager.preload_cache()
+
+    def_table = edit_every_nth_job(cache_manager.cache.get_item(CtmCacheManagerKeys.CONTROL_M_ALL_FOLDERS), args.every)
+    start = time.perf_counter()
+    CtmChangeFeed().record(1, def_table)
+    record_ms = (time.perf_counter() - start) * 1000
+    cache_manager.set_caching_complete(cache_manager.cache.get_item(CtmCacheManagerKeys.CONTROL_M_HOST_INFOS),
+                                       def_table)
+    generation = cache_manager.cache_generation
+
+    client = server.app.test_client()
+    print(f"{args.servers} servers x {args.folders} folders x {args.jobs} jobs, every {args.every}th job edited; "
+          f"change feed recording took {record_ms:.0f} ms")
+    print(f"{'request':<30} {'status':>6} {'size KB':>10} {'ms':>9}")
+    for path in ['/servers', f"/changes?since={generation - 1}"]:
+        status, size, elapsed = get(client, path)
+        print(f"{path:<30} {status:6d} {size / 1024:10.1f} {elapsed:9.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,114 @@
+"""
+Compressed source benchmark: parsing a definitions export stored plain, gzip, bz2 and xz compressed, with the file
+evicted from the page cache (cold) and read before (warm). The former workflow - decompressing to a temporary file
+and parsing that - is measured alongside for each format.
+
+Cold reads evict the source with posix_fadvise(DONTNEED), which needs no privileges but is only available on
+Linux; elsewhere, cold and warm timings are the same.
+
+Usage: python -m benchmarks.bench_compressed_sources [--folders N] [--jobs N] [--repeat N]
+"""
+import argparse
+import bz2
+import gc
+import gzip
+import logging
+import lzma
+import os
+import shutil
+import tempfile
+import time
+from statistics import median
+from typing import Callable
+from controlm.services import CtmXmlParser
+from corelib.compression import open_source
+from benchmarks.synthetic_export import write_synthetic_export
+
+
+FORMATS = [
+    ('plain', None),
+    ('gzip', lambda path: gzip.open(path, 'wb', compresslevel=6)),
+    ('bz2', lambda path: bz2.open(path, 'wb')),
+    ('xz', lambda path: lzma.open(path, 'wb', preset=6)),
+]
+
+
+def evict(path: str) -> None:
+    if not hasattr(os, 'posix_fadvise'):
+        return
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+        os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+    finally:
+        os.close(fd)
+
+
+def warm(path: str) -> None:
+    with open(path, 'rb') as source:
+        while source.read(1 << 20):
+            pass
+
+
+def parse_streaming(parser: CtmXmlParser, path: str) -> int:
+    return sum(1 for _ in parser.iter_def_table_items(path))
+
+
+def parse_decompressed_copy(parser: CtmXmlParser, path: str, directory: str) -> int:
+    copy_path = os.path.join(directory, 'decompressed.xml')
+    with open_source(path) as source, open(copy_path, 'wb') as target:
+        shutil.copyfileobj(source, target, 1 << 20)
+    try:
+        return parse_streaming(parser, copy_path)
+    finally:
+        os.remove(copy_path)
+
+
+def measure(fn: Callable[[], int], path: str, repeat: int, cold: bool) -> float:
+    timings = []
+    for _ in range(repeat):
+        evict(path) if cold else warm(path)
+        gc.collect()
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return median(timings)
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__)
+    arg_parser.add_argument('--servers', type=int, default=2)
+    arg_parser.add_argument('--folders', type=int, default=500, help='Folders per server.')
+    arg_parser.add_argument('--jobs', type=int, default=20, help='Jobs per folder.')
+    arg_parser.add_argument('--repeat', type=int, default=3)
+    args = arg_parser.parse_args()
+    logging.disable(logging.CRITICAL)
+
+    parser = CtmXmlParser()
+    with tempfile.TemporaryDirectory() as tmp:
+        xml_path = write_synthetic_export(os.path.join(tmp, 'export.xml'), servers=args.servers,
+                                          folders_per_server=args.folders, jobs_per_folder=args.jobs)
+        print(f"{args.servers} servers x {args.folders} folders x {args.jobs} jobs")
+        print(f"{'format':<7} {'size MB':>8} {'ratio':>6} {'cold s':>8} {'warm s':>8} "
+              f"{'copy cold s':>12} {'copy warm s':>12}")
+        plain_size = os.path.getsize(xml_path)
+        for name, open_compressed in FORMATS:
+            path = xml_path
+            if open_compressed is not None:
+                path = f"{xml_path}.{name}"
+                with open(xml_path, 'rb') as source, open_compressed(path) as target:
+                    shutil.copyfileobj(source, target, 1 << 20)
+            size = os.path.getsize(path)
+            streaming = [measure(lambda: parse_streaming(parser, path), path, args.repeat, cold)
+                         for cold in (True, False)]
+            if open_compressed is None:
+                copying = ['-', '-']
+            else:
+                copying = [f"{measure(lambda: parse_decompressed_copy(parser, path, tmp), path, args.repeat, cold):.2f}"
+                           for cold in (True, False)]
+            print(f"{name:<7} {size / 1e6:8.2f} {plain_size / size:6.1f} {streaming[0]:8.2f} {streaming[1]:8.2f} "
+                  f"{copying[0]:>12} {copying[1]:>12}")
+
+
+if __name__ == '__main__':
+    main()
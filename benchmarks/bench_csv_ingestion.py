@@ -0,0 +1,111 @@
+"""
+Node CSV ingestion benchmark: the former readlines/split parser followed by linear host lookups, versus the
+streaming csv-module parser that indexes hosts in the same pass, on plain and gzip-compressed inventories.
+
+Usage: python -m benchmarks.bench_csv_ingestion [--servers N] [--nodes N] [--hosts N] [--repeat N] [--lookups N]
+"""
+import argparse
+import gc
+import gzip
+import logging
+import os
+import shutil
+import tempfile
+import time
+import tracemalloc
+from statistics import median
+from typing import Callable, List
+from controlm.services import CtmCsvParser
+from controlm.services.dto import DtoHostInfo, DtoHostInventory
+from benchmarks.synthetic_export import write_synthetic_nodes_csv
+
+
+def parse_readlines(csv_path: str, delimiter: str = '|', skip_lines_count: int = 2) -> List[DtoHostInfo]:
+    """
+    The parser before streaming ingestion, without its per-row debug logging.
+    """
+    with open(csv_path) as tmp:
+        results = []
+        for index, line in enumerate(tmp.readlines()):
+            if index >= skip_lines_count:
+                cols = line.split(sep=delimiter)
+                if len(cols) > 3:
+                    results.append(DtoHostInfo(server=cols[0].strip(), group=cols[1].strip(), host=cols[2].strip()))
+        return results
+
+
+def lookup_linear(host_infos: List[DtoHostInfo], keys: list) -> int:
+    return sum(1 for server, host in keys
+               if next((h for h in host_infos if h.server == server and h.host == host), None) is not None)
+
+
+def lookup_indexed(inventory: DtoHostInventory, keys: list) -> int:
+    return sum(1 for key in keys if key in inventory.by_host)
+
+
+def measure(fn: Callable[[], object], repeat: int, trace: bool = False):
+    """
+    :return: Median wall time in seconds, and the peak traced memory of one more run in bytes if ``trace`` is set.
+    """
+    timings = []
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    peak = None
+    if trace:
+        gc.collect()
+        tracemalloc.start()
+        result = fn()
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        del result
+    return median(timings), peak
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__)
+    arg_parser.add_argument('--servers', type=int, default=10)
+    arg_parser.add_argument('--nodes', type=int, default=1000, help='Node groups per server.')
+    arg_parser.add_argument('--hosts', type=int, default=100, help='Hosts per node group.')
+    arg_parser.add_argument('--repeat', type=int, default=3)
+    arg_parser.add_argument('--lookups', type=int, default=200, help='Host lookups against each result.')
+    arg_parser.add_argument('--trace', action='store_true', help='Also report peak memory; slow.')
+    args = arg_parser.parse_args()
+    logging.disable(logging.CRITICAL)
+
+    parser = CtmCsvParser()
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = write_synthetic_nodes_csv(os.path.join(tmp, 'nodes.csv'), servers=args.servers,
+                                             nodes_per_server=args.nodes, hosts_per_node=args.hosts)
+        gz_path = csv_path + '.gz'
+        with open(csv_path, 'rb') as source, gzip.open(gz_path, 'wb', compresslevel=6) as target:
+            shutil.copyfileobj(source, target)
+        rows = args.servers * args.nodes * args.hosts
+        print(f"{rows} rows, {os.path.getsize(csv_path) / 1e6:.1f} MB plain, "
+              f"{os.path.getsize(gz_path) / 1e6:.1f} MB gzip")
+
+        candidates = [
+            ('readlines + split', lambda: parse_readlines(csv_path)),
+            ('readlines + split, index', lambda: DtoHostInventory(parse_readlines(csv_path))),
+            ('csv stream + index', lambda: parser.parse_host_inventory(csv_path)),
+            ('csv stream + index, gzip', lambda: parser.parse_host_inventory(gz_path)),
+        ]
+        print(f"{'parser':<28} {'seconds':>8} {'rows/s':>12} {'peak MB':>8}")
+        for name, fn in candidates:
+            seconds, peak = measure(fn, args.repeat, trace=args.trace)
+            peak_mb = f"{peak / 1e6:8.1f}" if peak is not None else f"{'-':>8}"
+            print(f"{name:<28} {seconds:8.2f} {rows / seconds:12,.0f} {peak_mb}")
+
+        host_infos = parse_readlines(csv_path)
+        inventory = parser.parse_host_inventory(csv_path)
+        step = max(1, len(host_infos) // args.lookups)
+        keys = [(h.server, h.host) for h in host_infos[::step]][:args.lookups]
+        linear, _ = measure(lambda: lookup_linear(host_infos, keys), 1)
+        indexed, _ = measure(lambda: lookup_indexed(inventory, keys), args.repeat)
+        print(f"\n{len(keys)} host lookups: linear scan {linear * 1000:.1f} ms, index {indexed * 1000:.3f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,119 @@
+"""
+Export diff benchmark: comparing two definitions exports by loading both as full definition tables and comparing
+every folder's and job's attribute dicts, versus the streaming differ that holds content hashes and only compares
+the attributes of entities whose hashes differ. Each runs in a fresh process, to report its own peak memory, and
+both are checked to find the same changes.
+
+Usage: python -m benchmarks.bench_export_diff [--folders N] [--jobs N] [--every N]
+"""
+import argparse
+import logging
+import multiprocessing
+import os
+import re
+import resource
+import tempfile
+import time
+from controlm.model import CtmBaseObject, CtmSimpleFolder, CtmSmartFolder
+from controlm.services import CtmExportDiffer, CtmXmlParser
+from benchmarks.synthetic_export import write_synthetic_export
+
+
+def write_modified_copy(xml_path: str, modified_path: str, every: int) -> str:
+    """
+    Copies an export, changing the command line of every ``every``th job and dropping the job after it.
+    """
+    with open(xml_path, encoding='utf-8') as source, open(modified_path, 'w', encoding='utf-8') as out:
+        job, skipping = 0, False
+        for line in source:
+            if line.lstrip().startswith('<JOB '):
+                job += 1
+                skipping = job % every == 1 and job > 1
+                if job % every == 0:
+                    line = re.sub(r'CMDLINE="', 'CMDLINE="nice ', line)
+            if not skipping:
+                out.write(line)
+            if skipping and line.strip() == '</JOB>':
+                skipping = False
+    return modified_path
+
+
+def _object_dict(obj, skip: tuple = ()) -> dict:
+    return {name: [_object_dict(child) for child in value] if isinstance(value, list)
+            else _object_dict(value) if isinstance(value, CtmBaseObject) else value
+            for name, value in vars(obj).items() if name not in skip}
+
+
+def _load(xml_path: str) -> dict:
+    entities = {}
+    for item in CtmXmlParser().parse_xml(xml_path).items:
+        if isinstance(item, (CtmSimpleFolder, CtmSmartFolder)):
+            entities[(item.data_center, item.folder_name)] = _object_dict(item, skip=('jobs',))
+            for job in item.jobs:
+                entities[(item.data_center, item.folder_name, job.job_name)] = _object_dict(job)
+    return entities
+
+
+def diff_full_tables(old_path: str, new_path: str) -> tuple:
+    old, new = _load(old_path), _load(new_path)
+    return (sorted(key for key in new if key not in old), sorted(key for key in old if key not in new),
+            sorted(key for key in new if key in old and new[key] != old[key]))
+
+
+def diff_streaming(old_path: str, new_path: str) -> tuple:
+    result = CtmExportDiffer().diff(old_path, new_path)
+
+    def keys(records):
+        return sorted((record['server'], record['folder'], record['job']) if 'job' in record
+                      else (record['server'], record['folder']) for record in records)
+    return (keys(result.folders_added + result.jobs_added), keys(result.folders_removed + result.jobs_removed),
+            keys(result.folders_changed + result.jobs_changed))
+
+
+def _measure(name: str, old_path: str, new_path: str, results: multiprocessing.Queue) -> None:
+    logging.disable(logging.CRITICAL)
+    start = time.perf_counter()
+    changes = globals()[name](old_path, new_path)
+    seconds = time.perf_counter() - start
+    results.put((seconds, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, changes))
+
+
+def measure(name: str, old_path: str, new_path: str) -> tuple:
+    context = multiprocessing.get_context('spawn')
+    results = context.Queue()
+    process = context.Process(target=_measure, args=(name, old_path, new_path, results))
+    process.start()
+    measured = results.get()
+    process.join()
+    return measured
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__)
+    arg_parser.add_argument('--servers', type=int, default=2)
+    arg_parser.add_argument('--folders', type=int, default=1000, help='Folders per server.')
+    arg_parser.add_argument('--jobs', type=int, default=20, help='Jobs per folder.')
+    arg_parser.add_argument('--every', type=int, default=200, help='Change every Nth job and drop the next.')
+    args = arg_parser.parse_args()
+    logging.disable(logging.CRITICAL)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        old_path = write_synthetic_export(os.path.join(tmp, 'old.xml'), servers=args.servers,
+                                          folders_per_server=args.folders, jobs_per_folder=args.jobs)
+        new_path = write_modified_copy(old_path, os.path.join(tmp, 'new.xml'), args.every)
+        print(f"{args.servers * args.folders} folders, {args.servers * args.folders * args.jobs} jobs, "
+              f"{os.path.getsize(old_path) / 2 ** 20:.0f} MiB per export")
+
+        print(f"{'approach':<30} {'seconds':>8} {'peak RSS MiB':>13} {'added':>6} {'removed':>8} {'changed':>8}")
+        answers = []
+        for label, name in [('full tables, dict comparison', 'diff_full_tables'),
+                            ('streaming content hashes', 'diff_streaming')]:
+            seconds, peak, changes = measure(name, old_path, new_path)
+            answers.append(changes)
+            print(f"{label:<30} {seconds:8.2f} {peak:13.0f} {len(changes[0]):6d} {len(changes[1]):8d} "
+                  f"{len(changes[2]):8d}")
+        print(f"answers agree: {answers[0] == answers[1]}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,91 @@
+"""
+Cold start benchmark: import time of each top-level package and construction time of the REST servers.
+
+Every sample runs in a fresh interpreter. Import times are the cumulative times reported by ``python -X importtime``
+for the package itself; heavy optional modules that the package pulls in are listed next to it.
+
+Usage: python -m benchmarks.bench_import_time [--repeat N]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+from statistics import median
+from typing import Dict, List, Tuple
+
+
+PACKAGES = [
+    'corelib',
+    'controlm.model',
+    'controlm.services',
+    'controlm.di',
+    'controlm.rest_server',
+    'controlm.rest_server.ctm_asgi_server',
+]
+
+HEAVY_MODULES = ['lxml', 'yaml', 'flask', 'dependency_injector.wiring', 'multiprocessing', 'asyncio']
+
+CONSTRUCT_SCRIPT = """
+import json, logging, sys, time
+logging.disable(logging.CRITICAL)
+start = time.perf_counter()
+from controlm.rest_server import CtmRestServer
+from controlm.rest_server.ctm_asgi_server import CtmAsgiServer
+imported = time.perf_counter()
+CtmRestServer(config_path={config!r})
+flask_built = time.perf_counter()
+CtmAsgiServer(config_path={config!r}).shutdown()
+asgi_built = time.perf_counter()
+print(json.dumps([imported - start, flask_built - imported, asgi_built - flask_built, 'lxml' in sys.modules]))
+"""
+
+
+def import_time(package: str) -> Tuple[float, List[str]]:
+    """
+    :return: The package's cumulative import time in milliseconds, and the heavy modules it imported.
+    """
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', f"import {package}"],
+                            capture_output=True, text=True, check=True, env=dict(os.environ, PYTHONWARNINGS='ignore'))
+    cumulative: Dict[str, int] = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or '|' not in line:
+            continue
+        _, total, name = line.split('|')
+        if total.strip().isdigit():
+            cumulative[name.strip()] = int(total)
+    return cumulative[package] / 1000, [module for module in HEAVY_MODULES if module in cumulative]
+
+
+def construct_times(config_path: str) -> List:
+    """
+    :return: Import and construction times of CtmRestServer and CtmAsgiServer in milliseconds, and whether lxml was
+    loaded.
+    """
+    result = subprocess.run([sys.executable, '-c', CONSTRUCT_SCRIPT.format(config=config_path)],
+                            capture_output=True, text=True, check=True)
+    *times, lxml_loaded = json.loads(result.stdout.splitlines()[-1])
+    return [t * 1000 for t in times] + [lxml_loaded]
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__)
+    arg_parser.add_argument('--repeat', type=int, default=5)
+    arg_parser.add_argument('--config', default='./config.yml')
+    args = arg_parser.parse_args()
+
+    print(f"{'package':<40} {'import ms':>10}  heavy modules")
+    for package in PACKAGES:
+        samples = [import_time(package) for _ in range(args.repeat)]
+        print(f"{package:<40} {median(ms for ms, _ in samples):10.1f}  {', '.join(samples[-1][1])}")
+
+    samples = [construct_times(args.config) for _ in range(args.repeat)]
+    imported, flask_built, asgi_built = (median(column) for column in list(zip(*samples))[:3])
+    print(f"\n{'import servers':<40} {imported:10.1f}")
+    print(f"{'CtmRestServer()':<40} {flask_built:10.1f}")
+    print(f"{'CtmAsgiServer()':<40} {asgi_built:10.1f}")
+    print(f"{'lxml loaded before populate':<40} {str(any(s[3] for s in samples)):>10}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,91 @@
+"""
+Load forecast benchmark: jobs eligible and runs starting per node and 15 minute slot, computed by walking each job's
+window and runs minute by minute in Python, versus the compiled forecast's matrix products - once to compile and
+answer, and again for a day's jobs from the schedule calendar. Both answers are checked to agree.
+
+Usage: python -m benchmarks.bench_load_forecast [--folders N] [--jobs N] [--slot N]
+"""
+import argparse
+import logging
+import os
+import tempfile
+import time
+from collections import Counter
+from datetime import date
+from controlm.model import CtmSimpleFolder, CtmSmartFolder
+from controlm.services import CtmJobTiming, CtmLoadForecast, CtmScheduleCalendar, CtmXmlParser
+from benchmarks.synthetic_export import write_synthetic_export
+
+
+def totals_per_job(def_table, slot_minutes: int) -> Counter:
+    totals = Counter()
+    for item in def_table.items:
+        if not isinstance(item, (CtmSimpleFolder, CtmSmartFolder)):
+            continue
+        for job in item.jobs:
+            node = (item.data_center, job.node_id or getattr(item, 'node_id', None))
+            timing = CtmJobTiming.of(job)
+            start, length = timing.window()
+            for slot in {(start + offset) % 1440 // slot_minutes for offset in range(length)}:
+                totals[(node, slot, 'eligible')] += 1
+            for offset in timing.run_offsets().tolist():
+                totals[(node, (start + offset) % 1440 // slot_minutes, 'runs')] += 1
+    return totals
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__)
+    arg_parser.add_argument('--servers', type=int, default=2)
+    arg_parser.add_argument('--folders', type=int, default=500, help='Folders per server.')
+    arg_parser.add_argument('--jobs', type=int, default=20, help='Jobs per folder.')
+    arg_parser.add_argument('--slot', type=int, default=15, help='Slot size in minutes.')
+    args = arg_parser.parse_args()
+    logging.disable(logging.CRITICAL)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        xml_path = write_synthetic_export(os.path.join(tmp, 'export.xml'), servers=args.servers,
+                                          folders_per_server=args.folders, jobs_per_folder=args.jobs)
+        def_table = CtmXmlParser().parse_xml(xml_path)
+
+    start = time.perf_counter()
+    expected = totals_per_job(def_table, args.slot)
+    per_job_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    forecast = CtmLoadForecast(def_table)
+    compiled = time.perf_counter() - start
+    start = time.perf_counter()
+    eligible, runs = forecast.totals(args.slot)
+    first_seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    forecast.heatmap(args.slot)
+    forecast.peaks(5, args.slot)
+    cached_seconds = time.perf_counter() - start
+    print(f"{forecast.jobs_count} jobs, {len(forecast.window_profiles)} distinct timings, "
+          f"compiled in {compiled * 1000:.1f} ms")
+
+    schedule = CtmScheduleCalendar(def_table, date.today().year)
+    start = time.perf_counter()
+    forecast.heatmap(args.slot, jobs=schedule.scheduled_on(date.today()))
+    day_seconds = time.perf_counter() - start
+
+    actual = Counter()
+    for group_idx, node in enumerate(forecast.groups()):
+        for slot in range(eligible.shape[1]):
+            if eligible[group_idx, slot]:
+                actual[(node, slot, 'eligible')] = int(eligible[group_idx, slot])
+            if runs[group_idx, slot]:
+                actual[(node, slot, 'runs')] = int(runs[group_idx, slot])
+
+    print(f"{'query':<40} {'seconds':>10} {'speed-up':>9}")
+    print(f"{'per job, minute by minute':<40} {per_job_seconds:10.3f}")
+    print(f"{'compile and first totals':<40} {compiled + first_seconds:10.3f} "
+          f"{per_job_seconds / (compiled + first_seconds):8.0f}x")
+    print(f"{'heatmap and peaks, same generation':<40} {cached_seconds:10.4f} "
+          f"{per_job_seconds / cached_seconds:8.0f}x")
+    print(f"{'heatmap of the jobs scheduled today':<40} {day_seconds:10.4f} {per_job_seconds / day_seconds:8.0f}x")
+    print(f"answers agree: {actual == expected}")
+
+
+if __name__ == '__main__':
+    main()
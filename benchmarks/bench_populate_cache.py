@@ -0,0 +1,77 @@
+"""
+End-to-end cache refresh benchmark: sequential CSV -> XML -> DTO mapping versus the pipelined loader.
+
+Usage: python -m benchmarks.bench_populate_cache [--folders N] [--jobs N] [--repeat N]
+"""
+import argparse
+import gc
+import logging
+import os
+import tempfile
+import time
+from statistics import median
+from controlm.services import CtmXmlParser, CtmCsvParser, CtmCacheManager
+from controlm.services.dto import map_server_infos_from_ctm_model
+from corelib.caching import CacheStore
+from corelib.threading import TaskRunner
+from benchmarks.synthetic_export import write_synthetic_export, write_synthetic_nodes_csv
+
+
+def run_sequential(xml_path: str, csv_path: str):
+    node_ids = CtmCsvParser().parse_node_ids(csv_path)
+    def_table = CtmXmlParser().parse_xml(xml_path)
+    mapped = map_server_infos_from_ctm_model(def_table)
+    return node_ids, def_table, mapped
+
+
+def run_pipelined(manager: CtmCacheManager):
+    return manager.load_sources()
+
+
+def measure(fns, repeat: int):
+    """
+    Runs the candidates interleaved, so that drift in machine load affects all of them alike.
+    :return: Median wall time of each candidate, in the order given.
+    """
+    timings = [[] for _ in fns]
+    for _ in range(repeat):
+        for idx, fn in enumerate(fns):
+            gc.collect()
+            start = time.perf_counter()
+            fn()
+            timings[idx].append(time.perf_counter() - start)
+    return [median(t) for t in timings]
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__)
+    arg_parser.add_argument('--servers', type=int, default=4)
+    arg_parser.add_argument('--folders', type=int, default=500, help='Folders per server.')
+    arg_parser.add_argument('--jobs', type=int, default=20, help='Jobs per folder.')
+    arg_parser.add_argument('--hosts', type=int, default=200000, help='Rows in the node CSV.')
+    arg_parser.add_argument('--repeat', type=int, default=3)
+    args = arg_parser.parse_args()
+    logging.disable(logging.CRITICAL)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        xml_path = write_synthetic_export(os.path.join(tmp, 'export.xml'), servers=args.servers,
+                                          folders_per_server=args.folders, jobs_per_folder=args.jobs)
+        nodes_per_server = 20
+        csv_path = write_synthetic_nodes_csv(os.path.join(tmp, 'nodes.csv'), servers=args.servers,
+                                             nodes_per_server=nodes_per_server,
+                                             hosts_per_node=max(1, args.hosts // (args.servers * nodes_per_server)))
+        manager = CtmCacheManager(cache=CacheStore(), task_runner=TaskRunner(), xml_path=xml_path, csv_path=csv_path)
+        sequential, pipelined = measure([
+            lambda: run_sequential(xml_path, csv_path),
+            lambda: run_pipelined(manager),
+        ], args.repeat)
+        manager.task_runner.shutdown()
+
+    jobs = args.servers * args.folders * args.jobs
+    print(f"folders={args.servers * args.folders} jobs={jobs} host rows={args.hosts}")
+    print(f"sequential: {sequential:8.3f} s")
+    print(f"pipelined:  {pipelined:8.3f} s  ({sequential / pipelined:.2f}x)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,112 @@
+"""
+Schedule calendar benchmark: "which jobs run on day D" and "scheduled jobs per node and day" for every day of a
+year, answered by evaluating each job's criteria in Python per day, versus the compiled calendar's column lookups
+and matrix product. The per-job evaluator covers the criteria the synthetic export uses - DAYS, WEEKDAYS,
+DAYS_AND_OR, the month flags and the folders' rule-based calendars - and both answers are checked to agree.
+
+Usage: python -m benchmarks.bench_schedule_calendar [--folders N] [--jobs N] [--year N]
+"""
+import argparse
+import logging
+import os
+import tempfile
+import time
+from collections import Counter
+from datetime import date, timedelta
+from typing import Optional, Union
+from controlm.model import CtmDefTable, CtmJobData, CtmSimpleFolder, CtmSmartFolder, CtmTagData
+from controlm.services import CtmScheduleCalendar, CtmXmlParser
+from controlm.services.ctm_schedule_calendar import MONTH_FLAGS
+from benchmarks.synthetic_export import write_synthetic_export
+
+
+def _matches(values: Optional[str], value: int) -> Optional[bool]:
+    if not values:
+        return None
+    tokens = [token.strip().upper() for token in values.split(',')]
+    return 'ALL' in tokens or str(value) in tokens
+
+
+def is_scheduled(item: Union[CtmJobData, CtmTagData], day: date) -> bool:
+    if getattr(item, MONTH_FLAGS[day.month - 1], None) != '1':
+        return False
+    by_day, by_weekday = _matches(item.days, day.day), _matches(item.weekdays, (day.weekday() + 1) % 7)
+    if by_day is not None and by_weekday is not None:
+        return by_day and by_weekday if (item.days_and_or or '').upper() in ('A', 'AND') else by_day or by_weekday
+    return bool(by_day if by_day is not None else by_weekday)
+
+
+def jobs_on_per_job(def_table: CtmDefTable, day: date) -> list:
+    jobs = []
+    for item in def_table.items:
+        if not isinstance(item, (CtmSimpleFolder, CtmSmartFolder)):
+            continue
+        folder_calendars = getattr(item, 'rule_based_calendars', [])
+        if folder_calendars and not any(is_scheduled(tag, day) for tag in folder_calendars):
+            continue
+        jobs.extend((item.data_center, item.folder_name, job.job_name) for job in item.jobs if is_scheduled(job, day))
+    return jobs
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__)
+    arg_parser.add_argument('--servers', type=int, default=2)
+    arg_parser.add_argument('--folders', type=int, default=500, help='Folders per server.')
+    arg_parser.add_argument('--jobs', type=int, default=20, help='Jobs per folder.')
+    arg_parser.add_argument('--year', type=int, default=date.today().year)
+    args = arg_parser.parse_args()
+    logging.disable(logging.CRITICAL)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        xml_path = write_synthetic_export(os.path.join(tmp, 'export.xml'), servers=args.servers,
+                                          folders_per_server=args.folders, jobs_per_folder=args.jobs)
+        def_table = CtmXmlParser().parse_xml(xml_path)
+    first_day = date(args.year, 1, 1)
+    days = [first_day + timedelta(days=offset) for offset in range((date(args.year + 1, 1, 1) - first_day).days)]
+
+    start = time.perf_counter()
+    schedule = CtmScheduleCalendar(def_table, args.year)
+    compiled = time.perf_counter() - start
+    print(f"{len(schedule.job_keys)} jobs, {schedule.pattern_matrix.shape[0]} distinct schedules, "
+          f"compiled in {compiled * 1000:.1f} ms")
+
+    start = time.perf_counter()
+    per_job = [jobs_on_per_job(def_table, day) for day in days]
+    per_job_seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    vectorized = [schedule.jobs_on(day) for day in days]
+    vectorized_seconds = time.perf_counter() - start
+    agree = all(sorted(expected) == sorted((job['server'], job['folder'], job['job']) for job in actual)
+                for expected, actual in zip(per_job, vectorized))
+
+    start = time.perf_counter()
+    per_node = Counter()
+    for item in def_table.items:
+        if not isinstance(item, (CtmSimpleFolder, CtmSmartFolder)):
+            continue
+        folder_calendars = getattr(item, 'rule_based_calendars', [])
+        for job in item.jobs:
+            for day in days:
+                if (not folder_calendars or any(is_scheduled(tag, day) for tag in folder_calendars)) \
+                        and is_scheduled(job, day):
+                    per_node[(item.data_center, job.node_id or getattr(item, 'node_id', None), day)] += 1
+    per_node_seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    counts = schedule.group_counts_by_day()
+    busiest = schedule.busiest_days(5)
+    matrix_seconds = time.perf_counter() - start
+    group_index = {group: idx for idx, group in enumerate(schedule.groups)}
+    agree = agree and sum(per_node.values()) == counts.sum() and all(
+        counts[group_index[(server, node)], (day - first_day).days] == count
+        for (server, node, day), count in per_node.items())
+
+    print(f"{'query':<40} {'per job s':>10} {'vectorized s':>13} {'speed-up':>9}")
+    print(f"{'jobs on each day of the year':<40} {per_job_seconds:10.2f} {vectorized_seconds:13.3f} "
+          f"{per_job_seconds / vectorized_seconds:8.0f}x")
+    print(f"{'jobs per node and day, busiest days':<40} {per_node_seconds:10.2f} {matrix_seconds:13.3f} "
+          f"{per_node_seconds / matrix_seconds:8.0f}x")
+    print(f"answers agree: {agree}, {len(busiest)} nodes")
+
+
+if __name__ == '__main__':
+    main()
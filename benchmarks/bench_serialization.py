@@ -0,0 +1,88 @@
+"""
+Serialization throughput of the /servers-raw document: the former CtmRestServerJSONEncoder, which fell back to
+every object's __dict__, versus the per-type serializers of CTM_JSON_SERIALIZER with each available backend.
+
+Throughput is the size of the encoded document divided by the median encoding time.
+
+Usage: python -m benchmarks.bench_serialization [--folders N] [--jobs N] [--repeat N]
+"""
+import argparse
+import enum
+import gc
+import json
+import logging
+import os
+import tempfile
+import time
+from datetime import datetime
+from statistics import median
+from controlm.rest_server.json_serialization import create_ctm_json_serializer
+from controlm.services import CtmXmlParser
+from corelib.serialization import ORJSON_BACKEND, STDLIB_BACKEND
+from benchmarks.synthetic_export import write_synthetic_export
+
+
+class LegacyJSONEncoder(json.JSONEncoder):
+    """
+    The encoder the REST server used before the per-type serializers.
+    """
+
+    def default(self, obj):
+        if isinstance(obj, datetime):
+            return obj.isoformat()
+        if isinstance(obj, enum.Enum):
+            return str(obj)
+        if isinstance(obj, set):
+            return list(obj)
+        return obj.__dict__
+
+
+def legacy_dumps(payload) -> bytes:
+    return (json.dumps(payload, cls=LegacyJSONEncoder, sort_keys=True, separators=(',', ':')) + '\n').encode('utf-8')
+
+
+def measure(fns, payload, repeat: int):
+    """
+    Runs the candidates interleaved, so that drift in machine load affects all of them alike.
+    :return: Median wall time of each candidate, and the size of the document it encoded, in the order given.
+    """
+    timings, sizes = [[] for _ in fns], [0 for _ in fns]
+    for _ in range(repeat):
+        for idx, fn in enumerate(fns):
+            gc.collect()
+            start = time.perf_counter()
+            sizes[idx] = len(fn(payload))
+            timings[idx].append(time.perf_counter() - start)
+    return [median(t) for t in timings], sizes
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__)
+    arg_parser.add_argument('--servers', type=int, default=2)
+    arg_parser.add_argument('--folders', type=int, default=500, help='Folders per server.')
+    arg_parser.add_argument('--jobs', type=int, default=20, help='Jobs per folder.')
+    arg_parser.add_argument('--repeat', type=int, default=5)
+    args = arg_parser.parse_args()
+    logging.disable(logging.CRITICAL)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        xml_path = write_synthetic_export(os.path.join(tmp, 'export.xml'), servers=args.servers,
+                                          folders_per_server=args.folders, jobs_per_folder=args.jobs)
+        def_table = CtmXmlParser().parse_xml(xml_path)
+
+    candidates = [('legacy __dict__ encoder', legacy_dumps)]
+    for backend in [STDLIB_BACKEND, ORJSON_BACKEND]:
+        try:
+            candidates.append((f"per-type serializers ({backend})", create_ctm_json_serializer(backend).dumps))
+        except ValueError as ex:
+            print(f"Skipping backend '{backend}': {ex}")
+
+    print(f"/servers-raw: {args.servers} servers x {args.folders} folders x {args.jobs} jobs")
+    timings, sizes = measure([fn for _, fn in candidates], def_table, args.repeat)
+    for (name, _), elapsed, size in zip(candidates, timings, sizes):
+        print(f"{name:<36} {size / 1e6:8.1f} MB {elapsed * 1000:9.1f} ms "
+              f"{size / 1e6 / elapsed:8.1f} MB/s {timings[0] / elapsed:6.2f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,150 @@
+"""
+Load test of the HTTP serving modes: the Flask development server (app.run) versus the pre-fork server.
+
+Each mode serves a synthetic export in its own process; keep-alive clients then request a mix of read-only routes
+for a fixed duration.
+
+Usage: python -m benchmarks.bench_serving [--clients N] [--duration S] [--workers N] [--threads N]
+"""
+import argparse
+import http.client
+import json
+import logging
+import os
+import signal
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from statistics import median
+import yaml
+from benchmarks.synthetic_export import write_synthetic_export, write_synthetic_nodes_csv
+
+
+DEFAULT_ROUTES = ['/server-names', '/servers/SRV00/stats', '/cache/state']
+
+
+def serve(mode: str, config_path: str, port: int) -> None:
+    logging.disable(logging.CRITICAL)
+    from controlm.rest_server import CtmRestServer
+    server = CtmRestServer(config_path=config_path)
+    if mode == 'dev':
+        server.run(host='127.0.0.1', port=port)
+    else:
+        server.serve(host='127.0.0.1', port=port)
+
+
+def wait_until_ready(port: int, timeout: float = 300) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            connection = http.client.HTTPConnection('127.0.0.1', port, timeout=5)
+            connection.request('GET', '/cache/state')
+            state = json.loads(connection.getresponse().read())
+            connection.close()
+            if 'COMPLETE' in json.dumps(state):
+                return
+        except (OSError, http.client.HTTPException, ValueError):
+            pass
+        time.sleep(0.2)
+    raise TimeoutError(f"Server on port {port} did not become ready.")
+
+
+def load(port: int, clients: int, duration: float, routes: [str]):
+    """
+    :return: Requests per second, p50 and p99 latency in milliseconds, and the number of connections opened.
+    """
+    latencies, connects = [], [0]
+    lock = threading.Lock()
+    stop_at = time.monotonic() + duration
+
+    def client(idx: int):
+        local, connection = [], None
+        n = idx
+        while time.monotonic() < stop_at:
+            if connection is None:
+                connection = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+                with lock:
+                    connects[0] += 1
+            start = time.perf_counter()
+            connection.request('GET', routes[n % len(routes)])
+            response = connection.getresponse()
+            response.read()
+            local.append(time.perf_counter() - start)
+            n += 1
+            if response.will_close:
+                connection.close()
+                connection = None
+        if connection:
+            connection.close()
+        with lock:
+            latencies.extend(local)
+
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(clients)]
+    started = time.monotonic()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.monotonic() - started
+    latencies.sort()
+    p99 = latencies[int(len(latencies) * 0.99) - 1] if latencies else 0
+    return len(latencies) / elapsed, median(latencies) * 1000, p99 * 1000, connects[0]
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__)
+    arg_parser.add_argument('--serve', choices=['dev', 'prefork'], help=argparse.SUPPRESS)
+    arg_parser.add_argument('--config', help=argparse.SUPPRESS)
+    arg_parser.add_argument('--port', type=int, default=5801)
+    arg_parser.add_argument('--clients', type=int, default=16)
+    arg_parser.add_argument('--duration', type=float, default=10)
+    arg_parser.add_argument('--workers', type=int, default=2)
+    arg_parser.add_argument('--threads', type=int, default=8)
+    arg_parser.add_argument('--folders', type=int, default=200, help='Folders per server.')
+    arg_parser.add_argument('--routes', nargs='+', default=DEFAULT_ROUTES,
+                            help='Routes requested round-robin. The defaults are cheap, so that serving overhead '
+                                 'dominates; /servers measures JSON encoding instead.')
+    args = arg_parser.parse_args()
+    if args.serve:
+        serve(args.serve, args.config, args.port)
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        config_path = os.path.join(tmp, 'config.yml')
+        with open(config_path, 'w') as out:
+            yaml.safe_dump({
+                'server': {'workers': args.workers, 'threads': args.threads},
+                'cache_manager': {
+                    'xml_path': write_synthetic_export(os.path.join(tmp, 'export.xml'), servers=2,
+                                                       folders_per_server=args.folders, jobs_per_folder=10),
+                    'csv_path': write_synthetic_nodes_csv(os.path.join(tmp, 'nodes.csv'), servers=2),
+                },
+            }, out)
+        results = {}
+        for mode in ['dev', 'prefork']:
+            process = subprocess.Popen([sys.executable, '-m', 'benchmarks.bench_serving', '--serve', mode,
+                                        '--config', config_path, '--port', str(args.port)],
+                                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+            try:
+                wait_until_ready(args.port)
+                load(args.port, args.clients, 1, args.routes)
+                results[mode] = load(args.port, args.clients, args.duration, args.routes)
+            finally:
+                process.send_signal(signal.SIGTERM)
+                try:
+                    process.wait(30)
+                except subprocess.TimeoutExpired:
+                    process.kill()
+                    process.wait()
+
+    print(f"clients={args.clients} duration={args.duration}s workers={args.workers} threads={args.threads} "
+          f"cpus={os.cpu_count()}")
+    for mode, (rps, p50, p99, connects) in results.items():
+        print(f"{mode:8s} {rps:9.1f} req/s  p50 {p50:7.2f} ms  p99 {p99:8.2f} ms  connections {connects}")
+    print(f"speed-up: {results['prefork'][0] / results['dev'][0]:.2f}x")
+
+
+if __name__ == '__main__':
+    main()
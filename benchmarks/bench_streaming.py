@@ -0,0 +1,89 @@
+"""
+Time to first byte, total time and peak memory of the large collection routes, rendered as a JSON document versus
+streamed as NDJSON.
+
+Requests are made against the WSGI application in-process, so that the numbers reflect rendering rather than the
+network. The response cache is cleared before each request, so that every request renders its body. Peak memory is
+measured in a separate, traced request.
+
+Usage: python -m benchmarks.bench_streaming [--folders N] [--jobs N] [--repeat N]
+"""
+import argparse
+import logging
+import os
+import tempfile
+import time
+import tracemalloc
+from statistics import median
+import yaml
+from werkzeug.test import EnvironBuilder
+from benchmarks.synthetic_export import write_synthetic_export, write_synthetic_nodes_csv
+
+ROUTES = ['/servers-raw', '/servers', '/servers/SRV00/folders/all']
+
+
+def request(app, path: str, accept: str, trace: bool = False):
+    """
+    :param trace: Trace memory allocations, which slows rendering down considerably.
+    :return: Time to first byte and total time in milliseconds, response size and peak traced memory in bytes.
+    """
+    environ = EnvironBuilder(path=path, headers={'Accept': accept}).get_environ()
+    if trace:
+        tracemalloc.start()
+    start = time.perf_counter()
+    body = app(environ, lambda status, headers, exc_info=None: None)
+    ttfb, size = None, 0
+    try:
+        for chunk in body:
+            if ttfb is None:
+                ttfb = time.perf_counter() - start
+            size += len(chunk)
+    finally:
+        if hasattr(body, 'close'):
+            body.close()
+    elapsed = time.perf_counter() - start
+    peak = 0
+    if trace:
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return ttfb * 1000, elapsed * 1000, size, peak
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__)
+    arg_parser.add_argument('--servers', type=int, default=2)
+    arg_parser.add_argument('--folders', type=int, default=500, help='Folders per server.')
+    arg_parser.add_argument('--jobs', type=int, default=20, help='Jobs per folder.')
+    arg_parser.add_argument('--repeat', type=int, default=3)
+    args = arg_parser.parse_args()
+    logging.disable(logging.CRITICAL)
+
+    from controlm.rest_server import CtmRestServer
+    with tempfile.TemporaryDirectory() as tmp:
+        config_path = os.path.join(tmp, 'config.yml')
+        with open(config_path, 'w') as out:
+            yaml.safe_dump({'cache_manager': {
+                'xml_path': write_synthetic_export(os.path.join(tmp, 'export.xml'), servers=args.servers,
+                                                   folders_per_server=args.folders, jobs_per_folder=args.jobs),
+                'csv_path': write_synthetic_nodes_csv(os.path.join(tmp, 'nodes.csv'), servers=args.servers),
+            }}, out)
+        server = CtmRestServer(config_path=config_path)
+        server.di.shared_cache_manager().preload_cache()
+    response_cache = server.di.shared_response_cache()
+
+    print(f"{args.servers} servers x {args.folders} folders x {args.jobs} jobs")
+    print(f"{'route':<30} {'format':<7} {'size MB':>8} {'TTFB ms':>9} {'total ms':>9} {'peak MB':>8}")
+    for path in ROUTES:
+        for name, accept in [('json', 'application/json'), ('ndjson', 'application/x-ndjson')]:
+            samples = []
+            for _ in range(args.repeat):
+                response_cache.clear()
+                samples.append(request(server.app.wsgi_app, path, accept))
+            ttfb, elapsed, size, _ = (median(column) for column in zip(*samples))
+            response_cache.clear()
+            peak = request(server.app.wsgi_app, path, accept, trace=True)[3]
+            print(f"{path:<30} {name:<7} {size / 1e6:8.1f} {ttfb:9.1f} {elapsed:9.1f} {peak / 1e6:8.1f}")
+
+
+if __name__ == '__main__':
+    main()
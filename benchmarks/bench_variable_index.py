@@ -0,0 +1,78 @@
+"""
+Variable lookups: finding the jobs that define or reference a variable by scanning every job's variables, command
+line and member name, versus the reverse index built when the cache is populated - its build time, and a lookup
+with the first page of records. Both are checked to find the same jobs.
+
+Usage: python -m benchmarks.bench_variable_index [--folders N] [--jobs N] [--repeat N]
+"""
+import argparse
+import logging
+import os
+import tempfile
+import time
+from controlm.model import CtmSimpleFolder, CtmSmartFolder
+from controlm.services import CtmVariableIndex, CtmXmlParser
+from controlm.services.ctm_variable_index import variable_user_sort_key
+from corelib.querying import CollectionQuery
+from benchmarks.synthetic_export import write_synthetic_export
+
+VARIABLES = ['%%JOB_ARGS', '%%FOLDER_HOME', '%%ODATE']
+
+
+def scan(def_table, name: str) -> tuple:
+    defined, referenced = [], []
+    for item in def_table.items:
+        if not isinstance(item, (CtmSimpleFolder, CtmSmartFolder)):
+            continue
+        for job in item.jobs:
+            key = (item.data_center, item.folder_name, job.job_name)
+            if any(variable.name == name for variable in job.variables):
+                defined.append(key)
+            if any(name in (text or '') for text in [job.cmd_line, job.mem_name]
+                   + [variable.value for variable in job.variables]):
+                referenced.append(key)
+    return sorted(defined), sorted(referenced)
+
+
+def lookup(index: CtmVariableIndex, name: str, query: CollectionQuery) -> list:
+    page, _ = query.select_page(index.references(name), key=variable_user_sort_key, presorted=True)
+    return [entry.to_dict() for entry in page]
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__)
+    arg_parser.add_argument('--servers', type=int, default=2)
+    arg_parser.add_argument('--folders', type=int, default=500, help='Folders per server.')
+    arg_parser.add_argument('--jobs', type=int, default=20, help='Jobs per folder.')
+    arg_parser.add_argument('--repeat', type=int, default=100)
+    args = arg_parser.parse_args()
+    logging.disable(logging.CRITICAL)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        xml_path = write_synthetic_export(os.path.join(tmp, 'export.xml'), servers=args.servers,
+                                          folders_per_server=args.folders, jobs_per_folder=args.jobs)
+        def_table = CtmXmlParser().parse_xml(xml_path)
+
+    start = time.perf_counter()
+    index = CtmVariableIndex(def_table)
+    print(f"{args.servers * args.folders * args.jobs} jobs, index built in {time.perf_counter() - start:.3f} s")
+
+    query = CollectionQuery(limit=100)
+    print(f"{'variable':<16} {'scan ms':>9} {'index page us':>14} {'answers agree':>14}")
+    for name in VARIABLES:
+        start = time.perf_counter()
+        expected = scan(def_table, name)
+        scan_ms = (time.perf_counter() - start) * 1000
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            lookup(index, name, query)
+        lookup_us = (time.perf_counter() - start) / args.repeat * 1e6
+        actual = (sorted((entry.server, entry.folder, entry.job) for entry in index.definitions(name)
+                         if entry.job is not None),
+                  sorted((entry.server, entry.folder, entry.job) for entry in index.references(name)
+                         if entry.job is not None))
+        print(f"{name:<16} {scan_ms:9.1f} {lookup_us:14.1f} {str(actual == expected):>14}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,106 @@
+import os
+import random
+from typing import Optional
+from xml.sax.saxutils import quoteattr
+
+
+TASK_TYPES = ['Command', 'Job', 'Dummy']
+ORDER_METHODS = ['SYSTEM', None]
+MONTHS = ['JAN', 'FEB', 'MAR', 'APR', 'MAY', 'JUN', 'JUL', 'AUG', 'SEP', 'OCT', 'NOV', 'DEC']
+
+
+def _attrs(**kwargs) -> str:
+    return ' '.join(f"{k}={quoteattr(str(v))}" for k, v in kwargs.items() if v is not None)
+
+
+def write_synthetic_export(xml_path: str,
+                           servers: int = 2,
+                           folders_per_server: int = 200,
+                           jobs_per_folder: int = 20,
+                           nodes_per_server: int = 20,
+                           seed: Optional[int] = 42) -> str:
+    """
+    Writes a synthetic definitions export, conforming to resources/Folder.xsd, to the target path.
+    :return: The path of the written XML file.
+    """
+    rnd = random.Random(seed)
+    os.makedirs(os.path.dirname(os.path.abspath(xml_path)), exist_ok=True)
+    with open(xml_path, 'w', encoding='utf-8') as out:
+        out.write('<?xml version="1.0" encoding="utf-8"?>\n<DEFTABLE>\n')
+        for s in range(servers):
+            server = f"SRV{s:02d}"
+            for f in range(folders_per_server):
+                smart = f % 2 == 0
+                folder_name = f"{server}_FOLDER_{f:05d}"
+                application = f"APP{rnd.randrange(10):02d}"
+                sub_application = f"{application}_SUB{rnd.randrange(5)}"
+                tag = 'SMART_FOLDER' if smart else 'FOLDER'
+                folder_attrs = dict(
+                    DATACENTER=server,
+                    FOLDER_NAME=folder_name,
+                    FOLDER_ORDER_METHOD=rnd.choice(ORDER_METHODS),
+                )
+                if smart:
+                    folder_attrs.update(
+                        APPLICATION=application,
+                        SUB_APPLICATION=sub_application,
+                        JOBNAME=folder_name,
+                        NODEID=f"{server}_NODE_{rnd.randrange(nodes_per_server):03d}",
+                    )
+                out.write(f"  <{tag} {_attrs(**folder_attrs)}>\n")
+                if smart:
+                    out.write(f"    <VARIABLE {_attrs(NAME='%%FOLDER_HOME', VALUE=f'/opt/{folder_name}')}/>\n")
+                    calendar_attrs = _attrs(NAME='WORKDAYS', WEEKDAYS='1,2,3,4,5', DAYS_AND_OR='OR',
+                                            **{m: '1' for m in MONTHS})
+                    out.write(f"    <RULE_BASED_CALENDAR {calendar_attrs}/>\n")
+                for j in range(jobs_per_folder):
+                    cyclic = rnd.random() < 0.2
+                    job_name = f"{folder_name}_JOB_{j:04d}"
+                    time_from = f"{rnd.randrange(24):02d}{rnd.choice(['00', '15', '30', '45'])}"
+                    job_attrs = dict(
+                        JOBNAME=job_name,
+                        MEMNAME=f"{job_name}.sh",
+                        APPLICATION=application,
+                        SUB_APPLICATION=sub_application,
+                        NODEID=f"{server}_NODE_{rnd.randrange(nodes_per_server):03d}",
+                        TASKTYPE=rnd.choice(TASK_TYPES),
+                        CYCLIC='1' if cyclic else '0',
+                        INTERVAL=f"{rnd.choice([5, 10, 15, 30, 60]):05d}M" if cyclic else None,
+                        CMDLINE=f"%%FOLDER_HOME/bin/run.sh %%ODATE {job_name}",
+                        DAYS=rnd.choice(['ALL', '1,15', None]),
+                        WEEKDAYS=rnd.choice(['1,2,3,4,5', None]),
+                        TIMEFROM=time_from,
+                        TIMETO=rnd.choice(['>', '2359', None]),
+                        DAYS_AND_OR='OR',
+                        PARENT_FOLDER=folder_name,
+                    )
+                    job_attrs.update({m: '1' for m in MONTHS})
+                    out.write(f"    <JOB {_attrs(**job_attrs)}>\n")
+                    out.write(f"      <VARIABLE {_attrs(NAME='%%JOB_ARGS', VALUE=f'--job {job_name}')}/>\n")
+                    out.write("    </JOB>\n")
+                out.write(f"  </{tag}>\n")
+        out.write('</DEFTABLE>\n')
+    return xml_path
+
+
+def write_synthetic_nodes_csv(csv_path: str,
+                              servers: int = 2,
+                              nodes_per_server: int = 20,
+                              hosts_per_node: int = 3,
+                              delimiter: str = '|') -> str:
+    """
+    Writes a synthetic node export in the layout of PROD_CTM.Nodes.csv - two header lines, then one
+    server, node group and host per line.
+    :return: The path of the written CSV file.
+    """
+    os.makedirs(os.path.dirname(os.path.abspath(csv_path)), exist_ok=True)
+    with open(csv_path, 'w', encoding='utf-8') as out:
+        out.write(delimiter.join(['DATACENTER', 'NODEGROUP', 'NODEID', 'APPLTYPE']) + '\n')
+        out.write(delimiter.join(['-' * 10] * 4) + '\n')
+        for s in range(servers):
+            server = f"SRV{s:02d}"
+            for n in range(nodes_per_server):
+                for h in range(hosts_per_node):
+                    out.write(delimiter.join([server, f"{server}_NODE_{n:03d}", f"host{s:02d}{n:03d}{h}.local", 'OS'])
+                              + '\n')
+    return csv_path
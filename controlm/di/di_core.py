@@ -1,19 +1,43 @@
 from dependency_injector import containers, providers
 from corelib.logging import create_console_logger
-from corelib.caching import CacheStore
-from corelib.threading import TaskRunner
+from corelib.caching import CacheStore, ResponseCache
+from corelib.events import EventBus
+from corelib.metrics import MetricsRegistry
+from corelib.threading import TaskRunner, PeriodicScheduler
 
 
 class DICore(containers.DeclarativeContainer):
 
     config = providers.Configuration()
-    logger = providers.Object(create_console_logger('default'))
+    logger = providers.Singleton(create_console_logger, 'default')
     shared_cache = providers.Singleton(
         CacheStore,
         identifier=providers.Object('shared_cache'),
         logger=providers.Object(None)
     )
+    shared_response_cache = providers.Singleton(
+        ResponseCache,
+        identifier=providers.Object('shared_response_cache'),
+        max_entries=config.response_cache.max_entries,
+        max_bytes=config.response_cache.max_bytes,
+    )
+    shared_event_bus = providers.Singleton(
+        EventBus,
+        identifier=providers.Object('shared_event_bus'),
+        history_size=config.events.history_size,
+        max_subscribers=config.events.max_subscribers,
+        max_queue_size=config.events.max_queue_size,
+    )
+    shared_metrics_registry = providers.Singleton(
+        MetricsRegistry,
+        identifier=providers.Object('shared_metrics_registry'),
+    )
     shared_task_runner = providers.Singleton(
         TaskRunner,
-        providers.Object('shared_task_runner'))
+        providers.Object('shared_task_runner'),
+        executors=config.task_runner.executors)
     task_runner = providers.Factory(TaskRunner)
+    shared_scheduler = providers.Singleton(
+        PeriodicScheduler,
+        providers.Object('shared_scheduler'),
+        task_runner=shared_task_runner)
@@ -1,6 +1,8 @@
 from dependency_injector import containers, providers
 from controlm.services.ctm_repository import CtmRepository
+from controlm.services.ctm_async_repository import AsyncCtmRepository
 from controlm.services.ctm_cache_manager import CtmCacheManager
+from controlm.services.ctm_metrics import CtmMetrics
 from .di_core import DICore
 
 
@@ -13,14 +15,36 @@ class DIData(containers.DeclarativeContainer):
     )
     logger = core_container.logger
     shared_cache = core_container.shared_cache
+    shared_response_cache = core_container.shared_response_cache
+    shared_event_bus = core_container.shared_event_bus
+    shared_metrics_registry = core_container.shared_metrics_registry
     shared_task_runner = core_container.shared_task_runner
+    shared_scheduler = core_container.shared_scheduler
     shared_cache_manager = providers.Singleton(
         CtmCacheManager,
         identifier=providers.Object("shared_cache_manager"),
         cache=shared_cache,
         task_runner=shared_task_runner,
+        xml_path=config.cache_manager.xml_path,
+        csv_path=config.cache_manager.csv_path,
+        sources_executor=config.cache_manager.sources_executor,
+        populate_timeout=config.cache_manager.populate_timeout,
+        event_bus=shared_event_bus,
+        change_feed_generations=config.cache_manager.change_feed_generations,
     )
     ctm_repository = providers.Factory(
         CtmRepository,
         cache_manager=shared_cache_manager,
     )
+    async_ctm_repository = providers.Factory(
+        AsyncCtmRepository,
+        repository=ctm_repository,
+        task_runner=shared_task_runner,
+    )
+    shared_metrics = providers.Singleton(
+        CtmMetrics,
+        registry=shared_metrics_registry,
+        cache_manager=shared_cache_manager,
+        task_runner=shared_task_runner,
+        response_cache=shared_response_cache,
+    )
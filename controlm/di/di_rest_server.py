@@ -1,4 +1,6 @@
 from dependency_injector import containers, providers
+from corelib.compression import ResponseCompressor
+from corelib.threading import AdmissionController, TokenBucket
 from .di_data import DIData
 
 
@@ -10,6 +12,30 @@ class DIRestServer(containers.DeclarativeContainer):
     )
     logger = data_container.logger
     shared_cache = data_container.shared_cache
+    shared_response_cache = data_container.shared_response_cache
+    shared_event_bus = data_container.shared_event_bus
+    shared_metrics_registry = data_container.shared_metrics_registry
+    shared_metrics = data_container.shared_metrics
     shared_task_runner = data_container.shared_task_runner
+    shared_scheduler = data_container.shared_scheduler
     shared_cache_manager = data_container.shared_cache_manager
     ctm_repository = data_container.ctm_repository
+    async_ctm_repository = data_container.async_ctm_repository
+    response_compressor = providers.Singleton(
+        ResponseCompressor,
+        identifier=providers.Object('response_compressor'),
+        min_size=config.data.compression.min_size,
+        level=config.data.compression.level,
+        encodings=config.data.compression.encodings,
+    )
+    admission_controller = providers.Singleton(
+        AdmissionController,
+        identifier=providers.Object('admission_controller'),
+        routes=config.data.admission.routes,
+    )
+    refresh_rate_limiter = providers.Singleton(
+        TokenBucket,
+        identifier=providers.Object('refresh_rate_limiter'),
+        capacity=config.data.admission.refresh.capacity,
+        refill_interval=config.data.admission.refresh.refill_interval,
+    )
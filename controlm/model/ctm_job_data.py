@@ -48,6 +48,7 @@ class CtmJobData (CtmDefTableItem):
         self.feb: Optional[str] = None
         self.mar: Optional[str] = None
         self.apr: Optional[str] = None
+        self.may: Optional[str] = None
         self.jun: Optional[str] = None
         self.jul: Optional[str] = None
         self.aug: Optional[str] = None
@@ -120,3 +121,4 @@ class CtmJobData (CtmDefTableItem):
         self.t_pg_ms: Optional[str] = None
         self.t_procs: Optional[str] = None
         self.variables: List[CtmVarData] = []
+        self.rule_based_calendars: List[str] = []
@@ -0,0 +1,35 @@
+import math
+from typing import Final
+from dependency_injector.wiring import Provide, inject
+from flask import Response
+from controlm.di.di_rest_server import DIRestServer
+from controlm.rest_server.json_serialization import json_response
+from corelib.threading import AdmissionController, ConcurrencyLimiter, TokenBucket
+
+OVERLOADED_MESSAGE: Final = 'Too many concurrent requests for this resource. Retry later.'
+REFRESH_RATE_LIMITED_MESSAGE: Final = 'Cache refreshes are rate limited. Retry later.'
+
+
+def retry_after(seconds: float) -> str:
+    """
+    :return: The value of a Retry-After header: whole seconds, at least 1.
+    """
+    return str(max(1, math.ceil(seconds)))
+
+
+@inject
+def admission_controller(
+        controller: AdmissionController = Provide[DIRestServer.admission_controller]) -> AdmissionController:
+    return controller
+
+
+def overloaded_response(limiter: ConcurrencyLimiter) -> Response:
+    response = json_response({'status': 503, 'message': OVERLOADED_MESSAGE}, 503)
+    response.headers['Retry-After'] = retry_after(limiter.wait_timeout)
+    return response
+
+
+def rate_limited_response(rate_limiter: TokenBucket) -> Response:
+    response = json_response({'status': 429, 'message': REFRESH_RATE_LIMITED_MESSAGE}, 429)
+    response.headers['Retry-After'] = retry_after(rate_limiter.retry_after)
+    return response
@@ -4,3 +4,10 @@ from .tasks import tasks_blueprint
 from .servers import servers_blueprint
 from .folders import folders_blueprint
 from .hosts import hosts_blueprint
+from .batch import batch_blueprint
+from .metrics import metrics_blueprint
+from .stats import stats_blueprint
+from .calendar import calendar_blueprint
+from .forecast import forecast_blueprint
+from .changes import changes_blueprint
+from .variables import variables_blueprint
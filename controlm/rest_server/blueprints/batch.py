@@ -0,0 +1,16 @@
+from dependency_injector.wiring import Provide, inject
+from flask import Blueprint, request
+from controlm.rest_server.route_handlers import BATCH, view_response
+from controlm.services import CtmRepository
+from controlm.di.di_rest_server import DIRestServer
+
+batch_blueprint = Blueprint('batch', __name__, template_folder='templates')
+
+
+@batch_blueprint.route(BATCH.rule, methods=['POST'])
+@inject
+def resolve_batch(repository: CtmRepository = Provide[DIRestServer.ctm_repository]):
+    """
+    Resolves folder, node, host and server stats lookups in one request; see CtmRepository.fetch_batch.
+    """
+    return view_response(BATCH, repository, document=request.get_json(silent=True))
@@ -1,6 +1,13 @@
 from dependency_injector.wiring import Provide, inject
-from flask import Blueprint, jsonify
+from flask import Blueprint, current_app, request
+from controlm.rest_server.admission import rate_limited_response
+from controlm.rest_server.json_serialization import json_response
+from controlm.rest_server.prefork_server import request_master_reload
+from controlm.rest_server.route_handlers import cache_state_document
+from controlm.rest_server.server_sent_events import SSE_MIMETYPE, event_stream, parse_last_event_id
 from corelib.caching import CacheStore
+from corelib.events import EventBus
+from corelib.threading import TokenBucket
 from controlm.di.di_rest_server import DIRestServer
 from controlm.services import CtmCacheManager
 
@@ -11,25 +18,50 @@ cache_blueprint = Blueprint('cache', __name__, template_folder='templates')
 @inject
 def get_shared_cache_keys(cache: CacheStore = Provide[DIRestServer.shared_cache]):
     keys = cache.cache_keys
-    return jsonify(keys)
+    return json_response(keys)
 
 
 @cache_blueprint.route('/cache/state', methods=['GET'])
 @inject
 def get_shared_cache_state(cache_manager: CtmCacheManager = Provide[DIRestServer.shared_cache_manager]):
-    return jsonify({
-        'state': cache_manager.cache_state,
-        'error': cache_manager.cache_error,
-        'ready': cache_manager.is_cache_ready,
-        'timestamp': cache_manager.cache_timestamp,
-        'parsingInterval': cache_manager.cache_populate_duration,
-    })
+    return json_response(cache_state_document(cache_manager))
 
 
-@cache_blueprint.route('/cache/populate', methods=['GET', 'POST', 'PUT'])
+@cache_blueprint.route('/cache/populate', methods=['POST', 'PUT'])
 @inject
-def schedule_populate_cache(cache_manager: CtmCacheManager = Provide[DIRestServer.shared_cache_manager]):
+def schedule_populate_cache(cache_manager: CtmCacheManager = Provide[DIRestServer.shared_cache_manager],
+                            rate_limiter: TokenBucket = Provide[DIRestServer.refresh_rate_limiter]):
+    """
+    Triggers a cache refresh. Triggers are rate limited, so that bursts of them do not queue refreshes back to back.
+    Under the pre-fork server, the master reloads all workers instead, so that they keep serving one generation.
+    """
+    if not rate_limiter.try_acquire():
+        return rate_limited_response(rate_limiter)
+    if request_master_reload():
+        return json_response({
+            'task_started': True
+        })
     future = cache_manager.schedule_populate_cache()
-    return jsonify({
+    return json_response({
         'task_started': True if future else False
     })
+
+
+@cache_blueprint.route('/cache/events', methods=['GET'])
+@inject
+def get_cache_events(cache_manager: CtmCacheManager = Provide[DIRestServer.shared_cache_manager],
+                     event_bus: EventBus = Provide[DIRestServer.shared_event_bus]):
+    """
+    Server-Sent Events stream of cache refreshes: a 'cache.state' snapshot first, then the CtmCacheManagerEvents
+    as they are published. Each stream holds a server thread, so the event bus' max_subscribers bounds them.
+    """
+    subscription = event_bus.subscribe(parse_last_event_id(request.headers.get('Last-Event-ID')))
+    if subscription is None:
+        return json_response({
+            'status': 503,
+            'message': 'Too many event stream subscribers.'
+        }), 503
+    return current_app.response_class(event_stream(subscription, cache_manager), mimetype=SSE_MIMETYPE, headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no',
+    })
@@ -0,0 +1,22 @@
+from dependency_injector.wiring import Provide, inject
+from flask import Blueprint
+from controlm.rest_server.response_caching import cached_response
+from controlm.rest_server.route_handlers import BUSIEST_DAYS, JOBS_SCHEDULED_ON, view_response
+from controlm.services import CtmRepository
+from controlm.di.di_rest_server import DIRestServer
+
+calendar_blueprint = Blueprint('calendar', __name__, template_folder='templates')
+
+
+@calendar_blueprint.route(JOBS_SCHEDULED_ON.rule, methods=['GET'])
+@cached_response(streamable=True)
+@inject
+def jobs_scheduled_on(day: str, repository: CtmRepository = Provide[DIRestServer.ctm_repository]):
+    return view_response(JOBS_SCHEDULED_ON, repository, day=day)
+
+
+@calendar_blueprint.route(BUSIEST_DAYS.rule, methods=['GET'])
+@cached_response
+@inject
+def busiest_days(year: int, repository: CtmRepository = Provide[DIRestServer.ctm_repository]):
+    return view_response(BUSIEST_DAYS, repository, year=year)
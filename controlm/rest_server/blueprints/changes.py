@@ -0,0 +1,15 @@
+from dependency_injector.wiring import Provide, inject
+from flask import Blueprint
+from controlm.rest_server.response_caching import cached_response
+from controlm.rest_server.route_handlers import CHANGES_SINCE, view_response
+from controlm.services import CtmRepository
+from controlm.di.di_rest_server import DIRestServer
+
+changes_blueprint = Blueprint('changes', __name__, template_folder='templates')
+
+
+@changes_blueprint.route(CHANGES_SINCE.rule, methods=['GET'])
+@cached_response
+@inject
+def changes_since(repository: CtmRepository = Provide[DIRestServer.ctm_repository]):
+    return view_response(CHANGES_SINCE, repository)
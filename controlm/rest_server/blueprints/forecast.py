@@ -0,0 +1,22 @@
+from dependency_injector.wiring import Provide, inject
+from flask import Blueprint
+from controlm.rest_server.response_caching import cached_response
+from controlm.rest_server.route_handlers import LOAD_HEATMAP, LOAD_PEAKS, view_response
+from controlm.services import CtmRepository
+from controlm.di.di_rest_server import DIRestServer
+
+forecast_blueprint = Blueprint('forecast', __name__, template_folder='templates')
+
+
+@forecast_blueprint.route(LOAD_HEATMAP.rule, methods=['GET'])
+@cached_response
+@inject
+def load_heatmap(repository: CtmRepository = Provide[DIRestServer.ctm_repository]):
+    return view_response(LOAD_HEATMAP, repository)
+
+
+@forecast_blueprint.route(LOAD_PEAKS.rule, methods=['GET'])
+@cached_response
+@inject
+def load_peaks(repository: CtmRepository = Provide[DIRestServer.ctm_repository]):
+    return view_response(LOAD_PEAKS, repository)
@@ -1,5 +1,9 @@
-from flask import Blueprint, jsonify, current_app
-from ..ctm_rest_server_meta import CTM_REST_SERVER_META
+from dependency_injector.wiring import Provide, inject
+from flask import Blueprint, current_app
+from controlm.di.di_rest_server import DIRestServer
+from controlm.rest_server.json_serialization import json_response
+from controlm.rest_server.route_handlers import index_document, readiness
+from controlm.services import CtmCacheManager
 
 
 meta_endpoint = Blueprint('meta', __name__)
@@ -7,18 +11,30 @@ meta_endpoint = Blueprint('meta', __name__)
 
 @meta_endpoint.route('/', methods=['GET'])
 def index():
-    return jsonify({
-        'maintainer': 'atanas.dragolov@saorsa.bg',
-        'description': 'Control-M Toolkit API Server',
-        'version': CTM_REST_SERVER_META['version'],
-        'discovery_endpoint': '/discover'
-    })
+    return json_response(index_document())
 
 
 @meta_endpoint.route('/discover', methods=['GET'])
 def discover():
     result_routes = [{'methods': p.methods, 'rule': p.rule,
                       'args': p.arguments, 'defaults': p.defaults} for p in current_app.url_map.iter_rules()]
-    return jsonify({
+    return json_response({
         'routes': result_routes
     })
+
+
+@meta_endpoint.route('/healthz', methods=['GET'])
+def healthz():
+    """
+    Liveness probe: the process serves requests.
+    """
+    return json_response({'status': 'ok'})
+
+
+@meta_endpoint.route('/readyz', methods=['GET'])
+@inject
+def readyz(cache_manager: CtmCacheManager = Provide[DIRestServer.shared_cache_manager]):
+    """
+    Readiness probe; see route_handlers.readiness.
+    """
+    return json_response(*readiness(cache_manager))
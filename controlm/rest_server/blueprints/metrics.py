@@ -0,0 +1,13 @@
+from dependency_injector.wiring import Provide, inject
+from flask import Blueprint, current_app
+from corelib.metrics import PROMETHEUS_CONTENT_TYPE
+from controlm.di.di_rest_server import DIRestServer
+from controlm.services import CtmMetrics
+
+metrics_blueprint = Blueprint('metrics', __name__, template_folder='templates')
+
+
+@metrics_blueprint.route('/metrics', methods=['GET'])
+@inject
+def get_metrics(metrics: CtmMetrics = Provide[DIRestServer.shared_metrics]):
+    return current_app.response_class(metrics.registry.render(), content_type=PROMETHEUS_CONTENT_TYPE)
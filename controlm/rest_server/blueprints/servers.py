@@ -1,100 +1,62 @@
 from dependency_injector.wiring import Provide, inject
-from flask import Blueprint, jsonify
+from flask import Blueprint
 from controlm.services import CtmRepository
 from controlm.di.di_rest_server import DIRestServer
+from controlm.rest_server.response_caching import cached_response
+from controlm.rest_server.route_handlers import ACTIVE_FOLDERS, ALL_FOLDERS, DISABLED_FOLDERS, SERVER_INFO_STATS, \
+    SERVER_NAMES, SERVERS_INFO, SERVERS_INFO_RAW, view_response
 
 servers_blueprint = Blueprint('servers', __name__, template_folder='templates')
 
 
-@servers_blueprint.route('/server-names', methods=['GET'])
+@servers_blueprint.route(SERVER_NAMES.rule, methods=['GET'])
+@cached_response
 @inject
 def server_names(repository: CtmRepository = Provide[DIRestServer.ctm_repository]):
-    servers = repository.fetch_server_names()
-    return jsonify(servers)
+    return view_response(SERVER_NAMES, repository)
 
 
-@servers_blueprint.route('/servers', methods=['GET'])
+@servers_blueprint.route(SERVERS_INFO.rule, methods=['GET'])
+@cached_response(streamable=True)
 @inject
 def servers_info(repository: CtmRepository = Provide[DIRestServer.ctm_repository]):
-    servers = repository.fetch_server_aggregate_stats()
-    return jsonify(servers)
+    return view_response(SERVERS_INFO, repository)
 
 
-@servers_blueprint.route('/servers-raw', methods=['GET'])
+@servers_blueprint.route(SERVERS_INFO_RAW.rule, methods=['GET'])
+@cached_response(streamable=True)
 @inject
 def servers_info_raw(repository: CtmRepository = Provide[DIRestServer.ctm_repository]):
-    servers = repository.cache_manager.cache.get_item('controlm.services.ctm_cache_manager.cache.controlm.folders.all')
-    return jsonify(servers)
+    return view_response(SERVERS_INFO_RAW, repository)
 
 
-@servers_blueprint.route('/servers/<server>/stats', methods=['GET'])
+@servers_blueprint.route(SERVER_INFO_STATS.rule, methods=['GET'])
+@cached_response
 @inject
 def server_info_stats(server: str,
                       repository: CtmRepository = Provide[DIRestServer.ctm_repository]):
-    try:
-        server_info = repository.fetch_server_info_or_die(server)
-        return jsonify({
-            'applicationsCount': len(server_info.application_keys),
-            'subApplicationsCount': len(server_info.application_keys),
-            'hostsCount': len(server_info.node_infos),
-            'foldersCount': len(server_info.folders)
-        })
-    except NameError:
-        jsonify({
-            'status': 404,
-            'message': f"Server '{server}' not found."
-        }), 404
+    return view_response(SERVER_INFO_STATS, repository, server=server)
 
 
-@servers_blueprint.route('/servers/<server>/folders/all', methods=['GET'])
+@servers_blueprint.route(ALL_FOLDERS.rule, methods=['GET'])
+@cached_response(streamable=True)
 @inject
 def filter_all_folders(server: str,
                        repository: CtmRepository = Provide[DIRestServer.ctm_repository]):
-    try:
-        folder_infos = repository.fetch_folders(
-            server,
-            folder_order_methods=[],
-            folder_node_ids=[]
-        )
-        return jsonify(folder_infos)
-    except NameError:
-        jsonify({
-            'status': 404,
-            'message': f"Server '{server}' not found."
-        }), 404
+    return view_response(ALL_FOLDERS, repository, server=server)
 
 
-@servers_blueprint.route('/servers/<server>/folders/active', methods=['GET'])
+@servers_blueprint.route(ACTIVE_FOLDERS.rule, methods=['GET'])
+@cached_response(streamable=True)
 @inject
 def filter_active_folders(server: str,
                           repository: CtmRepository = Provide[DIRestServer.ctm_repository]):
-    try:
-        folder_infos = repository.fetch_folders(
-            server,
-            folder_order_methods=['SYSTEM'],
-            folder_node_ids=[]
-        )
-        return jsonify(folder_infos)
-    except NameError:
-        jsonify({
-            'status': 404,
-            'message': f"Server '{server}' not found."
-        }), 404
+    return view_response(ACTIVE_FOLDERS, repository, server=server)
 
 
-@servers_blueprint.route('/servers/<server>/folders/disabled', methods=['GET'])
+@servers_blueprint.route(DISABLED_FOLDERS.rule, methods=['GET'])
+@cached_response(streamable=True)
 @inject
 def filter_disabled_folders(server: str,
                             repository: CtmRepository = Provide[DIRestServer.ctm_repository]):
-    try:
-        folder_infos = repository.fetch_folders(
-            server,
-            folder_order_methods=[None],
-            folder_node_ids=[]
-        )
-        return jsonify(folder_infos)
-    except NameError:
-        jsonify({
-            'status': 404,
-            'message': f"Server '{server}' not found."
-        }), 404
+    return view_response(DISABLED_FOLDERS, repository, server=server)
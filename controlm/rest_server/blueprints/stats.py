@@ -0,0 +1,15 @@
+from dependency_injector.wiring import Provide, inject
+from flask import Blueprint
+from controlm.rest_server.response_caching import cached_response
+from controlm.rest_server.route_handlers import STATS_CUBE, view_response
+from controlm.services import CtmRepository
+from controlm.di.di_rest_server import DIRestServer
+
+stats_blueprint = Blueprint('stats', __name__, template_folder='templates')
+
+
+@stats_blueprint.route(STATS_CUBE.rule, methods=['GET'])
+@cached_response
+@inject
+def stats_cube(repository: CtmRepository = Provide[DIRestServer.ctm_repository]):
+    return view_response(STATS_CUBE, repository)
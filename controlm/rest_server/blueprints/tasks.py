@@ -1,6 +1,7 @@
 from dependency_injector.wiring import Provide, inject
-from flask import Blueprint, jsonify
-from corelib.threading import TaskRunner
+from flask import Blueprint
+from controlm.rest_server.json_serialization import json_response
+from corelib.threading import TaskRunner, PeriodicScheduler
 from controlm.di.di_rest_server import DIRestServer
 
 
@@ -10,4 +11,16 @@ tasks_blueprint = Blueprint('task_runner', __name__, template_folder='templates'
 @tasks_blueprint.route('/tasks', methods=['GET'])
 @inject
 def get_shared_cache_keys(task_runner: TaskRunner = Provide[DIRestServer.shared_task_runner]):
-    return jsonify(task_runner.tasks_meta_data)
+    return json_response({key: task_meta.to_dict() for key, task_meta in task_runner.tasks_meta_data.items()})
+
+
+@tasks_blueprint.route('/tasks/metrics', methods=['GET'])
+@inject
+def get_task_metrics(task_runner: TaskRunner = Provide[DIRestServer.shared_task_runner]):
+    return json_response(task_runner.metrics)
+
+
+@tasks_blueprint.route('/tasks/schedules', methods=['GET'])
+@inject
+def get_scheduled_jobs(scheduler: PeriodicScheduler = Provide[DIRestServer.shared_scheduler]):
+    return json_response([job.to_dict() for job in scheduler.jobs])
@@ -0,0 +1,40 @@
+from dependency_injector.wiring import Provide, inject
+from flask import Blueprint
+from controlm.rest_server.response_caching import cached_response
+from controlm.rest_server.route_handlers import VARIABLE_DEFINITIONS, VARIABLE_INFO, VARIABLE_NAMES, \
+    VARIABLE_REFERENCES, view_response
+from controlm.services import CtmRepository
+from controlm.di.di_rest_server import DIRestServer
+
+variables_blueprint = Blueprint('variables', __name__, template_folder='templates')
+
+
+@variables_blueprint.route(VARIABLE_NAMES.rule, methods=['GET'])
+@cached_response
+@inject
+def variable_names(repository: CtmRepository = Provide[DIRestServer.ctm_repository]):
+    return view_response(VARIABLE_NAMES, repository)
+
+
+@variables_blueprint.route(VARIABLE_INFO.rule, methods=['GET'])
+@cached_response
+@inject
+def variable_info(name: str,
+                  repository: CtmRepository = Provide[DIRestServer.ctm_repository]):
+    return view_response(VARIABLE_INFO, repository, name=name)
+
+
+@variables_blueprint.route(VARIABLE_DEFINITIONS.rule, methods=['GET'])
+@cached_response
+@inject
+def variable_definitions(name: str,
+                         repository: CtmRepository = Provide[DIRestServer.ctm_repository]):
+    return view_response(VARIABLE_DEFINITIONS, repository, name=name)
+
+
+@variables_blueprint.route(VARIABLE_REFERENCES.rule, methods=['GET'])
+@cached_response
+@inject
+def variable_references(name: str,
+                        repository: CtmRepository = Provide[DIRestServer.ctm_repository]):
+    return view_response(VARIABLE_REFERENCES, repository, name=name)
@@ -0,0 +1,32 @@
+from dependency_injector.wiring import Provide, inject
+from flask import Response, request
+from corelib.compression import ResponseCompressor
+from controlm.di.di_rest_server import DIRestServer
+
+
+@inject
+def response_compressor(
+        compressor: ResponseCompressor = Provide[DIRestServer.response_compressor]
+) -> ResponseCompressor:
+    return compressor
+
+
+def compress_response(response: Response) -> Response:
+    """
+    ``after_request`` hook compressing bodies of at least the compressor's minimum size with the coding negotiated
+    from Accept-Encoding. Responses that are streamed, already encoded - such as the precompressed bodies of
+    ``cached_response`` - or not 200 are left alone.
+    """
+    if response.status_code != 200 or response.is_streamed or response.direct_passthrough \
+            or 'Content-Encoding' in response.headers:
+        return response
+    compressor = response_compressor()
+    body = response.get_data()
+    if not compressor.should_compress(len(body)):
+        return response
+    response.vary.add('Accept-Encoding')
+    encoding = compressor.negotiate(request.accept_encodings)
+    if encoding:
+        response.set_data(compressor.compress(body, encoding))
+        response.headers['Content-Encoding'] = encoding
+    return response
@@ -0,0 +1,536 @@
+import asyncio
+import json
+import os.path
+from abc import ABC
+from logging import Logger
+from time import perf_counter
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Iterable, List, Optional, Set, Tuple
+from urllib.parse import parse_qs
+from werkzeug.exceptions import HTTPException, NotFound, MethodNotAllowed
+from werkzeug.datastructures import Accept, MIMEAccept
+from werkzeug.http import parse_accept_header, parse_etags, quote_etag
+from werkzeug.routing import Map, Rule
+from controlm.di import DIRestServer
+from controlm.rest_server.admission import OVERLOADED_MESSAGE, REFRESH_RATE_LIMITED_MESSAGE, retry_after
+from controlm.rest_server.json_serialization import CTM_JSON_SERIALIZER
+from controlm.rest_server.request_metrics import UNMATCHED_ROUTE
+from controlm.rest_server.response_caching import generation_etag
+from controlm.rest_server.route_handlers import REPOSITORY_ROUTES, RepositoryRoute, cache_state_document, \
+    index_document, readiness
+from controlm.rest_server.server_sent_events import SSE_HEARTBEAT, SSE_HEARTBEAT_INTERVAL, SSE_MIMETYPE, \
+    encode_bus_event, parse_last_event_id, stream_preamble
+from controlm.rest_server.streaming import NDJSON_MIMETYPE, NDJSON_REPRESENTATION, NEXT_CURSOR_HEADER, \
+    accepts_ndjson, ndjson_chunks
+from controlm.services import AsyncCtmRepository, CtmCacheManager, CtmMetrics
+from corelib.caching import CacheStore, ResponseCache
+from corelib.compression import ResponseCompressor
+from corelib.events import Event, EventBus
+from corelib.logging import create_console_logger
+from corelib.metrics import PROMETHEUS_CONTENT_TYPE
+from corelib.querying import Page
+from corelib.threading import AdmissionController, ConcurrencyLimiter, PeriodicScheduler, TaskRunner, TokenBucket
+
+
+class AsgiResponse (ABC):
+
+    def __init__(self,
+                 payload: Any = None,
+                 status: int = 200,
+                 encode_in_executor: bool = False,
+                 body: bytes = None,
+                 headers: List[Tuple[bytes, bytes]] = None,
+                 items: Iterable[Any] = None,
+                 depth: int = 0,
+                 events: Callable[[dict, Callable], AsyncIterator[bytes]] = None,
+                 content_type: str = 'application/json',
+                 on_close: Callable[[], None] = None):
+        self.payload: Any = payload
+        self.status: int = status
+        self.encode_in_executor: bool = encode_in_executor
+        self.body: Optional[bytes] = body
+        self.headers: List[Tuple[bytes, bytes]] = headers or []
+        self.items: Optional[Iterable[Any]] = items
+        self.depth: int = depth
+        self.streaming: bool = False
+        self.events: Optional[Callable[[dict, Callable], AsyncIterator[bytes]]] = events
+        self.content_type: str = content_type
+        self.on_close: Optional[Callable[[], None]] = on_close
+
+
+def _header(scope: dict, name: bytes) -> Optional[str]:
+    return next((v.decode('latin-1') for k, v in scope.get('headers', []) if k.lower() == name), None)
+
+
+def _not_found(message: str) -> AsgiResponse:
+    return AsgiResponse({'status': 404, 'message': message}, status=404)
+
+
+async def _read_body(receive: Callable) -> bytes:
+    chunks = []
+    while True:
+        message = await receive()
+        chunks.append(message.get('body', b''))
+        if not message.get('more_body', False):
+            return b''.join(chunks)
+
+
+async def _wait_for_disconnect(receive: Callable) -> None:
+    while (await receive())['type'] != 'http.disconnect':
+        pass
+
+
+def _overloaded(limiter: ConcurrencyLimiter) -> AsgiResponse:
+    return AsgiResponse({'status': 503, 'message': OVERLOADED_MESSAGE}, status=503,
+                        headers=[(b'retry-after', retry_after(limiter.wait_timeout).encode('latin-1'))])
+
+
+def _json_document(body: bytes) -> Any:
+    """
+    Like Flask's ``request.get_json(silent=True)``: None when the body is empty or not JSON.
+    """
+    try:
+        return json.loads(body) if body else None
+    except ValueError:
+        return None
+
+
+class CtmAsgiServer (ABC):
+    """
+    ASGI variant of CtmRestServer, serving the same routes and JSON documents with async handlers. The repository
+    routes are the blueprints' RepositoryRoutes, awaiting AsyncCtmRepository, which runs folder and host scans in
+    TaskRunner executors, and large documents are encoded in an executor as well, so slow requests do not hold up
+    the event loop. WebSocket connections are closed, as no route serves them.
+
+    The instance is the ASGI application: ``uvicorn controlm.rest_server.ctm_asgi_server:app``. The lifespan startup
+    event populates the cache and starts the periodic scheduler.
+    """
+
+    def __init__(self, config_path: str = './config.yml', logger: Logger = None):
+        self.di: DIRestServer = DIRestServer()
+        if config_path and os.path.exists(config_path):
+            self.di.config.data.from_yaml(config_path)
+        self._logger: Logger = logger or create_console_logger(__name__)
+        self._repository: AsyncCtmRepository = self.di.async_ctm_repository()
+        self._cache_manager: CtmCacheManager = self.di.shared_cache_manager()
+        self._cache: CacheStore = self.di.shared_cache()
+        self._response_cache: ResponseCache = self.di.shared_response_cache()
+        self._compressor: ResponseCompressor = self.di.response_compressor()
+        self._event_bus: EventBus = self.di.shared_event_bus()
+        self._metrics: CtmMetrics = self.di.shared_metrics()
+        self._task_runner: TaskRunner = self.di.shared_task_runner()
+        self._scheduler: PeriodicScheduler = self.di.shared_scheduler()
+        self._admission: AdmissionController = self.di.admission_controller()
+        self._refresh_rate_limiter: TokenBucket = self.di.refresh_rate_limiter()
+        self._handlers: Dict[str, Callable[..., Awaitable[AsgiResponse]]] = {}
+        self._cached_endpoints: Set[str] = set()
+        self._streamable_endpoints: Set[str] = set()
+        self._url_map: Map = Map(strict_slashes=False)
+        self._register_routes()
+
+    @property
+    def logger(self) -> Logger:
+        return self._logger
+
+    @property
+    def repository(self) -> AsyncCtmRepository:
+        return self._repository
+
+    @property
+    def url_map(self) -> Map:
+        return self._url_map
+
+    def route(self,
+              rule: str,
+              handler: Callable[..., Awaitable[AsgiResponse]],
+              methods=('GET',),
+              cached: bool = False,
+              streamable: bool = False,
+              endpoint: str = None) -> None:
+        """
+        :param cached: Cache the rendered body per cache generation, like the ``cached_response`` view decorator.
+        :param streamable: Stream the response items as NDJSON when the client accepts it, like views returning
+        ``collection_response``.
+        :param endpoint: By default, the handler's name.
+        """
+        endpoint = endpoint or handler.__name__
+        self._handlers[endpoint] = handler
+        if cached:
+            self._cached_endpoints.add(endpoint)
+        if streamable:
+            self._streamable_endpoints.add(endpoint)
+        self._url_map.add(Rule(rule, endpoint=endpoint, methods=list(methods)))
+
+    async def __call__(self, scope: dict, receive: Callable, send: Callable) -> None:
+        if scope['type'] == 'lifespan':
+            await self._lifespan(receive, send)
+        elif scope['type'] == 'http':
+            await self._http(scope, receive, send)
+        elif scope['type'] == 'websocket':
+            await self._close_websocket(receive, send)
+        # Other scope types are ignored.
+
+    def run(self, host: str = '127.0.0.1', port: int = 5001, **kwargs) -> None:
+        """
+        Serves the application with uvicorn, which is an optional dependency.
+        """
+        try:
+            import uvicorn
+        except ImportError as ex:
+            raise ImportError('Serving the ASGI application requires uvicorn: pip install uvicorn') from ex
+        uvicorn.run(self, host=host, port=port, **kwargs)
+
+    def startup(self) -> None:
+        self._cache_manager.schedule_populate_cache()
+        refresh_config = self.di.config.data.cache_manager.refresh()
+        if refresh_config:
+            self._scheduler.register_job(self._cache_manager.create_refresh_job(**refresh_config))
+        self._scheduler.start()
+
+    def shutdown(self) -> None:
+        self._scheduler.stop()
+        self._task_runner.shutdown(wait=False)
+
+    async def _lifespan(self, receive: Callable, send: Callable) -> None:
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                try:
+                    self.startup()
+                except BaseException as ex:
+                    await send({'type': 'lifespan.startup.failed', 'message': str(ex)})
+                    return
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                self.shutdown()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    @staticmethod
+    async def _close_websocket(receive: Callable, send: Callable) -> None:
+        """
+        Rejects the WebSocket handshake: closing before accepting the connection answers it with a 403.
+        """
+        if (await receive())['type'] == 'websocket.connect':
+            await send({'type': 'websocket.close', 'code': 1000})
+
+    async def _http(self, scope: dict, receive: Callable, send: Callable) -> None:
+        method = scope['method']
+        start = perf_counter()
+        route = UNMATCHED_ROUTE
+        encoding = None
+        try:
+            rule, path_args = self._url_map.bind('localhost').match(scope['path'], method=method, return_rule=True)
+            route = rule.rule
+            query = parse_qs(scope.get('query_string', b'').decode('latin-1'), keep_blank_values=True)
+            if method in ('POST', 'PUT'):
+                path_args['body'] = await _read_body(receive)
+            streaming = rule.endpoint in self._streamable_endpoints and accepts_ndjson(
+                parse_accept_header(_header(scope, b'accept'), MIMEAccept))
+            encoding = None if streaming else self._compressor.negotiate(
+                parse_accept_header(_header(scope, b'accept-encoding'), Accept))
+            if rule.endpoint in self._cached_endpoints:
+                response = await self._cached(scope, rule, path_args, query, streaming, encoding)
+            else:
+                response = await self._handlers[rule.endpoint](query=query, **path_args)
+            if streaming and response.status == 200 and response.body is None:
+                response.streaming = True
+        except NotFound:
+            response = _not_found(f"Route '{scope['path']}' not found.")
+        except MethodNotAllowed:
+            response = AsgiResponse({'status': 405, 'message': f"Method '{method}' not allowed."}, status=405)
+        except HTTPException as ex:
+            response = AsgiResponse({'status': ex.code, 'message': ex.description}, status=ex.code)
+        except BaseException as ex:
+            self.logger.error(f"Request {method} {scope['path']} failed: {ex}")
+            response = AsgiResponse({'status': 500, 'message': 'Internal server error.'}, status=500)
+        if response.streaming or response.events is not None:
+            self._metrics.observe_request(method, route, response.status, perf_counter() - start, None)
+            try:
+                if response.streaming:
+                    await self._stream(response, method, send)
+                else:
+                    await self._send_events(response, method, scope, receive, send)
+            finally:
+                if response.on_close is not None:
+                    response.on_close()
+            return
+        body = await self._render(response)
+        if response.status == 200 and response.body is None and self._compressor.should_compress(len(body)):
+            response.headers.append((b'vary', b'Accept-Encoding'))
+            if encoding:
+                body = await self._compress(body, encoding, in_executor=response.encode_in_executor)
+                response.headers.append((b'content-encoding', encoding.encode('latin-1')))
+        self._metrics.observe_request(method, route, response.status, perf_counter() - start, len(body))
+        await send({
+            'type': 'http.response.start',
+            'status': response.status,
+            'headers': [
+                (b'content-type', response.content_type.encode('latin-1')),
+                (b'content-length', str(len(body)).encode('latin-1')),
+                (b'access-control-allow-origin', b'*'),
+            ] + response.headers,
+        })
+        await send({'type': 'http.response.body', 'body': b'' if method == 'HEAD' else body})
+
+    @staticmethod
+    async def _stream(response: AsgiResponse, method: str, send: Callable) -> None:
+        """
+        Sends the response items as NDJSON chunks. Without a content length the ASGI server uses chunked transfer
+        encoding, and awaiting each send applies the client's back pressure.
+        """
+        payload = response.payload
+        next_cursor_headers = []
+        if isinstance(payload, Page):
+            if payload.next_cursor:
+                next_cursor_headers.append((NEXT_CURSOR_HEADER.lower().encode('latin-1'),
+                                            payload.next_cursor.encode('latin-1')))
+            payload = payload.items
+        items = response.items
+        if items is None:
+            items = payload.values() if isinstance(payload, dict) else payload
+        await send({
+            'type': 'http.response.start',
+            'status': response.status,
+            'headers': [
+                (b'content-type', NDJSON_MIMETYPE.encode('latin-1')),
+                (b'access-control-allow-origin', b'*'),
+            ] + response.headers + next_cursor_headers,
+        })
+        if method != 'HEAD':
+            for chunk in ndjson_chunks(items, depth=response.depth):
+                await send({'type': 'http.response.body', 'body': chunk, 'more_body': True})
+        await send({'type': 'http.response.body', 'body': b''})
+
+    @staticmethod
+    async def _send_events(response: AsgiResponse, method: str, scope: dict, receive: Callable, send: Callable) -> None:
+        await send({
+            'type': 'http.response.start',
+            'status': response.status,
+            'headers': [
+                (b'content-type', SSE_MIMETYPE.encode('latin-1')),
+                (b'cache-control', b'no-cache'),
+                (b'x-accel-buffering', b'no'),
+                (b'access-control-allow-origin', b'*'),
+            ] + response.headers,
+        })
+        if method != 'HEAD':
+            async for chunk in response.events(scope, receive):
+                await send({'type': 'http.response.body', 'body': chunk, 'more_body': True})
+        await send({'type': 'http.response.body', 'body': b''})
+
+    async def _render(self, response: AsgiResponse) -> bytes:
+        if response.body is not None:
+            return response.body
+        if response.encode_in_executor:
+            return await self._repository.run_in_executor(self.encode, response.payload)
+        return self.encode(response.payload)
+
+    async def _compress(self, body: bytes, encoding: str, in_executor: bool) -> bytes:
+        if in_executor:
+            return await self._repository.run_in_executor(self._compressor.compress, body, encoding)
+        return self._compressor.compress(body, encoding)
+
+    async def _cached(self,
+                      scope: dict,
+                      rule: Rule,
+                      path_args: dict,
+                      query: dict,
+                      streaming: bool,
+                      encoding: Optional[str]) -> AsgiResponse:
+        generation = self._cache_manager.cache_generation
+        # Like the Flask cached_response, bodies are neither cached nor validated before a generation is published.
+        published = self._cache_manager.has_cache_generation
+        etag = generation_etag(generation, NDJSON_REPRESENTATION if streaming else None, encoding)
+        etag_headers = [(b'cache-control', b'no-cache'),
+                        (b'vary', b'Accept-Encoding, Accept' if rule.endpoint in self._streamable_endpoints
+                         else b'Accept-Encoding')]
+        if published:
+            etag_headers.insert(0, (b'etag', quote_etag(etag).encode('latin-1')))
+            if_none_match = _header(scope, b'if-none-match')
+            if if_none_match is not None and parse_etags(if_none_match).contains(etag):
+                return AsgiResponse(status=304, body=b'', headers=etag_headers)
+        limiter = self._admission.limiter(rule.rule)
+        if streaming:
+            if limiter is not None and not await limiter.acquire_async():
+                return _overloaded(limiter)
+            try:
+                response = await self._handlers[rule.endpoint](query=query, **path_args)
+            except BaseException:
+                if limiter is not None:
+                    limiter.release()
+                raise
+            if limiter is not None:
+                response.on_close = limiter.release
+            if response.status == 200:
+                response.headers.extend(etag_headers)
+            return response
+        key = (rule.rule, tuple(sorted(path_args.items())),
+               tuple(sorted((name, value) for name, values in query.items() for value in values)))
+        body = self._response_cache.get(generation, key) if published else None
+        if body is None:
+            (status, body, headers), shared = await self._admission.single_flight.do_async(
+                (generation, key), lambda: self._render_handler(rule, path_args, query, limiter))
+            if status != 200:
+                return AsgiResponse(status=status, body=body, headers=list(headers))
+            if not shared and published:
+                self._response_cache.put(generation, key, body)
+        if encoding and self._compressor.should_compress(len(body)):
+            compressed = self._response_cache.get(generation, (key, encoding)) if published else None
+            if compressed is None:
+                compressed = await self._compress(body, encoding, in_executor=True)
+                if published:
+                    self._response_cache.put(generation, (key, encoding), compressed)
+            return AsgiResponse(body=compressed,
+                                headers=etag_headers + [(b'content-encoding', encoding.encode('latin-1'))])
+        return AsgiResponse(body=body, headers=etag_headers)
+
+    async def _render_handler(self,
+                              rule: Rule,
+                              path_args: dict,
+                              query: dict,
+                              limiter: Optional[ConcurrencyLimiter]) -> Tuple[int, bytes, List[Tuple[bytes, bytes]]]:
+        """
+        Like the Flask ``cached_response``'s render: runs the handler holding a slot of the route's limiter, if it has
+        one, and returns the status, body and headers shared with the coalesced requests.
+        """
+        if limiter is not None and not await limiter.acquire_async():
+            response = _overloaded(limiter)
+            return response.status, await self._render(response), response.headers
+        try:
+            response = await self._handlers[rule.endpoint](query=query, **path_args)
+            return response.status, await self._render(response), response.headers
+        finally:
+            if limiter is not None:
+                limiter.release()
+
+    @staticmethod
+    def encode(payload: Any) -> bytes:
+        """
+        Encodes the payload exactly like the Flask blueprints' json_response.
+        """
+        return CTM_JSON_SERIALIZER.dumps(payload)
+
+    def _register_routes(self) -> None:
+        self.route('/', self.index)
+        self.route('/discover', self.discover)
+        self.route('/healthz', self.healthz)
+        self.route('/readyz', self.readyz)
+        self.route('/cache/keys', self.cache_keys)
+        self.route('/cache/state', self.cache_state)
+        self.route('/cache/events', self.cache_events)
+        self.route('/cache/populate', self.cache_populate, methods=('POST', 'PUT'))
+        self.route('/metrics', self.metrics)
+        self.route('/tasks', self.tasks)
+        self.route('/tasks/schedules', self.task_schedules)
+        self.route('/tasks/metrics', self.task_metrics)
+        for route in REPOSITORY_ROUTES:
+            self.route(route.rule, self._repository_handler(route), methods=route.methods, cached=route.cached,
+                       streamable=route.streamable, endpoint=route.name)
+
+    def _repository_handler(self, route: RepositoryRoute) -> Callable[..., Awaitable[AsgiResponse]]:
+        async def handler(query: dict, body: bytes = None, **path_args) -> AsgiResponse:
+            if body is not None:
+                path_args['document'] = _json_document(body)
+            response = await route.call_async(self._repository, {name: values[0] for name, values in query.items()},
+                                              **path_args)
+            return AsgiResponse(response.payload, response.status,
+                                encode_in_executor=route.encode_in_executor and response.status == 200,
+                                items=response.items, depth=response.depth)
+        return handler
+
+    async def index(self, **kwargs) -> AsgiResponse:
+        return AsgiResponse(index_document())
+
+    async def discover(self, **kwargs) -> AsgiResponse:
+        return AsgiResponse({
+            'routes': [{'methods': r.methods, 'rule': r.rule, 'args': r.arguments, 'defaults': r.defaults}
+                       for r in self._url_map.iter_rules()]
+        })
+
+    async def healthz(self, **kwargs) -> AsgiResponse:
+        return AsgiResponse({'status': 'ok'})
+
+    async def readyz(self, **kwargs) -> AsgiResponse:
+        payload, status = readiness(self._cache_manager)
+        return AsgiResponse(payload, status=status)
+
+    async def cache_keys(self, **kwargs) -> AsgiResponse:
+        return AsgiResponse(self._cache.cache_keys)
+
+    async def cache_state(self, **kwargs) -> AsgiResponse:
+        return AsgiResponse(cache_state_document(self._cache_manager))
+
+    async def cache_populate(self, **kwargs) -> AsgiResponse:
+        if not self._refresh_rate_limiter.try_acquire():
+            return AsgiResponse({'status': 429, 'message': REFRESH_RATE_LIMITED_MESSAGE}, status=429, headers=[
+                (b'retry-after', retry_after(self._refresh_rate_limiter.retry_after).encode('latin-1'))])
+        future = self._cache_manager.schedule_populate_cache()
+        return AsgiResponse({'task_started': True if future else False})
+
+    async def cache_events(self, **kwargs) -> AsgiResponse:
+        if self._event_bus.is_full:
+            return AsgiResponse({'status': 503, 'message': 'Too many event stream subscribers.'}, status=503)
+        return AsgiResponse(events=self._event_stream)
+
+    async def _event_stream(self, scope: dict, receive: Callable) -> AsyncIterator[bytes]:
+        """
+        Like the Flask blueprint's event_stream. Events are handed from the publishing thread to the event loop,
+        and the stream ends when the client disconnects.
+        """
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue()
+
+        def enqueue(event: Event) -> None:
+            if queue.qsize() >= self._event_bus.max_queue_size:
+                queue.get_nowait()
+            queue.put_nowait(event)
+
+        def listener(event: Event) -> None:
+            loop.call_soon_threadsafe(enqueue, event)
+
+        if not self._event_bus.add_subscriber(listener, parse_last_event_id(_header(scope, b'last-event-id'))):
+            return
+        disconnected = asyncio.ensure_future(_wait_for_disconnect(receive))
+        try:
+            yield stream_preamble(self._cache_manager)
+            while True:
+                next_event = asyncio.ensure_future(queue.get())
+                done, _ = await asyncio.wait({next_event, disconnected}, timeout=SSE_HEARTBEAT_INTERVAL,
+                                             return_when=asyncio.FIRST_COMPLETED)
+                if next_event not in done:
+                    next_event.cancel()
+                if disconnected in done:
+                    return
+                yield encode_bus_event(next_event.result()) if next_event in done else SSE_HEARTBEAT
+        finally:
+            self._event_bus.remove_listener(listener)
+            disconnected.cancel()
+
+    async def metrics(self, **kwargs) -> AsgiResponse:
+        return AsgiResponse(body=self._metrics.registry.render().encode('utf-8'), content_type=PROMETHEUS_CONTENT_TYPE)
+
+    async def tasks(self, **kwargs) -> AsgiResponse:
+        return AsgiResponse({key: meta.to_dict() for key, meta in self._task_runner.tasks_meta_data.items()})
+
+    async def task_schedules(self, **kwargs) -> AsgiResponse:
+        return AsgiResponse([job.to_dict() for job in self._scheduler.jobs])
+
+    async def task_metrics(self, **kwargs) -> AsgiResponse:
+        return AsgiResponse(self._task_runner.metrics)
+
+
+def create_app(config_path: str = None) -> CtmAsgiServer:
+    return CtmAsgiServer(config_path=config_path or os.environ.get('CTM_CONFIG', './config.yml'))
+
+
+def __getattr__(name: str):
+    # The module-level 'app' for ASGI servers is created on first access, so that importing the module does not
+    # load the configuration and build the container.
+    if name == 'app':
+        globals()['app'] = create_app()
+        return globals()['app']
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+if __name__ == '__main__':
+    create_app().run()
@@ -1,65 +1,131 @@
-import enum
+import argparse
 import json
+import os.path
 from abc import ABC
-from datetime import datetime
+from typing import Final
 from dependency_injector.wiring import Provide, inject
 from flask import Flask
 from flask_cors import CORS
 from controlm.di import DIRestServer
 from controlm.services import CtmCacheManager
+from corelib.threading import PeriodicScheduler, create_schedule
 from controlm.rest_server.blueprints import meta_endpoint, \
-    cache_blueprint, tasks_blueprint, servers_blueprint, hosts_blueprint
+    cache_blueprint, tasks_blueprint, servers_blueprint, folders_blueprint, hosts_blueprint, batch_blueprint, \
+    metrics_blueprint, stats_blueprint, calendar_blueprint, forecast_blueprint, changes_blueprint, \
+    variables_blueprint
+from controlm.rest_server.prefork_server import PreforkWsgiServer
+from controlm.rest_server.json_serialization import CTM_JSON_SERIALIZER
+from controlm.rest_server.compression import compress_response
+from controlm.rest_server.request_metrics import record_request, start_request_timer
+
+
+# Modules with injected functions. Wiring just these is much cheaper than scanning the whole package.
+WIRED_MODULES: Final = [
+    __name__,
+    'controlm.rest_server.admission',
+    'controlm.rest_server.compression',
+    'controlm.rest_server.request_metrics',
+    'controlm.rest_server.response_caching',
+    'controlm.rest_server.blueprints.batch',
+    'controlm.rest_server.blueprints.calendar',
+    'controlm.rest_server.blueprints.cache',
+    'controlm.rest_server.blueprints.changes',
+    'controlm.rest_server.blueprints.folders',
+    'controlm.rest_server.blueprints.forecast',
+    'controlm.rest_server.blueprints.hosts',
+    'controlm.rest_server.blueprints.meta',
+    'controlm.rest_server.blueprints.metrics',
+    'controlm.rest_server.blueprints.servers',
+    'controlm.rest_server.blueprints.stats',
+    'controlm.rest_server.blueprints.tasks',
+    'controlm.rest_server.blueprints.variables',
+]
 
 
 class CtmRestServerJSONEncoder(json.JSONEncoder):
+    """
+    Flask JSON encoder emitting the same documents as CTM_JSON_SERIALIZER, for responses built with jsonify.
+    """
 
     def default(self, obj):
-        if isinstance(obj, str):
-            return obj
-        if isinstance(obj, int):
-            return obj
-        if isinstance(obj, float):
-            return obj
-        if isinstance(obj, datetime):
-            return obj.isoformat()
-        if isinstance(obj, enum.Enum):
-            return str(obj)
-        if isinstance(obj, set):
-            return list(obj)
-        if isinstance(obj, dict):
-            return list(obj)
-        if hasattr(obj, '_tag_name'):
-            return obj.__dict__
-        return obj.__dict__
+        return CTM_JSON_SERIALIZER.default(obj)
 
 
 class CtmRestServer(ABC):
 
-    def __init__(self, app: Flask = None):
+    def __init__(self, app: Flask = None, config_path: str = './config.yml'):
 
         self.di: DIRestServer = DIRestServer()
-        self.di.wire(packages=[
-            __name__,
-            '.'
-        ])
+        if config_path and os.path.exists(config_path):
+            self.di.config.data.from_yaml(config_path)
+        self.di.wire(modules=WIRED_MODULES)
+        # Created up front, so that metrics observe cache refreshes that happen before the first request.
+        self.di.shared_metrics()
 
         self.app = app or Flask(__name__)
         self.app.json_encoder = CtmRestServerJSONEncoder
         self.app.register_blueprint(meta_endpoint)
         self.app.register_blueprint(cache_blueprint)
         self.app.register_blueprint(servers_blueprint)
+        self.app.register_blueprint(folders_blueprint)
         self.app.register_blueprint(tasks_blueprint)
         self.app.register_blueprint(hosts_blueprint)
+        self.app.register_blueprint(batch_blueprint)
+        self.app.register_blueprint(metrics_blueprint)
+        self.app.register_blueprint(stats_blueprint)
+        self.app.register_blueprint(calendar_blueprint)
+        self.app.register_blueprint(forecast_blueprint)
+        self.app.register_blueprint(changes_blueprint)
+        self.app.register_blueprint(variables_blueprint)
+        self.app.before_request(start_request_timer)
+        # After-request hooks run in reverse order of registration; metrics record the compressed size.
+        self.app.after_request(record_request)
+        self.app.after_request(compress_response)
         CORS(self.app)
 
     @inject
     def run(self,
             cache_manager: CtmCacheManager = Provide[DIRestServer.shared_cache_manager],
+            scheduler: PeriodicScheduler = Provide[DIRestServer.shared_scheduler],
+            refresh_config: dict = Provide[DIRestServer.config.data.cache_manager.refresh],
             **kwargs):
         cache_manager.schedule_populate_cache()
+        if refresh_config:
+            scheduler.register_job(cache_manager.create_refresh_job(**refresh_config))
+        scheduler.start()
         self.app.run(**kwargs)
 
+    @inject
+    def serve(self,
+              cache_manager: CtmCacheManager = Provide[DIRestServer.shared_cache_manager],
+              server_config: dict = Provide[DIRestServer.config.data.server],
+              refresh_config: dict = Provide[DIRestServer.config.data.cache_manager.refresh],
+              **kwargs):
+        """
+        Production entry point. Serves the app with a pre-fork server configured by the 'server' section of the
+        config, overridden by **kwargs. The cache is populated before the workers are forked and is refreshed by
+        reloading the workers on the cache refresh schedule, on SIGHUP, or when a worker is sent a populate trigger.
+        """
+        options = dict(server_config or {}, **kwargs)
+        reload_schedule = None
+        if refresh_config:
+            reload_schedule = create_schedule(interval=refresh_config.get('interval'),
+                                              cron=refresh_config.get('cron'))
+        server = PreforkWsgiServer(
+            self.app,
+            preload=cache_manager.preload_cache,
+            reload_schedule=reload_schedule,
+            **options)
+        server.serve_forever()
+
 
 if __name__ == '__main__':
-    server = CtmRestServer()
-    server.run(port=5001)
+    arg_parser = argparse.ArgumentParser(description='Control-M Toolkit API Server')
+    arg_parser.add_argument('--config', default='./config.yml', help='Path to the YAML configuration.')
+    arg_parser.add_argument('--dev', action='store_true', help='Run the Flask development server.')
+    args = arg_parser.parse_args()
+    server = CtmRestServer(config_path=args.config)
+    if args.dev:
+        server.run(port=5001)
+    else:
+        server.serve()
@@ -0,0 +1,45 @@
+from typing import Any, Final
+from flask import Response, current_app
+from controlm.model import CtmDefTable, CtmDefTableItem, CtmSimpleFolder, CtmSmartFolder, CtmVarData, CtmTagData, \
+    CtmJobData
+from controlm.services.dto import DtoServerInfo, DtoFolderInfo, DtoJobInfo, DtoHostInfo
+from controlm.services.dto.node_info import DtoNodeInfo
+from corelib.querying import Page
+from corelib.serialization import JsonSerializer
+
+
+def create_ctm_json_serializer(backend: str = None) -> JsonSerializer:
+    """
+    :return: A serializer with the Control-M model, DTO and page types registered by the fields their constructors
+    define.
+    """
+    serializer = JsonSerializer(backend=backend)
+    for prototype in [
+        CtmDefTable(),
+        CtmDefTableItem('DEFTABLE_ITEM'),
+        CtmSimpleFolder('FOLDER'),
+        CtmSmartFolder('SMART_FOLDER'),
+        CtmJobData('JOB'),
+        CtmVarData(),
+        CtmTagData('RULE_BASED_CALENDARS'),
+        DtoServerInfo(),
+        DtoFolderInfo(),
+        DtoJobInfo(),
+        DtoHostInfo(),
+        DtoNodeInfo(),
+        Page([]),
+    ]:
+        serializer.register_prototype(prototype)
+    return serializer
+
+
+CTM_JSON_SERIALIZER: Final = create_ctm_json_serializer()
+
+
+def json_response(payload: Any, status: int = 200) -> Response:
+    """
+    Drop-in replacement for Flask's jsonify, encoding the payload with CTM_JSON_SERIALIZER.
+    """
+    return current_app.response_class(CTM_JSON_SERIALIZER.dumps(payload),
+                                      status=status,
+                                      mimetype=current_app.config['JSONIFY_MIMETYPE'])
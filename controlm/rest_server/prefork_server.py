@@ -0,0 +1,356 @@
+import gc
+import os
+import signal
+import socket
+import time
+from abc import ABC
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from logging import Logger
+from threading import BoundedSemaphore, Thread
+from typing import Callable, Dict, Optional, Tuple
+from uuid import uuid4
+from werkzeug.serving import BaseWSGIServer, WSGIRequestHandler
+from corelib.logging import create_console_logger
+from corelib.threading import Schedule
+
+# Pid of the PreforkWsgiServer master, in its worker processes.
+_master_pid: Optional[int] = None
+
+
+def request_master_reload() -> bool:
+    """
+    In a worker of a PreforkWsgiServer, asks the master to reload, like SIGHUP does: data loaded by ``preload`` is
+    shared by all workers, so it is refreshed for all of them by the master rather than in the one worker.
+    :return: Whether the reload was requested; False outside of prefork workers.
+    """
+    if _master_pid is None:
+        return False
+    os.kill(_master_pid, signal.SIGHUP)
+    return True
+
+
+class _KeepAliveRequestHandler (WSGIRequestHandler):
+    """
+    HTTP/1.1 handler. Werkzeug closes every connection, since it cannot drain unread request bodies; here requests
+    without a body keep the connection open. Idle keep-alive connections are closed after ``timeout`` seconds, and
+    no further requests are read from a connection once the server is draining.
+    """
+
+    protocol_version = 'HTTP/1.1'
+    timeout: float = 5.0
+    access_log: bool = False
+
+    def send_header(self, keyword, value):
+        if keyword.lower() == 'connection' and value.lower() == 'close' and self._can_keep_alive():
+            return
+        super().send_header(keyword, value)
+
+    def _can_keep_alive(self) -> bool:
+        return not self.close_connection \
+            and not self.server.is_draining \
+            and self.headers.get('Content-Length', '0') == '0' \
+            and 'Transfer-Encoding' not in self.headers
+
+    def handle_one_request(self):
+        super().handle_one_request()
+        if self.server.is_draining:
+            self.close_connection = True
+
+    def log_request(self, *args, **kwargs):
+        if self.access_log:
+            super().log_request(*args, **kwargs)
+
+
+class BoundedThreadWSGIServer (BaseWSGIServer):
+    """
+    Werkzeug WSGI server handling connections in a fixed pool of ``threads`` threads. When all threads are busy the
+    accept loop blocks, leaving new connections in the listen backlog where sibling worker processes can take them.
+    """
+
+    multithread = True
+
+    def __init__(self,
+                 host: str,
+                 port: int,
+                 app: Callable,
+                 threads: int = 8,
+                 keep_alive_timeout: float = 5.0,
+                 access_log: bool = False,
+                 fd: int = None):
+        handler = type('KeepAliveRequestHandler', (_KeepAliveRequestHandler,), {
+            'timeout': keep_alive_timeout,
+            'access_log': access_log,
+        })
+        super().__init__(host, port, app, handler=handler, fd=fd)
+        self._slots: BoundedSemaphore = BoundedSemaphore(threads)
+        self._executor: ThreadPoolExecutor = ThreadPoolExecutor(max_workers=threads,
+                                                                thread_name_prefix=f"{__name__}.request")
+        self._draining: bool = False
+
+    @property
+    def is_draining(self) -> bool:
+        return self._draining
+
+    def get_request(self):
+        request, client_address = super().get_request()
+        if request.family in (socket.AF_INET, socket.AF_INET6):
+            # Headers and body are written separately; without this, Nagle's algorithm holds back the body of
+            # keep-alive responses until the client's delayed ACK.
+            request.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        return request, client_address
+
+    def process_request(self, request, client_address):
+        self._slots.acquire()
+        try:
+            self._executor.submit(self._process_request_thread, request, client_address)
+        except BaseException:
+            self._slots.release()
+            raise
+
+    def _process_request_thread(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except BaseException:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+            self._slots.release()
+
+    def drain(self) -> None:
+        """
+        Stops accepting connections, lets in-flight requests finish and closes the server. Must not be called from
+        the thread running ``serve_forever``.
+        """
+        self._draining = True
+        self.shutdown()
+        self._executor.shutdown(wait=True)
+        self.server_close()
+
+
+class PreforkWsgiServer (ABC):
+    """
+    Pre-fork WSGI server. The master process binds the listening socket, runs ``preload`` - e.g. to populate the
+    cache - and then forks ``workers`` processes, each serving the inherited socket with a BoundedThreadWSGIServer.
+    Data loaded before the fork is shared copy-on-write by all workers; the heap is frozen before forking so that the
+    garbage collector does not touch, and thereby copy, those pages.
+
+    Signals to the master: SIGTERM and SIGINT drain and stop all workers, SIGHUP reloads - ``preload`` runs again,
+    a new generation of workers is forked and the previous one is drained. When ``reload_schedule`` is given, reloads
+    also happen on that schedule. Workers request a reload with ``request_master_reload``. Workers that exit
+    unexpectedly are replaced. POSIX only.
+    """
+
+    def __init__(self,
+                 app: Callable,
+                 host: str = '127.0.0.1',
+                 port: int = 5001,
+                 workers: int = 2,
+                 threads: int = 8,
+                 backlog: int = 128,
+                 keep_alive_timeout: float = 5.0,
+                 graceful_timeout: float = 30.0,
+                 access_log: bool = False,
+                 preload: Callable[[], None] = None,
+                 reload_schedule: Schedule = None,
+                 identifier: str = f"{__name__}_{uuid4()}",
+                 logger: Logger = None):
+        if workers <= 0 or threads <= 0:
+            raise ValueError(f"[{identifier}] Worker and thread counts must be positive, "
+                             f"got workers={workers}, threads={threads}.")
+        self._identifier: str = identifier
+        self._logger: Logger = logger or create_console_logger(__name__)
+        self._app: Callable = app
+        self._host: str = host
+        self._port: int = port
+        self._workers: int = workers
+        self._threads: int = threads
+        self._backlog: int = backlog
+        self._keep_alive_timeout: float = keep_alive_timeout
+        self._graceful_timeout: float = graceful_timeout
+        self._access_log: bool = access_log
+        self._preload: Optional[Callable[[], None]] = preload
+        self._reload_schedule: Optional[Schedule] = reload_schedule
+        self._socket: Optional[socket.socket] = None
+        self._worker_pids: Dict[int, int] = {}
+        self._generation: int = 0
+        self._stopping: bool = False
+        self._reload_requested: bool = False
+
+    @property
+    def logger(self) -> Logger:
+        return self._logger
+
+    @property
+    def identifier(self) -> str:
+        return self._identifier
+
+    @property
+    def address(self) -> Optional[Tuple[str, int]]:
+        return self._socket.getsockname()[:2] if self._socket else None
+
+    @property
+    def worker_pids(self) -> [int]:
+        return list(self._worker_pids.keys())
+
+    def bind(self) -> Tuple[str, int]:
+        """
+        Binds and listens on the configured address. Called by ``serve_forever`` if not called before.
+        :return: The bound address; useful with port 0.
+        """
+        if self._socket is None:
+            family = socket.AF_INET6 if ':' in self._host else socket.AF_INET
+            sock = socket.socket(family, socket.SOCK_STREAM)
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            sock.bind((self._host, self._port))
+            sock.listen(self._backlog)
+            sock.set_inheritable(True)
+            self._socket = sock
+            self.logger.info(f"[{self.identifier}] Listening on {self.address}.")
+        return self.address
+
+    def serve_forever(self, poll_interval: float = 0.5) -> None:
+        self.bind()
+        if self._preload:
+            self.logger.info(f"[{self.identifier}] Preloading before forking workers...")
+            self._preload()
+        previous_handlers = {sig: signal.signal(sig, self._on_signal)
+                             for sig in (signal.SIGTERM, signal.SIGINT, signal.SIGHUP)}
+        try:
+            self._spawn_generation()
+            next_reload = self._next_reload()
+            while not self._stopping:
+                self._reap_workers()
+                if self._reload_requested or (next_reload and datetime.now() >= next_reload):
+                    self._reload_requested = False
+                    self._reload()
+                    next_reload = self._next_reload()
+                time.sleep(poll_interval)
+        finally:
+            self._stop_workers(list(self._worker_pids.keys()))
+            for sig, handler in previous_handlers.items():
+                signal.signal(sig, handler)
+            self._socket.close()
+            self._socket = None
+            self.logger.info(f"[{self.identifier}] Server stopped.")
+
+    def stop(self) -> None:
+        self._stopping = True
+
+    def reload(self) -> None:
+        self._reload_requested = True
+
+    def _on_signal(self, signum, frame) -> None:
+        if signum == signal.SIGHUP:
+            self.logger.info(f"[{self.identifier}] SIGHUP received. Reloading...")
+            self.reload()
+        else:
+            self.logger.info(f"[{self.identifier}] Signal {signum} received. Draining workers...")
+            self.stop()
+
+    def _next_reload(self) -> Optional[datetime]:
+        return self._reload_schedule.next_run_after(datetime.now()) if self._reload_schedule else None
+
+    def _reload(self) -> None:
+        old_pids = list(self._worker_pids.keys())
+        gc.unfreeze()
+        if self._preload:
+            try:
+                self._preload()
+            except BaseException as ex:
+                self.logger.error(f"[{self.identifier}] Reload failed, keeping current workers: {ex}")
+                return
+        self._spawn_generation()
+        self._stop_workers(old_pids)
+        self.logger.info(f"[{self.identifier}] Reloaded to worker generation {self._generation}.")
+
+    def _spawn_generation(self) -> None:
+        self._generation += 1
+        gc.collect()
+        gc.freeze()
+        for _ in range(self._workers):
+            self._spawn_worker()
+
+    def _spawn_worker(self) -> None:
+        master_pid = os.getpid()
+        pid = os.fork()
+        if pid == 0:
+            global _master_pid
+            _master_pid = master_pid
+            exit_code = 1
+            try:
+                self._run_worker()
+                exit_code = 0
+            except BaseException as ex:
+                self.logger.error(f"[{self.identifier}] Worker {os.getpid()} failed: {ex}")
+            finally:
+                os._exit(exit_code)
+        self._worker_pids[pid] = self._generation
+        self.logger.info(f"[{self.identifier}] Started worker {pid} (generation {self._generation}).")
+
+    def _run_worker(self) -> None:
+        server = BoundedThreadWSGIServer(
+            self._host,
+            self._port,
+            self._app,
+            threads=self._threads,
+            keep_alive_timeout=self._keep_alive_timeout,
+            access_log=self._access_log,
+            fd=self._socket.fileno())
+
+        drain_thread = Thread(target=server.drain, name=f"{__name__}.drain", daemon=True)
+
+        def on_stop(signum, frame):
+            if not drain_thread.is_alive() and not server.is_draining:
+                drain_thread.start()
+
+        signal.signal(signal.SIGTERM, on_stop)
+        signal.signal(signal.SIGINT, on_stop)
+        signal.signal(signal.SIGHUP, signal.SIG_IGN)
+        server.serve_forever()
+        if drain_thread.is_alive():
+            drain_thread.join()
+
+    def _reap_workers(self) -> None:
+        while self._worker_pids:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                return
+            if pid == 0:
+                return
+            generation = self._worker_pids.pop(pid, None)
+            if generation is None:
+                continue
+            if generation == self._generation and not self._stopping:
+                self.logger.warning(f"[{self.identifier}] Worker {pid} exited unexpectedly "
+                                    f"(status {status}). Replacing...")
+                self._spawn_worker()
+
+    def _stop_workers(self, pids: [int]) -> None:
+        for pid in pids:
+            self._signal_worker(pid, signal.SIGTERM)
+        deadline = time.monotonic() + self._graceful_timeout
+        remaining = set(pids)
+        while remaining and time.monotonic() < deadline:
+            for pid in list(remaining):
+                try:
+                    if os.waitpid(pid, os.WNOHANG)[0] != 0:
+                        remaining.discard(pid)
+                except ChildProcessError:
+                    remaining.discard(pid)
+            time.sleep(0.05)
+        for pid in remaining:
+            self.logger.warning(f"[{self.identifier}] Worker {pid} did not drain within "
+                                f"{self._graceful_timeout} seconds. Killing...")
+            self._signal_worker(pid, signal.SIGKILL)
+            os.waitpid(pid, 0)
+        for pid in pids:
+            self._worker_pids.pop(pid, None)
+
+    @staticmethod
+    def _signal_worker(pid: int, signum: int) -> None:
+        try:
+            os.kill(pid, signum)
+        except ProcessLookupError:
+            pass
@@ -0,0 +1,77 @@
+from datetime import date, datetime
+from typing import Mapping, Optional
+from controlm.services.dto import STATS_CUBE_DIMENSIONS
+
+
+def parse_top(args: Mapping[str, str], default: Optional[int] = None) -> Optional[int]:
+    """
+    :return: The 'top' query argument, or the default when it is missing or empty.
+    :raise ValueError: When it is not an integer.
+    """
+    top = args.get('top')
+    try:
+        return int(top) if top not in (None, '') else default
+    except ValueError:
+        raise ValueError(f"Top must be an integer, got '{top}'.")
+
+
+def parse_since(args: Mapping[str, str]) -> int:
+    """
+    :return: The 'since' query argument, the cache generation a client last synced.
+    :raise ValueError: When it is missing or not an integer.
+    """
+    since = args.get('since')
+    try:
+        return int(since)
+    except (TypeError, ValueError):
+        raise ValueError(f"Since must be a generation number, got '{since}'.")
+
+
+def parse_day(value: str) -> date:
+    """
+    :return: The date of a YYYY-MM-DD or YYYYMMDD path argument.
+    :raise ValueError: When it is neither.
+    """
+    for date_format in ('%Y-%m-%d', '%Y%m%d'):
+        try:
+            return datetime.strptime(value, date_format).date()
+        except ValueError:
+            pass
+    raise ValueError(f"Invalid date '{value}'. Expected YYYY-MM-DD.")
+
+
+def stats_cube_query(args: Mapping[str, str]) -> dict:
+    """
+    Reads a stats cube query from query arguments: 'by' lists the dimensions to break down by, comma separated,
+    'sort' names the measure to sort by and 'top' the number of cells to return. Any argument named after a
+    dimension fixes it; an empty value selects jobs without one.
+    :return: The keyword arguments of ``CtmRepository.fetch_stats_cube``.
+    :raise ValueError: When 'top' is not an integer.
+    """
+    return {
+        'by': [name.strip() for name in (args.get('by') or '').split(',') if name.strip()],
+        'where': {name: args[name] or None for name in STATS_CUBE_DIMENSIONS if name in args},
+        'order_by': args.get('sort') or None,
+        'top': parse_top(args),
+    }
+
+
+def load_forecast_query(args: Mapping[str, str]) -> dict:
+    """
+    Reads a load forecast query from query arguments: 'by' is 'node' or 'group', 'slot' the slot size in minutes,
+    'date' restricts the forecast to the jobs scheduled on a day, and 'server' and 'node' select the rows.
+    :return: The keyword arguments shared by ``CtmRepository.fetch_load_heatmap`` and ``fetch_load_peaks``.
+    :raise ValueError: When 'slot' is not an integer or 'date' is not a date.
+    """
+    slot = args.get('slot')
+    try:
+        slot_minutes = int(slot) if slot not in (None, '') else 15
+    except ValueError:
+        raise ValueError(f"Slot must be an integer, got '{slot}'.")
+    return {
+        'by': args.get('by') or 'node',
+        'server_name': args.get('server') or None,
+        'node': args.get('node') or None,
+        'slot_minutes': slot_minutes,
+        'day': parse_day(args['date']) if args.get('date') else None,
+    }
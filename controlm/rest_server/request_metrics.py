@@ -0,0 +1,38 @@
+from time import perf_counter
+from typing import Final
+from dependency_injector.wiring import Provide, inject
+from flask import Response, request
+from controlm.di.di_rest_server import DIRestServer
+from controlm.services import CtmMetrics
+
+UNMATCHED_ROUTE: Final = '<unmatched>'
+_START_TIME_KEY: Final = f"{__name__}.start"
+
+
+@inject
+def shared_metrics(metrics: CtmMetrics = Provide[DIRestServer.shared_metrics]) -> CtmMetrics:
+    return metrics
+
+
+def start_request_timer() -> None:
+    """
+    ``before_request`` hook.
+    """
+    request.environ[_START_TIME_KEY] = perf_counter()
+
+
+def record_request(response: Response) -> Response:
+    """
+    ``after_request`` hook recording the request in CtmMetrics. Register it before other ``after_request``
+    hooks, so that it runs last and sees the final - e.g. compressed - size. Streamed responses are timed to their
+    headers and have no size.
+    """
+    start = request.environ.get(_START_TIME_KEY)
+    if start is not None:
+        shared_metrics().observe_request(
+            request.method,
+            request.url_rule.rule if request.url_rule else UNMATCHED_ROUTE,
+            response.status_code,
+            perf_counter() - start,
+            None if response.is_streamed else response.content_length)
+    return response
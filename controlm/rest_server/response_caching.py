@@ -0,0 +1,125 @@
+import functools
+from typing import Callable, List, Optional, Tuple
+from dependency_injector.wiring import Provide, inject
+from flask import Response, current_app, request
+from corelib.caching import ResponseCache
+from corelib.threading import ConcurrencyLimiter
+from controlm.di.di_rest_server import DIRestServer
+from controlm.rest_server.admission import admission_controller, overloaded_response
+from controlm.rest_server.compression import response_compressor
+from controlm.rest_server.streaming import NDJSON_REPRESENTATION, accepts_ndjson
+from controlm.services import CtmCacheManager
+
+
+def generation_etag(generation: int, *representation: Optional[str]) -> str:
+    """
+    :param representation: Qualifiers of the representation, such as its media type or content coding; None values
+    are skipped.
+    """
+    return '-'.join([f"ctm-{generation}"] + [r for r in representation if r])
+
+
+@inject
+def _response_cache_dependencies(
+        response_cache: ResponseCache = Provide[DIRestServer.shared_response_cache],
+        cache_manager: CtmCacheManager = Provide[DIRestServer.shared_cache_manager]
+) -> Tuple[ResponseCache, CtmCacheManager]:
+    return response_cache, cache_manager
+
+
+def _set_validators(response: Response, etag: Optional[str], streamable: bool) -> Response:
+    if etag is not None:
+        response.set_etag(etag)
+    response.headers['Cache-Control'] = 'no-cache'
+    response.vary.add('Accept-Encoding')
+    if streamable:
+        response.vary.add('Accept')
+    return response
+
+
+def _render(view: Callable, args: tuple, kwargs: dict,
+            limiter: Optional[ConcurrencyLimiter]) -> Tuple[bytes, int, List[Tuple[str, str]]]:
+    """
+    Renders the view, holding a slot of the route's limiter if it has one.
+    :return: The body, status and headers; plain values, since they are shared with the coalesced requests.
+    """
+    if limiter is not None and not limiter.acquire():
+        response = overloaded_response(limiter)
+    else:
+        try:
+            response = current_app.make_response(view(*args, **kwargs))
+        finally:
+            if limiter is not None:
+                limiter.release()
+    return response.get_data(), response.status_code, [(name, value) for name, value in response.headers
+                                                       if name.lower() != 'content-length']
+
+
+def cached_response(view: Callable = None, streamable: bool = False) -> Callable:
+    """
+    Caches the rendered body of a view per route, arguments and cache generation. Responses carry a strong ETag
+    derived from the generation, and a request whose If-None-Match matches it gets a 304 without the view running.
+    Only 200 responses are cached, and only once a generation is published: before the first populate completes,
+    views run for every request and responses carry no ETag. During a refresh, or after a failed one, the published
+    generation is still served, and its bodies and ETags stay valid. Bodies large enough to compress are also cached
+    compressed with the coding negotiated from Accept-Encoding, so each generation's body is compressed once per
+    coding. Place it between ``route`` and ``inject``.
+
+    On a cache miss, concurrent identical requests are coalesced, and only one of them runs the view. Views of
+    routes with a concurrency limit in the admission controller run only while holding one of the route's slots;
+    requests that get no slot are shed with a 503.
+    :param streamable: The view streams NDJSON when the client accepts it. Streamed bodies are not cached, and
+    their ETag differs from the JSON representation's.
+    """
+    if view is None:
+        return functools.partial(cached_response, streamable=streamable)
+
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        response_cache, cache_manager = _response_cache_dependencies()
+        generation = cache_manager.cache_generation
+        published = cache_manager.has_cache_generation
+        compressor = response_compressor()
+        streaming = streamable and accepts_ndjson(request.accept_mimetypes)
+        encoding = None if streaming else compressor.negotiate(request.accept_encodings)
+        etag = None
+        if published:
+            etag = generation_etag(generation, NDJSON_REPRESENTATION if streaming else None, encoding)
+        if etag is not None and request.if_none_match.contains(etag):
+            return _set_validators(Response(status=304), etag, streamable)
+        controller = admission_controller()
+        limiter = controller.limiter(request.url_rule.rule)
+        if streaming:
+            if limiter is not None and not limiter.acquire():
+                return overloaded_response(limiter)
+            try:
+                response = current_app.make_response(view(*args, **kwargs))
+            except BaseException:
+                if limiter is not None:
+                    limiter.release()
+                raise
+            if limiter is not None:
+                # The body is generated while it is sent, so the slot is held until the response is closed.
+                response.call_on_close(limiter.release)
+            return _set_validators(response, etag, streamable) if response.status_code == 200 else response
+        key = (request.url_rule.rule, tuple(sorted(kwargs.items())), tuple(sorted(request.args.items(multi=True))))
+        body = response_cache.get(generation, key) if published else None
+        if body is None:
+            (body, status, headers), shared = controller.single_flight.do(
+                (generation, key), lambda: _render(view, args, kwargs, limiter))
+            if status != 200:
+                return Response(body, status=status, headers=headers)
+            if not shared and published:
+                response_cache.put(generation, key, body)
+        if encoding and compressor.should_compress(len(body)):
+            if published:
+                body, _ = response_cache.get_or_render(generation, (key, encoding),
+                                                       lambda: compressor.compress(body, encoding))
+            else:
+                body = compressor.compress(body, encoding)
+            response = Response(body, mimetype=current_app.config['JSONIFY_MIMETYPE'])
+            response.headers['Content-Encoding'] = encoding
+        else:
+            response = Response(body, mimetype=current_app.config['JSONIFY_MIMETYPE'])
+        return _set_validators(response, etag, streamable)
+    return wrapper
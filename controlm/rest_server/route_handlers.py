@@ -0,0 +1,246 @@
+from abc import ABC
+from typing import Any, Callable, Dict, Final, Iterable, List, Mapping, Optional, Tuple
+from flask import Response, request
+from controlm.rest_server.ctm_rest_server_meta import CTM_REST_SERVER_META
+from controlm.rest_server.json_serialization import json_response
+from controlm.rest_server.query_args import load_forecast_query, parse_day, parse_since, parse_top, \
+    stats_cube_query
+from controlm.rest_server.streaming import collection_response
+from controlm.services import AsyncCtmRepository, CtmCacheManager, CtmRepository
+from corelib.querying import CollectionQuery, Page
+
+
+class RouteResponse (ABC):
+    """
+    What a shared route answers, whichever server renders it: the JSON payload and status, and - for streamable
+    routes - the items to stream as NDJSON and the levels of each to encode incrementally.
+    """
+
+    def __init__(self, payload: Any, status: int = 200, items: Iterable[Any] = None, depth: int = 0):
+        self.payload: Any = payload
+        self.status: int = status
+        self.items: Optional[Iterable[Any]] = items
+        self.depth: int = depth
+
+
+def error_response(status: int, message: str) -> RouteResponse:
+    return RouteResponse({'status': status, 'message': message}, status)
+
+
+class RepositoryRoute (ABC):
+    """
+    A route answered by one fetch method of the repository. The Flask blueprints call it with CtmRepository, and the
+    ASGI server awaits it with AsyncCtmRepository, which has the same methods; both get the same documents and
+    errors: NameError is answered with a 404 and ValueError with a 400.
+    """
+
+    def __init__(self,
+                 name: str,
+                 rule: str,
+                 fetch: str,
+                 arguments: Callable[..., dict],
+                 render: Callable[[Any, Mapping[str, str]], RouteResponse] = None,
+                 not_found: str = None,
+                 methods: Tuple[str, ...] = ('GET',),
+                 cached: bool = True,
+                 streamable: bool = False,
+                 depth: int = 0,
+                 encode_in_executor: bool = False):
+        """
+        :param arguments: Reads the keyword arguments of the fetch method from the query arguments and the path
+        arguments of a request.
+        :param render: Turns the fetched result into the response. By default, the result is the payload.
+        :param not_found: Message of the 404, formatted with the path arguments. By default, the NameError's.
+        :param encode_in_executor: The ASGI server encodes the document in an executor, as it can be large.
+        """
+        self.name: str = name
+        self.rule: str = rule
+        self.fetch: str = fetch
+        self.methods: Tuple[str, ...] = methods
+        self.cached: bool = cached
+        self.streamable: bool = streamable
+        self.encode_in_executor: bool = encode_in_executor
+        self._arguments: Callable[..., dict] = arguments
+        self._render: Callable[[Any, Mapping[str, str]], RouteResponse] = render or (
+            lambda result, args: RouteResponse(result, depth=depth))
+        self._not_found: Optional[str] = not_found
+
+    def call(self, repository: CtmRepository, args: Mapping[str, str], **path_args) -> RouteResponse:
+        try:
+            return self._render(getattr(repository, self.fetch)(**self._arguments(args, **path_args)), args)
+        except NameError as err:
+            return self._not_found_response(err, path_args)
+        except ValueError as err:
+            return error_response(400, str(err))
+
+    async def call_async(self, repository: AsyncCtmRepository, args: Mapping[str, str], **path_args) -> RouteResponse:
+        try:
+            return self._render(await getattr(repository, self.fetch)(**self._arguments(args, **path_args)), args)
+        except NameError as err:
+            return self._not_found_response(err, path_args)
+        except ValueError as err:
+            return error_response(400, str(err))
+
+    def _not_found_response(self, err: NameError, path_args: dict) -> RouteResponse:
+        return error_response(404, self._not_found.format(**path_args) if self._not_found else str(err))
+
+
+def view_response(route: RepositoryRoute, repository: CtmRepository, **path_args) -> Response:
+    """
+    Answers the Flask request with the route, streaming the items of streamable routes when the client asks for it.
+    """
+    response = route.call(repository, request.args, **path_args)
+    if route.streamable and response.status == 200:
+        return collection_response(response.payload, items=response.items, depth=response.depth)
+    return json_response(response.payload, response.status)
+
+
+def _query(args: Mapping[str, str], **kwargs) -> dict:
+    return {'query': CollectionQuery.from_args(args)}
+
+
+def _server_query(args: Mapping[str, str], server: str) -> dict:
+    return {'server_name': server, 'query': CollectionQuery.from_args(args)}
+
+
+def _variable_query(args: Mapping[str, str], name: str) -> dict:
+    return {'name': name, 'server_name': args.get('server') or None, 'query': CollectionQuery.from_args(args)}
+
+
+def _folders_query(folder_order_methods: List[Optional[str]]) -> Callable[..., dict]:
+    def arguments(args: Mapping[str, str], server: str) -> dict:
+        return {
+            'server_name': server,
+            'folder_order_methods': folder_order_methods,
+            'folder_node_ids': [],
+            'query': CollectionQuery.from_args(args),
+        }
+    return arguments
+
+
+def _render_def_table(def_table: Any, args: Mapping[str, str]) -> RouteResponse:
+    return RouteResponse(def_table, items=None if isinstance(def_table, Page) else def_table.items if def_table else [])
+
+
+def _render_changes(changes: dict, args: Mapping[str, str]) -> RouteResponse:
+    if changes['resync']:
+        return RouteResponse({
+            'status': 410,
+            'message': f"Changes since generation {changes['since']} are no longer retained. Resync in full.",
+            **changes
+        }, 410)
+    return RouteResponse(changes)
+
+
+def _render_node(node_info: Any, args: Mapping[str, str]) -> RouteResponse:
+    query = CollectionQuery.from_args(args)
+    return RouteResponse(query.project(node_info) if query else node_info)
+
+
+def _batch_arguments(args: Mapping[str, str], document: Any = None) -> dict:
+    if not isinstance(document, dict):
+        raise ValueError('The request body must be a JSON object with a list of lookups.')
+    return {'lookups': document.get('lookups')}
+
+
+SERVER_NOT_FOUND: Final = "Server '{server}' not found."
+
+SERVER_NAMES: Final = RepositoryRoute('server_names', '/server-names', 'fetch_server_names', _query)
+# Servers are opened down to their folders, so that no more than one folder is encoded at a time.
+SERVERS_INFO: Final = RepositoryRoute('servers_info', '/servers', 'fetch_server_aggregate_stats', _query,
+                                      streamable=True, depth=2, encode_in_executor=True)
+SERVERS_INFO_RAW: Final = RepositoryRoute('servers_info_raw', '/servers-raw', 'fetch_def_table', _query,
+                                          render=_render_def_table, streamable=True, encode_in_executor=True)
+SERVER_INFO_STATS: Final = RepositoryRoute('server_info_stats', '/servers/<server>/stats', 'fetch_server_stats_or_die',
+                                           lambda args, server: {'server_name': server}, not_found=SERVER_NOT_FOUND)
+STATS_CUBE: Final = RepositoryRoute('stats_cube', '/stats/cube', 'fetch_stats_cube',
+                                    lambda args: stats_cube_query(args))
+JOBS_SCHEDULED_ON: Final = RepositoryRoute('jobs_scheduled_on', '/calendar/<day>/jobs', 'fetch_jobs_scheduled_on',
+                                           lambda args, day: {'day': parse_day(day),
+                                                              'server_name': args.get('server') or None,
+                                                              'node': args.get('node') or None,
+                                                              'query': CollectionQuery.from_args(args)},
+                                           streamable=True, encode_in_executor=True)
+BUSIEST_DAYS: Final = RepositoryRoute('busiest_days', '/calendar/<int:year>/busiest-days', 'fetch_busiest_days',
+                                      lambda args, year: {'year': year,
+                                                          'server_name': args.get('server') or None,
+                                                          'node': args.get('node') or None,
+                                                          'top': parse_top(args, 5)})
+LOAD_HEATMAP: Final = RepositoryRoute('load_heatmap', '/forecast/heatmap', 'fetch_load_heatmap',
+                                      lambda args: load_forecast_query(args))
+LOAD_PEAKS: Final = RepositoryRoute('load_peaks', '/forecast/peaks', 'fetch_load_peaks',
+                                    lambda args: {**load_forecast_query(args), 'top': parse_top(args, 5)})
+CHANGES_SINCE: Final = RepositoryRoute('changes_since', '/changes', 'fetch_changes_since',
+                                       lambda args: {'since': parse_since(args)}, render=_render_changes)
+VARIABLE_NAMES: Final = RepositoryRoute('variable_names', '/variables', 'fetch_variable_names', _query)
+VARIABLE_INFO: Final = RepositoryRoute('variable_info', '/variables/<name>', 'fetch_variable_or_die',
+                                       lambda args, name: {'name': name, 'server_name': args.get('server') or None})
+VARIABLE_DEFINITIONS: Final = RepositoryRoute('variable_definitions', '/variables/<name>/definitions',
+                                              'fetch_variable_definitions_or_die', _variable_query)
+VARIABLE_REFERENCES: Final = RepositoryRoute('variable_references', '/variables/<name>/references',
+                                             'fetch_variable_references_or_die', _variable_query)
+ALL_FOLDERS: Final = RepositoryRoute('filter_all_folders', '/servers/<server>/folders/all', 'fetch_folders',
+                                     _folders_query([]), not_found=SERVER_NOT_FOUND, streamable=True,
+                                     encode_in_executor=True)
+ACTIVE_FOLDERS: Final = RepositoryRoute('filter_active_folders', '/servers/<server>/folders/active', 'fetch_folders',
+                                        _folders_query(['SYSTEM']), not_found=SERVER_NOT_FOUND, streamable=True,
+                                        encode_in_executor=True)
+DISABLED_FOLDERS: Final = RepositoryRoute('filter_disabled_folders', '/servers/<server>/folders/disabled',
+                                          'fetch_folders', _folders_query([None]), not_found=SERVER_NOT_FOUND,
+                                          streamable=True, encode_in_executor=True)
+FOLDER: Final = RepositoryRoute('get_folder', '/servers/<server>/folder/<folder>', 'fetch_folder_or_die',
+                                lambda args, server, folder: {'server_name': server, 'folder_name': folder,
+                                                              'query': CollectionQuery.from_args(args)})
+NODE_NAMES: Final = RepositoryRoute('get_node_names', '/servers/<server>/nodes', 'fetch_node_names', _server_query,
+                                    not_found=SERVER_NOT_FOUND)
+NODE_STATS: Final = RepositoryRoute('get_node_stats', '/servers/<server>/nodes/stats', 'fetch_node_stats',
+                                    _server_query, not_found=SERVER_NOT_FOUND, streamable=True,
+                                    encode_in_executor=True)
+NODE: Final = RepositoryRoute('get_node', '/servers/<server>/node/<host>', 'fetch_node_details_or_die',
+                              lambda args, server, host: {'server_name': server, 'host': host}, render=_render_node)
+# Resolves folder, node, host and server stats lookups in one request; see CtmRepository.fetch_batch. The body is
+# {"lookups": [{"id": "f1", "type": "folder", "server": "...", "folder": "...", "fields": "name,jobs"}, ...]}.
+BATCH: Final = RepositoryRoute('resolve_batch', '/batch', 'fetch_batch', _batch_arguments,
+                               render=lambda results, args: RouteResponse({'results': results}), methods=('POST',),
+                               cached=False, encode_in_executor=True)
+
+REPOSITORY_ROUTES: Final = [
+    SERVER_NAMES, SERVERS_INFO, SERVERS_INFO_RAW, SERVER_INFO_STATS, STATS_CUBE, JOBS_SCHEDULED_ON, BUSIEST_DAYS,
+    LOAD_HEATMAP, LOAD_PEAKS, CHANGES_SINCE, VARIABLE_NAMES, VARIABLE_INFO, VARIABLE_DEFINITIONS, VARIABLE_REFERENCES,
+    ALL_FOLDERS, ACTIVE_FOLDERS, DISABLED_FOLDERS, FOLDER, NODE_NAMES, NODE_STATS, NODE, BATCH,
+]
+
+
+def index_document() -> dict:
+    return {
+        'maintainer': 'atanas.dragolov@saorsa.bg',
+        'description': 'Control-M Toolkit API Server',
+        'version': CTM_REST_SERVER_META['version'],
+        'discovery_endpoint': '/discover'
+    }
+
+
+def readiness(cache_manager: CtmCacheManager) -> Tuple[dict, int]:
+    """
+    Readiness probe: 200 once a cache generation is published, 503 before the first populate completes. The
+    published generation keeps being served during a refresh and after a failed one, so neither takes the instance
+    out of rotation.
+    :return: The document and its status.
+    """
+    ready = cache_manager.cache_generation > 0
+    return {
+        'status': 'ready' if ready else 'unavailable',
+        'state': str(cache_manager.cache_state),
+        'generation': cache_manager.cache_generation,
+    }, 200 if ready else 503
+
+
+def cache_state_document(cache_manager: CtmCacheManager) -> Dict[str, Any]:
+    return {
+        'state': str(cache_manager.cache_state),
+        'error': cache_manager.cache_error,
+        'ready': cache_manager.is_cache_ready,
+        'timestamp': cache_manager.cache_timestamp,
+        'parsingInterval': cache_manager.cache_populate_duration,
+        'generation': cache_manager.cache_generation,
+    }
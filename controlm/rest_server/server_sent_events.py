@@ -0,0 +1,63 @@
+from typing import Final, Iterator, Optional
+from corelib.events import Event, EventSubscription
+from controlm.rest_server.json_serialization import CTM_JSON_SERIALIZER
+from controlm.services import CtmCacheManager
+
+SSE_MIMETYPE: Final = 'text/event-stream'
+SSE_HEARTBEAT_INTERVAL: Final = 15.0
+SSE_RETRY_MILLISECONDS: Final = 3000
+SSE_HEARTBEAT: Final = b': heartbeat\n\n'
+CACHE_STATE_EVENT: Final = 'cache.state'
+
+
+def encode_event(event_type: str, data: dict, event_id: Optional[int] = None) -> bytes:
+    """
+    Encodes an event in the text/event-stream format. The data is a single line of JSON.
+    """
+    lines = [f"id: {event_id}\n".encode('ascii')] if event_id is not None else []
+    lines.append(f"event: {event_type}\n".encode('utf-8'))
+    lines.append(b'data: ' + CTM_JSON_SERIALIZER.dumps(data).rstrip(b'\n') + b'\n\n')
+    return b''.join(lines)
+
+
+def encode_bus_event(event: Event) -> bytes:
+    return encode_event(event.type, {**event.data, 'timestamp': event.timestamp}, event.id)
+
+
+def parse_last_event_id(value: Optional[str]) -> Optional[int]:
+    """
+    :return: The Last-Event-ID header sent by a reconnecting client, or None when absent or not an id of ours.
+    """
+    try:
+        return int(value) if value else None
+    except ValueError:
+        return None
+
+
+def stream_preamble(cache_manager: CtmCacheManager) -> bytes:
+    """
+    The reconnection delay, followed by a snapshot of the cache state, so that clients learn the current
+    generation without polling /cache/state. The snapshot has no id, and does not move the client's Last-Event-ID.
+    """
+    return f"retry: {SSE_RETRY_MILLISECONDS}\n\n".encode('ascii') + encode_event(CACHE_STATE_EVENT, {
+        'state': str(cache_manager.cache_state),
+        'ready': cache_manager.is_cache_ready,
+        'generation': cache_manager.cache_generation,
+    })
+
+
+def event_stream(subscription: EventSubscription,
+                 cache_manager: CtmCacheManager,
+                 heartbeat_interval: float = SSE_HEARTBEAT_INTERVAL) -> Iterator[bytes]:
+    """
+    Yields the preamble, then each event of the subscription, and a heartbeat comment when no event arrives within
+    ``heartbeat_interval`` seconds, so that disconnected clients are noticed. Closes the subscription when the
+    response is closed.
+    """
+    try:
+        yield stream_preamble(cache_manager)
+        while not subscription.closed:
+            event = subscription.get(timeout=heartbeat_interval)
+            yield encode_bus_event(event) if event else SSE_HEARTBEAT
+    finally:
+        subscription.close()
@@ -0,0 +1,66 @@
+from typing import Any, Final, Iterable, Iterator
+from flask import Response, current_app, request
+from werkzeug.datastructures import MIMEAccept
+from controlm.rest_server.json_serialization import CTM_JSON_SERIALIZER, json_response
+from corelib.querying import Page
+from corelib.serialization import JsonSerializer
+
+JSON_MIMETYPE: Final = 'application/json'
+NDJSON_MIMETYPE: Final = 'application/x-ndjson'
+NDJSON_REPRESENTATION: Final = 'ndjson'
+NDJSON_CHUNK_SIZE: Final = 64 * 1024
+NEXT_CURSOR_HEADER: Final = 'X-Next-Cursor'
+
+
+def accepts_ndjson(accept: MIMEAccept) -> bool:
+    """
+    :return: Whether the client prefers NDJSON over JSON. Streaming is opt-in, so wildcards select JSON.
+    """
+    return accept.best_match([JSON_MIMETYPE, NDJSON_MIMETYPE]) == NDJSON_MIMETYPE
+
+
+def ndjson_chunks(items: Iterable[Any],
+                  depth: int = 0,
+                  serializer: JsonSerializer = CTM_JSON_SERIALIZER,
+                  chunk_size: int = NDJSON_CHUNK_SIZE) -> Iterator[bytes]:
+    """
+    Encodes the items lazily as newline delimited JSON, one item per line, in chunks of about chunk_size bytes.
+    Only the current chunk is held in memory, along with the encoding of one item - or, for items that are
+    collections themselves, of one value ``depth`` levels below the item. The first piece is yielded on its own to
+    keep time to first byte low.
+    """
+    pieces, size = [], 0
+    first = True
+    for item in items:
+        for piece in serializer.iterencode(item, depth):
+            if first:
+                first = False
+                yield piece
+                continue
+            pieces.append(piece)
+            size += len(piece)
+            if size >= chunk_size:
+                yield b''.join(pieces)
+                pieces, size = [], 0
+    if pieces:
+        yield b''.join(pieces)
+
+
+def collection_response(payload: Any, items: Iterable[Any] = None, depth: int = 0) -> Response:
+    """
+    Renders the payload as JSON, or streams its items as NDJSON when the client asks for it with
+    'Accept: application/x-ndjson'. Streamed responses use chunked transfer encoding.
+    :param items: The items to stream. By default the items of a Page payload, the values of a dictionary payload,
+    or the payload itself. The next cursor of a Page is sent in the X-Next-Cursor header.
+    :param depth: Levels of each item to encode incrementally; see ``ndjson_chunks``.
+    """
+    if not accepts_ndjson(request.accept_mimetypes):
+        return json_response(payload)
+    headers = {}
+    if isinstance(payload, Page):
+        if payload.next_cursor:
+            headers[NEXT_CURSOR_HEADER] = payload.next_cursor
+        payload = payload.items
+    if items is None:
+        items = payload.values() if isinstance(payload, dict) else payload
+    return current_app.response_class(ndjson_chunks(items, depth=depth), mimetype=NDJSON_MIMETYPE, headers=headers)
@@ -1,4 +1,27 @@
-from .ctm_xml_parser import CtmXmlParser, CtmXmlParserException
 from .ctm_csv_parser import CtmCsvParser
-from .ctm_cache_manager import CtmCacheManager, CtmCacheManagerState, CtmCacheManagerKeys
+from .ctm_change_feed import CtmChangeFeed
+from .ctm_variable_index import CtmVariableIndex
+from .ctm_cache_manager import CtmCacheManager, CtmCacheManagerState, CtmCacheManagerKeys, CtmCacheManagerEvents
 from .ctm_repository import CtmRepository
+from .ctm_async_repository import AsyncCtmRepository
+from .ctm_metrics import CtmMetrics
+
+
+def __getattr__(name: str):
+    # The XML parser pulls in lxml, which only cache population needs; it is imported on first access.
+    if name in ('CtmXmlParser', 'CtmXmlParserException'):
+        from . import ctm_xml_parser
+        return getattr(ctm_xml_parser, name)
+    # As does the export diff, which streams exports through it.
+    if name in ('CtmExportDiffer', 'CtmExportDiff'):
+        from . import ctm_export_diff
+        return getattr(ctm_export_diff, name)
+    # The schedule calendar pulls in NumPy, which only calendar queries need.
+    if name in ('CtmScheduleCalendar', 'CtmSchedulingCriteria'):
+        from . import ctm_schedule_calendar
+        return getattr(ctm_schedule_calendar, name)
+    # So does the load forecast.
+    if name in ('CtmLoadForecast', 'CtmJobTiming'):
+        from . import ctm_load_forecast
+        return getattr(ctm_load_forecast, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
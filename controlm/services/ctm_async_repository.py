@@ -0,0 +1,180 @@
+import asyncio
+from abc import ABC
+from datetime import date
+from logging import Logger
+from typing import Any, Callable, Dict, List, Optional, Union
+from uuid import uuid4
+from controlm.model import CtmDefTable
+from controlm.services.ctm_repository import CtmRepository
+from controlm.services.dto import DtoServerInfo, DtoFolderInfo, DtoHostInfo
+from controlm.services.dto.node_info import DtoNodeInfo
+from corelib.logging import create_console_logger
+from corelib.querying import CollectionQuery, Page
+from corelib.threading import TaskRunner, TaskMetaData, IO_EXECUTOR
+
+
+def _call_without_meta(callable_fn: Callable, *args, task_meta: TaskMetaData = None, **kwargs) -> Any:
+    return callable_fn(*args, **kwargs)
+
+
+class AsyncCtmRepository (ABC):
+    """
+    Awaitable facade over CtmRepository. Dictionary lookups run directly on the event loop; methods that scan folder
+    or host lists run in a TaskRunner executor, so that the loop keeps serving other requests while they compute.
+    """
+
+    def __init__(self,
+                 repository: CtmRepository = None,
+                 task_runner: TaskRunner = None,
+                 executor: str = IO_EXECUTOR,
+                 logger: Logger = None):
+        self._identifier: str = f"{__name__}_{uuid4()}"
+        self._logger = logger or create_console_logger(__name__)
+        self._repository: CtmRepository = repository or CtmRepository()
+        self._task_runner: TaskRunner = task_runner or self._repository.cache_manager.task_runner
+        self._executor: str = executor
+        self._logger.info(f"Async repository '{self.identifier}' initialized.")
+
+    @property
+    def logger(self) -> Logger:
+        return self._logger
+
+    @property
+    def identifier(self) -> str:
+        return self._identifier
+
+    @property
+    def repository(self) -> CtmRepository:
+        return self._repository
+
+    @property
+    def task_runner(self) -> TaskRunner:
+        return self._task_runner
+
+    async def run_in_executor(self, callable_fn: Callable, *args, **kwargs) -> Any:
+        """
+        Runs the callable in the repository's TaskRunner executor. Task metrics are recorded under the callable's
+        qualified name. Cancelling the awaiting coroutine cancels the task if it has not started yet.
+        """
+        future = self._task_runner.schedule_task_on(
+            self._executor,
+            _call_without_meta,
+            callable_fn,
+            *args,
+            task_meta=TaskMetaData(name=f"{callable_fn.__module__}.{callable_fn.__qualname__}"),
+            **kwargs)
+        return await asyncio.wrap_future(future)
+
+    async def fetch_server_names(self, query: CollectionQuery = None) -> Union[List[str], Page]:
+        return self._repository.fetch_server_names(query)
+
+    async def fetch_server_aggregate_stats(self,
+                                           query: CollectionQuery = None) -> Union[Dict[str, DtoServerInfo], Page]:
+        if query is None:
+            return self._repository.fetch_server_aggregate_stats()
+        return await self.run_in_executor(self._repository.fetch_server_aggregate_stats, query)
+
+    async def fetch_def_table(self, query: CollectionQuery = None) -> Union[Optional[CtmDefTable], Page]:
+        if query is None:
+            return self._repository.fetch_def_table()
+        return await self.run_in_executor(self._repository.fetch_def_table, query)
+
+    async def fetch_server_info_or_die(self, server_name: str) -> DtoServerInfo:
+        return self._repository.fetch_server_info_or_die(server_name)
+
+    async def fetch_server_stats_or_die(self, server_name: str) -> dict:
+        return self._repository.fetch_server_stats_or_die(server_name)
+
+    async def fetch_stats_cube(self,
+                               by: List[str] = None,
+                               where: Dict[str, Optional[str]] = None,
+                               order_by: Optional[str] = None,
+                               top: Optional[int] = None) -> dict:
+        return self._repository.fetch_stats_cube(by, where, order_by=order_by, top=top)
+
+    async def fetch_changes_since(self, since: int) -> dict:
+        return await self.run_in_executor(self._repository.fetch_changes_since, since)
+
+    async def fetch_variable_names(self, query: CollectionQuery = None) -> Union[List[str], Page]:
+        return self._repository.fetch_variable_names(query)
+
+    async def fetch_variable_or_die(self, name: str, server_name: str = None) -> dict:
+        return self._repository.fetch_variable_or_die(name, server_name)
+
+    async def fetch_variable_definitions_or_die(self,
+                                                name: str,
+                                                server_name: str = None,
+                                                query: CollectionQuery = None) -> Union[List[dict], Page]:
+        return await self.run_in_executor(self._repository.fetch_variable_definitions_or_die, name, server_name, query)
+
+    async def fetch_variable_references_or_die(self,
+                                               name: str,
+                                               server_name: str = None,
+                                               query: CollectionQuery = None) -> Union[List[dict], Page]:
+        return await self.run_in_executor(self._repository.fetch_variable_references_or_die, name, server_name, query)
+
+    async def fetch_jobs_scheduled_on(self,
+                                      day: date,
+                                      server_name: str = None,
+                                      node: str = None,
+                                      query: CollectionQuery = None) -> Union[List[dict], Page]:
+        return await self.run_in_executor(self._repository.fetch_jobs_scheduled_on, day, server_name, node, query)
+
+    async def fetch_busiest_days(self, year: int, server_name: str = None, node: str = None, top: int = 5) -> dict:
+        return await self.run_in_executor(self._repository.fetch_busiest_days, year, server_name, node, top)
+
+    async def fetch_load_heatmap(self,
+                                 by: str = 'node',
+                                 server_name: str = None,
+                                 node: str = None,
+                                 slot_minutes: int = 15,
+                                 day: Optional[date] = None) -> dict:
+        return await self.run_in_executor(self._repository.fetch_load_heatmap, by, server_name, node, slot_minutes,
+                                          day)
+
+    async def fetch_load_peaks(self,
+                               by: str = 'node',
+                               server_name: str = None,
+                               node: str = None,
+                               slot_minutes: int = 15,
+                               day: Optional[date] = None,
+                               top: int = 5) -> dict:
+        return await self.run_in_executor(self._repository.fetch_load_peaks, by, server_name, node, slot_minutes,
+                                          day, top)
+
+    async def fetch_folders(self,
+                            server_name: str,
+                            folder_order_methods: List[Optional[str]] = None,
+                            folder_node_ids: List[str] = None,
+                            query: CollectionQuery = None) -> Union[List[DtoFolderInfo], Page]:
+        return await self.run_in_executor(self._repository.fetch_folders, server_name,
+                                          folder_order_methods=folder_order_methods,
+                                          folder_node_ids=folder_node_ids,
+                                          query=query)
+
+    async def fetch_folder_or_die(self,
+                                  server_name: str,
+                                  folder_name: str,
+                                  query: CollectionQuery = None) -> Optional[DtoFolderInfo]:
+        return await self.run_in_executor(self._repository.fetch_folder_or_die, server_name, folder_name, query)
+
+    async def fetch_node_names(self, server_name: str, query: CollectionQuery = None) -> Union[List[str], Page]:
+        return self._repository.fetch_node_names(server_name, query)
+
+    async def fetch_node_or_default(self, server_name: str, host: str) -> Optional[DtoNodeInfo]:
+        return self._repository.fetch_node_or_default(server_name, host)
+
+    async def fetch_node_details_or_die(self, server_name: str, host: str) -> DtoNodeInfo:
+        return await self.run_in_executor(self._repository.fetch_node_details_or_die, server_name, host)
+
+    async def fetch_node_stats(self, server_name: str, query: CollectionQuery = None) -> Union[dict, Page]:
+        return await self.run_in_executor(self._repository.fetch_node_stats, server_name, query)
+
+    async def fetch_host_or_default(self, server_name: str, host_name: str) -> Optional[DtoHostInfo]:
+        return await self.run_in_executor(self._repository.fetch_host_or_default, server_name, host_name)
+
+    async def fetch_hosts(self, server_name: str, node_group: str = None) -> List[DtoHostInfo]:
+        return await self.run_in_executor(self._repository.fetch_hosts, server_name, node_group)
+
+    async def fetch_batch(self, lookups: List[dict]) -> Dict[str, dict]:
+        return await self.run_in_executor(self._repository.fetch_batch, lookups)
@@ -1,17 +1,32 @@
 from abc import ABC
-from concurrent.futures import Future
+from concurrent.futures import Future, ThreadPoolExecutor
 from datetime import datetime
 from enum import Enum
 from logging import Logger
 from threading import Lock
-from typing import Final, Dict, Optional, List
+from typing import TYPE_CHECKING, Final, Dict, Optional, List, Tuple, Union
 from uuid import uuid4
-from controlm.model import CtmDefTable
-from controlm.services import CtmXmlParser, CtmCsvParser
-from controlm.services.dto import map_server_infos_from_ctm_model, DtoServerInfo, DtoHostInfo
+from controlm.model import CtmDefTable, CtmDefTableItem, CtmSimpleFolder, CtmSmartFolder
+from controlm.services.ctm_change_feed import CtmChangeFeed
+from controlm.services.ctm_csv_parser import CtmCsvParser
+from controlm.services.ctm_variable_index import CtmVariableIndex
+from controlm.services.dto import map_server_infos_from_ctm_model, map_folder_info_from_ctm_model, \
+    append_folder_info_to_server_infos, folder_sort_key, build_stats_cube, DtoServerInfo, DtoHostInfo, \
+    DtoHostInventory, DtoFolderInfo
 from corelib.caching import CacheStore
+from corelib.events import EventBus
 from corelib.logging import create_console_logger
-from corelib.threading import TaskRunner, TaskMetaData
+from corelib.querying import AggregateCube
+from corelib.threading import TaskRunner, TaskMetaData, TaskPriority, BoundedPipeline, PeriodicJob, task_executor, \
+    create_schedule, CPU_EXECUTOR
+if TYPE_CHECKING:
+    from controlm.services.ctm_load_forecast import CtmLoadForecast
+    from controlm.services.ctm_schedule_calendar import CtmScheduleCalendar
+
+
+DEFAULT_XML_PATH: Final = './resources/PROD_CTM.all.20220803.xml'
+DEFAULT_CSV_PATH: Final = './resources/PROD_CTM.Nodes.csv'
+MAX_SCHEDULE_CALENDAR_YEARS: Final = 4
 
 
 class CtmCacheManagerKeys:
@@ -22,12 +37,129 @@ class CtmCacheManagerKeys:
     CACHE_POPULATE_END: Final = f"{__name__}.cache.populate.end"
     CACHE_POPULATE_DURATION: Final = f"{__name__}.cache.populate.duration"
     CACHE_TIMESTAMP: Final = f"{__name__}.cache.timestamp"
+    CACHE_GENERATION: Final = f"{__name__}.cache.generation"
+    CACHE_POPULATE_TASK: Final = f"{__name__}.cache.populate.task"
+    CACHE_REFRESH_JOB: Final = 'cache_refresh'
 
     CONTROL_M_ALL_FOLDERS = f"{__name__}.cache.controlm.folders.all"
     CONTROL_M_ALL_FOLDERS_DTO = f"{__name__}.cache.controlm.folders.all.dto"
+    CONTROL_M_SORTED_FOLDERS = f"{__name__}.cache.controlm.folders.all.sorted"
     CONTROL_M_SERVERS = f"{__name__}.cache.controlm.servers"
     CONTROL_M_SERVER_INFOS = f"{__name__}.cache.controlm.server.infos"
     CONTROL_M_HOST_INFOS = f"{__name__}.cache.controlm.hosts.all"
+    CONTROL_M_FOLDER_INDEX = f"{__name__}.cache.controlm.folders.index"
+    CONTROL_M_HOST_INDEX = f"{__name__}.cache.controlm.hosts.index"
+    CONTROL_M_HOST_GROUP_INDEX = f"{__name__}.cache.controlm.hosts.groups.index"
+    CONTROL_M_STATS_CUBE = f"{__name__}.cache.controlm.stats.cube"
+    CONTROL_M_COMPILED_DEFINITIONS = f"{__name__}.cache.controlm.definitions.compiled"
+    CONTROL_M_VARIABLE_INDEX = f"{__name__}.cache.controlm.variables.index"
+
+
+class CtmCacheManagerEvents:
+
+    REFRESH_STARTED: Final = 'refresh.started'
+    REFRESH_PROGRESS: Final = 'refresh.progress'
+    REFRESH_COMPLETED: Final = 'refresh.completed'
+    REFRESH_FAILED: Final = 'refresh.failed'
+    GENERATION_PUBLISHED: Final = 'generation.published'
+
+
+def index_folders_by_name(server_infos: Dict[str, DtoServerInfo]) -> Dict[str, Dict[str, List[DtoFolderInfo]]]:
+    """
+    :return: The folders of each server by name. Names are expected to be unique per server, but are not enforced.
+    """
+    index: Dict[str, Dict[str, List[DtoFolderInfo]]] = {}
+    for server_name, server_info in server_infos.items():
+        folders = index.setdefault(server_name, {})
+        for folder in server_info.folders:
+            folders.setdefault(folder.name, []).append(folder)
+    return index
+
+
+def def_table_item_sort_key(item: CtmDefTableItem) -> Tuple[str, str]:
+    return item.data_center or '', getattr(item, 'folder_name', None) or ''
+
+
+@task_executor(CPU_EXECUTOR)
+def load_ctm_sources(
+        xml_path: str,
+        csv_path: str,
+        queue_size: int = 256,
+        logger: Logger = None) -> Tuple[DtoHostInventory, CtmDefTable, Dict[str, DtoServerInfo]]:
+    """
+    Loads the node CSV and the definitions XML concurrently. Folders are streamed from the XML parser to the DTO
+    mapper and the server index builder through bounded queues, so parsing and mapping overlap.
+    Module-level, so that it can run in a process executor.
+    :return: Tuple of the indexed host infos, the definition table and the mapped server infos.
+    """
+    logger = logger or create_console_logger(__name__)
+    def_table = CtmDefTable()
+    mapped: Dict[str, DtoServerInfo] = {}
+
+    def map_def_table_item(item: CtmDefTableItem) -> Optional[DtoFolderInfo]:
+        def_table.items.append(item)
+        if isinstance(item, CtmSimpleFolder) or isinstance(item, CtmSmartFolder):
+            return map_folder_info_from_ctm_model(item, logger=logger)
+        logger.warning(f"Cannot map item ({item}). Tag '{item.tag_name}' is not supported. Skipping...")
+        return None
+
+    # Imported here, so that lxml is only loaded by processes that populate the cache.
+    from controlm.services.ctm_xml_parser import CtmXmlParser
+
+    csv_parser = CtmCsvParser()
+    xml_parser = CtmXmlParser()
+    with ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"{__name__}.csv") as csv_executor:
+        node_ids_future = csv_executor.submit(csv_parser.parse_host_inventory, csv_path)
+        pipeline = BoundedPipeline(
+            identifier=f"{__name__}.pipeline",
+            queue_size=queue_size,
+            logger=logger)
+        pipeline.run(
+            xml_parser.iter_def_table_items(xml_path),
+            map_def_table_item,
+            sink=lambda dto_folder: append_folder_info_to_server_infos(mapped, dto_folder, logger=logger)
+        )
+        node_ids = node_ids_future.result()
+    return node_ids, def_table, mapped
+
+
+class _CompiledDefinitions:
+    """
+    The schedule calendars and the load forecast of one generation's definitions, compiled on first use. Cached
+    under a single key, so that a calendar and the forecast read together always come from the same generation.
+    """
+
+    def __init__(self, def_table: CtmDefTable, host_index: Dict[Tuple[str, str], DtoHostInfo], logger: Logger):
+        self.def_table: CtmDefTable = def_table
+        self.host_index: Dict[Tuple[str, str], DtoHostInfo] = host_index
+        self.logger: Logger = logger
+        self.schedule_calendars: Dict[int, 'CtmScheduleCalendar'] = {}
+        self.load_forecast: Optional['CtmLoadForecast'] = None
+        self.schedule_calendar_lock: Lock = Lock()
+        self.load_forecast_lock: Lock = Lock()
+
+    def get_schedule_calendar(self, year: int) -> 'CtmScheduleCalendar':
+        calendars = self.schedule_calendars
+        schedule_calendar = calendars.get(year)
+        if schedule_calendar is None:
+            with self.schedule_calendar_lock:
+                schedule_calendar = calendars.get(year)
+                if schedule_calendar is None:
+                    # Imported here, so that NumPy is only loaded by processes that answer calendar queries.
+                    from controlm.services.ctm_schedule_calendar import CtmScheduleCalendar
+                    schedule_calendar = CtmScheduleCalendar(self.def_table, year, logger=self.logger)
+                    if len(calendars) >= MAX_SCHEDULE_CALENDAR_YEARS:
+                        calendars.pop(next(iter(calendars)))
+                    calendars[year] = schedule_calendar
+        return schedule_calendar
+
+    def get_load_forecast(self) -> 'CtmLoadForecast':
+        if self.load_forecast is None:
+            with self.load_forecast_lock:
+                if self.load_forecast is None:
+                    from controlm.services.ctm_load_forecast import CtmLoadForecast
+                    self.load_forecast = CtmLoadForecast(self.def_table, self.host_index, logger=self.logger)
+        return self.load_forecast
 
 
 class CtmCacheManagerState (Enum):
@@ -43,16 +175,28 @@ class CtmCacheManager (ABC):
                  identifier: str = f"{__name__}_{uuid4()}",
                  cache: CacheStore = None,
                  task_runner: TaskRunner = None,
+                 xml_path: str = None,
+                 csv_path: str = None,
+                 pipeline_queue_size: int = 256,
+                 sources_executor: Optional[str] = None,
+                 populate_timeout: Optional[float] = None,
+                 event_bus: EventBus = None,
+                 change_feed_generations: Optional[int] = None,
                  logger: Logger = None):
         self._identifier: str = identifier
+        self._xml_path: str = xml_path or DEFAULT_XML_PATH
+        self._csv_path: str = csv_path or DEFAULT_CSV_PATH
+        self._pipeline_queue_size: int = pipeline_queue_size
+        self._sources_executor: Optional[str] = sources_executor
+        self._populate_timeout: Optional[float] = populate_timeout
         self._logger = logger or create_console_logger(__name__)
         if cache is None:
             self._logger.warning('Cache argument is None. Creating new cache instance.')
         self._cache: CacheStore = cache or CacheStore()
         self._task_runner: TaskRunner = task_runner or TaskRunner()
-        self._cache_lock: Lock = Lock()
+        self._event_bus: EventBus = event_bus or EventBus(logger=self._logger)
+        self._change_feed: CtmChangeFeed = CtmChangeFeed(change_feed_generations, logger=self._logger)
         self._cache_process_lock: Lock = Lock()
-        self._cache_task: Optional[Future] = None
         self._logger.info(f"Cache manager '{self.identifier}' initialized.")
 
     @property
@@ -71,6 +215,25 @@ class CtmCacheManager (ABC):
     def cache(self) -> CacheStore:
         return self._cache
 
+    @property
+    def event_bus(self) -> EventBus:
+        """
+        Publishes the CtmCacheManagerEvents of cache refreshes.
+        """
+        return self._event_bus
+
+    @property
+    def change_feed(self) -> CtmChangeFeed:
+        return self._change_feed
+
+    @property
+    def xml_path(self) -> str:
+        return self._xml_path
+
+    @property
+    def csv_path(self) -> str:
+        return self._csv_path
+
     @property
     def cache_state(self) -> CtmCacheManagerState:
         return self._cache.get_item(CtmCacheManagerKeys.CACHE_STATE) or CtmCacheManagerState.UNKNOWN
@@ -91,6 +254,22 @@ class CtmCacheManager (ABC):
             return self._cache.get_item(CtmCacheManagerKeys.CACHE_POPULATE_DURATION)
         return None
 
+    @property
+    def cache_generation(self) -> int:
+        """
+        Number of data sets published so far. Increases every time a populate completes, so anything derived from
+        the cached data can be keyed by it.
+        """
+        return self._cache.get_item(CtmCacheManagerKeys.CACHE_GENERATION) or 0
+
+    @property
+    def has_cache_generation(self) -> bool:
+        """
+        Whether a generation has been published. The getters serve the latest one, including while the next is
+        populated and after a populate fails.
+        """
+        return self.cache_generation > 0
+
     @property
     def is_cache_corrupt(self) -> bool:
         return self.cache_error is not None
@@ -109,18 +288,46 @@ class CtmCacheManager (ABC):
             CtmCacheManagerKeys.CACHE_STATE: CtmCacheManagerState.PROGRESS
         })
         self.logger.info(f"[{self.identifier}] Caching has started.")
+        self._event_bus.publish(CtmCacheManagerEvents.REFRESH_STARTED, {'generation': self.cache_generation})
 
-    def set_caching_complete(self, node_ids: List[DtoHostInfo], def_table: CtmDefTable) -> None:
-        mapped = map_server_infos_from_ctm_model(def_table, self.logger)
-        data_center_keys = list(mapped.keys())
+    def set_caching_complete(self,
+                             node_ids: Union[List[DtoHostInfo], DtoHostInventory],
+                             def_table: CtmDefTable,
+                             mapped: Dict[str, DtoServerInfo] = None) -> None:
+        if mapped is None:
+            mapped = map_server_infos_from_ctm_model(def_table, self.logger)
+        # Presorted once per generation, so that repository pages are found by binary search.
+        for server_info in mapped.values():
+            server_info.folders.sort(key=folder_sort_key)
+        sorted_items = sorted(def_table.items, key=def_table_item_sort_key)
+        self._publish_progress('indexing', servers=len(mapped), hosts=len(node_ids))
+        data_center_keys = sorted(mapped.keys())
+        inventory = node_ids if isinstance(node_ids, DtoHostInventory) else DtoHostInventory(node_ids)
+        generation = self.cache_generation + 1
+        stats_cube = build_stats_cube(mapped)
+        variable_index = CtmVariableIndex(def_table, logger=self._logger)
+        # Computed before the generation is published, but committed only once it is, so that the feed never
+        # records a generation that failed to publish.
+        pending_changes = self._change_feed.prepare(generation, def_table)
         self.cache.set_items_from_dict({
             CtmCacheManagerKeys.CONTROL_M_ALL_FOLDERS: def_table,
             CtmCacheManagerKeys.CONTROL_M_ALL_FOLDERS_DTO: mapped,
-            CtmCacheManagerKeys.CONTROL_M_HOST_INFOS: node_ids,
+            CtmCacheManagerKeys.CONTROL_M_SORTED_FOLDERS: sorted_items,
+            CtmCacheManagerKeys.CONTROL_M_HOST_INFOS: inventory.hosts,
+            CtmCacheManagerKeys.CONTROL_M_FOLDER_INDEX: index_folders_by_name(mapped),
+            CtmCacheManagerKeys.CONTROL_M_HOST_INDEX: inventory.by_host,
+            CtmCacheManagerKeys.CONTROL_M_HOST_GROUP_INDEX: inventory.by_group,
+            CtmCacheManagerKeys.CONTROL_M_STATS_CUBE: stats_cube,
+            CtmCacheManagerKeys.CONTROL_M_COMPILED_DEFINITIONS: _CompiledDefinitions(def_table, inventory.by_host,
+                                                                                     self._logger),
+            CtmCacheManagerKeys.CONTROL_M_VARIABLE_INDEX: variable_index,
             CtmCacheManagerKeys.CONTROL_M_SERVERS: data_center_keys,
             CtmCacheManagerKeys.CACHE_STATE: CtmCacheManagerState.COMPLETE,
+            CtmCacheManagerKeys.CACHE_GENERATION: generation,
         })
-        self.logger.info(f"[{self.identifier}] Caching complete.")
+        self._change_feed.commit(pending_changes)
+        self.logger.info(f"[{self.identifier}] Caching complete. Generation {generation} published.")
+        self._event_bus.publish(CtmCacheManagerEvents.GENERATION_PUBLISHED, {'generation': generation})
 
     def set_caching_failed(self, error: any):
         self.cache.set_items_from_dict({
@@ -128,6 +335,7 @@ class CtmCacheManager (ABC):
             CtmCacheManagerKeys.CACHE_STATE: CtmCacheManagerState.FAULT
         })
         self.logger.error(f"[{self.identifier}] Caching has failed: {error}.")
+        self._event_bus.publish(CtmCacheManagerEvents.REFRESH_FAILED, {'error': str(error)})
 
     def set_caching_stats(self, start: datetime, end: datetime) -> None:
         second_diff = (end - start).total_seconds()
@@ -142,25 +350,34 @@ class CtmCacheManager (ABC):
 
     def populate_cache(self, *args, **kwargs):
         self.logger.debug(f"[{self.identifier}] Populate cache invoked with *args={args} and **kwargs={kwargs}")
-        task_meta: TaskMetaData = kwargs['task_meta']
+        self._populate_cache(kwargs['task_meta'], self._sources_executor)
+
+    def preload_cache(self) -> None:
+        """
+        Populates the cache in the calling thread, loading the sources inline instead of in an executor, so that no
+        worker threads or processes exist afterwards - e.g. before forking server workers.
+        """
+        self._populate_cache(TaskMetaData(description='Preload Control-M cache'), None)
+
+    def _populate_cache(self, task_meta: TaskMetaData, sources_executor: Optional[str]) -> None:
         task_meta.invalidate_thread()
-        with self._cache_process_lock:
-            if self.is_populating_cache:
-                self.logger.warning(f"[{self.identifier}] Already running cache initialization. "
-                                    f"Subsequent calls will be ignored.")
-                return
+        if not self._cache_process_lock.acquire(blocking=False):
+            self.logger.warning(f"[{self.identifier}] Already running cache initialization. "
+                                f"Subsequent calls will be ignored.")
+            return
+        try:
             self.set_caching_in_progress()
             date_start = datetime.now()
 
-            csv_parser = CtmCsvParser()
-
-            parser = CtmXmlParser()
             try:
-                node_ids = csv_parser.parse_node_ids()
-                def_table = parser.parse_xml('./resources/PROD_CTM.all.20220803.xml')
-                self.set_caching_complete(node_ids, def_table)
+                self._publish_progress('loading')
+                node_ids, def_table, mapped = self._load_sources(sources_executor)
+                task_meta.cancellation_token.raise_if_cancelled()
+                self._publish_progress('loaded', items=len(def_table.items))
+                self.set_caching_complete(node_ids, def_table, mapped)
             except BaseException as ex:
                 self.set_caching_failed(ex)
+                raise
             finally:
                 date_end = datetime.now()
                 self.set_caching_stats(
@@ -168,24 +385,128 @@ class CtmCacheManager (ABC):
                     end=date_end
                 )
                 task_meta.set_finished(date_end)
-                self._cache_task = None
-
-    def schedule_populate_cache(self) -> Optional[Future]:
-        with self._cache_lock:
-            if self.is_populating_cache:
-                self.logger.warning("Already running cache initialization. Returning existing task...")
-                return self._cache_task
-            self.logger.info("Scheduling cache initialization task...")
-            self._cache_task = self.task_runner.schedule_task(
-                self.populate_cache,
+            self._event_bus.publish(CtmCacheManagerEvents.REFRESH_COMPLETED, {
+                'generation': self.cache_generation,
+                'duration': self.cache_populate_duration,
+            })
+        finally:
+            self._cache_process_lock.release()
+
+    def _publish_progress(self, stage: str, **counts) -> None:
+        self._event_bus.publish(CtmCacheManagerEvents.REFRESH_PROGRESS, {'stage': stage, **counts})
+
+    def load_sources(self) -> Tuple[DtoHostInventory, CtmDefTable, Dict[str, DtoServerInfo]]:
+        return self._load_sources(self._sources_executor)
+
+    def _load_sources(self, sources_executor: Optional[str]) -> Tuple[DtoHostInventory, CtmDefTable,
+                                                                      Dict[str, DtoServerInfo]]:
+        if sources_executor:
+            self.logger.info(f"[{self.identifier}] Loading sources in executor '{sources_executor}'...")
+            return self.task_runner.schedule_task_on(
+                sources_executor,
+                load_ctm_sources,
+                self.xml_path,
+                self.csv_path,
+                self._pipeline_queue_size
+            ).result()
+        return load_ctm_sources(self.xml_path, self.csv_path, self._pipeline_queue_size, logger=self.logger)
+
+    def schedule_populate_cache(self, priority: int = TaskPriority.NORMAL) -> Optional[Future]:
+        self.logger.info("Scheduling cache initialization task...")
+        return self.task_runner.schedule_task(
+            self.populate_cache,
+            task_meta=TaskMetaData(
+                description='Populate Control-M cache',
+                priority=priority,
+                coalesce_key=CtmCacheManagerKeys.CACHE_POPULATE_TASK,
+                timeout=self._populate_timeout,
             )
-            return self._cache_task
+        )
+
+    def create_refresh_job(self,
+                           interval: float = None,
+                           cron: str = None,
+                           jitter: float = 0.0,
+                           backoff_base: float = 30.0,
+                           backoff_max: float = 3600.0) -> PeriodicJob:
+        """
+        Creates the periodic cache refresh job. It shares the coalescing key of ``schedule_populate_cache``, so a
+        scheduled refresh is skipped while a manually triggered one is still running, and fails with the
+        TaskTimeoutException of a populate still running past its deadline.
+        """
+        return PeriodicJob(
+            CtmCacheManagerKeys.CACHE_REFRESH_JOB,
+            self.populate_cache,
+            create_schedule(interval=interval, cron=cron),
+            jitter=jitter,
+            backoff_base=backoff_base,
+            backoff_max=backoff_max,
+            coalesce_key=CtmCacheManagerKeys.CACHE_POPULATE_TASK,
+            timeout=self._populate_timeout,
+        )
 
     def get_cached_server_names(self) -> List[str]:
-        return self.cache.get_item(CtmCacheManagerKeys.CONTROL_M_SERVERS) if self.is_cache_ready else []
+        return self.cache.get_item(CtmCacheManagerKeys.CONTROL_M_SERVERS) if self.has_cache_generation else []
 
     def get_cached_server_infos_dto(self) -> Dict[str, DtoServerInfo]:
-        return self.cache.get_item(CtmCacheManagerKeys.CONTROL_M_ALL_FOLDERS_DTO) if self.is_cache_ready else {}
+        return self.cache.get_item(CtmCacheManagerKeys.CONTROL_M_ALL_FOLDERS_DTO) if self.has_cache_generation else {}
+
+    def get_cached_sorted_def_table_items(self) -> List[CtmDefTableItem]:
+        """
+        :return: The items of the cached definitions, sorted by ``def_table_item_sort_key``.
+        """
+        return self.cache.get_item(CtmCacheManagerKeys.CONTROL_M_SORTED_FOLDERS) if self.has_cache_generation else []
 
     def get_cached_host_infos_dto(self) -> List[DtoHostInfo]:
-        return self.cache.get_item(CtmCacheManagerKeys.CONTROL_M_HOST_INFOS) if self.is_cache_ready else []
\ No newline at end of file
+        return self.cache.get_item(CtmCacheManagerKeys.CONTROL_M_HOST_INFOS) if self.has_cache_generation else []
+
+    def get_cached_folder_index(self) -> Dict[str, Dict[str, List[DtoFolderInfo]]]:
+        return self.cache.get_item(CtmCacheManagerKeys.CONTROL_M_FOLDER_INDEX) if self.has_cache_generation else {}
+
+    def get_cached_host_index(self) -> Dict[Tuple[str, str], DtoHostInfo]:
+        return self.cache.get_item(CtmCacheManagerKeys.CONTROL_M_HOST_INDEX) if self.has_cache_generation else {}
+
+    def get_cached_host_group_index(self) -> Dict[Tuple[str, str], List[DtoHostInfo]]:
+        return self.cache.get_item(CtmCacheManagerKeys.CONTROL_M_HOST_GROUP_INDEX) if self.has_cache_generation else {}
+
+    def get_cached_stats_cube(self) -> Optional[AggregateCube]:
+        return self.cache.get_item(CtmCacheManagerKeys.CONTROL_M_STATS_CUBE) if self.has_cache_generation else None
+
+    def get_cached_variable_index(self) -> Optional[CtmVariableIndex]:
+        return self.cache.get_item(CtmCacheManagerKeys.CONTROL_M_VARIABLE_INDEX) if self.has_cache_generation else None
+
+    def get_cached_schedule_calendar(self, year: int) -> Optional['CtmScheduleCalendar']:
+        """
+        The schedule calendar of the cached definitions for a year, compiled on first use and kept until the next
+        generation is published. At most MAX_SCHEDULE_CALENDAR_YEARS years are kept; the earliest compiled goes
+        first.
+        :return: The calendar, or None until a generation is published.
+        """
+        compiled = self._get_compiled_definitions()
+        return compiled.get_schedule_calendar(year) if compiled else None
+
+    def get_cached_load_forecast(self) -> Optional['CtmLoadForecast']:
+        """
+        The intraday load forecast of the cached definitions, expanded on first use and kept until the next
+        generation is published.
+        :return: The forecast, or None until a generation is published.
+        """
+        compiled = self._get_compiled_definitions()
+        return compiled.get_load_forecast() if compiled else None
+
+    def get_cached_load_forecast_and_calendar(self, year: int) -> Tuple[Optional['CtmLoadForecast'],
+                                                                        Optional['CtmScheduleCalendar']]:
+        """
+        The load forecast and the schedule calendar for a year of the same generation, so that the calendar's jobs
+        line up with the forecast's even while a refresh publishes the next one.
+        :return: The forecast and the calendar, or None for both until a generation is published.
+        """
+        compiled = self._get_compiled_definitions()
+        if compiled is None:
+            return None, None
+        return compiled.get_load_forecast(), compiled.get_schedule_calendar(year)
+
+    def _get_compiled_definitions(self) -> Optional[_CompiledDefinitions]:
+        if not self.has_cache_generation:
+            return None
+        return self.cache.get_item(CtmCacheManagerKeys.CONTROL_M_COMPILED_DEFINITIONS)
@@ -0,0 +1,211 @@
+from abc import ABC
+from collections import deque
+from logging import Logger
+from threading import Lock
+from typing import Deque, Dict, Final, Iterable, List, Optional, Tuple
+from uuid import uuid4
+from controlm.model import CtmBaseObject, CtmDefTable, CtmSimpleFolder, CtmSmartFolder
+from corelib.logging import create_console_logger
+from corelib.utils import repr_hash, unique_names
+
+
+DEFAULT_CHANGE_FEED_GENERATIONS: Final = 16
+
+EntityKey = Tuple[Optional[str], ...]
+# The hashes of an entity before and after a generation; None where it did not exist.
+HashChange = Tuple[Optional[bytes], Optional[bytes]]
+
+
+def object_state(obj: CtmBaseObject, skip: Iterable[str] = ()) -> dict:
+    """
+    :return: The attributes of a model object that are set, in declaration order, with lists of child objects as
+    lists of their states.
+    """
+    # Unset attributes are most of a job's, so leaving them out more than halves the repr to hash.
+    return {name: [object_state(child) if isinstance(child, CtmBaseObject) else child for child in value]
+            if value.__class__ is list else value
+            for name, value in vars(obj).items() if value is not None and name not in skip}
+
+
+def digest_def_table(def_table: CtmDefTable) -> Tuple[Dict[EntityKey, bytes], Dict[EntityKey, bytes]]:
+    """
+    :return: The content hash of each folder - without its jobs - by (server, folder), and of each job by
+    (server, folder, job). Repeated names are numbered, as in 'NAME#2'.
+    """
+    folders: Dict[EntityKey, bytes] = {}
+    jobs: Dict[EntityKey, bytes] = {}
+    folder_items = [item for item in def_table.items if isinstance(item, (CtmSimpleFolder, CtmSmartFolder))]
+    folder_names: Dict[Optional[str], List[str]] = {}
+    for item in folder_items:
+        folder_names.setdefault(item.data_center, []).append(item.folder_name)
+    unique_folder_names = {server: iter(unique_names(names)) for server, names in folder_names.items()}
+    for item in folder_items:
+        folder_key = (item.data_center, next(unique_folder_names[item.data_center]))
+        folders[folder_key] = repr_hash(object_state(item, skip=('jobs',)))
+        for job_name, job in zip(unique_names(job.job_name for job in item.jobs), item.jobs):
+            jobs[(*folder_key, job_name)] = repr_hash(object_state(job))
+    return folders, jobs
+
+
+def _hash_changes(old: Dict[EntityKey, bytes], new: Dict[EntityKey, bytes]) -> Dict[EntityKey, HashChange]:
+    changes = {key: (old_hash, new.get(key)) for key, old_hash in old.items() if new.get(key) != old_hash}
+    changes.update((key, (None, new_hash)) for key, new_hash in new.items() if key not in old)
+    return changes
+
+
+class CtmGenerationDelta (ABC):
+    """
+    The folders and jobs whose content changed from one cache generation to the next.
+    """
+    __slots__ = ('generation', 'folders', 'jobs')
+
+    def __init__(self, generation: int, folders: Dict[EntityKey, HashChange], jobs: Dict[EntityKey, HashChange]):
+        self.generation: int = generation
+        self.folders: Dict[EntityKey, HashChange] = folders
+        self.jobs: Dict[EntityKey, HashChange] = jobs
+
+
+class CtmPendingGeneration (ABC):
+    """
+    The content hashes of a generation about to be published, and its changes relative to the generation recorded
+    when they were computed; see CtmChangeFeed.prepare.
+    """
+    __slots__ = ('generation', 'previous_generation', 'folder_hashes', 'job_hashes', 'delta')
+
+    def __init__(self,
+                 generation: int,
+                 previous_generation: int,
+                 folder_hashes: Dict[EntityKey, bytes],
+                 job_hashes: Dict[EntityKey, bytes],
+                 delta: Optional[CtmGenerationDelta]):
+        self.generation: int = generation
+        self.previous_generation: int = previous_generation
+        self.folder_hashes: Dict[EntityKey, bytes] = folder_hashes
+        self.job_hashes: Dict[EntityKey, bytes] = job_hashes
+        self.delta: Optional[CtmGenerationDelta] = delta
+
+
+class CtmChangeFeed (ABC):
+    """
+    Records, for each published cache generation, which folders and jobs were added, changed and removed relative
+    to the previous one, and keeps the last ``max_generations`` of these deltas. Clients mirroring the definitions
+    ask for the changes since the generation they last synced, and only need a full resync once it is no longer
+    retained. Only content hashes of the latest generation are kept, besides the deltas.
+    """
+
+    def __init__(self,
+                 max_generations: int = None,
+                 logger: Logger = None):
+        self._identifier: str = f"{__name__}_{uuid4()}"
+        self._logger: Logger = logger or create_console_logger(__name__)
+        self._deltas: Deque[CtmGenerationDelta] = deque(maxlen=max_generations or DEFAULT_CHANGE_FEED_GENERATIONS)
+        self._folder_hashes: Optional[Dict[EntityKey, bytes]] = None
+        self._job_hashes: Optional[Dict[EntityKey, bytes]] = None
+        self._generation: int = 0
+        self._lock: Lock = Lock()
+
+    @property
+    def identifier(self) -> str:
+        return self._identifier
+
+    @property
+    def logger(self) -> Logger:
+        return self._logger
+
+    @property
+    def generation(self) -> int:
+        """
+        The last recorded generation; 0 before the first.
+        """
+        return self._generation
+
+    @property
+    def oldest_generation(self) -> int:
+        """
+        The earliest generation changes can be listed since.
+        """
+        with self._lock:
+            return self._deltas[0].generation - 1 if self._deltas else self._generation
+
+    def prepare(self, generation: int, def_table: CtmDefTable) -> CtmPendingGeneration:
+        """
+        Digests the definitions of a generation about to be published and computes its changes, without recording
+        them, so that the feed is only committed to once the generation is published.
+        """
+        folder_hashes, job_hashes = digest_def_table(def_table)
+        with self._lock:
+            previous_generation = self._generation
+            previous_folder_hashes, previous_job_hashes = self._folder_hashes, self._job_hashes
+        delta = None
+        if previous_folder_hashes is not None and generation == previous_generation + 1:
+            delta = CtmGenerationDelta(generation, _hash_changes(previous_folder_hashes, folder_hashes),
+                                       _hash_changes(previous_job_hashes, job_hashes))
+        return CtmPendingGeneration(generation, previous_generation, folder_hashes, job_hashes, delta)
+
+    def commit(self, pending: CtmPendingGeneration) -> Optional[CtmGenerationDelta]:
+        """
+        Records a prepared generation. Generations that do not directly follow the last recorded one - or that were
+        prepared against another one - start the feed over, as the changes in between are unknown.
+        :return: Its changes relative to the previous generation, or None when there is none to compare with.
+        """
+        delta = pending.delta
+        with self._lock:
+            if delta is not None and pending.previous_generation == self._generation:
+                self._deltas.append(delta)
+            else:
+                delta = None
+                self._deltas.clear()
+            self._folder_hashes, self._job_hashes = pending.folder_hashes, pending.job_hashes
+            self._generation = pending.generation
+        if delta is not None:
+            self.logger.info(f"[{self.identifier}] Generation {pending.generation}: {len(delta.folders)} folder(s) "
+                             f"and {len(delta.jobs)} job(s) changed.")
+        return delta
+
+    def record(self, generation: int, def_table: CtmDefTable) -> Optional[CtmGenerationDelta]:
+        """
+        Prepares and commits the definitions of a newly published generation at once.
+        :return: Its changes relative to the previous generation, or None when there is none to compare with.
+        """
+        return self.commit(self.prepare(generation, def_table))
+
+    def changes_since(self, since: int) -> Optional[dict]:
+        """
+        :return: The net folders and jobs added, changed and removed after generation ``since`` up to the last
+        recorded one - an entity added and removed again is left out - or None when ``since`` is no longer
+        retained and a full resync is needed.
+        :raise ValueError: When ``since`` is negative or after the last recorded generation.
+        """
+        with self._lock:
+            generation = self._generation
+            if since < 0 or since > generation:
+                raise ValueError(f"Generation {since} is not between 0 and the current generation {generation}.")
+            oldest = self._deltas[0].generation - 1 if self._deltas else generation
+            if since < oldest:
+                return None
+            deltas = [delta for delta in self._deltas if delta.generation > since]
+        return {
+            'since': since,
+            'generation': generation,
+            'folders': _net_changes((delta.folders for delta in deltas), ('server', 'folder')),
+            'jobs': _net_changes((delta.jobs for delta in deltas), ('server', 'folder', 'job')),
+        }
+
+
+def _net_changes(deltas: Iterable[Dict[EntityKey, HashChange]], fields: Tuple[str, ...]) -> Dict[str, List[dict]]:
+    # The hash before the first delta an entity appears in, and after the last one.
+    net: Dict[EntityKey, List[Optional[bytes]]] = {}
+    for changes in deltas:
+        for key, (old_hash, new_hash) in changes.items():
+            if key in net:
+                net[key][1] = new_hash
+            else:
+                net[key] = [old_hash, new_hash]
+    result = {'added': [], 'changed': [], 'removed': []}
+    for key in sorted(net, key=lambda k: tuple(part or '' for part in k)):
+        old_hash, new_hash = net[key]
+        if old_hash == new_hash:
+            continue
+        change = 'added' if old_hash is None else 'removed' if new_hash is None else 'changed'
+        result[change].append(dict(zip(fields, key)))
+    return result
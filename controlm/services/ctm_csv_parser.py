@@ -1,34 +1,64 @@
+import csv
+import itertools
+import sys
 from logging import Logger
-from typing import List
+from typing import Final, Iterator, List
 
-from controlm.services.dto import DtoHostInfo
+from controlm.services.dto import DtoHostInfo, DtoHostInventory
+from corelib.compression import open_source
 from corelib.logging import create_console_logger
 
 
+DEFAULT_CSV_PATH: Final = './resources/PROD_CTM.Nodes.csv'
+MIN_NODE_COLUMNS: Final = 4
+
+
 class CtmCsvParser:
 
     def __init__(self,
                  logger: Logger = None):
         self._logger: Logger = logger or create_console_logger(__name__)
 
-    def parse_node_ids(self,
-                       csv_path: str = './resources/PROD_CTM.Nodes.csv',
-                       delimiter: str = '|',
-                       skip_lines_count: int = 2) -> List[DtoHostInfo]:
+    def iter_host_infos(self,
+                        csv_path: str = DEFAULT_CSV_PATH,
+                        delimiter: str = '|',
+                        skip_lines_count: int = 2,
+                        quotechar: str = '"',
+                        encoding: str = 'utf-8') -> Iterator[DtoHostInfo]:
+        """
+        Streams the node export - server, node group and host per row - one row at a time; gzip, bz2 and xz/lzma
+        compressed exports are decompressed while they are read. Rows with fewer than MIN_NODE_COLUMNS columns are
+        skipped. Field values are interned, so the many rows of a server or node group share one string.
+        :param skip_lines_count: Header lines before the first row.
+        """
         try:
-            with open(csv_path) as tmp:
-                lines = tmp.readlines()
-                index = 0
-                results: List[DtoHostInfo] = []
-                for line in lines:
-                    if index >= skip_lines_count:
-                        cols = line.split(sep=delimiter)
-                        if len(cols) > 3:
-                            results.append(DtoHostInfo(
-                                server=cols[0].strip(), group=cols[1].strip(), host=cols[2].strip()))
-                            self._logger.debug(f"{cols[0].strip()}, {cols[1].strip()}, {cols[2].strip()}")
-                    index += 1
-                return results
-        except BaseException as ex:
+            with open_source(csv_path, encoding=encoding, newline='') as source:
+                rows = csv.reader(itertools.islice(source, skip_lines_count, None),
+                                  delimiter=delimiter,
+                                  quotechar=quotechar)
+                intern = sys.intern
+                for row in rows:
+                    if len(row) >= MIN_NODE_COLUMNS:
+                        yield DtoHostInfo(server=intern(row[0].strip()),
+                                          group=intern(row[1].strip()),
+                                          host=intern(row[2].strip()))
+        except Exception as ex:
             self._logger.fatal(ex)
             raise ex
+
+    def parse_host_inventory(self, csv_path: str = DEFAULT_CSV_PATH, **kwargs) -> DtoHostInventory:
+        """
+        Parses the node export and indexes the hosts in the same pass.
+        :param kwargs: Options of ``iter_host_infos``.
+        """
+        inventory = DtoHostInventory()
+        for host_info in self.iter_host_infos(csv_path, **kwargs):
+            inventory.add(host_info)
+        self._logger.debug(f"Parsed {len(inventory)} host(s) from '{csv_path}'.")
+        return inventory
+
+    def parse_node_ids(self, csv_path: str = DEFAULT_CSV_PATH, **kwargs) -> List[DtoHostInfo]:
+        """
+        :param kwargs: Options of ``iter_host_infos``.
+        """
+        return list(self.iter_host_infos(csv_path, **kwargs))
@@ -0,0 +1,277 @@
+import argparse
+import hashlib
+import json
+import sys
+from abc import ABC
+from logging import Logger
+from typing import Dict, Final, Iterator, List, Optional, Tuple
+from uuid import uuid4
+from lxml import etree
+from controlm.services.ctm_xml_parser import CtmXmlParser, CtmXmlParserException, SUPPORTED_DEF_TABLE_ITEM_TYPES
+from corelib.logging import create_console_logger
+from corelib.utils import content_hash, unique_names, DIGEST_SIZE
+
+
+TAG_ATTRIBUTE: Final = '(tag)'
+
+FolderKey = Tuple[Optional[str], str]
+JobKey = Tuple[Optional[str], str, str]
+
+
+def element_attributes(element: etree.ElementBase) -> Dict[str, str]:
+    """
+    Flattens a folder or job element - without the folder's jobs - into attributes named as in the export. Child
+    elements such as variables, calendars and conditions add '<TAG>[<NAME>]', and their attributes
+    '<TAG>[<NAME>].<ATTRIBUTE>'; children without a NAME are numbered per tag, from 1.
+    :return: The attributes by name. The element's own tag is kept as TAG_ATTRIBUTE.
+    """
+    attributes = {TAG_ATTRIBUTE: element.tag}
+    _flatten(element, '', attributes)
+    return attributes
+
+
+def _flatten(element: etree.ElementBase, prefix: str, attributes: Dict[str, str]) -> None:
+    attributes.update((f"{prefix}{name}", value) for name, value in element.attrib.items())
+    numbers: Dict[str, int] = {}
+    for child in element:
+        # Jobs are compared on their own; comments and processing instructions have no string tag.
+        if child.tag == 'JOB' or not isinstance(child.tag, str):
+            continue
+        numbers[child.tag] = numbers.get(child.tag, 0) + 1
+        path = f"{prefix}{child.tag}[{child.get('NAME') or numbers[child.tag]}]"
+        attributes[path] = child.text.strip() if child.text and child.text.strip() else ''
+        _flatten(child, f"{path}.", attributes)
+
+
+def attribute_changes(old: Dict[str, Optional[str]], new: Dict[str, Optional[str]]) -> List[dict]:
+    """
+    :return: The attribute, old and new value of each attribute that differs, by attribute name. Attributes missing
+    on one side have a value of None there.
+    """
+    return [{'attribute': name, 'old': old.get(name), 'new': new.get(name)}
+            for name in sorted(old.keys() | new.keys()) if old.get(name) != new.get(name)]
+
+
+def _jobs(folder: etree.ElementBase) -> Iterator[Tuple[str, etree.ElementBase]]:
+    jobs = [child for child in folder if child.tag == 'JOB']
+    return zip(unique_names(job.get('JOBNAME') for job in jobs), jobs)
+
+
+class _FolderDigest (ABC):
+    """
+    Hashes of a folder: of its own attributes, of each job by name, and of the whole - attributes and jobs in
+    order - so that unchanged folders are skipped without looking at their jobs.
+    """
+    __slots__ = ('attributes_hash', 'tree_hash', 'job_hashes')
+
+    def __init__(self, folder: etree.ElementBase):
+        self.attributes_hash: bytes = content_hash(element_attributes(folder))
+        self.job_hashes: Dict[str, bytes] = {name: content_hash(element_attributes(job)) for name, job in _jobs(folder)}
+        tree = hashlib.blake2b(self.attributes_hash, digest_size=DIGEST_SIZE)
+        tree.update(repr(list(self.job_hashes.items())).encode())
+        self.tree_hash: bytes = tree.digest()
+
+
+class CtmExportDiff (ABC):
+    """
+    The folders and jobs added, removed and changed between two definitions exports. Folders are matched by data
+    center and folder name, jobs by data center, folder and job name; the jobs of added and removed folders are
+    listed as added and removed too. Changed entities list their attribute changes.
+    """
+
+    def __init__(self):
+        self.folders_added: List[dict] = []
+        self.folders_removed: List[dict] = []
+        self.folders_changed: List[dict] = []
+        self.jobs_added: List[dict] = []
+        self.jobs_removed: List[dict] = []
+        self.jobs_changed: List[dict] = []
+        self.folders_unchanged: int = 0
+        self.jobs_unchanged: int = 0
+
+    @property
+    def is_empty(self) -> bool:
+        return not (self.folders_added or self.folders_removed or self.folders_changed
+                    or self.jobs_added or self.jobs_removed or self.jobs_changed)
+
+    def to_dict(self) -> dict:
+        return {
+            'summary': {
+                'foldersAdded': len(self.folders_added),
+                'foldersRemoved': len(self.folders_removed),
+                'foldersChanged': len(self.folders_changed),
+                'foldersUnchanged': self.folders_unchanged,
+                'jobsAdded': len(self.jobs_added),
+                'jobsRemoved': len(self.jobs_removed),
+                'jobsChanged': len(self.jobs_changed),
+                'jobsUnchanged': self.jobs_unchanged,
+            },
+            'folders': {'added': self.folders_added, 'removed': self.folders_removed,
+                        'changed': self.folders_changed},
+            'jobs': {'added': self.jobs_added, 'removed': self.jobs_removed, 'changed': self.jobs_changed},
+        }
+
+
+class CtmExportDiffer (ABC):
+    """
+    Compares two definitions exports while streaming their XML elements, holding content hashes rather than
+    definitions.
+
+    The old export is hashed first. The new export is then hashed and matched against it: unchanged folders are
+    dropped, added ones reported, and for changed ones only the attributes of the folder or jobs whose hashes
+    differ are kept. Whatever is left of the old hashes has been removed. A last pass over the old export compares
+    the attributes of the changed entities, and stops once all have been found. Memory is bounded by the hashes of
+    the old export and the attributes of the changed entities.
+    """
+
+    def __init__(self,
+                 parser: CtmXmlParser = None,
+                 logger: Logger = None):
+        self._identifier: str = f"{__name__}_{uuid4()}"
+        self._logger: Logger = logger or create_console_logger(__name__)
+        self._parser: CtmXmlParser = parser or CtmXmlParser(logger=self._logger)
+
+    @property
+    def identifier(self) -> str:
+        return self._identifier
+
+    @property
+    def logger(self) -> Logger:
+        return self._logger
+
+    @property
+    def parser(self) -> CtmXmlParser:
+        return self._parser
+
+    def diff(self, old_xml_path: str, new_xml_path: str) -> CtmExportDiff:
+        """
+        :param old_xml_path: The export to compare against; may be compressed.
+        :param new_xml_path: The export to compare; may be compressed.
+        :raise CtmXmlParserException: When an export is missing or does not conform to the schema.
+        """
+        result = CtmExportDiff()
+        old_digests: Dict[FolderKey, _FolderDigest] = {key: _FolderDigest(folder)
+                                                       for key, folder in self._iter_folders(old_xml_path)}
+        self.logger.info(f"[{self.identifier}] Hashed {len(old_digests)} folder(s) of {old_xml_path}.")
+
+        pending_folders: Dict[FolderKey, Tuple[dict, dict]] = {}
+        pending_jobs: Dict[JobKey, Tuple[dict, dict]] = {}
+        for key, folder in self._iter_folders(new_xml_path):
+            server, folder_name = key
+            new_digest = _FolderDigest(folder)
+            old_digest = old_digests.pop(key, None)
+            if old_digest is None:
+                result.folders_added.append({'server': server, 'folder': folder_name})
+                result.jobs_added.extend({'server': server, 'folder': folder_name, 'job': name}
+                                         for name in new_digest.job_hashes)
+                continue
+            if old_digest.tree_hash == new_digest.tree_hash:
+                result.folders_unchanged += 1
+                result.jobs_unchanged += len(new_digest.job_hashes)
+                continue
+            if old_digest.attributes_hash != new_digest.attributes_hash:
+                record = {'server': server, 'folder': folder_name}
+                result.folders_changed.append(record)
+                pending_folders[key] = (record, element_attributes(folder))
+            else:
+                result.folders_unchanged += 1
+            for name, job in _jobs(folder):
+                old_hash = old_digest.job_hashes.pop(name, None)
+                if old_hash is None:
+                    result.jobs_added.append({'server': server, 'folder': folder_name, 'job': name})
+                elif old_hash != new_digest.job_hashes[name]:
+                    record = {'server': server, 'folder': folder_name, 'job': name}
+                    result.jobs_changed.append(record)
+                    pending_jobs[(server, folder_name, name)] = (record, element_attributes(job))
+                else:
+                    result.jobs_unchanged += 1
+            result.jobs_removed.extend({'server': server, 'folder': folder_name, 'job': name}
+                                       for name in old_digest.job_hashes)
+
+        for (server, folder_name), old_digest in old_digests.items():
+            result.folders_removed.append({'server': server, 'folder': folder_name})
+            result.jobs_removed.extend({'server': server, 'folder': folder_name, 'job': name}
+                                       for name in old_digest.job_hashes)
+        del old_digests
+
+        if pending_folders or pending_jobs:
+            self._compare_attributes(old_xml_path, pending_folders, pending_jobs)
+        self.logger.info(f"[{self.identifier}] Compared {old_xml_path} with {new_xml_path}: "
+                         f"{result.to_dict()['summary']}.")
+        return result
+
+    def _compare_attributes(self,
+                            old_xml_path: str,
+                            pending_folders: Dict[FolderKey, Tuple[dict, dict]],
+                            pending_jobs: Dict[JobKey, Tuple[dict, dict]]) -> None:
+        folders_with_jobs = {(server, folder_name) for server, folder_name, _ in pending_jobs}
+        for key, folder in self._iter_folders(old_xml_path):
+            pending_folder = pending_folders.pop(key, None)
+            if pending_folder is not None:
+                record, new_attributes = pending_folder
+                record['changes'] = attribute_changes(element_attributes(folder), new_attributes)
+            if key in folders_with_jobs:
+                folders_with_jobs.discard(key)
+                for name, job in _jobs(folder):
+                    pending_job = pending_jobs.pop((*key, name), None)
+                    if pending_job is not None:
+                        record, new_attributes = pending_job
+                        record['changes'] = attribute_changes(element_attributes(job), new_attributes)
+            if not pending_folders and not folders_with_jobs:
+                break
+
+    def _iter_folders(self, xml_path: str) -> Iterator[Tuple[FolderKey, etree.ElementBase]]:
+        # Folder names are only unique per data center, so repeats are numbered per data center.
+        seen: Dict[FolderKey, int] = {}
+        for element in self.parser.iter_def_table_elements(xml_path):
+            if element.tag not in SUPPORTED_DEF_TABLE_ITEM_TYPES:
+                raise CtmXmlParserException(f"Unsupported DEF_TABLE child element {element.tag}")
+            key = (element.get('DATACENTER'), element.get('FOLDER_NAME') or '')
+            seen[key] = seen.get(key, 0) + 1
+            yield (key if seen[key] == 1 else (key[0], f"{key[1]}#{seen[key]}")), element
+
+
+def main(argv: List[str] = None) -> int:
+    """
+    Command line entry point. Prints the differences between two exports and exits with 0 when there are none,
+    1 when there are, and 2 when an export cannot be read - like diff.
+    """
+    arg_parser = argparse.ArgumentParser(description='Compare two Control-M definitions exports.')
+    arg_parser.add_argument('old', help='Path of the export to compare against; may be compressed.')
+    arg_parser.add_argument('new', help='Path of the export to compare; may be compressed.')
+    arg_parser.add_argument('--xsd', default='./resources/Folder.xsd', help='Path to the XSD schema.')
+    arg_parser.add_argument('--json', action='store_true', help='Print the differences as JSON.')
+    arg_parser.add_argument('--summary', action='store_true', help='Only print the number of differences.')
+    args = arg_parser.parse_args(argv)
+    logger = create_console_logger(__name__)
+    try:
+        differ = CtmExportDiffer(CtmXmlParser(xsd_path=args.xsd, logger=logger), logger=logger)
+        result = differ.diff(args.old, args.new)
+    except CtmXmlParserException as ex:
+        print(ex.message, file=sys.stderr)
+        return 2
+    document = result.to_dict()
+    if args.json:
+        if args.summary:
+            document = {'summary': document['summary']}
+        json.dump(document, sys.stdout, indent=2)
+        sys.stdout.write('\n')
+    else:
+        print(' '.join(f"{name}={count}" for name, count in document['summary'].items()))
+        if not args.summary:
+            _print_changes(document)
+    return 0 if result.is_empty else 1
+
+
+def _print_changes(document: dict) -> None:
+    for kind in ('folders', 'jobs'):
+        for change, sign in (('removed', '-'), ('added', '+'), ('changed', '~')):
+            for record in document[kind][change]:
+                path = '/'.join(record[name] or '' for name in ('server', 'folder', 'job') if name in record)
+                print(f"{sign} {path}")
+                for attribute in record.get('changes', []):
+                    print(f"    {attribute['attribute']}: {attribute['old']!r} -> {attribute['new']!r}")
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,320 @@
+from abc import ABC
+from logging import Logger
+from threading import Lock
+from typing import Dict, Final, List, NamedTuple, Optional, Tuple
+from uuid import uuid4
+import numpy as np
+from controlm.model import CtmDefTable, CtmJobData, CtmSimpleFolder, CtmSmartFolder
+from controlm.services.ctm_schedule_calendar import group_sort_key
+from controlm.services.dto import DtoHostInfo
+from corelib.logging import create_console_logger
+
+
+MINUTES_PER_DAY: Final = 1440
+FORECAST_GROUPINGS: Final = ('node', 'group')
+FORECAST_MEASURES: Final = ('eligible', 'runs')
+INTERVAL_UNITS: Final = {'M': 1, 'H': 60, 'D': MINUTES_PER_DAY}
+END_OF_DAY: Final = '>'
+
+
+def parse_ctm_time(value: Optional[str]) -> Optional[int]:
+    """
+    :return: Minutes after midnight of a Control-M HHMM time, or None when it is empty or invalid.
+    """
+    value = (value or '').strip()
+    if len(value) != 4 or not value.isdigit() or int(value[:2]) > 23 or int(value[2:]) > 59:
+        return None
+    return int(value[:2]) * 60 + int(value[2:])
+
+
+def parse_ctm_interval(value: Optional[str]) -> Optional[int]:
+    """
+    :return: Minutes of a Control-M interval - digits followed by M, H or D, minutes if there is no unit, and an
+    optional leading '+' - or None when it is empty, zero or invalid.
+    """
+    value = (value or '').strip().upper().lstrip('+')
+    unit = INTERVAL_UNITS.get(value[-1:], None)
+    digits = value[:-1] if unit is not None else value
+    if not digits.isdigit() or int(digits) == 0:
+        return None
+    return int(digits) * (unit or 1)
+
+
+def format_minute(minute: int) -> str:
+    return f"{minute // 60:02d}:{minute % 60:02d}"
+
+
+def check_forecast_args(slot_minutes: int, by: str) -> None:
+    """
+    :raise ValueError: When the slot size does not divide the day or the grouping is unknown.
+    """
+    if slot_minutes <= 0 or MINUTES_PER_DAY % slot_minutes:
+        raise ValueError(f"Slot minutes must divide {MINUTES_PER_DAY}, got {slot_minutes}.")
+    if by not in FORECAST_GROUPINGS:
+        raise ValueError(f"Unknown grouping '{by}'. Expected one of {list(FORECAST_GROUPINGS)}.")
+
+
+def slot_labels(slot_minutes: int) -> List[str]:
+    return [format_minute(minute) for minute in range(0, MINUTES_PER_DAY, slot_minutes)]
+
+
+class CtmJobTiming (NamedTuple):
+    """
+    The intraday timing of a job, as raw strings. Hashable, so that the many jobs sharing a timing are expanded
+    once.
+    """
+    time_from: Optional[str]
+    time_to: Optional[str]
+    cyclic: bool
+    cyclic_type: Optional[str]
+    interval: Optional[str]
+    interval_sequence: Optional[str]
+    times_sequence: Optional[str]
+
+    @staticmethod
+    def of(job: CtmJobData) -> 'CtmJobTiming':
+        return CtmJobTiming(
+            time_from=job.time_from,
+            time_to=job.time_to,
+            cyclic=job.cyclic == '1',
+            cyclic_type=(job.cyclic_type or '').strip().upper() or None,
+            interval=job.interval,
+            interval_sequence=job.cyclic_interval_sequence,
+            times_sequence=job.cyclic_times_sequence)
+
+    def window(self) -> Tuple[int, int]:
+        """
+        :return: The first minute of the submission window and its length in minutes. Windows without a start begin
+        at midnight, windows without an end or ending with '>' close at the end of the day, and windows ending
+        before they start run past midnight.
+        """
+        start = parse_ctm_time(self.time_from) or 0
+        end = parse_ctm_time(self.time_to) if (self.time_to or '').strip() != END_OF_DAY else None
+        end = MINUTES_PER_DAY - 1 if end is None else end
+        return start, (end - start) % MINUTES_PER_DAY + 1
+
+    def run_offsets(self) -> np.ndarray:
+        """
+        :return: Minutes after the window start of each run within the window: one run at the start, or every
+        interval, the repeated interval sequence or the specific times of cyclic jobs. Intervals are counted from
+        run start to run start, as run durations are not known.
+        """
+        start, length = self.window()
+        if not self.cyclic:
+            return np.zeros(1, dtype=np.int32)
+        if self.cyclic_type == 'S' or (self.cyclic_type is None and self.times_sequence):
+            times = [parse_ctm_time(token) for token in (self.times_sequence or '').split(',')]
+            offsets = np.array(sorted((time - start) % MINUTES_PER_DAY for time in times if time is not None),
+                               dtype=np.int32)
+            return offsets[offsets < length]
+        if self.cyclic_type == 'V' or (self.cyclic_type is None and self.interval_sequence):
+            steps = [parse_ctm_interval(token) for token in (self.interval_sequence or '').split(',')]
+            steps = [step for step in steps if step is not None]
+            if not steps:
+                return np.zeros(1, dtype=np.int32)
+            # One cycle of the sequence, repeated until the window closes.
+            cycle = np.cumsum([0] + steps[:-1])
+            repeats = np.arange(0, length, sum(steps))
+            offsets = (repeats[:, None] + cycle[None, :]).ravel()
+            return offsets[offsets < length].astype(np.int32)
+        step = parse_ctm_interval(self.interval)
+        return np.arange(0, length, step or length, dtype=np.int32)
+
+
+class _Grouping (ABC):
+
+    def __init__(self, keys: List[Tuple[str, Optional[str]]]):
+        self.groups: List[Tuple[str, Optional[str]]] = sorted(set(keys), key=group_sort_key)
+        index = {group: idx for idx, group in enumerate(self.groups)}
+        self.job_groups: np.ndarray = np.array([index[key] for key in keys], dtype=np.int32)
+
+
+class CtmLoadForecast (ABC):
+    """
+    How many jobs are eligible - inside their TIMEFROM/TIMETO submission window - and how many runs start, in each
+    time slot of a day, per node and per host group. Each distinct timing is expanded once into per-minute window
+    and run profiles, jobs index into them, and slot totals per node are a matrix product of the jobs per timing
+    and node with the profiles summed per slot.
+
+    Nodes are the jobs' NODEID. A node that is a host in the host inventory belongs to the host's group; any other
+    node is taken as a host group itself.
+    """
+
+    def __init__(self,
+                 def_table: CtmDefTable,
+                 host_index: Dict[Tuple[str, str], DtoHostInfo] = None,
+                 logger: Logger = None):
+        self._identifier: str = f"{__name__}_{uuid4()}"
+        self._logger: Logger = logger or create_console_logger(__name__)
+        profile_index: Dict[CtmJobTiming, int] = {}
+        windows: List[np.ndarray] = []
+        runs: List[np.ndarray] = []
+        job_profiles: List[int] = []
+        node_keys: List[Tuple[str, Optional[str]]] = []
+        host_index = host_index or {}
+
+        for item in def_table.items:
+            if not isinstance(item, (CtmSimpleFolder, CtmSmartFolder)):
+                continue
+            for job in item.jobs:
+                timing = CtmJobTiming.of(job)
+                idx = profile_index.get(timing)
+                if idx is None:
+                    idx = profile_index[timing] = len(windows)
+                    window, run = self._expand(timing)
+                    windows.append(window)
+                    runs.append(run)
+                job_profiles.append(idx)
+                node_keys.append((item.data_center, job.node_id or getattr(item, 'node_id', None)))
+
+        self._windows: np.ndarray = np.array(windows, dtype=bool).reshape(-1, MINUTES_PER_DAY)
+        self._runs: np.ndarray = np.array(runs, dtype=np.int32).reshape(-1, MINUTES_PER_DAY)
+        self._job_profiles: np.ndarray = np.array(job_profiles, dtype=np.int32)
+        group_keys = [(server, host_index[(server, node)].group if (server, node) in host_index else node)
+                      for server, node in node_keys]
+        self._groupings: Dict[str, _Grouping] = {'node': _Grouping(node_keys), 'group': _Grouping(group_keys)}
+        self._slot_profiles: Dict[int, Tuple[np.ndarray, np.ndarray]] = {}
+        self._totals: Dict[Tuple[int, str], Tuple[np.ndarray, np.ndarray]] = {}
+        self._lock: Lock = Lock()
+        self._logger.info(f"[{self.identifier}] Expanded {len(job_profiles)} job(s) into {len(windows)} "
+                          f"timing profile(s).")
+
+    @property
+    def identifier(self) -> str:
+        return self._identifier
+
+    @property
+    def logger(self) -> Logger:
+        return self._logger
+
+    @property
+    def jobs_count(self) -> int:
+        return len(self._job_profiles)
+
+    @property
+    def window_profiles(self) -> np.ndarray:
+        """
+        The distinct submission windows, one boolean row of MINUTES_PER_DAY minutes each.
+        """
+        return self._windows
+
+    @property
+    def run_profiles(self) -> np.ndarray:
+        """
+        The run starts per minute of each distinct timing, rows matching ``window_profiles``.
+        """
+        return self._runs
+
+    @property
+    def job_profiles(self) -> np.ndarray:
+        return self._job_profiles
+
+    def groups(self, by: str = 'node') -> List[Tuple[str, Optional[str]]]:
+        return self._grouping(by).groups
+
+    def totals(self,
+               slot_minutes: int = 15,
+               by: str = 'node',
+               jobs: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        :param jobs: Boolean mask of the jobs to count, in definition order - e.g. those scheduled on a day. All
+        jobs if None; their totals are computed once per slot size and grouping.
+        :return: The eligible jobs and the run starts of each group (rows, in ``groups`` order) and slot.
+        """
+        if jobs is None:
+            key = (slot_minutes, by)
+            totals = self._totals.get(key)
+            if totals is None:
+                with self._lock:
+                    totals = self._totals.get(key)
+                    if totals is None:
+                        totals = self._totals[key] = self._compute_totals(slot_minutes, by, None)
+            return totals
+        if len(jobs) != self.jobs_count:
+            raise ValueError(f"The job mask has {len(jobs)} entries for {self.jobs_count} jobs.")
+        return self._compute_totals(slot_minutes, by, jobs)
+
+    def heatmap(self,
+                slot_minutes: int = 15,
+                by: str = 'node',
+                server: str = None,
+                node: str = None,
+                jobs: Optional[np.ndarray] = None) -> List[dict]:
+        """
+        :param node: The node, or host group when grouping by group, to select.
+        :return: The server, node or group, and the eligible jobs and run starts of each slot, per group.
+        """
+        eligible, runs = self.totals(slot_minutes, by, jobs)
+        return [{'server': group_server, by: group_name,
+                 'eligible': eligible[idx].tolist(), 'runs': runs[idx].tolist()}
+                for idx, (group_server, group_name) in self._selected(by, server, node)]
+
+    def peaks(self,
+              top: int = 5,
+              slot_minutes: int = 15,
+              by: str = 'node',
+              server: str = None,
+              node: str = None,
+              jobs: Optional[np.ndarray] = None) -> List[dict]:
+        """
+        :return: The ``top`` slots with most eligible jobs - then most run starts - of each group, busiest first.
+        """
+        if top < 0:
+            raise ValueError(f"Top must not be negative, got {top}.")
+        eligible, runs = self.totals(slot_minutes, by, jobs)
+        # Lexicographic order on (-eligible, -runs, slot): lexsort sorts by its last key first.
+        slots = np.arange(eligible.shape[1])
+        results = []
+        for idx, (group_server, group_name) in self._selected(by, server, node):
+            order = np.lexsort((slots, -runs[idx], -eligible[idx]))[:top]
+            results.append({'server': group_server, by: group_name, 'peaks': [
+                {'start': format_minute(int(slot) * slot_minutes),
+                 'end': format_minute((int(slot) + 1) * slot_minutes % MINUTES_PER_DAY),
+                 'eligible': int(eligible[idx, slot]),
+                 'runs': int(runs[idx, slot])}
+                for slot in order if eligible[idx, slot] or runs[idx, slot]]})
+        return results
+
+    def _compute_totals(self,
+                        slot_minutes: int,
+                        by: str,
+                        jobs: Optional[np.ndarray]) -> Tuple[np.ndarray, np.ndarray]:
+        check_forecast_args(slot_minutes, by)
+        grouping = self._groupings[by]
+        slot_windows, slot_runs = self._slot_profile(slot_minutes)
+        usage = np.zeros((len(grouping.groups), len(self._windows)), dtype=np.int64)
+        job_groups, job_profiles = grouping.job_groups, self._job_profiles
+        if jobs is not None:
+            job_groups, job_profiles = job_groups[jobs], job_profiles[jobs]
+        np.add.at(usage, (job_groups, job_profiles), 1)
+        return usage @ slot_windows, usage @ slot_runs
+
+    def _slot_profile(self, slot_minutes: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        :return: Whether each window overlaps each slot, and the run starts of each timing per slot.
+        """
+        profiles = self._slot_profiles.get(slot_minutes)
+        if profiles is None:
+            shape = (len(self._windows), MINUTES_PER_DAY // slot_minutes, slot_minutes)
+            profiles = self._slot_profiles[slot_minutes] = (
+                self._windows.reshape(shape).any(axis=2).astype(np.int64),
+                self._runs.reshape(shape).sum(axis=2, dtype=np.int64))
+        return profiles
+
+    def _grouping(self, by: str) -> _Grouping:
+        check_forecast_args(MINUTES_PER_DAY, by)
+        return self._groupings[by]
+
+    def _selected(self, by: str, server: Optional[str], node: Optional[str]) -> List[Tuple[int, tuple]]:
+        return [(idx, group) for idx, group in enumerate(self._grouping(by).groups)
+                if (server is None or group[0] == server) and (node is None or group[1] == node)]
+
+    @staticmethod
+    def _expand(timing: CtmJobTiming) -> Tuple[np.ndarray, np.ndarray]:
+        start, length = timing.window()
+        minutes = (start + np.arange(length)) % MINUTES_PER_DAY
+        window = np.zeros(MINUTES_PER_DAY, dtype=bool)
+        window[minutes] = True
+        run = np.zeros(MINUTES_PER_DAY, dtype=np.int32)
+        np.add.at(run, (start + timing.run_offsets()) % MINUTES_PER_DAY, 1)
+        return window, run
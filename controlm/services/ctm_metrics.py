@@ -0,0 +1,117 @@
+from abc import ABC
+from datetime import datetime
+from typing import Final, Optional
+from corelib.caching import ResponseCache
+from corelib.events import Event
+from corelib.metrics import MetricsRegistry
+from corelib.threading import TaskRunner
+from controlm.services.ctm_cache_manager import CtmCacheManager, CtmCacheManagerEvents
+
+RESPONSE_SIZE_BUCKETS: Final = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216, 67108864)
+REFRESH_DURATION_BUCKETS: Final = (1.0, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0, 600.0, 1800.0)
+
+
+class CtmMetrics (ABC):
+    """
+    Request, cache and task runner metrics of the REST servers, in a MetricsRegistry. Requests are counted per
+    method, route template and status, with latency and response size histograms; requests served before the first
+    cache generation is published - which get empty results - are counted separately. Refreshes are followed
+    through the cache manager's events. Queue and cache gauges are read when the registry is rendered. Each server
+    process has its own metrics.
+    """
+
+    def __init__(self,
+                 registry: MetricsRegistry,
+                 cache_manager: CtmCacheManager,
+                 task_runner: TaskRunner,
+                 response_cache: ResponseCache):
+        self._registry: MetricsRegistry = registry
+        self._cache_manager: CtmCacheManager = cache_manager
+        self._task_runner: TaskRunner = task_runner
+        self._response_cache: ResponseCache = response_cache
+
+        self._requests = registry.counter(
+            'ctm_http_requests_total', 'HTTP requests by method, route and status.', ('method', 'route', 'status'))
+        self._latency = registry.histogram(
+            'ctm_http_request_duration_seconds', 'Time to the response headers, by method and route.',
+            ('method', 'route'))
+        self._sizes = registry.histogram(
+            'ctm_http_response_size_bytes', 'Sizes of response bodies that are not streamed, by method and route.',
+            ('method', 'route'), buckets=RESPONSE_SIZE_BUCKETS)
+        self._unready = registry.counter(
+            'ctm_http_requests_cache_not_ready_total', 'HTTP requests served before a cache generation was published.',
+            ('route',))
+        self._refreshes = registry.counter(
+            'ctm_cache_refreshes_total', 'Cache refreshes by outcome.', ('outcome',))
+        self._refresh_durations = registry.histogram(
+            'ctm_cache_refresh_duration_seconds', 'Durations of completed cache refreshes.',
+            buckets=REFRESH_DURATION_BUCKETS)
+        self._generation = registry.gauge('ctm_cache_generation', 'Generation of the published cache.')
+        self._generation_age = registry.gauge(
+            'ctm_cache_generation_age_seconds', 'Time since the last cache refresh finished.')
+        self._ready = registry.gauge('ctm_cache_ready', '1 when the cache is ready, 0 otherwise.')
+        self._executor_workers = registry.gauge(
+            'ctm_task_executor_workers', 'Maximum workers of each task runner executor.', ('executor',))
+        self._executor_running = registry.gauge(
+            'ctm_task_executor_running', 'Tasks running in each task runner executor.', ('executor',))
+        self._executor_pending = registry.gauge(
+            'ctm_task_executor_pending', 'Tasks queued for each task runner executor.', ('executor',))
+        self._task_outcomes = registry.gauge(
+            'ctm_task_outcomes', 'Finished tasks by outcome since start.', ('outcome',))
+        self._task_queue_wait = registry.gauge(
+            'ctm_task_queue_wait_seconds', 'Recent queue wait quantiles by task.', ('task', 'quantile'))
+        self._task_run_time = registry.gauge(
+            'ctm_task_run_time_seconds', 'Recent run time quantiles by task.', ('task', 'quantile'))
+        self._response_cache_entries = registry.gauge('ctm_response_cache_entries', 'Cached response bodies.')
+        self._response_cache_bytes = registry.gauge('ctm_response_cache_bytes', 'Size of cached response bodies.')
+        self._response_cache_lookups = registry.gauge(
+            'ctm_response_cache_lookups', 'Response cache lookups by result since start.', ('result',))
+
+        cache_manager.event_bus.add_listener(self._on_cache_event)
+        registry.register_collector(self.collect)
+
+    @property
+    def registry(self) -> MetricsRegistry:
+        return self._registry
+
+    def observe_request(self, method: str, route: str, status: int, duration: float, size: Optional[int]) -> None:
+        self._requests.labels(method, route, str(status)).inc()
+        self._latency.labels(method, route).observe(duration)
+        if size is not None:
+            self._sizes.labels(method, route).observe(size)
+        if not self._cache_manager.has_cache_generation:
+            self._unready.labels(route).inc()
+
+    def collect(self) -> None:
+        cache_manager = self._cache_manager
+        self._generation.set(cache_manager.cache_generation)
+        self._ready.set(1 if cache_manager.is_cache_ready else 0)
+        timestamp = cache_manager.cache_timestamp
+        if timestamp:
+            self._generation_age.set((datetime.now() - timestamp).total_seconds())
+        metrics = self._task_runner.metrics
+        for name, executor in metrics['executors'].items():
+            self._executor_workers.labels(name).set(executor['maxWorkers'])
+            self._executor_running.labels(name).set(executor['running'])
+            self._executor_pending.labels(name).set(executor['pending'])
+        for outcome, count in metrics['totals'].items():
+            self._task_outcomes.labels(outcome).set(count)
+        for task, task_metrics in metrics['tasks'].items():
+            for gauge, snapshot in ((self._task_queue_wait, task_metrics['queueWait']),
+                                    (self._task_run_time, task_metrics['runTime'])):
+                for quantile in ('p50', 'p90', 'p99'):
+                    if snapshot[quantile] is not None:
+                        gauge.labels(task, f"0.{quantile[1:]}").set(snapshot[quantile])
+        stats = self._response_cache.stats
+        self._response_cache_entries.set(stats['entries'])
+        self._response_cache_bytes.set(stats['bytes'])
+        self._response_cache_lookups.labels('hit').set(stats['hits'])
+        self._response_cache_lookups.labels('miss').set(stats['misses'])
+
+    def _on_cache_event(self, event: Event) -> None:
+        if event.type == CtmCacheManagerEvents.REFRESH_COMPLETED:
+            self._refreshes.labels('completed').inc()
+            if event.data.get('duration') is not None:
+                self._refresh_durations.observe(event.data['duration'])
+        elif event.type == CtmCacheManagerEvents.REFRESH_FAILED:
+            self._refreshes.labels('failed').inc()
@@ -1,12 +1,46 @@
 from abc import ABC
+from datetime import date
 from uuid import uuid4
 from logging import Logger
-from typing import Dict, Optional, List
+from typing import TYPE_CHECKING, Any, Callable, Dict, Final, Optional, List, Sequence, Tuple, Union
+from controlm.model import CtmDefTable
 from controlm.services.dto.node_info import DtoNodeInfo
 from controlm.services.dto.host_info import DtoHostInfo
 from corelib.logging import create_console_logger
-from controlm.services import CtmCacheManager
-from controlm.services.dto import DtoServerInfo, DtoFolderInfo
+from corelib.querying import AggregateCube, CollectionQuery, Page
+from controlm.services import CtmCacheManager, CtmCacheManagerKeys
+from controlm.services.ctm_cache_manager import def_table_item_sort_key
+from controlm.services.ctm_variable_index import CtmVariableDefinition, CtmVariableIndex, CtmVariableReference, \
+    variable_key, variable_user_sort_key
+from controlm.services.dto import DtoServerInfo, DtoFolderInfo, folder_sort_key, STATS_CUBE_DIMENSIONS, \
+    STATS_CUBE_MEASURES, STATS_CUBE_DISTINCT_MEASURES
+if TYPE_CHECKING:
+    import numpy as np
+    from controlm.services.ctm_load_forecast import CtmLoadForecast
+
+
+MAX_BATCH_LOOKUPS: Final = 1000
+
+
+def _scheduled_job_sort_key(job: dict) -> Tuple[str, str, str]:
+    return job['server'] or '', job['folder'] or '', job['job'] or ''
+
+
+def _variable_users(entries: Sequence[Union[CtmVariableDefinition, CtmVariableReference]],
+                    query: Optional[CollectionQuery]) -> Union[List[dict], Page]:
+    # Only the records of the requested page are built, so that a page costs the same however many use a variable.
+    if query is None:
+        return [entry.to_dict() for entry in entries]
+    page, next_cursor = query.select_page(entries, key=variable_user_sort_key, presorted=True)
+    records = [query.project(entry.to_dict()) for entry in page]
+    return Page(records, next_cursor) if query.is_paginated else records
+
+
+def _lookup_arg(lookup: dict, name: str) -> str:
+    value = lookup.get(name)
+    if not isinstance(value, str) or not value:
+        raise ValueError(f"Lookup of type '{lookup.get('type')}' requires '{name}'.")
+    return value
 
 
 class CtmRepository (ABC):
@@ -39,11 +73,27 @@ class CtmRepository (ABC):
     def cache_manager(self) -> CtmCacheManager:
         return self._cache_manager
 
-    def fetch_server_names(self) -> List[str]:
-        return self.cache_manager.get_cached_server_names()
+    def fetch_server_names(self, query: CollectionQuery = None) -> Union[List[str], Page]:
+        server_names = self.cache_manager.get_cached_server_names()
+        return query.apply(server_names, presorted=True) if query else server_names
 
-    def fetch_server_aggregate_stats(self) -> Dict[str, DtoServerInfo]:
-        return self.cache_manager.get_cached_server_infos_dto()
+    def fetch_server_aggregate_stats(self, query: CollectionQuery = None) -> Union[Dict[str, DtoServerInfo], Page]:
+        server_infos = self.cache_manager.get_cached_server_infos_dto()
+        return query.apply_mapping(server_infos) if query else server_infos
+
+    def fetch_def_table(self, query: CollectionQuery = None) -> Union[Optional[CtmDefTable], Page]:
+        """
+        :return: The parsed definitions, or a Page of their items when a query is given.
+        """
+        def_table = self.cache_manager.cache.get_item(CtmCacheManagerKeys.CONTROL_M_ALL_FOLDERS)
+        if query is None:
+            return def_table
+        if query.is_paginated:
+            items = self.cache_manager.get_cached_sorted_def_table_items()
+        else:
+            items = def_table.items if def_table else []
+        result = query.apply(items, key=def_table_item_sort_key, presorted=True)
+        return result if isinstance(result, Page) else Page(result)
 
     def fetch_server_info_or_default(self, server_name: str) -> Optional[DtoServerInfo]:
         stats = self.fetch_server_aggregate_stats()
@@ -57,10 +107,220 @@ class CtmRepository (ABC):
             return stats[server_name]
         raise NameError(f"Server '{server_name}' not found.")
 
+    def fetch_server_stats_or_die(self, server_name: str) -> dict:
+        server_info = self.fetch_server_info_or_die(server_name)
+        return {
+            'applicationsCount': len(server_info.application_keys),
+            'subApplicationsCount': len(server_info.sub_application_keys),
+            'hostsCount': len(server_info.node_infos),
+            'foldersCount': len(server_info.folders)
+        }
+
+    def fetch_stats_cube(self,
+                         by: List[str] = None,
+                         where: Dict[str, Optional[str]] = None,
+                         order_by: Optional[str] = None,
+                         top: Optional[int] = None) -> dict:
+        """
+        Job and folder counts broken down by any of STATS_CUBE_DIMENSIONS, read from the cube computed when the cache
+        was populated: rolling up or drilling down is choosing fewer or more ``by`` dimensions, and ``where`` fixes
+        dimensions to a value - None for jobs without one.
+        :param order_by: Measure to sort the cells by, descending; by coordinates if None.
+        :param top: Number of cells to return, all if None.
+        :return: The query, the totals of the slice and its cells.
+        :raise ValueError: When a dimension or measure is unknown.
+        """
+        by, where = list(by or []), dict(where or {})
+        cube = self.cache_manager.get_cached_stats_cube()
+        if cube is None:
+            # Validates the query against an empty cube, so that errors do not depend on the cache state.
+            cube = AggregateCube(STATS_CUBE_DIMENSIONS, STATS_CUBE_MEASURES, STATS_CUBE_DISTINCT_MEASURES).build()
+        cells = cube.cells(by, where, order_by=order_by, top=top)
+        return {
+            'by': by,
+            'where': where,
+            'sort': order_by,
+            'top': top,
+            'total': cube.cell(where),
+            'cells': cells,
+        }
+
+    def fetch_changes_since(self, since: int) -> dict:
+        """
+        The folders and jobs added, changed and removed after cache generation ``since``, for clients that mirror the
+        definitions and last synced at that generation.
+        :return: The net changes up to the current generation, flagged with 'resync' False; or, when ``since`` is too
+        old for the changes to still be known, the oldest generation they are known since, flagged with 'resync' True.
+        :raise ValueError: When ``since`` is negative or after the current generation.
+        """
+        change_feed = self.cache_manager.change_feed
+        changes = change_feed.changes_since(since)
+        if changes is None:
+            return {
+                'since': since,
+                'generation': change_feed.generation,
+                'oldestGeneration': change_feed.oldest_generation,
+                'resync': True,
+            }
+        changes['resync'] = False
+        return changes
+
+    def fetch_variable_names(self, query: CollectionQuery = None) -> Union[List[str], Page]:
+        """
+        :return: The variables and AutoEdit functions defined or referenced in the definitions, sorted.
+        """
+        variable_index = self.cache_manager.get_cached_variable_index()
+        names = variable_index.names if variable_index else []
+        return query.apply(names, presorted=True) if query else names
+
+    def fetch_variable_or_die(self, name: str, server_name: str = None) -> dict:
+        """
+        :param name: The variable, with or without its leading '%%'.
+        :return: The number of folders and jobs defining and referencing the variable, optionally of one server.
+        :raise NameError: When no folder or job defines or references the variable.
+        """
+        variable_index = self._variable_index_or_die(name)
+        return {
+            'variable': variable_key(name),
+            'server': server_name,
+            'definitionsCount': len(variable_index.definitions(name, server_name)),
+            'referencesCount': len(variable_index.references(name, server_name)),
+        }
+
+    def fetch_variable_definitions_or_die(self,
+                                          name: str,
+                                          server_name: str = None,
+                                          query: CollectionQuery = None) -> Union[List[dict], Page]:
+        """
+        :return: Server, folder, job - None for a folder variable - and value of each definition of the variable,
+        optionally of one server, sorted by server, folder and job.
+        :raise NameError: When no folder or job defines or references the variable.
+        """
+        return _variable_users(self._variable_index_or_die(name).definitions(name, server_name), query)
+
+    def fetch_variable_references_or_die(self,
+                                         name: str,
+                                         server_name: str = None,
+                                         query: CollectionQuery = None) -> Union[List[dict], Page]:
+        """
+        :return: Server, folder, job - None for a folder variable - and fields of each folder and job referencing
+        the variable, optionally of one server, sorted by server, folder and job.
+        :raise NameError: When no folder or job defines or references the variable.
+        """
+        return _variable_users(self._variable_index_or_die(name).references(name, server_name), query)
+
+    def _variable_index_or_die(self, name: str) -> CtmVariableIndex:
+        variable_index = self.cache_manager.get_cached_variable_index()
+        if variable_index is None or name not in variable_index:
+            raise NameError(f"Variable '{variable_key(name)}' not found.")
+        return variable_index
+
+    def fetch_jobs_scheduled_on(self,
+                                day: date,
+                                server_name: str = None,
+                                node: str = None,
+                                query: CollectionQuery = None) -> Union[List[dict], Page]:
+        """
+        :return: Server, folder, name and node of the jobs scheduled on the day, optionally of one server or node,
+        sorted by server, folder and name.
+        """
+        schedule_calendar = self.cache_manager.get_cached_schedule_calendar(day.year)
+        jobs = schedule_calendar.jobs_on(day, server_name, node) if schedule_calendar else []
+        jobs.sort(key=_scheduled_job_sort_key)
+        return query.apply(jobs, key=_scheduled_job_sort_key, presorted=True) if query else jobs
+
+    def fetch_busiest_days(self, year: int, server_name: str = None, node: str = None, top: int = 5) -> dict:
+        """
+        :return: The ``top`` days of the year with most scheduled jobs of each server and node, and the named
+        calendars the definitions refer to but the export does not hold.
+        :raise ValueError: When the year or top is invalid.
+        """
+        if not 1 <= year <= 9999:
+            raise ValueError(f"Invalid year {year}.")
+        if top < 0:
+            raise ValueError(f"Top must not be negative, got {top}.")
+        schedule_calendar = self.cache_manager.get_cached_schedule_calendar(year)
+        if schedule_calendar is None:
+            nodes, unresolved = [], []
+        else:
+            nodes, unresolved = schedule_calendar.busiest_days(top, server_name, node), \
+                schedule_calendar.unresolved_calendars
+        return {
+            'year': year,
+            'top': top,
+            'unresolvedCalendars': unresolved,
+            'nodes': nodes,
+        }
+
+    def fetch_load_heatmap(self,
+                           by: str = 'node',
+                           server_name: str = None,
+                           node: str = None,
+                           slot_minutes: int = 15,
+                           day: Optional[date] = None) -> dict:
+        """
+        :param by: 'node' for the jobs' nodes, 'group' for the host groups the nodes belong to.
+        :param day: Only count the jobs scheduled on the day, if given.
+        :return: The jobs eligible to run and the runs starting in each time slot of the day, per node or group.
+        :raise ValueError: When the grouping or slot size is invalid.
+        """
+        from controlm.services.ctm_load_forecast import slot_labels
+        forecast, jobs, unresolved = self._load_forecast(slot_minutes, by, day)
+        return {
+            'by': by,
+            'slotMinutes': slot_minutes,
+            'date': day.isoformat() if day else None,
+            'unresolvedCalendars': unresolved,
+            'slots': slot_labels(slot_minutes),
+            'rows': forecast.heatmap(slot_minutes, by, server_name, node, jobs) if forecast else [],
+        }
+
+    def fetch_load_peaks(self,
+                         by: str = 'node',
+                         server_name: str = None,
+                         node: str = None,
+                         slot_minutes: int = 15,
+                         day: Optional[date] = None,
+                         top: int = 5) -> dict:
+        """
+        :return: The ``top`` time slots with most jobs eligible to run, then most runs starting, per node or group.
+        :raise ValueError: When the grouping, slot size or top is invalid.
+        """
+        if top < 0:
+            raise ValueError(f"Top must not be negative, got {top}.")
+        forecast, jobs, unresolved = self._load_forecast(slot_minutes, by, day)
+        return {
+            'by': by,
+            'slotMinutes': slot_minutes,
+            'date': day.isoformat() if day else None,
+            'top': top,
+            'unresolvedCalendars': unresolved,
+            'rows': forecast.peaks(top, slot_minutes, by, server_name, node, jobs) if forecast else [],
+        }
+
+    def _load_forecast(self,
+                       slot_minutes: int,
+                       by: str,
+                       day: Optional[date]) -> Tuple[Optional['CtmLoadForecast'], Optional['np.ndarray'], List[str]]:
+        # Imported here, so that NumPy is only loaded by processes that answer forecast queries.
+        from controlm.services.ctm_load_forecast import check_forecast_args
+        check_forecast_args(slot_minutes, by)
+        if day is None:
+            return self.cache_manager.get_cached_load_forecast(), None, []
+        # Read together, so that both are of the same generation and the calendar's jobs line up with the forecast's.
+        forecast, schedule_calendar = self.cache_manager.get_cached_load_forecast_and_calendar(day.year)
+        if forecast is None or schedule_calendar is None:
+            return None, None, []
+        return forecast, schedule_calendar.scheduled_on(day), schedule_calendar.unresolved_calendars
+
     def fetch_folders(self,
                       server_name: str,
                       folder_order_methods: List[Optional[str]] = None,
-                      folder_node_ids: List[str] = None) -> List[DtoFolderInfo]:
+                      folder_node_ids: List[str] = None,
+                      query: CollectionQuery = None) -> Union[List[DtoFolderInfo], Page]:
+        """
+        :param query: Fields and page to select. Folders are kept sorted by name, so pages cost no sorting.
+        """
         server_info = self.fetch_server_info_or_die(server_name)
         results = server_info.folders
 
@@ -80,34 +340,37 @@ class CtmRepository (ABC):
             c_after = len(results)
             self.logger.warning(f"[{self.identifier}] fetching folders. Original count = {c_before}. "
                                 f"Filtering by nodes ({folder_node_ids}) count = {c_after}")
-        return results
+        return query.apply(results, key=folder_sort_key, presorted=True) if query else results
 
     def fetch_folder_or_default(self, server_name: str, folder_name: str) -> Optional[DtoFolderInfo]:
-        server_info = self.fetch_server_info_or_default(server_name)
-        if server_info:
-            results = list(filter(lambda folder: folder.folder_name == folder_name, server_info.folders))
+        server_folders = self.cache_manager.get_cached_folder_index().get(server_name)
+        if server_folders is not None:
+            results = server_folders.get(folder_name, [])
             if len(results) > 1:
                 self.logger.warning(f"Server '{server_name}' hosts {len(results)} folders with name '{folder_name}'. "
                                     f"This is not expected")
             return results[0] if len(results) else None
         return None
 
-    def fetch_folder_or_die(self, server_name: str, folder_name: str) -> Optional[DtoFolderInfo]:
-        server_info = self.fetch_server_info_or_default(server_name)
-        if server_info:
-            results = list(filter(lambda folder: folder.folder_name == folder_name, server_info.folders))
+    def fetch_folder_or_die(self,
+                            server_name: str,
+                            folder_name: str,
+                            query: CollectionQuery = None) -> Optional[DtoFolderInfo]:
+        server_folders = self.cache_manager.get_cached_folder_index().get(server_name)
+        if server_folders is not None:
+            results = server_folders.get(folder_name, [])
             if len(results):
                 if len(results) > 1:
                     raise NameError(f"Server '{server_name}' hosts {len(results)} folders with name '{folder_name}'. "
                                     f"This is not expected")
-                return results[0]
+                return query.project(results[0]) if query else results[0]
             raise NameError(f"Folder '{folder_name}' not found.")
         raise NameError(f"Server '{server_name}' not found.")
 
-    def fetch_node_names(self, server_name: str) -> List[str]:
+    def fetch_node_names(self, server_name: str, query: CollectionQuery = None) -> Union[List[str], Page]:
         server_info = self.fetch_server_info_or_die(server_name)
         node_keys = list(server_info.node_infos.keys())
-        return node_keys
+        return query.apply(node_keys) if query else node_keys
 
     def fetch_node_or_default(self, server_name: str, host: str) -> Optional[DtoNodeInfo]:
         server_info = self.fetch_server_info_or_die(server_name)
@@ -123,9 +386,13 @@ class CtmRepository (ABC):
             raise NameError(f"Host '{host}' not found.")
         raise NameError(f"Server '{server_name}' not found.")
 
-    def fetch_node_stats(self, server_name: str) -> dict:
+    def fetch_node_stats(self, server_name: str, query: CollectionQuery = None) -> Union[dict, Page]:
+        """
+        :param query: Fields and page to select. Only the nodes of the requested page are computed.
+        """
         server_info = self.fetch_server_info_or_die(server_name)
-        node_keys = server_info.node_infos.keys()
+        node_keys, next_cursor = query.select_page(list(server_info.node_infos.keys())) if query \
+            else (server_info.node_infos.keys(), None)
         result: dict = {}
         for node_id in node_keys:
             active = self.fetch_folders(server_name, folder_order_methods=['SYSTEM'], folder_node_ids=[node_id])
@@ -136,19 +403,89 @@ class CtmRepository (ABC):
                 'disabledCount': len(disabled),
                 'disabled': [f.name for f in disabled],
             }
-        return result
+        if query is None:
+            return result
+        result = {node_id: query.project(stats) for node_id, stats in result.items()}
+        return Page(result, next_cursor) if query.is_paginated else result
+
+    def fetch_node_details_or_die(self, server_name: str, host: str) -> DtoNodeInfo:
+        """
+        :return: The node with its hosts and group, or an empty node when the name is only known as a host.
+        """
+        host_ref = self.fetch_host_or_default(server_name, host)
+        node_ref = self.fetch_node_or_default(server_name, host)
+        if node_ref:
+            node_ref.hosts = self.fetch_hosts(server_name, host)
+            if host_ref:
+                node_ref.group = host_ref.group
+            return node_ref
+        elif host_ref:
+            return DtoNodeInfo()
+        raise NameError(f"Host group '{host}' not found.")
 
     def fetch_host_or_default(self, server_name: str, host_name: str) -> Optional[DtoHostInfo]:
-        hosts = self.cache_manager.get_cached_host_infos_dto()
-        for h in hosts:
-            if h.server == server_name and h.host == host_name:
-                return h
-        return None
+        return self.cache_manager.get_cached_host_index().get((server_name, host_name))
+
+    def fetch_host_or_die(self, server_name: str, host_name: str) -> DtoHostInfo:
+        host_info = self.fetch_host_or_default(server_name, host_name)
+        if host_info is None:
+            raise NameError(f"Host '{host_name}' not found on server '{server_name}'.")
+        return host_info
 
     def fetch_hosts(self, server_name: str, node_group: str = None) -> List[DtoHostInfo]:
+        if node_group is not None:
+            return list(self.cache_manager.get_cached_host_group_index().get((server_name, node_group), []))
         hosts = self.cache_manager.get_cached_host_infos_dto()
-        results: List[DtoHostInfo] = []
-        for h in hosts:
-            if h.server == server_name and (node_group is None or h.group == node_group):
-                results.append(h)
+        return [h for h in hosts if h.server == server_name]
+
+    def fetch_batch(self, lookups: List[dict]) -> Dict[str, dict]:
+        """
+        Resolves many lookups in one call. Each lookup is a dictionary with a 'type' - 'folder', 'node', 'host' or
+        'server' (its stats) - the 'server' and, by type, 'folder' or 'host' names. Optional 'fields' select fields
+        of the result, and an optional 'id' keys it; the position in the list is used by default.
+        :return: The result of each lookup by id, as {'status': 200, 'data': ...} or {'status': 400 or 404,
+        'message': ...}.
+        :raise ValueError: When the lookups are not a list of dictionaries with unique ids, or too many.
+        """
+        if not isinstance(lookups, list) or not all(isinstance(lookup, dict) for lookup in lookups):
+            raise ValueError('Lookups must be a list of objects.')
+        if len(lookups) > MAX_BATCH_LOOKUPS:
+            raise ValueError(f"At most {MAX_BATCH_LOOKUPS} lookups are allowed per batch, got {len(lookups)}.")
+        lookup_ids = [str(lookup.get('id', idx)) for idx, lookup in enumerate(lookups)]
+        if len(set(lookup_ids)) != len(lookup_ids):
+            raise ValueError('Lookup ids must be unique.')
+        results: Dict[str, dict] = {}
+        for lookup_id, lookup in zip(lookup_ids, lookups):
+            try:
+                resolve = self._batch_resolvers.get(lookup.get('type'))
+                if resolve is None:
+                    raise ValueError(f"Unknown lookup type '{lookup.get('type')}'.")
+                fields = lookup.get('fields')
+                if fields is not None and not isinstance(fields, str):
+                    raise ValueError("Lookup 'fields' must be a string.")
+                query = CollectionQuery(fields=fields)
+                results[lookup_id] = {'status': 200, 'data': query.project(resolve(self, lookup))}
+            except NameError as err:
+                results[lookup_id] = {'status': 404, 'message': str(err)}
+            except (TypeError, ValueError) as err:
+                results[lookup_id] = {'status': 400, 'message': str(err)}
         return results
+
+    def _resolve_folder(self, lookup: dict) -> DtoFolderInfo:
+        return self.fetch_folder_or_die(_lookup_arg(lookup, 'server'), _lookup_arg(lookup, 'folder'))
+
+    def _resolve_node(self, lookup: dict) -> DtoNodeInfo:
+        return self.fetch_node_details_or_die(_lookup_arg(lookup, 'server'), _lookup_arg(lookup, 'host'))
+
+    def _resolve_host(self, lookup: dict) -> DtoHostInfo:
+        return self.fetch_host_or_die(_lookup_arg(lookup, 'server'), _lookup_arg(lookup, 'host'))
+
+    def _resolve_server(self, lookup: dict) -> dict:
+        return self.fetch_server_stats_or_die(_lookup_arg(lookup, 'server'))
+
+    _batch_resolvers: Dict[str, Callable[['CtmRepository', dict], Any]] = {
+        'folder': _resolve_folder,
+        'node': _resolve_node,
+        'host': _resolve_host,
+        'server': _resolve_server,
+    }
@@ -0,0 +1,453 @@
+import calendar
+from abc import ABC
+from datetime import date, timedelta
+from logging import Logger
+from typing import Dict, Final, Iterable, List, NamedTuple, Optional, Set, Tuple, Union
+from uuid import uuid4
+import numpy as np
+from controlm.model import CtmDefTable, CtmJobData, CtmSimpleFolder, CtmSmartFolder, CtmTagData
+from corelib.logging import create_console_logger
+
+
+DAYS_IN_BITMAP: Final = 366
+MONTH_FLAGS: Final = ('jan', 'feb', 'mar', 'apr', 'may', 'jun', 'jul', 'aug', 'sep', 'oct', 'nov', 'dec')
+ALL_RULE_BASED_CALENDARS: Final = '*'
+
+
+def group_sort_key(group: Tuple[str, Optional[str]]) -> tuple:
+    """
+    Sorts (server, node) groups by server, then node, with the jobs of no node first.
+    """
+    return group[0] or '', group[1] is not None, group[1] or ''
+
+
+def parse_ctm_date(value: Optional[str]) -> Optional[date]:
+    """
+    :return: The date of a Control-M YYYYMMDD value, or None when it is empty or invalid.
+    """
+    if not value or len(value) != 8 or not value.isdigit():
+        return None
+    try:
+        return date(int(value[:4]), int(value[4:6]), int(value[6:]))
+    except ValueError:
+        return None
+
+
+class CtmSchedulingCriteria (NamedTuple):
+    """
+    The basic scheduling criteria of a job or rule-based calendar, as raw strings. Hashable, so that the many jobs
+    sharing criteria are compiled once.
+    """
+    days: Optional[str]
+    weekdays: Optional[str]
+    months: Tuple[bool, ...]
+    days_and_or: Optional[str]
+    dates: Optional[str]
+    days_cal: Optional[str]
+    weeks_cal: Optional[str]
+    conf_cal: Optional[str]
+    shift: Optional[str]
+    shift_num: Optional[str]
+    active_from: Optional[str]
+    active_till: Optional[str]
+
+    @staticmethod
+    def of(item: Union[CtmJobData, CtmTagData]) -> 'CtmSchedulingCriteria':
+        return CtmSchedulingCriteria(
+            days=item.days,
+            weekdays=item.weekdays,
+            months=tuple(getattr(item, flag, None) == '1' for flag in MONTH_FLAGS),
+            days_and_or=item.days_and_or,
+            dates=item.date,
+            days_cal=item.days_cal,
+            weeks_cal=item.weeks_cal,
+            # The job model names the confirmation calendar 'conf_call'.
+            conf_cal=getattr(item, 'conf_cal', None) or getattr(item, 'conf_call', None),
+            shift=item.shift,
+            shift_num=item.shift_num,
+            active_from=item.active_from,
+            active_till=item.active_till)
+
+    @property
+    def has_days(self) -> bool:
+        return bool(self.days or self.weekdays or self.dates or self.days_cal or self.weeks_cal)
+
+
+class _YearAxes (ABC):
+    """
+    Month, day of month, weekday and days to the end of the month of each day of a year, padded to DAYS_IN_BITMAP.
+    """
+
+    def __init__(self, year: int):
+        first = date(year, 1, 1)
+        self.length: int = 366 if calendar.isleap(year) else 365
+        days = [first + timedelta(days=offset) for offset in range(self.length)]
+        padding = [0] * (DAYS_IN_BITMAP - self.length)
+        self.valid: np.ndarray = np.arange(DAYS_IN_BITMAP) < self.length
+        self.month: np.ndarray = np.array([d.month for d in days] + padding, dtype=np.int8)
+        self.month_day: np.ndarray = np.array([d.day for d in days] + padding, dtype=np.int8)
+        # Control-M numbers weekdays from Sunday (0) to Saturday (6).
+        self.weekday: np.ndarray = np.array([(d.weekday() + 1) % 7 for d in days] + padding, dtype=np.int8)
+        self.to_month_end: np.ndarray = np.array(
+            [calendar.monthrange(year, d.month)[1] - d.day for d in days] + [-1] * len(padding), dtype=np.int8)
+
+
+class CtmScheduleCalendar (ABC):
+    """
+    The days of a year each job of a definitions table is scheduled on, compiled once from the raw criteria: DAYS,
+    WEEKDAYS and DAYS_AND_OR, the JAN..DEC month flags, DATE, DAYSCAL/WEEKSCAL, CONFCAL with SHIFT and SHIFTNUM,
+    ACTIVE_FROM/ACTIVE_TILL, and the rule-based calendars of smart folders that jobs refer to.
+
+    Each distinct schedule is a row of a boolean pattern matrix of DAYS_IN_BITMAP columns, and jobs index into it, so
+    that "which jobs run on a day" is a column lookup and "scheduled jobs per day and node" a matrix product, instead
+    of evaluating every job's criteria in Python.
+
+    Supported DAYS values are ALL, n, +n, -n (excluded), Ln (n-th last day of the month) and -Ln; WEEKDAYS values
+    are ALL, 0-6 (Sunday to Saturday) and their exclusions. Other values are ignored. Named calendars are not part
+    of the export; they are taken from ``calendars``, and criteria referring to missing ones are compiled as if the
+    calendar held every day. Their names are reported by ``unresolved_calendars``. Days shifted past the end of the
+    year are dropped.
+    """
+
+    def __init__(self,
+                 def_table: CtmDefTable,
+                 year: int,
+                 calendars: Dict[str, Iterable[date]] = None,
+                 logger: Logger = None):
+        self._identifier: str = f"{__name__}_{uuid4()}"
+        self._logger: Logger = logger or create_console_logger(__name__)
+        self._year: int = year
+        self._axes: _YearAxes = _YearAxes(year)
+        self._first_day: date = date(year, 1, 1)
+        self._calendars: Dict[str, np.ndarray] = {name: self._days_mask(days)
+                                                  for name, days in (calendars or {}).items()}
+        self._unresolved_calendars: Set[str] = set()
+        self._ignored_values: Set[str] = set()
+        self._compiled: Dict[CtmSchedulingCriteria, np.ndarray] = {}
+        self._pattern_index: Dict[bytes, int] = {}
+        self._patterns: List[np.ndarray] = []
+        self._job_keys: List[Tuple[str, str, str]] = []
+        self._job_nodes: List[Optional[str]] = []
+        job_patterns: List[int] = []
+
+        for item in def_table.items:
+            if not isinstance(item, (CtmSimpleFolder, CtmSmartFolder)):
+                continue
+            folder_calendars = {tag.name: self._compile(CtmSchedulingCriteria.of(tag))
+                                for tag in getattr(item, 'rule_based_calendars', [])}
+            folder_mask = np.logical_or.reduce(list(folder_calendars.values())) if folder_calendars else None
+            for job in item.jobs:
+                mask = self._compile_job(job, folder_calendars)
+                if folder_mask is not None:
+                    mask = mask & folder_mask
+                job_patterns.append(self._pattern(mask))
+                self._job_keys.append((item.data_center, item.folder_name, job.job_name))
+                self._job_nodes.append(job.node_id or getattr(item, 'node_id', None))
+
+        self._pattern_matrix: np.ndarray = np.array(self._patterns, dtype=bool).reshape(-1, DAYS_IN_BITMAP)
+        self._job_patterns: np.ndarray = np.array(job_patterns, dtype=np.int32)
+        self._groups: List[Tuple[str, Optional[str]]] = sorted(
+            set(zip((key[0] for key in self._job_keys), self._job_nodes)), key=group_sort_key)
+        group_index = {group: idx for idx, group in enumerate(self._groups)}
+        self._job_groups: np.ndarray = np.array(
+            [group_index[(key[0], node)] for key, node in zip(self._job_keys, self._job_nodes)], dtype=np.int32)
+        usage = np.zeros((len(self._groups), len(self._patterns)), dtype=np.int64)
+        np.add.at(usage, (self._job_groups, self._job_patterns), 1)
+        self._group_counts: np.ndarray = usage @ self._pattern_matrix.astype(np.int64)
+        self._job_records: List[dict] = [{'server': server, 'folder': folder, 'job': job, 'node': node}
+                                         for (server, folder, job), node in zip(self._job_keys, self._job_nodes)]
+        self._compiled.clear()
+        self._pattern_index.clear()
+        if self._ignored_values:
+            self._logger.warning(f"[{self.identifier}] Ignored unsupported scheduling values "
+                                 f"{sorted(self._ignored_values)}.")
+        self._logger.info(f"[{self.identifier}] Compiled {len(self._job_keys)} job(s) into "
+                          f"{len(self._patterns)} schedule(s) for {year}.")
+
+    @property
+    def identifier(self) -> str:
+        return self._identifier
+
+    @property
+    def logger(self) -> Logger:
+        return self._logger
+
+    @property
+    def year(self) -> int:
+        return self._year
+
+    @property
+    def job_keys(self) -> List[Tuple[str, str, str]]:
+        """
+        Server, folder and name of each job, in matrix row order.
+        """
+        return self._job_keys
+
+    @property
+    def pattern_matrix(self) -> np.ndarray:
+        """
+        The distinct schedules, one boolean row of DAYS_IN_BITMAP days each.
+        """
+        return self._pattern_matrix
+
+    @property
+    def job_patterns(self) -> np.ndarray:
+        """
+        The row of ``pattern_matrix`` of each job.
+        """
+        return self._job_patterns
+
+    @property
+    def matrix(self) -> np.ndarray:
+        """
+        The jobs-by-days matrix, materialized from the distinct schedules.
+        """
+        return self._pattern_matrix[self._job_patterns]
+
+    @property
+    def unresolved_calendars(self) -> List[str]:
+        return sorted(self._unresolved_calendars)
+
+    def day_index(self, day: date) -> int:
+        if day.year != self._year:
+            raise ValueError(f"Date {day.isoformat()} is not in {self._year}.")
+        return (day - self._first_day).days
+
+    def scheduled_on(self, day: date) -> np.ndarray:
+        """
+        :return: Whether each job, in ``job_keys`` order, is scheduled on the day.
+        """
+        if not len(self._patterns):
+            return np.zeros(0, dtype=bool)
+        return self._pattern_matrix[:, self.day_index(day)][self._job_patterns]
+
+    def jobs_on(self, day: date, server: str = None, node: str = None) -> List[dict]:
+        """
+        :return: Server, folder, name and node of the jobs scheduled on the day, optionally of one server or node.
+        The records are shared between queries and must not be modified.
+        """
+        selected = self.scheduled_on(day) & self._group_selection(server, node)[self._job_groups]
+        records = self._job_records
+        return [records[idx] for idx in np.flatnonzero(selected).tolist()]
+
+    def jobs_count_by_day(self, server: str = None, node: str = None) -> np.ndarray:
+        """
+        :return: The number of scheduled jobs of each day of the year, optionally of one server or node.
+        """
+        return self.group_counts_by_day()[self._group_selection(server, node)].sum(axis=0)[:self._axes.length]
+
+    def group_counts_by_day(self) -> np.ndarray:
+        """
+        :return: The number of scheduled jobs of each server and node (rows, in ``groups`` order) and day of the year.
+        Computed once, as the product of the jobs per schedule and node with the schedules.
+        """
+        return self._group_counts
+
+    @property
+    def groups(self) -> List[Tuple[str, Optional[str]]]:
+        """
+        The server and node pairs jobs run on, sorted.
+        """
+        return self._groups
+
+    def busiest_days(self, top: int = 5, server: str = None, node: str = None) -> List[dict]:
+        """
+        :return: The ``top`` days with most scheduled jobs of each server and node, busiest first.
+        """
+        if top < 0:
+            raise ValueError(f"Top must not be negative, got {top}.")
+        counts = self.group_counts_by_day()[:, :self._axes.length]
+        selection = self._group_selection(server, node)
+        # Stable sort of the negated counts keeps earlier days first among equally busy ones.
+        order = np.argsort(-counts, axis=1, kind='stable')[:, :top]
+        results = []
+        for group_idx in np.flatnonzero(selection):
+            group_server, group_node = self._groups[group_idx]
+            results.append({
+                'server': group_server,
+                'node': group_node,
+                'days': [{'date': (self._first_day + timedelta(days=int(day))).isoformat(),
+                          'jobsCount': int(counts[group_idx, day])}
+                         for day in order[group_idx] if counts[group_idx, day] > 0],
+            })
+        return results
+
+    def _group_selection(self, server: Optional[str], node: Optional[str]) -> np.ndarray:
+        return np.array([(server is None or group_server == server) and (node is None or group_node == node)
+                         for group_server, group_node in self._groups], dtype=bool)
+
+    def _pattern(self, mask: np.ndarray) -> int:
+        key = np.packbits(mask).tobytes()
+        idx = self._pattern_index.get(key)
+        if idx is None:
+            idx = self._pattern_index[key] = len(self._patterns)
+            self._patterns.append(mask)
+        return idx
+
+    def _compile_job(self, job: CtmJobData, folder_calendars: Dict[str, np.ndarray]) -> np.ndarray:
+        criteria = CtmSchedulingCriteria.of(job)
+        own = self._compile(criteria)
+        if not job.rule_based_calendars:
+            return own
+        referenced = []
+        for name in job.rule_based_calendars:
+            if name == ALL_RULE_BASED_CALENDARS:
+                referenced.extend(folder_calendars.values())
+            elif name in folder_calendars:
+                referenced.append(folder_calendars[name])
+            else:
+                self._unresolved_calendars.add(name)
+        rule_based = np.logical_or.reduce(referenced) if referenced else np.zeros(DAYS_IN_BITMAP, dtype=bool)
+        if not criteria.has_days:
+            return rule_based
+        return own & rule_based if _is_and(job.rule_based_calendar_relationship) else own | rule_based
+
+    def _compile(self, criteria: CtmSchedulingCriteria) -> np.ndarray:
+        mask = self._compiled.get(criteria)
+        if mask is None:
+            mask = self._compiled[criteria] = self._evaluate(criteria)
+        return mask
+
+    def _evaluate(self, criteria: CtmSchedulingCriteria) -> np.ndarray:
+        axes = self._axes
+        if criteria.dates:
+            mask = self._dates_mask(criteria.dates)
+        elif criteria.has_days:
+            days = self._restrict(self._month_days_mask(criteria.days), criteria.days_cal)
+            weekdays = self._restrict(self._weekdays_mask(criteria.weekdays), criteria.weeks_cal)
+            if days is not None and weekdays is not None:
+                mask = days & weekdays if _is_and(criteria.days_and_or) else days | weekdays
+            else:
+                mask = days if days is not None else weekdays
+            mask = mask & np.isin(axes.month, [idx + 1 for idx, flag in enumerate(criteria.months) if flag])
+        else:
+            return np.zeros(DAYS_IN_BITMAP, dtype=bool)
+        mask = self._confirm(mask & axes.valid, criteria)
+        active_from, active_till = parse_ctm_date(criteria.active_from), parse_ctm_date(criteria.active_till)
+        if active_from is not None:
+            mask &= np.arange(DAYS_IN_BITMAP) >= (active_from - self._first_day).days
+        if active_till is not None:
+            mask &= np.arange(DAYS_IN_BITMAP) <= (active_till - self._first_day).days
+        return mask & axes.valid
+
+    def _month_days_mask(self, days: Optional[str]) -> Optional[np.ndarray]:
+        if not days:
+            return None
+        axes = self._axes
+        included, excluded = np.zeros(DAYS_IN_BITMAP, dtype=bool), np.zeros(DAYS_IN_BITMAP, dtype=bool)
+        any_included = False
+        for token in (t.strip().upper() for t in days.split(',') if t.strip()):
+            negate = token.startswith('-')
+            value = token.lstrip('+-')
+            if value == 'ALL':
+                selected = axes.valid
+            elif value.isdigit():
+                selected = axes.month_day == int(value)
+            elif value.startswith('L') and value[1:].isdigit():
+                selected = axes.to_month_end == int(value[1:]) - 1
+            else:
+                self._ignored_values.add(f"DAYS={token}")
+                continue
+            if negate:
+                excluded |= selected
+            else:
+                included |= selected
+                any_included = True
+        # Only exclusions means every other day.
+        return (included if any_included else axes.valid.copy()) & ~excluded
+
+    def _weekdays_mask(self, weekdays: Optional[str]) -> Optional[np.ndarray]:
+        if not weekdays:
+            return None
+        axes = self._axes
+        included, excluded = np.zeros(DAYS_IN_BITMAP, dtype=bool), np.zeros(DAYS_IN_BITMAP, dtype=bool)
+        any_included = False
+        for token in (t.strip().upper() for t in weekdays.split(',') if t.strip()):
+            negate = token.startswith('-')
+            value = token.lstrip('+-')
+            if value == 'ALL':
+                selected = axes.valid
+            elif value.isdigit() and int(value) <= 6:
+                selected = axes.weekday == int(value)
+            else:
+                self._ignored_values.add(f"WEEKDAYS={token}")
+                continue
+            if negate:
+                excluded |= selected
+            else:
+                included |= selected
+                any_included = True
+        return (included if any_included else axes.valid.copy()) & ~excluded
+
+    def _dates_mask(self, dates: str) -> np.ndarray:
+        mask = np.zeros(DAYS_IN_BITMAP, dtype=bool)
+        # MMDD values, comma separated or concatenated.
+        tokens = [token.strip() for token in dates.split(',')]
+        for value in (token[i:i + 4] for token in tokens for i in range(0, len(token), 4)):
+            try:
+                mask[self.day_index(date(self._year, int(value[:2]), int(value[2:])))] = True
+            except ValueError:
+                self._ignored_values.add(f"DATE={value}")
+        return mask
+
+    def _restrict(self, mask: Optional[np.ndarray], calendar_name: Optional[str]) -> Optional[np.ndarray]:
+        if not calendar_name:
+            return mask
+        calendar_mask = self._calendar(calendar_name)
+        return calendar_mask if mask is None else mask & calendar_mask
+
+    def _confirm(self, mask: np.ndarray, criteria: CtmSchedulingCriteria) -> np.ndarray:
+        """
+        Applies the confirmation calendar: scheduled days that are not working days are dropped, kept ('@'), or
+        moved to the next ('>') or previous ('<') working day, then all of them move SHIFTNUM working days.
+        """
+        if not criteria.conf_cal:
+            return mask
+        working = self._calendar(criteria.conf_cal) & self._axes.valid
+        positions = np.flatnonzero(working)
+        days = np.flatnonzero(mask)
+        shift = (criteria.shift or '').strip()
+        on_working = working[days]
+        if shift == '@':
+            kept, moved = days, np.zeros(0, dtype=days.dtype)
+        elif shift == '>':
+            kept, moved = days[on_working], np.searchsorted(positions, days[~on_working], side='left')
+            moved = positions[moved[moved < len(positions)]]
+        elif shift == '<':
+            kept, moved = days[on_working], np.searchsorted(positions, days[~on_working], side='right') - 1
+            moved = positions[moved[moved >= 0]]
+        else:
+            kept, moved = days[on_working], np.zeros(0, dtype=days.dtype)
+        days = np.union1d(kept, moved)
+        shift_num = _parse_shift_num(criteria.shift_num)
+        if shift_num:
+            ranks = np.searchsorted(positions, days) + shift_num
+            days = positions[ranks[(ranks >= 0) & (ranks < len(positions))]]
+        result = np.zeros(DAYS_IN_BITMAP, dtype=bool)
+        result[days] = True
+        return result
+
+    def _calendar(self, name: str) -> np.ndarray:
+        mask = self._calendars.get(name)
+        if mask is None:
+            self._unresolved_calendars.add(name)
+            return self._axes.valid
+        return mask
+
+    def _days_mask(self, days: Iterable[date]) -> np.ndarray:
+        mask = np.zeros(DAYS_IN_BITMAP, dtype=bool)
+        for day in days:
+            if day.year == self._year:
+                mask[self.day_index(day)] = True
+        return mask
+
+
+def _is_and(relationship: Optional[str]) -> bool:
+    return (relationship or '').strip().upper() in ('A', 'AND')
+
+
+def _parse_shift_num(value: Optional[str]) -> int:
+    try:
+        return int((value or '0').strip() or '0')
+    except ValueError:
+        return 0
@@ -0,0 +1,170 @@
+import re
+from abc import ABC
+from logging import Logger
+from typing import Dict, Final, Iterable, List, NamedTuple, Optional, Sequence, Tuple, Union
+from uuid import uuid4
+from controlm.model import CtmDefTable, CtmSimpleFolder, CtmSmartFolder, CtmVarData
+from corelib.logging import create_console_logger
+
+
+# '%%NAME' or '%%{NAME}'. Names may hold the '$' of AutoEdit functions and system variables, such as '%%$CALCDATE',
+# and the backslashes of pool variables; '.' is the concatenation operator, as in '%%A.%%B'.
+VARIABLE_REFERENCE_PATTERN: Final = re.compile(r'%%(?:\{[^{}%\s]+\}|[\w@#$\\]+)')
+
+
+class CtmVariableDefinition (NamedTuple):
+    """
+    A variable defined by a folder - with a job of None - or by a job.
+    """
+    server: Optional[str]
+    folder: Optional[str]
+    job: Optional[str]
+    value: Optional[str]
+
+    def to_dict(self) -> dict:
+        return {'server': self.server, 'folder': self.folder, 'job': self.job, 'value': self.value}
+
+
+class CtmVariableReference (NamedTuple):
+    """
+    A folder - with a job of None - or job referencing a variable in its fields: 'CMDLINE', 'MEMNAME', or
+    'VARIABLE[<name>]' for the value of one of its variables.
+    """
+    server: Optional[str]
+    folder: Optional[str]
+    job: Optional[str]
+    fields: Tuple[str, ...]
+
+    def to_dict(self) -> dict:
+        return {'server': self.server, 'folder': self.folder, 'job': self.job, 'fields': list(self.fields)}
+
+
+def variable_key(name: str) -> str:
+    """
+    :return: The name of a variable as it is defined in an export, as in '%%NAME', whether given as 'NAME', '%%NAME'
+    or '%%{NAME}'.
+    """
+    name = name.strip()
+    if name.startswith('%%'):
+        name = name[2:]
+    if name.startswith('{') and name.endswith('}'):
+        name = name[1:-1]
+    return f"%%{name}"
+
+
+def find_variable_references(text: Optional[str]) -> List[str]:
+    """
+    :return: The variables and AutoEdit functions referenced in a text, once each, in order of first reference.
+    """
+    if not text or '%%' not in text:
+        return []
+    references = VARIABLE_REFERENCE_PATTERN.findall(text)
+    if '{' in text:
+        references = [variable_key(reference) for reference in references]
+    return list(dict.fromkeys(references))
+
+
+def variable_user_sort_key(entry: Union[CtmVariableDefinition, CtmVariableReference]) -> Tuple[str, str, str]:
+    return entry.server or '', entry.folder or '', entry.job or ''
+
+
+def _server_range(entries: Sequence[Union[CtmVariableDefinition, CtmVariableReference]], server_name: str) -> slice:
+    # Entries are sorted by server first, so that a server's are found by binary search.
+    bounds = []
+    for after in (False, True):
+        low, high = 0, len(entries)
+        while low < high:
+            middle = (low + high) // 2
+            server = entries[middle].server or ''
+            if server < server_name or after and server == server_name:
+                low = middle + 1
+            else:
+                high = middle
+        bounds.append(low)
+    return slice(*bounds)
+
+
+class CtmVariableIndex (ABC):
+    """
+    Reverse index of the variables of a definitions table: which folders and jobs define each variable, and which
+    reference it - or an AutoEdit function - in their command line, member name or variable values. Built in one
+    pass over the definitions; a lookup is a dictionary access, and a server's entries are found by binary search.
+    """
+
+    def __init__(self,
+                 def_table: CtmDefTable,
+                 logger: Logger = None):
+        self._identifier: str = f"{__name__}_{uuid4()}"
+        self._logger: Logger = logger or create_console_logger(__name__)
+        self._definitions: Dict[str, List[CtmVariableDefinition]] = {}
+        self._references: Dict[str, List[CtmVariableReference]] = {}
+        for item in def_table.items if def_table else []:
+            if not isinstance(item, (CtmSimpleFolder, CtmSmartFolder)):
+                continue
+            if isinstance(item, CtmSmartFolder):
+                self._add(item.data_center, item.folder_name, None, item.variables)
+            for job in item.jobs:
+                self._add(item.data_center, item.folder_name, job.job_name, job.variables, job.cmd_line, job.mem_name)
+        for entries in (*self._definitions.values(), *self._references.values()):
+            entries.sort(key=variable_user_sort_key)
+        self._names: List[str] = sorted(self._definitions.keys() | self._references.keys())
+        self.logger.info(f"[{self.identifier}] Indexed {len(self._names)} variable(s): "
+                         f"{sum(map(len, self._definitions.values()))} definition(s) and "
+                         f"{sum(map(len, self._references.values()))} referencing folder(s) and job(s).")
+
+    @property
+    def identifier(self) -> str:
+        return self._identifier
+
+    @property
+    def logger(self) -> Logger:
+        return self._logger
+
+    @property
+    def names(self) -> List[str]:
+        """
+        The variables and AutoEdit functions defined or referenced anywhere, sorted.
+        """
+        return self._names
+
+    def __contains__(self, name: str) -> bool:
+        name = variable_key(name)
+        return name in self._definitions or name in self._references
+
+    def definitions(self, name: str, server_name: str = None) -> Sequence[CtmVariableDefinition]:
+        """
+        :param name: The variable, with or without its leading '%%'.
+        :return: The definitions of the variable, optionally of one server, sorted by server, folder and job.
+        """
+        entries = self._definitions.get(variable_key(name), [])
+        return entries if server_name is None else entries[_server_range(entries, server_name)]
+
+    def references(self, name: str, server_name: str = None) -> Sequence[CtmVariableReference]:
+        """
+        :param name: The variable, with or without its leading '%%'.
+        :return: The folders and jobs referencing the variable, optionally of one server, sorted by server, folder
+        and job.
+        """
+        entries = self._references.get(variable_key(name), [])
+        return entries if server_name is None else entries[_server_range(entries, server_name)]
+
+    def _add(self,
+             server: Optional[str],
+             folder: Optional[str],
+             job: Optional[str],
+             variables: Iterable[CtmVarData],
+             cmd_line: Optional[str] = None,
+             mem_name: Optional[str] = None) -> None:
+        referenced: Dict[str, List[str]] = {}
+        for variable in variables:
+            if not variable.name:
+                continue
+            name = variable_key(variable.name)
+            self._definitions.setdefault(name, []).append(CtmVariableDefinition(server, folder, job, variable.value))
+            for reference in find_variable_references(variable.value):
+                referenced.setdefault(reference, []).append(f"VARIABLE[{name}]")
+        for field, text in (('CMDLINE', cmd_line), ('MEMNAME', mem_name)):
+            for reference in find_variable_references(text):
+                referenced.setdefault(reference, []).append(field)
+        for reference, fields in referenced.items():
+            self._references.setdefault(reference, []).append(CtmVariableReference(server, folder, job, tuple(fields)))
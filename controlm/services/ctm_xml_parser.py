@@ -1,7 +1,10 @@
+import logging
 import os.path
+from contextlib import contextmanager
 from logging import Logger
-from typing import Final, Optional
+from typing import IO, Final, Optional, Iterator
 from lxml import etree
+from corelib.compression import detect_compression, open_source
 from corelib.logging import create_console_logger
 from controlm.model.ctm_def_table import CtmDefTable
 from controlm.model.ctm_def_table_item import CtmDefTableItem
@@ -42,6 +45,7 @@ class CtmXmlParser:
                  logger: Logger = None):
         self._xsd_path: str = xsd_path
         self._logger: Logger = logger or create_console_logger(__name__)
+        self._debug_enabled: bool = self._logger.isEnabledFor(logging.DEBUG)
         self._validate_xsd_path()
 
     @property
@@ -52,18 +56,38 @@ class CtmXmlParser:
     def xsd_path(self) -> str:
         return self._xsd_path
 
+    @contextmanager
+    def open_xml(self, xml_path: str) -> Iterator[IO[bytes]]:
+        """
+        Opens an XML source for lxml. gzip, bz2 and xz/lzma files are decompressed as a stream while lxml reads
+        them. Files are opened here rather than handed to lxml by path, so that they are closed when the source is,
+        even when a streaming parse is not read to the end.
+        """
+        compression = detect_compression(xml_path)
+        if compression is None:
+            with open(xml_path, 'rb') as stream:
+                yield stream
+            return
+        self.logger.debug(f"Decompressing {compression} XML file {xml_path} while parsing.")
+        with open_source(xml_path) as stream:
+            yield stream
+
     def validate_xml(self, xml_path: str) -> bool:
         """
         Validates the target XML file
-        :param xml_path: XML file to be validated.
+        :param xml_path: XML file to be validated; may be compressed.
         :return: True, if the XML file conforms to the XSD schema, false otherwise.
         """
+        with self.open_xml(xml_path) as source:
+            xml_doc = etree.parse(source)
+        self.logger.debug(f'XML document at path {xml_path} loaded. {xml_doc}')
+        return self._validate_document(xml_path, xml_doc)
+
+    def _validate_document(self, xml_path: str, xml_doc: etree.ElementTree) -> bool:
         self.logger.debug(f'Validating source XML file {xml_path} against XSD schema {self.xsd_path}')
         xmlschema_doc = etree.parse(self.xsd_path)
         self.logger.debug(f'XSD schema at path {self.xsd_path} loaded. {xmlschema_doc}')
         xmlschema = etree.XMLSchema(xmlschema_doc)
-        xml_doc = etree.parse(xml_path)
-        self.logger.debug(f'XML document at path {xml_path} loaded. {xml_doc}')
         result = xmlschema.validate(xml_doc)
         if not result:
             self.logger.warning(f'XML file at path {xml_path} failed validation against XSD '
@@ -76,20 +100,71 @@ class CtmXmlParser:
             raise CtmXmlParserException(
                 f"XML file at path '{xml_file}' could not be found."
             )
-        if not self.validate_xml(xml_file):
+        with self.open_xml(xml_file) as source:
+            xml_doc = etree.parse(source)
+        if not self._validate_document(xml_file, xml_doc):
             self.logger.fatal(f"XML file at path '{xml_file}' does not conform to schema at path '{self.xsd_path}'.")
             raise CtmXmlParserException(
                 f"XML file at path '{xml_file}' does not conform to schema at path '{self.xsd_path}'."
             )
 
         self.logger.info(f"XML at path '{xml_file}' conforms to schema at path '{self.xsd_path}'.")
-        result = etree.parse(xml_file)
-        root = result.getroot()
+        root = xml_doc.getroot()
         self.logger.debug(f"Root element tag is {root.tag}. Parsing definition table...")
         result = self.parse_def_table(root)
         self.logger.debug(f"Parsed definition table. {len(result.items)} items found...")
         return result
 
+    def iter_def_table_items(self, xml_file: str) -> Iterator[CtmDefTableItem]:
+        """
+        Streams the definition table items of the target XML file, validating it against the XSD schema on the fly.
+        Each top-level element is released as soon as it has been mapped, so memory stays bounded by a single item.
+        :param xml_file: XML file to be parsed; compressed files are decompressed as they are parsed.
+        :return: Iterator over the parsed definition table items, in document order.
+        """
+        for x in self.iter_def_table_elements(xml_file):
+            if x.tag not in SUPPORTED_DEF_TABLE_ITEM_TYPES:
+                raise CtmXmlParserException(
+                    f"Unsupported DEF_TABLE child element {x.tag}"
+                )
+            child = self.parse_def_table_item(x)
+            self.logger.info(f"Processed {child}")
+            yield child
+
+    def iter_def_table_elements(self, xml_file: str) -> Iterator[etree.ElementBase]:
+        """
+        Streams the top-level elements of the target XML file, unmapped, validating it against the XSD schema on
+        the fly. Each element is released when the next one is requested, so it must not be kept.
+        :param xml_file: XML file to be parsed; compressed files are decompressed as they are parsed.
+        :return: Iterator over the complete top-level elements, in document order.
+        """
+        if not os.path.exists(xml_file):
+            self.logger.fatal(f"XML file at path '{xml_file}' could not be found.")
+            raise CtmXmlParserException(
+                f"XML file at path '{xml_file}' could not be found."
+            )
+        xmlschema = etree.XMLSchema(etree.parse(self.xsd_path))
+        try:
+            with self.open_xml(xml_file) as source:
+                yield from self._iter_def_table_elements(source, xmlschema)
+        except etree.XMLSyntaxError as ex:
+            self.logger.fatal(f"XML file at path '{xml_file}' does not conform to schema at path '{self.xsd_path}'.")
+            raise CtmXmlParserException(
+                f"XML file at path '{xml_file}' does not conform to schema at path '{self.xsd_path}': {ex}"
+            )
+
+    @staticmethod
+    def _iter_def_table_elements(source: IO[bytes],
+                                 xmlschema: etree.XMLSchema) -> Iterator[etree.ElementBase]:
+        for _, x in etree.iterparse(source, events=('end',), schema=xmlschema):
+            parent = x.getparent()
+            if parent is None or parent.getparent() is not None:
+                continue
+            yield x
+            x.clear()
+            while x.getprevious() is not None:
+                del parent[0]
+
     def parse_def_table(self, xml_element: etree.ElementTree) -> CtmDefTable:
         result = CtmDefTable()
         for x in xml_element:
@@ -114,12 +189,13 @@ class CtmXmlParser:
         return CtmDefTableItem(xml_element.tag)
 
     def parse_attribute_value_or_default(self, xml_element: etree.ElementTree, attr_key: str) -> Optional[str]:
-        if attr_key in xml_element.attrib:
-            return xml_element.attrib[attr_key]
-        self.logger.debug(
-            f"XML element '{xml_element.tag}' does not have an attribute'{attr_key}'. Returning default value of None."
-        )
-        return None
+        value = xml_element.get(attr_key)
+        if value is None and self._debug_enabled:
+            self.logger.debug(
+                f"XML element '{xml_element.tag}' does not have an attribute'{attr_key}'. "
+                f"Returning default value of None."
+            )
+        return value
 
     def parse_simple_folder(self, xml_element: etree.ElementTree) -> CtmDefTableItem:
         data_center = self.parse_attribute_value_or_default(xml_element, 'DATACENTER')
@@ -136,7 +212,8 @@ class CtmXmlParser:
         for child in xml_element:
             if child.tag == 'JOB':
                 job_data = self.parse_job_data(child)
-                self.logger.debug(f"Processed child job {child.tag}: {job_data.__dict__}")
+                if self._debug_enabled:
+                    self.logger.debug(f"Processed child job {child.tag}: {job_data.__dict__}")
                 result.jobs.append(job_data)
             else:
                 self.logger.debug(f"Unsupported SIMPLE_FOLDER child element {child.tag}")
@@ -169,15 +246,18 @@ class CtmXmlParser:
         for child in xml_element:
             if child.tag == 'VARIABLE':
                 var_data = self.parse_var_data(child)
-                self.logger.debug(f"Processed child variable {child.tag}: {var_data.__dict__}")
+                if self._debug_enabled:
+                    self.logger.debug(f"Processed child variable {child.tag}: {var_data.__dict__}")
                 result.variables.append(var_data)
             elif child.tag == 'RULE_BASED_CALENDAR':
                 tag_data = self.parse_tag_data(child)
-                self.logger.debug(f"Processed child rule based calendar {child.tag}: {tag_data.__dict__}")
+                if self._debug_enabled:
+                    self.logger.debug(f"Processed child rule based calendar {child.tag}: {tag_data.__dict__}")
                 result.rule_based_calendars.append(tag_data)
             elif child.tag == 'JOB':
                 job_data = self.parse_job_data(child)
-                self.logger.debug(f"Processed child job {child.tag}: {job_data.__dict__}")
+                if self._debug_enabled:
+                    self.logger.debug(f"Processed child job {child.tag}: {job_data.__dict__}")
                 result.jobs.append(job_data)
             else:
                 self.logger.debug(f"Unsupported SMART_FOLDER child element {child.tag}")
@@ -280,6 +360,7 @@ class CtmXmlParser:
         job.feb = self.parse_attribute_value_or_default(xml_element, "FEB")
         job.mar = self.parse_attribute_value_or_default(xml_element, "MAR")
         job.apr = self.parse_attribute_value_or_default(xml_element, "APR")
+        job.may = self.parse_attribute_value_or_default(xml_element, "MAY")
         job.jun = self.parse_attribute_value_or_default(xml_element, "JUN")
         job.jul = self.parse_attribute_value_or_default(xml_element, "JUL")
         job.aug = self.parse_attribute_value_or_default(xml_element, "AUG")
@@ -289,7 +370,8 @@ class CtmXmlParser:
         job.dec = self.parse_attribute_value_or_default(xml_element, "DEC")
         job.date = self.parse_attribute_value_or_default(xml_element, "DATE")
         job.rerun_mem = self.parse_attribute_value_or_default(xml_element, "RERUNMEM")
-        job.category = self.parse_attribute_value_or_default(xml_element, "DAYS_AND_OR")
+        job.days_and_or = self.parse_attribute_value_or_default(xml_element, "DAYS_AND_OR")
+        job.category = self.parse_attribute_value_or_default(xml_element, "CATEGORY")
         job.shift = self.parse_attribute_value_or_default(xml_element, "SHIFT")
         job.shift_num = self.parse_attribute_value_or_default(xml_element, "SHIFTNUM")
         job.pds_name = self.parse_attribute_value_or_default(xml_element, "PDSNAME")
@@ -353,8 +435,13 @@ class CtmXmlParser:
         for child in xml_element:
             if child.tag == 'VARIABLE':
                 var_data = self.parse_var_data(child)
-                self.logger.debug(f"Processed child variable {child.tag}: {var_data.__dict__}")
+                if self._debug_enabled:
+                    self.logger.debug(f"Processed child variable {child.tag}: {var_data.__dict__}")
                 job.variables.append(var_data)
+            elif child.tag == 'RULE_BASED_CALENDARS':
+                calendar_name = self.parse_attribute_value_or_default(child, "NAME")
+                if calendar_name:
+                    job.rule_based_calendars.append(calendar_name)
             else:
                 self.logger.debug(f"Unsupported JOB child element {child.tag}")
         return job
@@ -1,4 +1,5 @@
-from .server_info import DtoServerInfo, map_server_infos_from_ctm_model
-from .folder_info import DtoFolderInfo, map_folder_info_from_ctm_model
+from .server_info import DtoServerInfo, map_server_infos_from_ctm_model, append_folder_info_to_server_infos
+from .folder_info import DtoFolderInfo, map_folder_info_from_ctm_model, folder_sort_key
 from .job_info import DtoJobInfo, map_job_info_from_ctm_model
-from .host_info import DtoHostInfo
\ No newline at end of file
+from .host_info import DtoHostInfo, DtoHostInventory
+from .stats_cube import build_stats_cube, STATS_CUBE_DIMENSIONS, STATS_CUBE_MEASURES, STATS_CUBE_DISTINCT_MEASURES
@@ -25,13 +25,17 @@ class DtoFolderInfo(ABC):
         self.node_jobs_map: Dict[str, List[str]] = {}
         self.is_running_automatically: bool = False
         self.run_as: Optional[str] = None
-        self.variables: List[Tuple[str, str]]
+        self.variables: List[Tuple[str, str]] = []
 
     @property
     def job_names(self) -> List[str]:
         return [j.job_name for j in self.jobs]
 
 
+def folder_sort_key(folder: DtoFolderInfo) -> str:
+    return folder.name or ''
+
+
 def map_folder_info_from_ctm_model(
         item_def: CtmDefTableItem,
         logger: Logger = None) -> DtoFolderInfo:
@@ -50,7 +54,7 @@ def map_folder_info_from_ctm_model(
             result.run_as = item_def.run_as
             result.node_id = item_def.node_id
             if item_def.node_id:
-                print(item_def)
+                logger.debug(f"Mapped smart folder with node ({item_def}).")
         for job_item in item_def.jobs:
             dto_job = map_job_info_from_ctm_model(job_item, logger=logger)
             if dto_job.application and dto_job.application not in result.job_application_keys:
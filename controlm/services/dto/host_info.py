@@ -1,5 +1,5 @@
 from abc import ABC
-from typing import Optional
+from typing import Dict, Iterable, List, Optional, Tuple
 
 
 class DtoHostInfo(ABC):
@@ -7,3 +7,24 @@ class DtoHostInfo(ABC):
         self.server: Optional[str] = kwargs['server'] if 'server' in kwargs else None
         self.group: Optional[str] = kwargs['group'] if 'group' in kwargs else None
         self.host: Optional[str] = kwargs['host'] if 'host' in kwargs else None
+
+
+class DtoHostInventory(ABC):
+    """
+    Host infos in source order, indexed by (server, host) - the first occurrence wins - and by (server, group).
+    """
+
+    def __init__(self, host_infos: Iterable[DtoHostInfo] = None):
+        self.hosts: List[DtoHostInfo] = []
+        self.by_host: Dict[Tuple[str, str], DtoHostInfo] = {}
+        self.by_group: Dict[Tuple[str, str], List[DtoHostInfo]] = {}
+        for host_info in host_infos or []:
+            self.add(host_info)
+
+    def __len__(self) -> int:
+        return len(self.hosts)
+
+    def add(self, host_info: DtoHostInfo) -> None:
+        self.hosts.append(host_info)
+        self.by_host.setdefault((host_info.server, host_info.host), host_info)
+        self.by_group.setdefault((host_info.server, host_info.group), []).append(host_info)
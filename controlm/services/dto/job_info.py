@@ -24,7 +24,8 @@ class DtoJobInfo(ABC):
         self.parent_folder: Optional[str] = None
         self.task_type: Optional[str] = None
         self.is_run_as_dummy: bool = False
-        self.variables: List[Tuple[str, str]]
+        self.is_cyclic: bool = False
+        self.variables: List[Tuple[str, str]] = []
 
 
 def map_job_info_from_ctm_model(
@@ -49,5 +50,6 @@ def map_job_info_from_ctm_model(
     result.parent_folder = item_def.parent_folder
     result.task_type = item_def.task_type
     result.is_run_as_dummy = item_def.task_type == 'Dummy'
+    result.is_cyclic = item_def.cyclic == '1'
     logger.debug(f"Mapped job {item_def.job_name}.")
     return result
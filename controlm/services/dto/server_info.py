@@ -33,48 +33,59 @@ def map_server_infos_from_ctm_model(
     for item in ctm_def.items:
         if isinstance(item, CtmSimpleFolder) or isinstance(item, CtmSmartFolder):
             dto_folder = map_folder_info_from_ctm_model(item, logger=logger)
-            if dto_folder.server not in results:
-                logger.debug(f"Mapping server DTO '{dto_folder.server}'...")
-                info = DtoServerInfo()
-                info.name = dto_folder.server
-                results[dto_folder.server] = info
-            else:
-                info = results[dto_folder.server]
-
-            info.folders.append(dto_folder)
-
-            if dto_folder.application and dto_folder.application not in info.application_keys:
-                info.application_keys.append(dto_folder.application)
-
-            if dto_folder.sub_application and dto_folder.sub_application not in info.sub_application_keys:
-                info.sub_application_keys.append(dto_folder.sub_application)
-
-            if dto_folder.node_id:
-                if dto_folder.node_id not in info.node_infos:
-                    node_info = DtoNodeInfo()
-                    info.node_infos[dto_folder.node_id] = node_info
-                else:
-                    node_info = info.node_infos[dto_folder.node_id]
-                node_info.append_folder_key_if_needed(dto_folder.name)
-
-            for k in dto_folder.job_application_keys:
-                if k not in info.application_keys:
-                    info.application_keys.append(k)
-
-            for k in dto_folder.job_sub_application_keys:
-                if k not in info.sub_application_keys:
-                    info.sub_application_keys.append(k)
-
-            for folder_node_id in dto_folder.node_jobs_map:
-                if folder_node_id not in info.node_infos:
-                    node_info = DtoNodeInfo()
-                    info.node_infos[folder_node_id] = node_info
-                else:
-                    node_info = info.node_infos[folder_node_id]
-                folder_node_jobs = dto_folder.node_jobs_map[folder_node_id]
-                for j in folder_node_jobs:
-                    node_info.append_folder_key_if_needed(dto_folder.name)
-                    node_info.append_job_key_if_needed(dto_folder.name, j)
+            append_folder_info_to_server_infos(results, dto_folder, logger=logger)
         else:
             logger.warning(f"Cannot map item ({item}). Tag '{item.tag_name}' is not supported. Skipping...")
     return results
+
+
+def append_folder_info_to_server_infos(
+        results: Dict[str, DtoServerInfo],
+        dto_folder: DtoFolderInfo,
+        logger: Logger = None) -> DtoServerInfo:
+
+    logger = logger or create_console_logger(
+        f"{__name__}.mapper", min_log_level=logging.WARNING, console_log_level=logging.WARNING)
+    if dto_folder.server not in results:
+        logger.debug(f"Mapping server DTO '{dto_folder.server}'...")
+        info = DtoServerInfo()
+        info.name = dto_folder.server
+        results[dto_folder.server] = info
+    else:
+        info = results[dto_folder.server]
+
+    info.folders.append(dto_folder)
+
+    if dto_folder.application and dto_folder.application not in info.application_keys:
+        info.application_keys.append(dto_folder.application)
+
+    if dto_folder.sub_application and dto_folder.sub_application not in info.sub_application_keys:
+        info.sub_application_keys.append(dto_folder.sub_application)
+
+    if dto_folder.node_id:
+        if dto_folder.node_id not in info.node_infos:
+            node_info = DtoNodeInfo()
+            info.node_infos[dto_folder.node_id] = node_info
+        else:
+            node_info = info.node_infos[dto_folder.node_id]
+        node_info.append_folder_key_if_needed(dto_folder.name)
+
+    for k in dto_folder.job_application_keys:
+        if k not in info.application_keys:
+            info.application_keys.append(k)
+
+    for k in dto_folder.job_sub_application_keys:
+        if k not in info.sub_application_keys:
+            info.sub_application_keys.append(k)
+
+    for folder_node_id in dto_folder.node_jobs_map:
+        if folder_node_id not in info.node_infos:
+            node_info = DtoNodeInfo()
+            info.node_infos[folder_node_id] = node_info
+        else:
+            node_info = info.node_infos[folder_node_id]
+        folder_node_jobs = dto_folder.node_jobs_map[folder_node_id]
+        for j in folder_node_jobs:
+            node_info.append_folder_key_if_needed(dto_folder.name)
+            node_info.append_job_key_if_needed(dto_folder.name, j)
+    return info
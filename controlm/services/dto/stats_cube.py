@@ -0,0 +1,32 @@
+from typing import Dict, Final, Tuple
+from corelib.querying import AggregateCube
+from .server_info import DtoServerInfo
+
+
+STATS_CUBE_DIMENSIONS: Final = ('server', 'application', 'subApplication', 'node', 'taskType')
+STATS_CUBE_MEASURES: Final = ('jobsCount', 'cyclicCount', 'dummyCount')
+STATS_CUBE_DISTINCT_MEASURES: Final = ('foldersCount',)
+
+
+def build_stats_cube(server_infos: Dict[str, DtoServerInfo]) -> AggregateCube:
+    """
+    Counts jobs, cyclic jobs, dummy jobs and folders by server, application, sub-application, node and task type in
+    one pass over the folders. Jobs without an application, sub-application or node fall back to their folder's.
+    A folder counts towards every cell it has a job in; folders without jobs count towards a cell without task type.
+    """
+    cube = AggregateCube(STATS_CUBE_DIMENSIONS, STATS_CUBE_MEASURES, STATS_CUBE_DISTINCT_MEASURES)
+    for server_name, server_info in server_infos.items():
+        for folder in server_info.folders:
+            folder_key: Tuple[str, str] = (server_name, folder.name)
+            if not folder.jobs:
+                cube.add((server_name, folder.application, folder.sub_application, folder.node_id, None),
+                         (0, 0, 0), (folder_key,))
+            for job in folder.jobs:
+                cube.add((server_name,
+                          job.application or folder.application,
+                          job.sub_application or folder.sub_application,
+                          job.node_id or folder.node_id,
+                          job.task_type),
+                         (1, int(job.is_cyclic), int(job.is_run_as_dummy)),
+                         (folder_key,))
+    return cube.build()
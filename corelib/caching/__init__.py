@@ -1 +1,2 @@
 from .cache_store import CacheStore
+from .response_cache import ResponseCache
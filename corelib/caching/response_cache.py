@@ -0,0 +1,111 @@
+from abc import ABC
+from collections import OrderedDict
+from logging import Logger
+from threading import Lock
+from typing import Callable, Hashable, Optional, Tuple
+from uuid import uuid4
+from corelib.logging.helpers import create_console_logger
+
+
+class ResponseCache (ABC):
+    """
+    LRU cache of rendered response bodies, keyed by route, arguments and data generation. Entries of older
+    generations are dropped as soon as a newer generation is seen, so a published data set invalidates every body
+    rendered from its predecessor. The cache holds at most ``max_entries`` bodies and ``max_bytes`` bytes in total;
+    larger bodies are not cached.
+    """
+
+    def __init__(self,
+                 identifier: str = f"{__name__}_{uuid4()}",
+                 max_entries: int = None,
+                 max_bytes: int = None,
+                 logger: Logger = None):
+        self._identifier: str = identifier
+        self._max_entries: int = max_entries or 1024
+        self._max_bytes: int = max_bytes or 512 * 1024 * 1024
+        self._lock: Lock = Lock()
+        self._entries: OrderedDict = OrderedDict()
+        self._size: int = 0
+        self._generation: Optional[int] = None
+        self._hits: int = 0
+        self._misses: int = 0
+        self._logger = logger or create_console_logger(__name__)
+        self._logger.info(f"Response cache '{self.identifier}' initialized.")
+
+    @property
+    def logger(self) -> Logger:
+        return self._logger
+
+    @property
+    def identifier(self) -> str:
+        return self._identifier
+
+    @property
+    def size(self) -> int:
+        return self._size
+
+    @property
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                'generation': self._generation,
+                'entries': len(self._entries),
+                'bytes': self._size,
+                'maxEntries': self._max_entries,
+                'maxBytes': self._max_bytes,
+                'hits': self._hits,
+                'misses': self._misses,
+            }
+
+    def get(self, generation: int, key: Hashable) -> Optional[bytes]:
+        with self._lock:
+            self._observe_generation(generation)
+            body = self._entries.get(key)
+            if body is None:
+                self._misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return body
+
+    def put(self, generation: int, key: Hashable, body: bytes) -> None:
+        if len(body) > self._max_bytes:
+            self.logger.debug(f"[{self.identifier}] Body of {len(body)} bytes for [{key}] exceeds the cache size.")
+            return
+        with self._lock:
+            self._observe_generation(generation)
+            if generation != self._generation:
+                return
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._size -= len(previous)
+            self._entries[key] = body
+            self._size += len(body)
+            while len(self._entries) > self._max_entries or self._size > self._max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= len(evicted)
+
+    def get_or_render(self, generation: int, key: Hashable, render: Callable[[], bytes]) -> Tuple[bytes, bool]:
+        """
+        :return: The cached body, or the rendered one after caching it, and whether it was a cache hit.
+        """
+        body = self.get(generation, key)
+        if body is not None:
+            return body, True
+        body = render()
+        self.put(generation, key, body)
+        return body, False
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+    def _observe_generation(self, generation: int) -> None:
+        if self._generation is None or generation > self._generation:
+            if self._entries:
+                self.logger.info(f"[{self.identifier}] Generation {generation} published. "
+                                 f"Dropping {len(self._entries)} response(s) of generation {self._generation}.")
+            self._entries.clear()
+            self._size = 0
+            self._generation = generation
@@ -0,0 +1,2 @@
+from .response_compressor import ResponseCompressor, GZIP_ENCODING, DEFLATE_ENCODING
+from .compressed_source import open_source, detect_compression, GZIP_COMPRESSION, BZ2_COMPRESSION, LZMA_COMPRESSION
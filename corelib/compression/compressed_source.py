@@ -0,0 +1,49 @@
+import bz2
+import gzip
+import io
+import lzma
+from typing import IO, Callable, Dict, Optional, Tuple
+
+
+GZIP_COMPRESSION: str = 'gzip'
+BZ2_COMPRESSION: str = 'bz2'
+LZMA_COMPRESSION: str = 'lzma'
+
+# Magic numbers of the formats the standard library decompresses; xz and legacy .lzma both open with lzma.
+_SIGNATURES: Tuple[Tuple[bytes, str], ...] = (
+    (b'\x1f\x8b', GZIP_COMPRESSION),
+    (b'BZh', BZ2_COMPRESSION),
+    (b'\xfd7zXZ\x00', LZMA_COMPRESSION),
+    (b'\x5d\x00\x00', LZMA_COMPRESSION),
+)
+
+_OPENERS: Dict[str, Callable[[str], IO[bytes]]] = {
+    GZIP_COMPRESSION: lambda path: gzip.open(path, 'rb'),
+    BZ2_COMPRESSION: lambda path: bz2.open(path, 'rb'),
+    LZMA_COMPRESSION: lambda path: lzma.open(path, 'rb'),
+}
+
+
+def detect_compression(path: str) -> Optional[str]:
+    """
+    Detects the compression of a file from its leading bytes, so that sources are recognized whatever their
+    suffix.
+    :return: GZIP_COMPRESSION, BZ2_COMPRESSION, LZMA_COMPRESSION, or None for uncompressed files.
+    """
+    with open(path, 'rb') as source:
+        head = source.read(6)
+    return next((compression for signature, compression in _SIGNATURES if head.startswith(signature)), None)
+
+
+def open_source(path: str, encoding: str = None, newline: str = None) -> IO:
+    """
+    Opens a file for reading, decompressing gzip, bz2 and xz/lzma files as a stream while they are read. Nothing
+    is decompressed to disk, and memory stays bounded by the decompressors' buffers.
+    :param encoding: Opens the file in text mode with this encoding; binary mode if None.
+    :param newline: Newline handling in text mode, as for ``open``.
+    """
+    compression = detect_compression(path)
+    if compression is None:
+        return open(path, 'rb') if encoding is None else open(path, 'r', encoding=encoding, newline=newline)
+    stream = _OPENERS[compression](path)
+    return stream if encoding is None else io.TextIOWrapper(stream, encoding=encoding, newline=newline)
@@ -0,0 +1,81 @@
+import gzip
+import zlib
+from abc import ABC
+from logging import Logger
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+from uuid import uuid4
+from corelib.logging.helpers import create_console_logger
+
+
+GZIP_ENCODING: str = 'gzip'
+DEFLATE_ENCODING: str = 'deflate'
+
+_COMPRESSORS: Dict[str, Callable[[bytes, int], bytes]] = {
+    # mtime=0 keeps the output a function of the input only, so that equal bodies compress to equal bytes.
+    GZIP_ENCODING: lambda body, level: gzip.compress(body, compresslevel=level, mtime=0),
+    DEFLATE_ENCODING: lambda body, level: zlib.compress(body, level),
+}
+
+
+class ResponseCompressor (ABC):
+    """
+    Negotiates and applies HTTP content codings available in the standard library: gzip and deflate. Bodies
+    smaller than ``min_size`` bytes are not worth compressing and are sent as they are.
+    """
+
+    def __init__(self,
+                 identifier: str = f"{__name__}_{uuid4()}",
+                 min_size: int = None,
+                 level: int = None,
+                 encodings: List[str] = None,
+                 logger: Logger = None):
+        self._identifier: str = identifier
+        self._min_size: int = 1024 if min_size is None else min_size
+        self._level: int = 6 if level is None else level
+        self._encodings: List[str] = list(encodings or [GZIP_ENCODING, DEFLATE_ENCODING])
+        for encoding in self._encodings:
+            if encoding not in _COMPRESSORS:
+                raise ValueError(f"[{identifier}] Unsupported content coding '{encoding}'. "
+                                 f"Supported are {list(_COMPRESSORS)}.")
+        self._logger = logger or create_console_logger(__name__)
+        self._logger.info(f"Response compressor '{self.identifier}' initialized.")
+
+    @property
+    def logger(self) -> Logger:
+        return self._logger
+
+    @property
+    def identifier(self) -> str:
+        return self._identifier
+
+    @property
+    def min_size(self) -> int:
+        return self._min_size
+
+    @property
+    def level(self) -> int:
+        return self._level
+
+    @property
+    def encodings(self) -> List[str]:
+        return list(self._encodings)
+
+    def negotiate(self, accept_encoding: Iterable[Tuple[str, float]]) -> Optional[str]:
+        """
+        :param accept_encoding: The parsed Accept-Encoding header, as (coding, quality) pairs.
+        :return: The supported coding the client prefers, preferring the configured order on ties; None when the
+        client accepts none of them.
+        """
+        qualities = {coding.lower(): quality for coding, quality in accept_encoding}
+        best, best_quality = None, 0
+        for encoding in self._encodings:
+            quality = qualities.get(encoding, qualities.get('*', 0))
+            if quality > best_quality:
+                best, best_quality = encoding, quality
+        return best
+
+    def should_compress(self, size: int) -> bool:
+        return size >= self._min_size
+
+    def compress(self, body: bytes, encoding: str) -> bytes:
+        return _COMPRESSORS[encoding](body, self._level)
@@ -0,0 +1 @@
+from .event_bus import Event, EventBus, EventSubscription
@@ -0,0 +1,169 @@
+from abc import ABC
+from collections import deque
+from datetime import datetime
+from logging import Logger
+from threading import Condition, Lock
+from typing import Callable, Deque, List, Optional
+from uuid import uuid4
+from corelib.logging.helpers import create_console_logger
+
+
+class Event (ABC):
+
+    def __init__(self, event_id: int, event_type: str, data: dict = None, timestamp: datetime = None):
+        self.id: int = event_id
+        self.type: str = event_type
+        self.data: dict = data or {}
+        self.timestamp: datetime = timestamp or datetime.now()
+
+    def __repr__(self):
+        return f"Event(id={self.id}, type={self.type!r}, data={self.data!r})"
+
+
+class EventSubscription (ABC):
+    """
+    Blocking queue of the events published after subscribing. At most ``max_queue_size`` events are queued; when a
+    slow subscriber falls behind, the oldest events are dropped and counted in ``missed``.
+    """
+
+    def __init__(self, bus: 'EventBus', max_queue_size: int):
+        self._bus: EventBus = bus
+        self._condition: Condition = Condition()
+        self._queue: Deque[Event] = deque(maxlen=max_queue_size)
+        self._missed: int = 0
+        self._closed: bool = False
+
+    @property
+    def missed(self) -> int:
+        return self._missed
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    def notify(self, event: Event) -> None:
+        with self._condition:
+            if len(self._queue) == self._queue.maxlen:
+                self._missed += 1
+            self._queue.append(event)
+            self._condition.notify()
+
+    def get(self, timeout: float = None) -> Optional[Event]:
+        """
+        :return: The next event, or None when the timeout expires or the subscription is closed.
+        """
+        with self._condition:
+            self._condition.wait_for(lambda: self._queue or self._closed, timeout=timeout)
+            return self._queue.popleft() if self._queue else None
+
+    def close(self) -> None:
+        self._bus.remove_listener(self.notify)
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+class EventBus (ABC):
+    """
+    In-process publish/subscribe. Events get increasing ids, and the last ``history_size`` events are kept, so that
+    a subscriber reconnecting with the id of the last event it saw receives the ones it missed. Listeners are called
+    in the publishing thread and must not block. Subscribers - listeners serving clients, such as event streams -
+    are limited to ``max_subscribers``; in-process listeners are not.
+    """
+
+    def __init__(self,
+                 identifier: str = f"{__name__}_{uuid4()}",
+                 history_size: int = None,
+                 max_subscribers: int = None,
+                 max_queue_size: int = None,
+                 logger: Logger = None):
+        self._identifier: str = identifier
+        self._max_subscribers: int = max_subscribers or 64
+        self._max_queue_size: int = max_queue_size or 256
+        self._lock: Lock = Lock()
+        self._history: Deque[Event] = deque(maxlen=history_size or 128)
+        self._listeners: List[Callable[[Event], None]] = []
+        self._subscribers: List[Callable[[Event], None]] = []
+        self._last_event_id: int = 0
+        self._logger = logger or create_console_logger(__name__)
+        self._logger.info(f"Event bus '{self.identifier}' initialized.")
+
+    @property
+    def logger(self) -> Logger:
+        return self._logger
+
+    @property
+    def identifier(self) -> str:
+        return self._identifier
+
+    @property
+    def last_event_id(self) -> int:
+        return self._last_event_id
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+
+    @property
+    def is_full(self) -> bool:
+        return len(self._subscribers) >= self._max_subscribers
+
+    @property
+    def max_queue_size(self) -> int:
+        return self._max_queue_size
+
+    def publish(self, event_type: str, data: dict = None) -> Event:
+        with self._lock:
+            self._last_event_id += 1
+            event = Event(self._last_event_id, event_type, data)
+            self._history.append(event)
+            listeners = self._listeners + self._subscribers
+        for listener in listeners:
+            try:
+                listener(event)
+            except BaseException as ex:
+                self.logger.error(f"[{self.identifier}] Listener {listener} failed on {event}: {ex}")
+        return event
+
+    def add_listener(self, listener: Callable[[Event], None]) -> None:
+        with self._lock:
+            self._listeners.append(listener)
+
+    def add_subscriber(self, listener: Callable[[Event], None], last_event_id: int = None) -> bool:
+        """
+        :param last_event_id: Id of the last event seen; the retained events published after it are passed to the
+        listener first.
+        :return: False when the bus already has ``max_subscribers`` subscribers.
+        """
+        with self._lock:
+            if len(self._subscribers) >= self._max_subscribers:
+                return False
+            if last_event_id is not None:
+                for event in self._history:
+                    if event.id > last_event_id:
+                        listener(event)
+            self._subscribers.append(listener)
+            return True
+
+    def remove_listener(self, listener: Callable[[Event], None]) -> None:
+        """
+        Removes a listener or subscriber.
+        """
+        with self._lock:
+            for listeners in (self._listeners, self._subscribers):
+                if listener in listeners:
+                    listeners.remove(listener)
+
+    def subscribe(self, last_event_id: int = None) -> Optional[EventSubscription]:
+        """
+        :return: A subscription starting with the retained events after last_event_id, if given, or None when the
+        bus already has ``max_subscribers`` subscribers.
+        """
+        subscription = EventSubscription(self, self._max_queue_size)
+        return subscription if self.add_subscriber(subscription.notify, last_event_id) else None
@@ -1,20 +1,30 @@
 import logging
+from typing import Final
 from .console_color_formatter import ConsoleColorFormatter
 
 
+CONSOLE_HANDLER_NAME: Final = f"{__name__}.console"
+
+
 def create_console_logger(
         logger_name: str = __name__,
         min_log_level: int = None,
         console_log_level: int = None) -> logging.Logger:
-
+    """
+    Idempotent: the console handler is added once per logger, later calls only update the levels.
+    """
     logger = logging.getLogger(logger_name)
     min_log_level = min_log_level or logging.WARNING
     logger.setLevel(min_log_level)
 
-    ch = logging.StreamHandler()
+    ch = next((h for h in logger.handlers if h.get_name() == CONSOLE_HANDLER_NAME), None)
+    if ch is None:
+        ch = logging.StreamHandler()
+        ch.set_name(CONSOLE_HANDLER_NAME)
+        ch.setFormatter(ConsoleColorFormatter())
+        logger.addHandler(ch)
     console_log_level = console_log_level or logging.WARNING
     ch.setLevel(console_log_level)
-    ch.setFormatter(ConsoleColorFormatter())
-    logger.addHandler(ch)
 
     return logger
+
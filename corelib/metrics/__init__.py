@@ -0,0 +1,2 @@
+from .rolling_histogram import RollingHistogram, DEFAULT_LATENCY_BUCKETS
+from .metrics_registry import MetricsRegistry, MetricFamily, PROMETHEUS_CONTENT_TYPE
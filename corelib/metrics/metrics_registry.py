@@ -0,0 +1,249 @@
+import bisect
+import math
+from abc import ABC
+from logging import Logger
+from threading import Lock
+from typing import Callable, Dict, Final, List, Sequence, Tuple
+from uuid import uuid4
+from corelib.logging.helpers import create_console_logger
+from .rolling_histogram import DEFAULT_LATENCY_BUCKETS
+
+
+PROMETHEUS_CONTENT_TYPE: Final = 'text/plain; version=0.0.4; charset=utf-8'
+COUNTER: Final = 'counter'
+GAUGE: Final = 'gauge'
+HISTOGRAM: Final = 'histogram'
+
+
+def _format_value(value: float) -> str:
+    if math.isnan(value):
+        return 'NaN'
+    if math.isinf(value):
+        return '+Inf' if value > 0 else '-Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def _escape_label_value(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape_label_value(value)}"' for name, value in zip(names, values)) + '}'
+
+
+class CounterChild (ABC):
+
+    def __init__(self):
+        self._lock: Lock = Lock()
+        self._value: float = 0
+
+    @property
+    def value(self) -> float:
+        return self._value
+
+    def inc(self, amount: float = 1) -> None:
+        if amount < 0:
+            raise ValueError(f"Counters can only increase, got {amount}.")
+        with self._lock:
+            self._value += amount
+
+    def samples(self, name: str, labels: str) -> List[str]:
+        return [f"{name}{labels} {_format_value(self._value)}"]
+
+
+class GaugeChild (ABC):
+
+    def __init__(self):
+        self._value: float = 0
+
+    @property
+    def value(self) -> float:
+        return self._value
+
+    def set(self, value: float) -> None:
+        self._value = value
+
+    def samples(self, name: str, labels: str) -> List[str]:
+        return [f"{name}{labels} {_format_value(self._value)}"]
+
+
+class HistogramChild (ABC):
+    """
+    Cumulative histogram with fixed buckets. An observation costs a binary search and two increments.
+    """
+
+    def __init__(self, buckets: Tuple[float, ...]):
+        self._buckets: Tuple[float, ...] = buckets
+        self._lock: Lock = Lock()
+        self._counts: List[int] = [0] * (len(buckets) + 1)
+        self._sum: float = 0.0
+
+    @property
+    def count(self) -> int:
+        return sum(self._counts)
+
+    @property
+    def sum(self) -> float:
+        return self._sum
+
+    def observe(self, value: float) -> None:
+        idx = bisect.bisect_left(self._buckets, value)
+        with self._lock:
+            self._counts[idx] += 1
+            self._sum += value
+
+    def samples(self, name: str, labels: str) -> List[str]:
+        with self._lock:
+            counts, total = list(self._counts), self._sum
+        # The bucket bound is appended to the child's labels.
+        prefix = f"{labels[:-1]}," if labels else '{'
+        lines, cumulative = [], 0
+        for bound, count in zip(self._buckets + (math.inf,), counts):
+            cumulative += count
+            lines.append(f'{name}_bucket{prefix}le="{_format_value(bound)}"}} {cumulative}')
+        lines.append(f"{name}_sum{labels} {_format_value(total)}")
+        lines.append(f"{name}_count{labels} {cumulative}")
+        return lines
+
+
+class MetricFamily (ABC):
+    """
+    A named metric and its children, one per combination of label values. Children are created on first use.
+    """
+
+    def __init__(self,
+                 name: str,
+                 documentation: str,
+                 metric_type: str,
+                 labelnames: Sequence[str],
+                 create_child: Callable[[], object]):
+        self._name: str = name
+        self._documentation: str = documentation
+        self._type: str = metric_type
+        self._labelnames: Tuple[str, ...] = tuple(labelnames)
+        self._create_child: Callable[[], object] = create_child
+        self._children: Dict[Tuple[str, ...], object] = {}
+        self._lock: Lock = Lock()
+
+    @property
+    def name(self) -> str:
+        return self._name
+
+    @property
+    def type(self) -> str:
+        return self._type
+
+    def labels(self, *values: str):
+        """
+        :return: The child for the label values, which are strings in the order of the label names.
+        """
+        child = self._children.get(values)
+        if child is None:
+            if len(values) != len(self._labelnames):
+                raise ValueError(f"Metric '{self._name}' takes labels {self._labelnames}, got {values}.")
+            with self._lock:
+                child = self._children.setdefault(values, self._create_child())
+        return child
+
+    def clear(self) -> None:
+        with self._lock:
+            self._children = {}
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self._name} {self._documentation}", f"# TYPE {self._name} {self._type}"]
+        with self._lock:
+            children = list(self._children.items())
+        for values, child in children:
+            lines.extend(child.samples(self._name, _format_labels(self._labelnames, values)))
+        return lines
+
+    # Shortcuts for families without labels.
+
+    def inc(self, amount: float = 1) -> None:
+        self.labels().inc(amount)
+
+    def set(self, value: float) -> None:
+        self.labels().set(value)
+
+    def observe(self, value: float) -> None:
+        self.labels().observe(value)
+
+
+class MetricsRegistry (ABC):
+    """
+    Counters, gauges and histograms rendered in the Prometheus text exposition format. Recording is cheap and
+    thread safe; values that are only needed at scrape time, such as queue depths, are set by collectors that run
+    before each rendering.
+    """
+
+    def __init__(self,
+                 identifier: str = f"{__name__}_{uuid4()}",
+                 logger: Logger = None):
+        self._identifier: str = identifier
+        self._lock: Lock = Lock()
+        self._families: Dict[str, MetricFamily] = {}
+        self._collectors: List[Callable[[], None]] = []
+        self._logger = logger or create_console_logger(__name__)
+        self._logger.info(f"Metrics registry '{self.identifier}' initialized.")
+
+    @property
+    def logger(self) -> Logger:
+        return self._logger
+
+    @property
+    def identifier(self) -> str:
+        return self._identifier
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> MetricFamily:
+        return self._register(name, documentation, COUNTER, labelnames, CounterChild)
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> MetricFamily:
+        return self._register(name, documentation, GAUGE, labelnames, GaugeChild)
+
+    def histogram(self,
+                  name: str,
+                  documentation: str,
+                  labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_LATENCY_BUCKETS) -> MetricFamily:
+        bounds = tuple(sorted(buckets))
+        return self._register(name, documentation, HISTOGRAM, labelnames, lambda: HistogramChild(bounds))
+
+    def get(self, name: str) -> MetricFamily:
+        if name not in self._families:
+            raise NameError(f"[{self.identifier}] Metric '{name}' is not registered.")
+        return self._families[name]
+
+    def register_collector(self, collector: Callable[[], None]) -> None:
+        with self._lock:
+            self._collectors.append(collector)
+
+    def render(self) -> str:
+        with self._lock:
+            collectors = list(self._collectors)
+            families = list(self._families.values())
+        for collector in collectors:
+            try:
+                collector()
+            except BaseException as ex:
+                self.logger.error(f"[{self.identifier}] Metrics collector {collector} failed: {ex}")
+        lines = []
+        for family in families:
+            lines.extend(family.render())
+        return '\n'.join(lines) + '\n'
+
+    def _register(self,
+                  name: str,
+                  documentation: str,
+                  metric_type: str,
+                  labelnames: Sequence[str],
+                  create_child: Callable[[], object]) -> MetricFamily:
+        with self._lock:
+            family = self._families.get(name)
+            if family is None:
+                family = MetricFamily(name, documentation, metric_type, labelnames, create_child)
+                self._families[name] = family
+            elif family.type != metric_type:
+                raise ValueError(f"[{self.identifier}] Metric '{name}' is registered as a {family.type}.")
+            return family
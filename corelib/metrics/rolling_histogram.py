@@ -0,0 +1,100 @@
+import bisect
+import math
+from abc import ABC
+from collections import deque
+from threading import Lock
+from time import monotonic
+from typing import Deque, Final, Optional, Sequence, Tuple
+
+
+DEFAULT_LATENCY_BUCKETS: Final = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0, 30.0, 60.0, 300.0, 1800.0)
+
+
+class RollingHistogram (ABC):
+    """
+    Histogram over the most recent observations only. At most ``window_size`` samples are kept, and samples older
+    than ``max_age`` seconds are dropped, so the snapshot follows the current behaviour of the system rather than
+    its whole lifetime. The lifetime count and sum are tracked separately.
+    """
+
+    def __init__(self,
+                 window_size: int = 1024,
+                 max_age: Optional[float] = None,
+                 buckets: Sequence[float] = DEFAULT_LATENCY_BUCKETS):
+        if window_size <= 0:
+            raise ValueError(f"Histogram window size must be positive, got {window_size}.")
+        self._window_size: int = window_size
+        self._max_age: Optional[float] = max_age
+        self._buckets: Tuple[float, ...] = tuple(sorted(buckets))
+        self._samples: Deque[Tuple[float, float]] = deque(maxlen=window_size)
+        self._lock: Lock = Lock()
+        self._total_count: int = 0
+        self._total_sum: float = 0.0
+
+    @property
+    def window_size(self) -> int:
+        return self._window_size
+
+    @property
+    def buckets(self) -> Tuple[float, ...]:
+        return self._buckets
+
+    @property
+    def total_count(self) -> int:
+        return self._total_count
+
+    @property
+    def total_sum(self) -> float:
+        return self._total_sum
+
+    def observe(self, value: float) -> None:
+        with self._lock:
+            self._samples.append((monotonic(), value))
+            self._total_count += 1
+            self._total_sum += value
+
+    def values(self) -> [float]:
+        with self._lock:
+            self._expire()
+            return [value for _, value in self._samples]
+
+    def snapshot(self) -> dict:
+        """
+        :return: Count, sum, mean, min, max and the 50th/90th/99th percentiles of the window, plus its cumulative
+        bucket counts keyed by upper bound.
+        """
+        values = sorted(self.values())
+        counts = [0] * (len(self._buckets) + 1)
+        for value in values:
+            counts[bisect.bisect_left(self._buckets, value)] += 1
+        cumulative, buckets = 0, {}
+        for bound, count in zip(list(self._buckets) + [math.inf], counts):
+            cumulative += count
+            buckets['+Inf' if bound == math.inf else str(bound)] = cumulative
+        return {
+            'count': len(values),
+            'sum': sum(values),
+            'mean': sum(values) / len(values) if values else None,
+            'min': values[0] if values else None,
+            'max': values[-1] if values else None,
+            'p50': self._percentile(values, 50),
+            'p90': self._percentile(values, 90),
+            'p99': self._percentile(values, 99),
+            'buckets': buckets,
+            'totalCount': self._total_count,
+            'totalSum': self._total_sum,
+        }
+
+    def _expire(self) -> None:
+        if self._max_age is None:
+            return
+        threshold = monotonic() - self._max_age
+        while self._samples and self._samples[0][0] < threshold:
+            self._samples.popleft()
+
+    @staticmethod
+    def _percentile(sorted_values: [float], percentile: float) -> Optional[float]:
+        if not sorted_values:
+            return None
+        rank = max(0, math.ceil(percentile / 100 * len(sorted_values)) - 1)
+        return sorted_values[rank]
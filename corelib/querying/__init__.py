@@ -0,0 +1,4 @@
+from .field_projection import parse_fields, project
+from .pagination import Page, paginate, encode_cursor, decode_cursor
+from .collection_query import CollectionQuery, DEFAULT_PAGE_LIMIT
+from .aggregate_cube import AggregateCube
@@ -0,0 +1,186 @@
+from abc import ABC
+from itertools import combinations
+from threading import Lock
+from typing import Any, Dict, Hashable, List, Mapping, Optional, Sequence, Set, Tuple
+
+
+Coordinates = Tuple[Hashable, ...]
+
+
+class AggregateCube (ABC):
+    """
+    Counts of facts along every combination of a fixed set of dimensions, computed once. Facts are added at full
+    detail, then ``build`` rolls them up into one cuboid per subset of the dimensions, so that a roll-up, a
+    drill-down or a slice is answered from precomputed cells instead of by scanning the facts.
+
+    Measures are summed. Distinct measures count distinct members - e.g. the folders having jobs in a cell - which
+    cannot be summed across cells, so they are counted per cuboid while building and only the counts are kept.
+    """
+
+    def __init__(self, dimensions: Sequence[str], measures: Sequence[str], distinct_measures: Sequence[str] = ()):
+        names = list(dimensions) + list(measures) + list(distinct_measures)
+        if len(set(names)) != len(names):
+            raise ValueError(f"Dimension and measure names must be unique, got {names}.")
+        self._dimensions: Tuple[str, ...] = tuple(dimensions)
+        self._measures: Tuple[str, ...] = tuple(measures)
+        self._distinct_measures: Tuple[str, ...] = tuple(distinct_measures)
+        self._facts: Optional[Dict[Coordinates, Tuple[List[int], List[Set[Hashable]]]]] = {}
+        self._cuboids: Dict[Tuple[int, ...], Dict[Coordinates, Tuple[int, ...]]] = {}
+        self._slices: Dict[tuple, Dict[Coordinates, List[Tuple[Coordinates, Tuple[int, ...]]]]] = {}
+        self._slices_lock: Lock = Lock()
+
+    @property
+    def dimensions(self) -> Tuple[str, ...]:
+        return self._dimensions
+
+    @property
+    def measures(self) -> Tuple[str, ...]:
+        return self._measures + self._distinct_measures
+
+    @property
+    def is_built(self) -> bool:
+        return self._facts is None
+
+    def add(self, coordinates: Sequence[Hashable], values: Sequence[int], members: Sequence[Hashable] = ()) -> None:
+        """
+        Adds a fact.
+        :param coordinates: The fact's value of each dimension, in order.
+        :param values: The fact's value of each measure, in order.
+        :param members: The member the fact counts towards each distinct measure, in order.
+        """
+        if self.is_built:
+            raise ValueError('Facts cannot be added to a built cube.')
+        if len(coordinates) != len(self._dimensions) or len(values) != len(self._measures) \
+                or len(members) != len(self._distinct_measures):
+            raise ValueError(f"A fact needs {len(self._dimensions)} coordinates, {len(self._measures)} values and "
+                             f"{len(self._distinct_measures)} members.")
+        fact = self._facts.get(tuple(coordinates))
+        if fact is None:
+            fact = self._facts[tuple(coordinates)] = ([0] * len(self._measures),
+                                                      [set() for _ in self._distinct_measures])
+        sums, distinct = fact
+        for idx, value in enumerate(values):
+            sums[idx] += value
+        for idx, member in enumerate(members):
+            distinct[idx].add(member)
+
+    def build(self) -> 'AggregateCube':
+        """
+        Rolls the facts up into every cuboid and drops them.
+        :return: The cube itself.
+        """
+        if self.is_built:
+            return self
+        dimensions = tuple(range(len(self._dimensions)))
+        rolled_up = {dimensions: self._facts}
+        self._facts = None
+        # Each cuboid is rolled up from the smallest cuboid with one more dimension rather than from the facts.
+        for size in range(len(dimensions), -1, -1):
+            parents, rolled_up = rolled_up, {}
+            for group in combinations(dimensions, size):
+                if group != dimensions:
+                    parent_group = min((tuple(sorted(group + (idx,))) for idx in dimensions if idx not in group),
+                                       key=lambda candidate: len(parents[candidate]))
+                    rolled_up[group] = _roll_up(parents[parent_group], [parent_group.index(idx) for idx in group])
+                else:
+                    rolled_up[group] = parents[group]
+                self._cuboids[group] = {key: tuple(sums) + tuple(len(members) for members in distinct)
+                                        for key, (sums, distinct) in rolled_up[group].items()}
+        return self
+
+    def cell(self, where: Mapping[str, Hashable] = None) -> Dict[str, Any]:
+        """
+        :param where: Value of each fixed dimension; the others are rolled up. The grand total if None.
+        :return: The fixed coordinates and the measures of the cell, all zero when no fact falls into it.
+        """
+        where = dict(where or {})
+        group = self._group(where.keys())
+        key = tuple(where[self._dimensions[idx]] for idx in group)
+        values = self._cuboid(group).get(key, (0,) * len(self.measures))
+        return self._record(group, key, values)
+
+    def cells(self,
+              by: Sequence[str] = (),
+              where: Mapping[str, Hashable] = None,
+              order_by: Optional[str] = None,
+              top: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Breaks the cube down by the given dimensions within the slice selected by ``where``.
+        :param order_by: Measure to sort by, descending; cells are sorted by coordinates if None.
+        :param top: Number of cells to return, all if None.
+        :return: The coordinates - of the ``by`` and ``where`` dimensions - and the measures of each cell.
+        """
+        where = dict(where or {})
+        if order_by is not None and order_by not in self.measures:
+            raise ValueError(f"Unknown measure '{order_by}'. Expected one of {list(self.measures)}.")
+        if top is not None and top < 0:
+            raise ValueError(f"Top must not be negative, got {top}.")
+        fixed = self._group(where.keys())
+        group = self._group(list(by) + list(where.keys()))
+        slices = self._slice_index(group, fixed, order_by)
+        selected = slices.get(tuple(where[self._dimensions[idx]] for idx in fixed), [])
+        return [self._record(group, key, values) for key, values in (selected[:top] if top is not None else selected)]
+
+    def _group(self, names: Sequence[str]) -> Tuple[int, ...]:
+        unknown = [name for name in names if name not in self._dimensions]
+        if unknown:
+            raise ValueError(f"Unknown dimension(s) {unknown}. Expected any of {list(self._dimensions)}.")
+        return tuple(idx for idx, name in enumerate(self._dimensions) if name in names)
+
+    def _cuboid(self, group: Tuple[int, ...]) -> Dict[Coordinates, Tuple[int, ...]]:
+        if not self.is_built:
+            raise ValueError('The cube is not built yet.')
+        return self._cuboids[group]
+
+    def _slice_index(self,
+                     group: Tuple[int, ...],
+                     fixed: Tuple[int, ...],
+                     order_by: Optional[str]) -> Dict[Coordinates, List[Tuple[Coordinates, Tuple[int, ...]]]]:
+        """
+        Cells of a cuboid grouped by their coordinates on the fixed dimensions, each group sorted. Built on first
+        use of a query shape and kept, so that repeated queries only slice a list.
+        """
+        index_key = (group, fixed, order_by)
+        index = self._slices.get(index_key)
+        if index is not None:
+            return index
+        with self._slices_lock:
+            index = self._slices.get(index_key)
+            if index is None:
+                positions = [group.index(idx) for idx in fixed]
+                index = {}
+                for key, values in self._cuboid(group).items():
+                    index.setdefault(tuple(key[pos] for pos in positions), []).append((key, values))
+                measure = self.measures.index(order_by) if order_by is not None else None
+                for cells in index.values():
+                    cells.sort(key=lambda cell: _coordinates_sort_key(cell[0]))
+                    if measure is not None:
+                        cells.sort(key=lambda cell: cell[1][measure], reverse=True)
+                self._slices[index_key] = index
+        return index
+
+    def _record(self, group: Tuple[int, ...], key: Coordinates, values: Tuple[int, ...]) -> Dict[str, Any]:
+        record: Dict[str, Any] = {self._dimensions[idx]: value for idx, value in zip(group, key)}
+        record.update(zip(self.measures, values))
+        return record
+
+
+def _roll_up(cells: Dict[Coordinates, Tuple[List[int], List[Set[Hashable]]]],
+             positions: List[int]) -> Dict[Coordinates, Tuple[List[int], List[Set[Hashable]]]]:
+    result: Dict[Coordinates, Tuple[List[int], List[Set[Hashable]]]] = {}
+    for coordinates, (sums, distinct) in cells.items():
+        key = tuple(coordinates[pos] for pos in positions)
+        cell = result.get(key)
+        if cell is None:
+            result[key] = (list(sums), [set(members) for members in distinct])
+            continue
+        for idx, value in enumerate(sums):
+            cell[0][idx] += value
+        for idx, members in enumerate(distinct):
+            cell[1][idx].update(members)
+    return result
+
+
+def _coordinates_sort_key(key: Coordinates) -> tuple:
+    # Missing coordinates (None) sort first and do not compare with values.
+    return tuple((value is not None, value if value is not None else '') for value in key)
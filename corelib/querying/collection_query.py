@@ -0,0 +1,99 @@
+from abc import ABC
+from typing import Any, Callable, Dict, List, Mapping, Optional, Sequence, Tuple, Union
+from .field_projection import FieldTree, parse_fields, project
+from .pagination import Page, paginate
+
+
+DEFAULT_PAGE_LIMIT: int = 100
+
+
+class CollectionQuery (ABC):
+    """
+    Field projection and cursor pagination requested for a collection: ``fields`` selects fields of each item,
+    ``limit`` and ``cursor`` select a page of items in key order.
+    """
+
+    def __init__(self, fields: Optional[str] = None, limit: Optional[int] = None, cursor: Optional[str] = None):
+        if limit is not None and limit <= 0:
+            raise ValueError(f"Limit must be positive, got {limit}.")
+        self._fields: Optional[str] = fields
+        self._tree: Optional[FieldTree] = parse_fields(fields)
+        self._limit: Optional[int] = limit
+        self._cursor: Optional[str] = cursor or None
+
+    @staticmethod
+    def from_args(args: Mapping[str, str]) -> Optional['CollectionQuery']:
+        """
+        Reads 'fields', 'limit' and 'cursor' from query arguments.
+        :return: The query, or None when none of the arguments is given.
+        :raise ValueError: When an argument is invalid.
+        """
+        if not any(args.get(name) for name in ('fields', 'limit', 'cursor')):
+            return None
+        limit = args.get('limit')
+        try:
+            limit = int(limit) if limit not in (None, '') else None
+        except ValueError:
+            raise ValueError(f"Limit must be an integer, got '{limit}'.")
+        return CollectionQuery(fields=args.get('fields'), limit=limit, cursor=args.get('cursor'))
+
+    @property
+    def fields(self) -> Optional[str]:
+        return self._fields
+
+    @property
+    def limit(self) -> Optional[int]:
+        return self._limit
+
+    @property
+    def cursor(self) -> Optional[str]:
+        return self._cursor
+
+    @property
+    def is_paginated(self) -> bool:
+        return self._limit is not None or self._cursor is not None
+
+    def project(self, item: Any) -> Any:
+        return project(item, self._tree)
+
+    def apply(self,
+              items: Sequence[Any],
+              key: Callable[[Any], Any] = None,
+              presorted: bool = False) -> Union[List[Any], Page]:
+        """
+        Projects the items and, when paginated, selects the requested page in key order.
+        :param presorted: The items are sorted by key already; otherwise a paginated query sorts them.
+        :return: The projected items, or a Page of them when paginated.
+        """
+        if not self.is_paginated:
+            return [self.project(item) for item in items] if self._tree else list(items)
+        page, next_cursor = self.select_page(items, key, presorted)
+        return Page([self.project(item) for item in page], next_cursor)
+
+    def apply_mapping(self, mapping: Dict[Any, Any]) -> Union[Dict[Any, Any], Page]:
+        """
+        Like ``apply`` for a mapping of records, paginated in key order.
+        """
+        if not self.is_paginated:
+            return {key: self.project(value) for key, value in mapping.items()} if self._tree else mapping
+        page, next_cursor = self.select_page(list(mapping.keys()))
+        return Page({key: self.project(mapping[key]) for key in page}, next_cursor)
+
+    def select_page(self,
+                    items: Sequence[Any],
+                    key: Callable[[Any], Any] = None,
+                    presorted: bool = False) -> Tuple[Sequence[Any], Optional[str]]:
+        """
+        Selects the requested page without projecting it, e.g. to compute only the records of the page.
+        :return: The page, or all items when not paginated, and the cursor of the next page.
+        """
+        if not self.is_paginated:
+            return items, None
+        key = key or _identity
+        if not presorted:
+            items = sorted(items, key=key)
+        return paginate(items, key, self._limit or DEFAULT_PAGE_LIMIT, self._cursor)
+
+
+def _identity(value: Any) -> Any:
+    return value
@@ -0,0 +1,65 @@
+from typing import Any, Dict, Optional
+
+FieldTree = Dict[str, 'FieldTree']
+
+_MISSING = object()
+
+
+def parse_fields(fields: Optional[str]) -> Optional[FieldTree]:
+    """
+    Parses a comma separated field selection, such as 'name,jobs.job_name', into a tree of field names. Selecting a
+    field also selects everything below it, so 'jobs,jobs.job_name' selects whole jobs.
+    :return: The field tree, or None when nothing is selected.
+    """
+    if fields is None or not fields.strip():
+        return None
+    tree: FieldTree = {}
+    for path in fields.split(','):
+        names = [name.strip() for name in path.strip().split('.')]
+        if not all(names) or any(name.startswith('_') for name in names):
+            raise ValueError(f"Invalid field '{path.strip()}'.")
+        node = tree
+        for idx, name in enumerate(names):
+            if name in node and not node[name]:
+                break
+            if idx == len(names) - 1:
+                node[name] = {}
+            else:
+                node = node.setdefault(name, {})
+    return tree
+
+
+def project(item: Any, tree: Optional[FieldTree]) -> Any:
+    """
+    Selects the fields in tree from item, an object or a dictionary, into a new dictionary. Below the item, lists
+    are projected element by element and dictionaries value by value, as they hold collections of records.
+    :raise ValueError: When a selected field does not exist.
+    """
+    if not tree:
+        return item
+    return _project_record(item, tree, '')
+
+
+def _project_value(value: Any, tree: FieldTree, prefix: str) -> Any:
+    if not tree or value is None:
+        return value
+    if isinstance(value, (list, tuple)):
+        return [_project_value(element, tree, prefix) for element in value]
+    if isinstance(value, dict):
+        return {key: _project_value(element, tree, prefix) for key, element in value.items()}
+    return _project_record(value, tree, prefix)
+
+
+def _project_record(record: Any, tree: FieldTree, prefix: str) -> dict:
+    if isinstance(record, (str, bytes, int, float, bool)):
+        raise ValueError(f"Fields cannot be selected on '{prefix.rstrip('.') or type(record).__name__}'.")
+    result = {}
+    for name, subtree in tree.items():
+        if isinstance(record, dict):
+            value = record.get(name, _MISSING)
+        else:
+            value = getattr(record, name, _MISSING)
+        if value is _MISSING or callable(value):
+            raise ValueError(f"Unknown field '{prefix}{name}'.")
+        result[name] = _project_value(value, subtree, f"{prefix}{name}.")
+    return result
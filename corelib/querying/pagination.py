@@ -0,0 +1,71 @@
+import base64
+import binascii
+import json
+from abc import ABC
+from typing import Any, Callable, Optional, Sequence, Tuple
+
+
+class Page (ABC):
+
+    def __init__(self, items: Any, next_cursor: Optional[str] = None):
+        self.items: Any = items
+        self.next_cursor: Optional[str] = next_cursor
+
+
+def encode_cursor(key: Any, skip: int) -> str:
+    """
+    :return: An opaque cursor pointing after the first ``skip`` items whose sort key is ``key``.
+    """
+    data = json.dumps([key, skip], separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(data).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor: str) -> Tuple[Any, int]:
+    try:
+        data = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        key, skip = json.loads(data)
+    except (binascii.Error, UnicodeDecodeError, TypeError, ValueError):
+        raise ValueError(f"Invalid cursor '{cursor}'.")
+    if not isinstance(skip, int) or skip < 0:
+        raise ValueError(f"Invalid cursor '{cursor}'.")
+    return _freeze(key), skip
+
+
+def _freeze(key: Any) -> Any:
+    # JSON turns tuple keys into lists, which do not compare with tuples.
+    return tuple(_freeze(part) for part in key) if isinstance(key, list) else key
+
+
+def _bisect_left(items: Sequence[Any], key_value: Any, key: Callable[[Any], Any]) -> int:
+    low, high = 0, len(items)
+    while low < high:
+        middle = (low + high) // 2
+        if key(items[middle]) < key_value:
+            low = middle + 1
+        else:
+            high = middle
+    return low
+
+
+def paginate(items: Sequence[Any],
+             key: Callable[[Any], Any],
+             limit: int,
+             cursor: Optional[str] = None) -> Tuple[Sequence[Any], Optional[str]]:
+    """
+    Returns the page of up to limit items following the cursor. Items must be sorted by key; the cursor is found by
+    binary search, so the cost of a page does not depend on its position. Keys need not be unique.
+    :return: The page and the cursor of the next page, or None on the last page.
+    """
+    start = 0
+    if cursor:
+        cursor_key, skip = decode_cursor(cursor)
+        try:
+            start = _bisect_left(items, cursor_key, key) + skip
+        except TypeError:
+            raise ValueError(f"Invalid cursor '{cursor}'.")
+    end = start + limit
+    page = items[start:end]
+    if end >= len(items) or not page:
+        return page, None
+    last_key = key(page[-1])
+    return page, encode_cursor(last_key, end - _bisect_left(items, last_key, key))
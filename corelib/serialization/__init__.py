@@ -0,0 +1 @@
+from .json_serializer import JsonSerializer, public_fields, ORJSON_BACKEND, STDLIB_BACKEND
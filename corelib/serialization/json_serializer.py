@@ -0,0 +1,168 @@
+import enum
+import json
+from abc import ABC
+from datetime import date, datetime
+from operator import attrgetter
+from threading import Lock
+from typing import Any, Callable, Dict, Iterable, Iterator, List
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+ORJSON_BACKEND: str = 'orjson'
+STDLIB_BACKEND: str = 'json'
+
+
+def public_fields(obj: Any) -> List[str]:
+    """
+    :return: Names of the instance attributes of obj that do not start with an underscore, in definition order.
+    """
+    return [name for name in vars(obj) if not name.startswith('_')]
+
+
+def _compile_serializer(fields: Iterable[str], layout: Iterable[str] = None) -> Callable[[Any], dict]:
+    fields = tuple(fields)
+    if not fields:
+        def by_fields(obj: Any) -> dict:
+            return {}
+    elif len(fields) == 1:
+        name = fields[0]
+        getter = attrgetter(name)
+
+        def by_fields(obj: Any) -> dict:
+            return {name: getter(obj)}
+    else:
+        getter = attrgetter(*fields)
+
+        def by_fields(obj: Any) -> dict:
+            return dict(zip(fields, getter(obj)))
+    if layout is None:
+        return by_fields
+
+    layout = frozenset(layout)
+    excluded = tuple(layout.difference(fields))
+
+    def by_layout(obj: Any) -> dict:
+        # Copying the instance dictionary and dropping the excluded attributes is several times faster than
+        # reading the fields one by one, but only valid while the instance has exactly the expected attributes.
+        attributes = obj.__dict__
+        if attributes.keys() == layout:
+            result = attributes.copy()
+            for name in excluded:
+                del result[name]
+            return result
+        return by_fields(obj)
+    return by_layout
+
+
+class JsonSerializer (ABC):
+    """
+    Encodes payloads of plain objects to compact JSON bytes with sorted keys and a trailing newline, like Flask's
+    jsonify. Objects of registered types are encoded by a serializer compiled once from the type's field list;
+    objects of other types fall back to their public instance attributes. Private attributes are never emitted.
+
+    Uses orjson when it is installed and the standard library json module otherwise. Both backends encode datetimes
+    in ISO 8601, enums by value and sets as lists. The json backend escapes non-ASCII characters like jsonify does,
+    which is notably faster there; orjson emits them as UTF-8.
+    """
+
+    def __init__(self, backend: str = None):
+        if backend is None:
+            backend = ORJSON_BACKEND if orjson else STDLIB_BACKEND
+        if backend == ORJSON_BACKEND and orjson is None:
+            raise ValueError(f"JSON backend '{ORJSON_BACKEND}' requested, but orjson is not installed.")
+        if backend not in (ORJSON_BACKEND, STDLIB_BACKEND):
+            raise ValueError(f"Unknown JSON backend '{backend}'.")
+        self._backend: str = backend
+        self._serializers: Dict[type, Callable[[Any], Any]] = {}
+        self._lock: Lock = Lock()
+        if backend == STDLIB_BACKEND:
+            self._encoder = json.JSONEncoder(
+                default=self.default, sort_keys=True, separators=(',', ':'))
+
+    @property
+    def backend(self) -> str:
+        return self._backend
+
+    @property
+    def registered_types(self) -> List[type]:
+        return list(self._serializers.keys())
+
+    def register(self, cls: type, fields: Iterable[str], layout: Iterable[str] = None) -> None:
+        """
+        Registers the fields of cls to be emitted. Fields missing on an instance fail its encoding.
+        :param layout: All instance attribute names of cls, when known; enables a faster path for instances that have
+        exactly these attributes.
+        """
+        serializer = _compile_serializer(fields, layout)
+        with self._lock:
+            self._serializers[cls] = serializer
+
+    def register_prototype(self, prototype: Any) -> None:
+        """
+        Registers the type of prototype with its public instance attributes as fields.
+        """
+        self.register(type(prototype), public_fields(prototype), layout=vars(prototype).keys())
+
+    def default(self, obj: Any) -> Any:
+        """
+        Converts an object the backend cannot encode natively to an encodable one.
+        """
+        serializer = self._serializers.get(type(obj))
+        if serializer is not None:
+            return serializer(obj)
+        if isinstance(obj, (datetime, date)):
+            return obj.isoformat()
+        if isinstance(obj, enum.Enum):
+            return obj.value
+        if isinstance(obj, (set, frozenset)):
+            return list(obj)
+        if hasattr(obj, '__dict__'):
+            return {name: value for name, value in vars(obj).items() if not name.startswith('_')}
+        raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable.")
+
+    def dumps(self, payload: Any) -> bytes:
+        if self._backend == ORJSON_BACKEND:
+            return orjson.dumps(payload, default=self.default,
+                                option=orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS | orjson.OPT_APPEND_NEWLINE)
+        return (self._encoder.encode(payload) + '\n').encode('ascii')
+
+    def iterencode(self, payload: Any, depth: int = 1) -> Iterator[bytes]:
+        """
+        Encodes the payload to the same bytes as ``dumps``, in pieces. Containers and objects are opened up to
+        ``depth`` levels deep, and the values below are encoded whole, so memory is bounded by the largest of those
+        values rather than by the payload.
+        """
+        yield from self._iterencode(payload, depth)
+        yield b'\n'
+
+    def _iterencode(self, value: Any, depth: int) -> Iterator[bytes]:
+        if depth > 0 and value is not None and not isinstance(value, (dict, list, tuple, str, int, float)):
+            value = self.default(value)
+        if depth > 0 and type(value) is dict and all(type(key) is str for key in value):
+            yield b'{'
+            for index, key in enumerate(sorted(value)):
+                yield (b',' if index else b'') + self._encode(key) + b':'
+                yield from self._iterencode(value[key], depth - 1)
+            yield b'}'
+        elif depth > 0 and isinstance(value, (list, tuple)):
+            yield b'['
+            for index, item in enumerate(value):
+                if index:
+                    yield b','
+                yield from self._iterencode(item, depth - 1)
+            yield b']'
+        else:
+            yield self._encode(value)
+
+    def _encode(self, value: Any) -> bytes:
+        if self._backend == ORJSON_BACKEND:
+            return orjson.dumps(value, default=self.default, option=orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS)
+        return self._encoder.encode(value).encode('ascii')
+
+    def loads(self, data: bytes) -> Any:
+        if self._backend == ORJSON_BACKEND:
+            return orjson.loads(data)
+        return json.loads(data)
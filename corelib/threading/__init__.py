@@ -1 +1,7 @@
-from .task_runner import TaskMetaData, TaskRunner
+from .task_runner import TaskMetaData, TaskRunner, TaskPriority, TaskMetrics, CancellationToken, task_executor, \
+    TaskCancelledException, TaskTimeoutException, IO_EXECUTOR, CPU_EXECUTOR, TASK_COMPLETED, TASK_FAILED, \
+    TASK_CANCELLED
+from .pipeline import BoundedPipeline
+from .periodic_scheduler import Schedule, IntervalSchedule, CronSchedule, PeriodicJob, PeriodicScheduler, \
+    create_schedule
+from .admission_control import TokenBucket, ConcurrencyLimiter, SingleFlight, AdmissionController
@@ -0,0 +1,362 @@
+import asyncio
+import threading
+import time
+from abc import ABC
+from collections import deque
+from logging import Logger
+from typing import Any, Awaitable, Callable, Deque, Dict, Hashable, Optional, Tuple, Union
+from uuid import uuid4
+from corelib.logging import create_console_logger
+
+
+class TokenBucket (ABC):
+    """
+    Token bucket rate limiter. The bucket holds up to ``capacity`` tokens and gains one every ``refill_interval``
+    seconds; each admitted call takes a token. Bursts of up to ``capacity`` calls pass, sustained calls are held to
+    one per ``refill_interval``.
+    """
+
+    def __init__(self,
+                 identifier: str = f"{__name__}_{uuid4()}",
+                 capacity: int = None,
+                 refill_interval: float = None,
+                 clock: Callable[[], float] = None,
+                 logger: Logger = None):
+        capacity = 1 if capacity is None else capacity
+        refill_interval = 1.0 if refill_interval is None else refill_interval
+        if capacity < 1 or refill_interval <= 0:
+            raise ValueError(f"[{identifier}] Capacity and refill interval must be positive, "
+                             f"got capacity={capacity}, refill_interval={refill_interval}.")
+        self._identifier: str = identifier
+        self._capacity: int = capacity
+        self._refill_interval: float = refill_interval
+        self._clock: Callable[[], float] = clock or time.monotonic
+        self._lock: threading.Lock = threading.Lock()
+        self._tokens: float = float(capacity)
+        self._updated: float = self._clock()
+        self._admitted: int = 0
+        self._rejected: int = 0
+        self._logger: Logger = logger or create_console_logger(__name__)
+
+    @property
+    def logger(self) -> Logger:
+        return self._logger
+
+    @property
+    def identifier(self) -> str:
+        return self._identifier
+
+    @property
+    def retry_after(self) -> float:
+        """
+        :return: Seconds until a token is available; 0 if one is available now.
+        """
+        with self._lock:
+            self._refill()
+            return max(0.0, (1 - self._tokens) * self._refill_interval)
+
+    @property
+    def stats(self) -> dict:
+        with self._lock:
+            self._refill()
+            return {
+                'capacity': self._capacity,
+                'refillInterval': self._refill_interval,
+                'tokens': self._tokens,
+                'admitted': self._admitted,
+                'rejected': self._rejected,
+            }
+
+    def try_acquire(self) -> bool:
+        with self._lock:
+            self._refill()
+            if self._tokens >= 1:
+                self._tokens -= 1
+                self._admitted += 1
+                return True
+            self._rejected += 1
+        self.logger.debug(f"[{self.identifier}] Rate limit exceeded.")
+        return False
+
+    def _refill(self) -> None:
+        now = self._clock()
+        self._tokens = min(float(self._capacity), self._tokens + (now - self._updated) / self._refill_interval)
+        self._updated = now
+
+
+class _Waiter (ABC):
+
+    __slots__ = ('wake', 'granted')
+
+    def __init__(self, wake: Callable[[], None]):
+        self.wake: Callable[[], None] = wake
+        self.granted: bool = False
+
+
+def _resolve(future: asyncio.Future) -> None:
+    if not future.done():
+        future.set_result(None)
+
+
+class ConcurrencyLimiter (ABC):
+    """
+    Limits the calls running at once to ``max_concurrent``. Callers beyond the limit wait in a FIFO queue of at most
+    ``max_waiting`` entries for up to ``wait_timeout`` seconds - 0 sheds them at once; ``acquire`` returns False when
+    the queue is full or the wait times out, so the caller can shed the call. A released slot is handed straight to
+    the oldest waiter. Threads wait with ``acquire``, coroutines with ``acquire_async``; both share the same slots.
+    """
+
+    def __init__(self,
+                 identifier: str = f"{__name__}_{uuid4()}",
+                 max_concurrent: int = None,
+                 max_waiting: int = None,
+                 wait_timeout: float = None,
+                 logger: Logger = None):
+        max_concurrent = 4 if max_concurrent is None else max_concurrent
+        max_waiting = 0 if max_waiting is None else max_waiting
+        wait_timeout = 10.0 if wait_timeout is None else wait_timeout
+        if max_concurrent < 1 or max_waiting < 0 or wait_timeout < 0:
+            raise ValueError(f"[{identifier}] Concurrency must be positive, the wait queue and timeout non-negative, "
+                             f"got max_concurrent={max_concurrent}, max_waiting={max_waiting}, "
+                             f"wait_timeout={wait_timeout}.")
+        self._identifier: str = identifier
+        self._max_concurrent: int = max_concurrent
+        self._max_waiting: int = max_waiting
+        self._wait_timeout: float = wait_timeout
+        self._lock: threading.Lock = threading.Lock()
+        self._waiters: Deque[_Waiter] = deque()
+        self._running: int = 0
+        self._admitted: int = 0
+        self._rejected: int = 0
+        self._logger: Logger = logger or create_console_logger(__name__)
+
+    @property
+    def logger(self) -> Logger:
+        return self._logger
+
+    @property
+    def identifier(self) -> str:
+        return self._identifier
+
+    @property
+    def wait_timeout(self) -> float:
+        return self._wait_timeout
+
+    @property
+    def running(self) -> int:
+        return self._running
+
+    @property
+    def waiting(self) -> int:
+        return len(self._waiters)
+
+    @property
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                'maxConcurrent': self._max_concurrent,
+                'maxWaiting': self._max_waiting,
+                'running': self._running,
+                'waiting': len(self._waiters),
+                'admitted': self._admitted,
+                'rejected': self._rejected,
+            }
+
+    def acquire(self) -> bool:
+        event = threading.Event()
+        with self._lock:
+            waiter = self._enter(event.set)
+        if isinstance(waiter, bool):
+            return waiter
+        event.wait(self._wait_timeout)
+        return self._leave(waiter)
+
+    async def acquire_async(self) -> bool:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        with self._lock:
+            waiter = self._enter(lambda: loop.call_soon_threadsafe(_resolve, future))
+        if isinstance(waiter, bool):
+            return waiter
+        try:
+            await asyncio.wait_for(future, self._wait_timeout)
+        except asyncio.TimeoutError:
+            pass
+        except asyncio.CancelledError:
+            if self._leave(waiter):
+                self.release()
+            raise
+        return self._leave(waiter)
+
+    def release(self) -> None:
+        with self._lock:
+            if self._waiters:
+                waiter = self._waiters.popleft()
+                waiter.granted = True
+                waiter.wake()
+            else:
+                self._running -= 1
+
+    def _enter(self, wake: Callable[[], None]) -> Union[bool, _Waiter]:
+        if self._running < self._max_concurrent and not self._waiters:
+            self._running += 1
+            self._admitted += 1
+            return True
+        if len(self._waiters) >= self._max_waiting:
+            self._rejected += 1
+            self.logger.debug(f"[{self.identifier}] Wait queue full. Rejecting call.")
+            return False
+        waiter = _Waiter(wake)
+        self._waiters.append(waiter)
+        return waiter
+
+    def _leave(self, waiter: _Waiter) -> bool:
+        with self._lock:
+            if waiter.granted:
+                self._admitted += 1
+                return True
+            if waiter in self._waiters:
+                self._waiters.remove(waiter)
+            self._rejected += 1
+        self.logger.debug(f"[{self.identifier}] No slot within {self._wait_timeout} seconds. Rejecting call.")
+        return False
+
+
+class _Call (ABC):
+
+    __slots__ = ('done', 'result', 'error')
+
+    def __init__(self):
+        self.done: threading.Event = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight (ABC):
+    """
+    Coalesces concurrent calls with equal keys: the first caller runs the function, and callers arriving while it
+    runs wait for it and share its result or exception. Nothing is kept once the call returns. ``do`` coalesces
+    threads, ``do_async`` coroutines running on the same event loop.
+    """
+
+    def __init__(self, identifier: str = f"{__name__}_{uuid4()}", logger: Logger = None):
+        self._identifier: str = identifier
+        self._lock: threading.Lock = threading.Lock()
+        self._calls: Dict[Hashable, _Call] = {}
+        self._async_calls: Dict[Tuple[int, Hashable], asyncio.Future] = {}
+        self._shared: int = 0
+        self._logger: Logger = logger or create_console_logger(__name__)
+
+    @property
+    def logger(self) -> Logger:
+        return self._logger
+
+    @property
+    def identifier(self) -> str:
+        return self._identifier
+
+    @property
+    def stats(self) -> dict:
+        return {
+            'inFlight': len(self._calls) + len(self._async_calls),
+            'shared': self._shared,
+        }
+
+    def do(self, key: Hashable, callable_fn: Callable[[], Any]) -> Tuple[Any, bool]:
+        """
+        :return: The result, and whether it was shared from a call started by another caller.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+            else:
+                self._shared += 1
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+        try:
+            call.result = callable_fn()
+        except BaseException as ex:
+            call.error = ex
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result, False
+
+    async def do_async(self, key: Hashable, coroutine_fn: Callable[[], Awaitable[Any]]) -> Tuple[Any, bool]:
+        """
+        :return: The result, and whether it was shared from a call started by another coroutine.
+        """
+        loop = asyncio.get_running_loop()
+        loop_key = (id(loop), key)
+        future = self._async_calls.get(loop_key)
+        if future is not None:
+            self._shared += 1
+            return await asyncio.shield(future), True
+        future = self._async_calls[loop_key] = loop.create_future()
+        try:
+            result = await coroutine_fn()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as ex:
+            future.set_exception(ex)
+            # Marks the exception as retrieved when no other coroutine awaits it.
+            future.exception()
+            raise
+        else:
+            future.set_result(result)
+        finally:
+            del self._async_calls[loop_key]
+        return result, False
+
+
+class AdmissionController (ABC):
+    """
+    Admission control of expensive routes: a ConcurrencyLimiter per configured route and a SingleFlight shared by
+    all routes. ``routes`` maps route templates to ConcurrencyLimiter options.
+    """
+
+    def __init__(self,
+                 identifier: str = f"{__name__}_{uuid4()}",
+                 routes: Dict[str, dict] = None,
+                 logger: Logger = None):
+        self._identifier: str = identifier
+        self._logger: Logger = logger or create_console_logger(__name__)
+        self._limiters: Dict[str, ConcurrencyLimiter] = {
+            route: ConcurrencyLimiter(identifier=f"{identifier}[{route}]", logger=self._logger, **(options or {}))
+            for route, options in (routes or {}).items()
+        }
+        self._single_flight: SingleFlight = SingleFlight(identifier=f"{identifier}.single_flight",
+                                                         logger=self._logger)
+        self._logger.info(f"Admission controller '{self.identifier}' initialized "
+                          f"with {len(self._limiters)} limited route(s).")
+
+    @property
+    def logger(self) -> Logger:
+        return self._logger
+
+    @property
+    def identifier(self) -> str:
+        return self._identifier
+
+    @property
+    def single_flight(self) -> SingleFlight:
+        return self._single_flight
+
+    @property
+    def stats(self) -> dict:
+        return {
+            'routes': {route: limiter.stats for route, limiter in self._limiters.items()},
+            'singleFlight': self._single_flight.stats,
+        }
+
+    def limiter(self, route: str) -> Optional[ConcurrencyLimiter]:
+        return self._limiters.get(route)
+
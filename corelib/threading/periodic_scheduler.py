@@ -0,0 +1,358 @@
+import random
+import threading
+from abc import ABC, abstractmethod
+from concurrent.futures import Future
+from datetime import datetime, timedelta
+from logging import Logger
+from threading import Condition, Thread, RLock
+from typing import Callable, Dict, List, Optional, Set
+from uuid import uuid4
+from corelib.logging import create_console_logger
+from .task_runner import TaskRunner, TaskMetaData, TaskPriority, IO_EXECUTOR
+
+
+class Schedule (ABC):
+
+    @abstractmethod
+    def next_run_after(self, moment: datetime) -> datetime:
+        pass
+
+
+class IntervalSchedule (Schedule):
+
+    def __init__(self, seconds: float):
+        if seconds <= 0:
+            raise ValueError(f"Schedule interval must be positive, got {seconds}.")
+        self._interval: timedelta = timedelta(seconds=seconds)
+
+    @property
+    def interval(self) -> timedelta:
+        return self._interval
+
+    def next_run_after(self, moment: datetime) -> datetime:
+        return moment + self._interval
+
+    def __str__(self) -> str:
+        return f"every {self._interval.total_seconds()} seconds"
+
+
+class CronSchedule (Schedule):
+    """
+    Five-field cron expression - minute, hour, day of month, month, day of week (0 or 7 is Sunday). Fields accept
+    '*', single values, ranges 'a-b', lists 'a,b' and steps '*/n' or 'a-b/n'. As in cron, when both day fields are
+    restricted a day matches if either of them does.
+    """
+
+    _FIELD_RANGES = [(0, 59), (0, 23), (1, 31), (1, 12), (0, 7)]
+
+    def __init__(self, expression: str):
+        fields = expression.split()
+        if len(fields) != 5:
+            raise ValueError(f"Cron expression '{expression}' must have 5 fields, got {len(fields)}.")
+        self._expression: str = expression
+        parsed = [self._parse_field(f, lo, hi) for f, (lo, hi) in zip(fields, self._FIELD_RANGES)]
+        self._minutes, self._hours, self._days, self._months, self._weekdays = parsed
+        if 7 in self._weekdays:
+            self._weekdays = (self._weekdays - {7}) | {0}
+        self._days_restricted: bool = fields[2] != '*'
+        self._weekdays_restricted: bool = fields[4] != '*'
+
+    @property
+    def expression(self) -> str:
+        return self._expression
+
+    def next_run_after(self, moment: datetime) -> datetime:
+        candidate = moment.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        limit = candidate + timedelta(days=366 * 5)
+        while candidate < limit:
+            if candidate.month not in self._months:
+                year = candidate.year + (1 if candidate.month == 12 else 0)
+                month = 1 if candidate.month == 12 else candidate.month + 1
+                candidate = candidate.replace(year=year, month=month, day=1, hour=0, minute=0)
+                continue
+            if not self._matches_day(candidate):
+                candidate = candidate.replace(hour=0, minute=0) + timedelta(days=1)
+                continue
+            if candidate.hour not in self._hours:
+                candidate = candidate.replace(minute=0) + timedelta(hours=1)
+                continue
+            if candidate.minute not in self._minutes:
+                candidate += timedelta(minutes=1)
+                continue
+            return candidate
+        raise ValueError(f"Cron expression '{self._expression}' never matches.")
+
+    def _matches_day(self, moment: datetime) -> bool:
+        day_match = moment.day in self._days
+        weekday_match = (moment.isoweekday() % 7) in self._weekdays
+        if self._days_restricted and self._weekdays_restricted:
+            return day_match or weekday_match
+        return day_match and weekday_match
+
+    @staticmethod
+    def _parse_field(field: str, lo: int, hi: int) -> Set[int]:
+        values: Set[int] = set()
+        for part in field.split(','):
+            step = 1
+            if '/' in part:
+                part, step_str = part.split('/', 1)
+                step = int(step_str)
+                if step <= 0:
+                    raise ValueError(f"Cron step must be positive in '{field}'.")
+            if part == '*':
+                start, end = lo, hi
+            elif '-' in part:
+                start, end = (int(v) for v in part.split('-', 1))
+            else:
+                start = int(part)
+                end = hi if step > 1 else start
+            if start < lo or end > hi or start > end:
+                raise ValueError(f"Cron field '{field}' is out of range {lo}-{hi}.")
+            values.update(range(start, end + 1, step))
+        return values
+
+    def __str__(self) -> str:
+        return f"cron '{self._expression}'"
+
+
+def create_schedule(interval: float = None, cron: str = None) -> Schedule:
+    """
+    Creates a schedule from either an interval in seconds or a cron expression, e.g. from configuration.
+    """
+    if (interval is None) == (cron is None):
+        raise ValueError('Exactly one of interval or cron must be given.')
+    return IntervalSchedule(interval) if interval is not None else CronSchedule(cron)
+
+
+class PeriodicJob (ABC):
+    """
+    A recurring job. The callable is scheduled on the TaskRunner and receives the ``task_meta`` keyword argument.
+    """
+
+    def __init__(self,
+                 name: str,
+                 callable_fn: Callable,
+                 schedule: Schedule,
+                 jitter: float = 0.0,
+                 backoff_base: float = 30.0,
+                 backoff_max: float = 3600.0,
+                 skip_if_running: bool = True,
+                 priority: int = TaskPriority.LOW,
+                 executor: str = IO_EXECUTOR,
+                 coalesce_key: str = None,
+                 timeout: float = None):
+        self.name: str = name
+        self.callable_fn: Callable = callable_fn
+        self.schedule: Schedule = schedule
+        self.jitter: float = jitter
+        self.backoff_base: float = backoff_base
+        self.backoff_max: float = backoff_max
+        self.skip_if_running: bool = skip_if_running
+        self.priority: int = priority
+        self.executor: str = executor
+        self.coalesce_key: str = coalesce_key or f"{__name__}.{name}"
+        self.timeout: Optional[float] = timeout
+        self.next_run_at: Optional[datetime] = None
+        self.last_run_started_at: Optional[datetime] = None
+        self.last_run_finished_at: Optional[datetime] = None
+        self.last_status: Optional[str] = None
+        self.last_error: Optional[str] = None
+        self.consecutive_failures: int = 0
+        self.runs_count: int = 0
+        self.skipped_count: int = 0
+        self.future: Optional[Future] = None
+
+    @property
+    def is_running(self) -> bool:
+        return self.future is not None and not self.future.done()
+
+    def backoff_delay(self) -> float:
+        if self.consecutive_failures <= 0:
+            return 0.0
+        return min(self.backoff_max, self.backoff_base * (2 ** (self.consecutive_failures - 1)))
+
+    def to_dict(self) -> dict:
+        return {
+            'name': self.name,
+            'schedule': str(self.schedule),
+            'running': self.is_running,
+            'nextRunAt': self.next_run_at,
+            'lastRunStartedAt': self.last_run_started_at,
+            'lastRunFinishedAt': self.last_run_finished_at,
+            'lastStatus': self.last_status,
+            'lastError': self.last_error,
+            'consecutiveFailures': self.consecutive_failures,
+            'runsCount': self.runs_count,
+            'skippedCount': self.skipped_count,
+        }
+
+
+class PeriodicScheduler (ABC):
+    """
+    Runs registered jobs through a TaskRunner on interval or cron schedules. Each run is delayed by a random jitter
+    of up to ``jitter`` seconds, failed runs are retried after an exponential backoff - or at their next regular run,
+    if sooner - and a job that is still running when it becomes due again is skipped unless it opts out of that
+    policy.
+    """
+
+    def __init__(self,
+                 identifier: str = f"{__name__}_{uuid4()}",
+                 task_runner: TaskRunner = None,
+                 logger: Logger = None):
+        self._identifier: str = identifier
+        self._logger: Logger = logger or create_console_logger(__name__)
+        self._task_runner: TaskRunner = task_runner or TaskRunner()
+        self._lock: RLock = RLock()
+        self._condition: Condition = Condition(self._lock)
+        self._jobs: Dict[str, PeriodicJob] = {}
+        self._thread: Optional[Thread] = None
+        self._stopped: bool = False
+        self._random: random.Random = random.Random()
+        self._logger.info(f"Periodic scheduler '{self.identifier}' initialized.")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+
+    @property
+    def logger(self) -> Logger:
+        return self._logger
+
+    @property
+    def identifier(self) -> str:
+        return self._identifier
+
+    @property
+    def task_runner(self) -> TaskRunner:
+        return self._task_runner
+
+    @property
+    def is_running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    @property
+    def jobs(self) -> List[PeriodicJob]:
+        with self._lock:
+            return sorted(self._jobs.values(), key=lambda j: j.next_run_at or datetime.max)
+
+    def register_job(self, job: PeriodicJob, run_immediately: bool = False) -> PeriodicJob:
+        with self._condition:
+            if job.name in self._jobs:
+                raise NameError(f"[{self.identifier}] Periodic job '{job.name}' is already registered.")
+            now = datetime.now()
+            job.next_run_at = now if run_immediately else self._with_jitter(job, job.schedule.next_run_after(now))
+            self._jobs[job.name] = job
+            self.logger.info(f"[{self.identifier}] Registered periodic job '{job.name}' ({job.schedule}), "
+                             f"next run at {job.next_run_at}.")
+            self._condition.notify_all()
+            return job
+
+    def unregister_job(self, name: str) -> Optional[PeriodicJob]:
+        with self._condition:
+            job = self._jobs.pop(name, None)
+            self._condition.notify_all()
+            return job
+
+    def start(self) -> None:
+        with self._condition:
+            if self.is_running:
+                return
+            self._stopped = False
+            self._thread = Thread(target=self._run_loop, name=f"{self.identifier}.loop", daemon=True)
+            self._thread.start()
+        self.logger.info(f"[{self.identifier}] Periodic scheduler started.")
+
+    def stop(self, wait: bool = True) -> None:
+        with self._condition:
+            self._stopped = True
+            self._condition.notify_all()
+            thread = self._thread
+            self._thread = None
+        if wait and thread is not None and thread is not threading.current_thread():
+            thread.join()
+        self.logger.info(f"[{self.identifier}] Periodic scheduler stopped.")
+
+    def _run_loop(self) -> None:
+        # Due jobs are picked under the condition but submitted once it is released: the task runner takes its own
+        # lock while scheduling, and completes futures - whose callback, _job_done, takes the condition - from its
+        # threads.
+        while True:
+            with self._condition:
+                if self._stopped:
+                    return
+                now = datetime.now()
+                due = [j for j in self._jobs.values() if j.next_run_at and j.next_run_at <= now]
+                starting = [job for job in due if self._start_run(job, now)]
+                if not starting:
+                    upcoming = [j.next_run_at for j in self._jobs.values() if j.next_run_at]
+                    timeout = (min(upcoming) - datetime.now()).total_seconds() if upcoming else None
+                    if timeout is None or timeout > 0:
+                        self._condition.wait(timeout)
+                    continue
+            for job in starting:
+                self._run_job(job)
+
+    def _start_run(self, job: PeriodicJob, now: datetime) -> bool:
+        """
+        :return: True, if the due job is to run now, false if the run is skipped.
+        """
+        job.next_run_at = self._with_jitter(job, job.schedule.next_run_after(now))
+        if job.skip_if_running and job.is_running:
+            job.skipped_count += 1
+            self.logger.warning(f"[{self.identifier}] Periodic job '{job.name}' is still running. Skipping run, "
+                                f"next run at {job.next_run_at}.")
+            return False
+        job.last_run_started_at = now
+        job.runs_count += 1
+        return True
+
+    def _run_job(self, job: PeriodicJob) -> None:
+        self.logger.info(f"[{self.identifier}] Running periodic job '{job.name}'...")
+        try:
+            future = self._task_runner.schedule_task_on(
+                job.executor,
+                job.callable_fn,
+                task_meta=TaskMetaData(
+                    description=f"Periodic job '{job.name}'",
+                    priority=job.priority,
+                    coalesce_key=job.coalesce_key,
+                    timeout=job.timeout,
+                ))
+        except BaseException as ex:
+            with self._condition:
+                self._record_result(job, ex)
+            return
+        job.future = future
+        future.add_done_callback(lambda f, j=job: self._job_done(j, f))
+
+    def _job_done(self, job: PeriodicJob, future: Future) -> None:
+        error = future.exception() if not future.cancelled() else None
+        with self._condition:
+            self._record_result(job, error)
+            self._condition.notify_all()
+
+    def _record_result(self, job: PeriodicJob, error: Optional[BaseException]) -> None:
+        now = datetime.now()
+        job.last_run_finished_at = now
+        if error is None:
+            job.last_status = 'SUCCESS'
+            job.last_error = None
+            job.consecutive_failures = 0
+            return
+        job.last_status = 'FAILURE'
+        job.last_error = str(error)
+        job.consecutive_failures += 1
+        # The retry is brought forward from the next regular run, which - on a long interval or a cron schedule -
+        # may be hours away; that run still takes place if it is due first.
+        retry_at = self._with_jitter(job, now + timedelta(seconds=job.backoff_delay()))
+        if job.next_run_at is None or retry_at < job.next_run_at:
+            job.next_run_at = retry_at
+        self.logger.error(f"[{self.identifier}] Periodic job '{job.name}' failed "
+                          f"({job.consecutive_failures} in a row): {error}. Next run at {job.next_run_at}.")
+
+    def _with_jitter(self, job: PeriodicJob, moment: datetime) -> datetime:
+        if job.jitter > 0:
+            return moment + timedelta(seconds=self._random.uniform(0, job.jitter))
+        return moment
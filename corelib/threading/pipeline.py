@@ -0,0 +1,133 @@
+import threading
+from abc import ABC
+from logging import Logger
+from queue import Queue, Full, Empty
+from threading import Thread, Event
+from typing import Any, Callable, Iterable, List, Optional
+from uuid import uuid4
+from corelib.logging import create_console_logger
+
+
+_END_OF_STREAM: object = object()
+
+
+class BoundedPipeline (ABC):
+    """
+    Producer/consumer pipeline connecting a source, a chain of stages and a sink through bounded queues.
+
+    The source and every stage run in their own thread, the sink runs in the calling thread. Each queue holds at most
+    ``queue_size`` items, so the number of in-flight items - and the memory they occupy - is capped no matter how
+    large the source is. A stage returning None drops the item. The first error raised anywhere stops the pipeline
+    and is re-raised from ``run``.
+    """
+
+    def __init__(self,
+                 identifier: str = f"{__name__}_{uuid4()}",
+                 queue_size: int = 64,
+                 poll_interval: float = 0.1,
+                 logger: Logger = None):
+        if queue_size <= 0:
+            raise ValueError(f"[{identifier}] Queue size must be positive, got {queue_size}.")
+        self._identifier: str = identifier
+        self._queue_size: int = queue_size
+        self._poll_interval: float = poll_interval
+        self._logger: Logger = logger or create_console_logger(__name__)
+        self._stop: Event = Event()
+        self._error_lock = threading.Lock()
+        self._error: Optional[BaseException] = None
+
+    @property
+    def logger(self) -> Logger:
+        return self._logger
+
+    @property
+    def identifier(self) -> str:
+        return self._identifier
+
+    @property
+    def queue_size(self) -> int:
+        return self._queue_size
+
+    def run(self,
+            source: Iterable[Any],
+            *stages: Callable[[Any], Any],
+            sink: Callable[[Any], None] = None) -> None:
+        self._stop.clear()
+        self._error = None
+        queues: List[Queue] = [Queue(maxsize=self._queue_size) for _ in range(len(stages) + 1)]
+        threads: List[Thread] = [Thread(
+            target=self._run_source,
+            args=(source, queues[0]),
+            name=f"{self.identifier}.source",
+            daemon=True)]
+        for idx, stage in enumerate(stages):
+            threads.append(Thread(
+                target=self._run_stage,
+                args=(stage, queues[idx], queues[idx + 1]),
+                name=f"{self.identifier}.stage-{idx}",
+                daemon=True))
+        for t in threads:
+            t.start()
+        self.logger.debug(f"[{self.identifier}] Pipeline started with {len(stages)} stage(s).")
+        try:
+            for item in self._drain(queues[-1]):
+                if sink:
+                    sink(item)
+        except BaseException as ex:
+            self._fail(ex)
+        finally:
+            self._stop.set()
+            for t in threads:
+                t.join()
+        if self._error is not None:
+            raise self._error
+        self.logger.debug(f"[{self.identifier}] Pipeline complete.")
+
+    def _run_source(self, source: Iterable[Any], out_queue: Queue) -> None:
+        try:
+            for item in source:
+                if not self._put(out_queue, item):
+                    return
+        except BaseException as ex:
+            self._fail(ex)
+        finally:
+            self._put(out_queue, _END_OF_STREAM)
+
+    def _run_stage(self, stage: Callable[[Any], Any], in_queue: Queue, out_queue: Queue) -> None:
+        try:
+            for item in self._drain(in_queue):
+                result = stage(item)
+                if result is not None and not self._put(out_queue, result):
+                    return
+        except BaseException as ex:
+            self._fail(ex)
+        finally:
+            self._put(out_queue, _END_OF_STREAM)
+
+    def _drain(self, in_queue: Queue):
+        while True:
+            try:
+                item = in_queue.get(timeout=self._poll_interval)
+            except Empty:
+                if self._stop.is_set():
+                    return
+                continue
+            if item is _END_OF_STREAM:
+                return
+            yield item
+
+    def _put(self, out_queue: Queue, item: Any) -> bool:
+        while not self._stop.is_set():
+            try:
+                out_queue.put(item, timeout=self._poll_interval)
+                return True
+            except Full:
+                continue
+        return False
+
+    def _fail(self, ex: BaseException) -> None:
+        with self._error_lock:
+            if self._error is None:
+                self._error = ex
+                self.logger.error(f"[{self.identifier}] Pipeline failed: {ex}")
+        self._stop.set()
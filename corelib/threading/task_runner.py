@@ -1,12 +1,90 @@
+import os
+import heapq
+import itertools
 import threading
+import multiprocessing
 from abc import ABC
-from logging import Logger
-from threading import Lock
+from enum import IntEnum
+from logging import Logger, DEBUG
+from threading import RLock, Event, Timer
 from uuid import uuid4
-from typing import Optional, Dict
+from typing import Optional, Dict, Final, Callable, List, Tuple, Set
 from corelib.logging import create_console_logger
-from datetime import datetime
-from concurrent.futures import ThreadPoolExecutor, Future
+from corelib.metrics import RollingHistogram
+from datetime import datetime, timedelta
+from concurrent.futures import Executor, ThreadPoolExecutor, ProcessPoolExecutor, Future, BrokenExecutor, \
+    CancelledError
+
+
+IO_EXECUTOR: Final = 'io'
+CPU_EXECUTOR: Final = 'cpu'
+
+TASK_COMPLETED: Final = 'completed'
+TASK_FAILED: Final = 'failed'
+TASK_CANCELLED: Final = 'cancelled'
+
+DEFAULT_EXECUTORS: Final = {
+    IO_EXECUTOR: {
+        'type': 'thread',
+        'max_workers': 4,
+    },
+    CPU_EXECUTOR: {
+        'type': 'process',
+        'max_workers': os.cpu_count() or 1,
+        'mp_context': 'spawn',
+    },
+}
+
+
+def task_executor(name: str) -> Callable:
+    """
+    Declares the named executor a task function should run in when it is passed to TaskRunner.schedule_task.
+    Functions meant for a process executor must be picklable (module-level) and do not receive 'task_meta'.
+    """
+    def decorator(fn: Callable) -> Callable:
+        fn.__task_executor__ = name
+        return fn
+    return decorator
+
+
+class TaskPriority (IntEnum):
+    HIGH = 0
+    NORMAL = 50
+    LOW = 100
+
+
+class TaskCancelledException (CancelledError):
+
+    def __init__(self, message: str = 'Task was cancelled.'):
+        super().__init__(message)
+        self.message = message
+
+
+class TaskTimeoutException (TimeoutError):
+
+    def __init__(self, message: str = 'Task deadline exceeded.'):
+        super().__init__(message)
+        self.message = message
+
+
+class CancellationToken (ABC):
+
+    def __init__(self):
+        self._event: Event = Event()
+
+    @property
+    def is_cancelled(self) -> bool:
+        return self._event.is_set()
+
+    def cancel(self) -> None:
+        self._event.set()
+
+    def raise_if_cancelled(self) -> None:
+        if self._event.is_set():
+            raise TaskCancelledException()
+
+    def wait(self, timeout: float = None) -> bool:
+        return self._event.wait(timeout)
 
 
 class TaskMetaData (ABC):
@@ -16,17 +94,72 @@ class TaskMetaData (ABC):
                  thread_id: int = None,
                  description: str = None,
                  started_at: datetime = None,
-                 finished_at: datetime = None):
+                 finished_at: datetime = None,
+                 executor: str = None,
+                 priority: int = TaskPriority.NORMAL,
+                 coalesce_key: str = None,
+                 timeout: float = None,
+                 name: str = None,
+                 enqueued_at: datetime = None):
         self._key = key or f"{__name__}_{uuid4()}"
+        self._name: Optional[str] = name
+        self._executor: Optional[str] = executor
         self._thread_id: int = thread_id or -1
         self._description: Optional[str] = description
-        self._started = started_at or datetime.now()
+        self._enqueued: Optional[datetime] = enqueued_at
+        self._started: Optional[datetime] = started_at
         self._finished: Optional[datetime] = finished_at
+        self._priority: int = int(priority)
+        self._coalesce_key: Optional[str] = coalesce_key
+        self._timeout: Optional[float] = timeout
+        self._deadline: Optional[datetime] = None
+        self._cancellation_token: CancellationToken = CancellationToken()
 
     @property
     def key(self) -> str:
         return self._key
 
+    @property
+    def name(self) -> Optional[str]:
+        return self._name
+
+    def set_name(self, name: str) -> None:
+        self._name = name
+
+    @property
+    def executor(self) -> Optional[str]:
+        return self._executor
+
+    def set_executor(self, executor: str) -> None:
+        self._executor = executor
+
+    @property
+    def priority(self) -> int:
+        return self._priority
+
+    @property
+    def coalesce_key(self) -> Optional[str]:
+        return self._coalesce_key
+
+    @property
+    def timeout(self) -> Optional[float]:
+        return self._timeout
+
+    @property
+    def deadline(self) -> Optional[datetime]:
+        return self._deadline
+
+    def set_deadline(self, deadline: Optional[datetime]) -> None:
+        self._deadline = deadline
+
+    @property
+    def cancellation_token(self) -> CancellationToken:
+        return self._cancellation_token
+
+    @property
+    def is_cancelled(self) -> bool:
+        return self._cancellation_token.is_cancelled
+
     @property
     def thread_id(self) -> int:
         return self._thread_id
@@ -39,9 +172,19 @@ class TaskMetaData (ABC):
         return self._description
 
     @property
-    def started_at(self) -> datetime:
+    def enqueued_at(self) -> Optional[datetime]:
+        return self._enqueued
+
+    def set_enqueued(self, enqueued_at: datetime) -> None:
+        self._enqueued = enqueued_at
+
+    @property
+    def started_at(self) -> Optional[datetime]:
         return self._started
 
+    def set_started(self, started_at: datetime) -> None:
+        self._started = started_at
+
     @property
     def finished_at(self) -> Optional[datetime]:
         return self._finished
@@ -57,21 +200,153 @@ class TaskMetaData (ABC):
     def is_finished(self) -> bool:
         return self._finished is not None
 
+    @property
+    def queue_wait(self) -> Optional[float]:
+        """
+        :return: Seconds between enqueueing and starting the task, or None if it has not started.
+        """
+        if self._enqueued is None or self._started is None:
+            return None
+        return (self._started - self._enqueued).total_seconds()
+
+    @property
+    def run_time(self) -> Optional[float]:
+        """
+        :return: Seconds between starting and finishing the task, or None if it has not finished.
+        """
+        if self._started is None or self._finished is None:
+            return None
+        return (self._finished - self._started).total_seconds()
+
+    def to_dict(self) -> dict:
+        return {
+            'key': self._key,
+            'name': self._name,
+            'description': self._description,
+            'executor': self._executor,
+            'priority': self._priority,
+            'coalesceKey': self._coalesce_key,
+            'threadId': self._thread_id,
+            'enqueuedAt': self._enqueued,
+            'startedAt': self._started,
+            'finishedAt': self._finished,
+            'deadline': self._deadline,
+            'queueWait': self.queue_wait,
+            'runTime': self.run_time,
+            'cancelled': self.is_cancelled,
+        }
+
+
+class TaskMetrics (ABC):
+    """
+    Rolling queue wait and run time histograms, in seconds, and outcome counters for one task name.
+    """
+
+    def __init__(self, window_size: int = 1024):
+        self._queue_wait: RollingHistogram = RollingHistogram(window_size=window_size)
+        self._run_time: RollingHistogram = RollingHistogram(window_size=window_size)
+        self._completed: int = 0
+        self._failed: int = 0
+        self._cancelled: int = 0
+
+    @property
+    def queue_wait(self) -> RollingHistogram:
+        return self._queue_wait
+
+    @property
+    def run_time(self) -> RollingHistogram:
+        return self._run_time
+
+    @property
+    def completed(self) -> int:
+        return self._completed
+
+    @property
+    def failed(self) -> int:
+        return self._failed
+
+    @property
+    def cancelled(self) -> int:
+        return self._cancelled
+
+    def record_outcome(self, outcome: str) -> None:
+        if outcome == TASK_COMPLETED:
+            self._completed += 1
+        elif outcome == TASK_FAILED:
+            self._failed += 1
+        else:
+            self._cancelled += 1
+
+    def to_dict(self) -> dict:
+        return {
+            'completed': self._completed,
+            'failed': self._failed,
+            'cancelled': self._cancelled,
+            'queueWait': self._queue_wait.snapshot(),
+            'runTime': self._run_time.snapshot(),
+        }
+
+
+def _task_name(callable_fn: Callable) -> str:
+    qualified_name = getattr(callable_fn, '__qualname__', None) or type(callable_fn).__qualname__
+    module = getattr(callable_fn, '__module__', None)
+    return f"{module}.{qualified_name}" if module else qualified_name
+
+
+def _task_outcome(future: Future) -> str:
+    if future.cancelled() or isinstance(future.exception(), CancelledError):
+        return TASK_CANCELLED
+    return TASK_FAILED if future.exception() is not None else TASK_COMPLETED
+
+
+class _ScheduledTask:
+
+    def __init__(self, executor_name: str, callable_fn: Callable, args: tuple, kwargs: dict,
+                 task_meta: TaskMetaData):
+        self.executor_name: str = executor_name
+        self.callable_fn: Callable = callable_fn
+        self.args: tuple = args
+        self.kwargs: dict = kwargs
+        self.task_meta: TaskMetaData = task_meta
+        self.future: Future = Future()
+        self.timer: Optional[Timer] = None
+
 
 class TaskRunner (ABC):
+    """
+    Runs tasks in named executors. Tasks wait in a per-executor priority queue (lower TaskPriority value first, FIFO
+    within a priority) and are handed to the executor only when one of its workers is free. Scheduling options are
+    carried by the task's TaskMetaData: a coalesce key makes identical pending or running tasks share one Future,
+    a timeout fails the Future with TaskTimeoutException once the deadline passes - the coalesce key is held until
+    the callable has returned, so that later tasks get the failed Future instead of running alongside it - and the
+    cancellation token lets running tasks stop cooperatively. Queue wait and run time of the last ``metrics_window``
+    runs are kept per task name, which defaults to the qualified name of the scheduled callable.
+    """
 
     def __init__(self,
                  identifier: str = f"{__name__}_{uuid4()}",
-                 logger: Logger = None):
+                 logger: Logger = None,
+                 executors: Dict[str, dict] = None,
+                 metrics_window: int = 1024):
         self._identifier = identifier
-        self._thread_lock = Lock()
-        self._thread_pool = ThreadPoolExecutor(
-            max_workers=4,
-            thread_name_prefix=identifier
-        )
+        self._thread_lock = RLock()
+        self._executors_config: Dict[str, dict] = {
+            name: dict(DEFAULT_EXECUTORS.get(name, {}), **(options or {}))
+            for name, options in dict(DEFAULT_EXECUTORS, **(executors or {})).items()
+        }
+        self._executors: Dict[str, Executor] = {}
+        self._pending: Dict[str, List[Tuple[int, int, _ScheduledTask]]] = {}
+        self._running_count: Dict[str, int] = {}
+        self._sequence = itertools.count()
+        self._coalesced: Dict[str, Future] = {}
+        self._in_executor: Set[Future] = set()
         self._logger = logger or create_console_logger(__name__)
-        self._meta: Dict[int, TaskMetaData] = {}
+        self._meta: Dict[str, TaskMetaData] = {}
+        self._future_keys: Dict[Future, str] = {}
         self._futures: [Future] = []
+        self._metrics_window: int = metrics_window
+        self._task_metrics: Dict[str, TaskMetrics] = {}
+        self._max_pending: Dict[str, int] = {}
         self._logger.info(f"Task runner '{self.identifier}' initialized.")
 
     def __enter__(self):
@@ -93,34 +368,243 @@ class TaskRunner (ABC):
         return self._futures
 
     @property
-    def tasks_meta_data(self) -> Dict[int, TaskMetaData]:
-        return self._meta
+    def tasks_meta_data(self) -> Dict[str, TaskMetaData]:
+        with self._thread_lock:
+            return dict(self._meta)
+
+    @property
+    def metrics(self) -> dict:
+        """
+        :return: Queue depth and worker usage per executor, outcome totals and per task name metrics.
+        """
+        with self._thread_lock:
+            executors = {
+                name: {
+                    'maxWorkers': int(self._executors_config[name].get('max_workers') or 1),
+                    'running': self._running_count.get(name, 0),
+                    'pending': len(self._pending.get(name, [])),
+                    'maxPending': self._max_pending.get(name, 0),
+                }
+                for name in self._executors_config
+            }
+            task_metrics = dict(self._task_metrics)
+        tasks = {name: metrics.to_dict() for name, metrics in task_metrics.items()}
+        return {
+            'executors': executors,
+            'totals': {
+                outcome: sum(t[outcome] for t in tasks.values())
+                for outcome in (TASK_COMPLETED, TASK_FAILED, TASK_CANCELLED)
+            },
+            'tasks': tasks,
+        }
+
+    def get_task_metrics(self, name: str) -> TaskMetrics:
+        with self._thread_lock:
+            if name not in self._task_metrics:
+                raise NameError(f"[{self.identifier}] No metrics recorded for task '{name}'.")
+            return self._task_metrics[name]
+
+    @property
+    def executor_names(self) -> [str]:
+        return list(self._executors_config.keys())
+
+    def executor_config(self, name: str) -> dict:
+        if name not in self._executors_config:
+            raise NameError(f"[{self.identifier}] Executor '{name}' is not configured.")
+        return dict(self._executors_config[name])
+
+    def get_executor(self, name: str) -> Executor:
+        with self._thread_lock:
+            return self._get_or_create_executor(name)
+
+    def pending_count(self, executor_name: str = None) -> int:
+        with self._thread_lock:
+            if executor_name:
+                return len(self._pending.get(executor_name, []))
+            return sum(len(p) for p in self._pending.values())
 
     def shutdown(self, wait: bool = True):
         self.logger.info("Task runner shutting down...")
-        self._thread_pool.shutdown(wait=wait)
+        with self._thread_lock:
+            pending = [entry[2] for queue in self._pending.values() for entry in queue]
+            self._pending.clear()
+            executors = list(self._executors.values())
+            self._executors.clear()
+        for task in pending:
+            task.future.cancel()
+        for executor in executors:
+            executor.shutdown(wait=wait)
         self.logger.info("Task runner shut down.")
 
     def schedule_task(self, callable_fn, *args, **kwargs) -> Future:
+        executor_name = getattr(callable_fn, '__task_executor__', IO_EXECUTOR)
+        return self.schedule_task_on(executor_name, callable_fn, *args, **kwargs)
+
+    def schedule_task_on(self, executor_name: str, callable_fn, *args, **kwargs) -> Future:
         with self._thread_lock:
-            task_meta: TaskMetaData = kwargs.get('task_meta') or TaskMetaData()
-            kwargs['task_meta'] = task_meta
-            future = self._thread_pool.submit(callable_fn, *args, **kwargs)
-            future.add_done_callback(self._scheduled_task_completion_callback)
-            future_id = id(future)
-            self._futures.append(future)
-            self._meta[future_id] = task_meta
-            self.logger.debug(f"Scheduled background task [{future_id}]. "
-                              f"Meta = {self._meta[future_id].__dict__}.")
-            return future
+            self.executor_config(executor_name)
+            task_meta: TaskMetaData = kwargs.pop('task_meta', None) or TaskMetaData()
+            if task_meta.coalesce_key:
+                existing = self._coalesced.get(task_meta.coalesce_key)
+                if existing is not None and (not existing.done() or existing in self._in_executor):
+                    self.logger.info(f"[{self.identifier}] Task '{task_meta.coalesce_key}' is already pending or "
+                                     f"running. Returning existing task...")
+                    return existing
+            if task_meta.key in self._meta:
+                raise ValueError(f"[{self.identifier}] Task '{task_meta.key}' is already scheduled.")
+            task_meta.set_executor(executor_name)
+            task_meta.set_name(task_meta.name or _task_name(callable_fn))
+            task_meta.set_enqueued(datetime.now())
+            task = _ScheduledTask(executor_name, callable_fn, args, kwargs, task_meta)
+            self._futures.append(task.future)
+            self._meta[task_meta.key] = task_meta
+            self._future_keys[task.future] = task_meta.key
+            if task_meta.coalesce_key:
+                self._coalesced[task_meta.coalesce_key] = task.future
+            if task_meta.timeout is not None:
+                task_meta.set_deadline(datetime.now() + timedelta(seconds=task_meta.timeout))
+                task.timer = Timer(task_meta.timeout, self._expire_task, args=(task,))
+                task.timer.daemon = True
+                task.timer.start()
+                task.future.add_done_callback(lambda _, t=task.timer: t.cancel())
+            queue = self._pending.setdefault(executor_name, [])
+            heapq.heappush(queue, (task_meta.priority, next(self._sequence), task))
+            self._max_pending[executor_name] = max(self._max_pending.get(executor_name, 0), len(queue))
+            if self.logger.isEnabledFor(DEBUG):
+                self.logger.debug(f"Scheduled background task [{task_meta.key}]. Meta = {task_meta.to_dict()}.")
+            task.future.add_done_callback(self._scheduled_task_completion_callback)
+        self._dispatch(executor_name)
+        return task.future
+
+    def cancel_task(self, future: Future) -> bool:
+        """
+        Cancels a pending task outright, or signals the cancellation token of a running one.
+        :return: True, if the task was pending and will never run, false otherwise.
+        """
+        with self._thread_lock:
+            task_meta = self._meta.get(self._future_keys.get(future))
+        if task_meta is not None:
+            task_meta.cancellation_token.cancel()
+        return future.cancel()
+
+    def _dispatch(self, executor_name: str) -> None:
+        # Futures are completed, and callbacks added to inner futures, only once the lock is released: both run done
+        # callbacks, which may take locks of their own - e.g. a scheduler's while it schedules tasks here.
+        failed: List[Tuple[_ScheduledTask, BaseException]] = []
+        started: List[Tuple[_ScheduledTask, Future]] = []
+        with self._thread_lock:
+            queue = self._pending.get(executor_name)
+            capacity = int(self.executor_config(executor_name).get('max_workers') or 1)
+            while queue and self._running_count.get(executor_name, 0) < capacity:
+                _, _, task = heapq.heappop(queue)
+                if task.future.done() or not task.future.set_running_or_notify_cancel():
+                    continue
+                task.task_meta.set_started(datetime.now())
+                self._metrics_for(task.task_meta.name).queue_wait.observe(task.task_meta.queue_wait)
+                executor = self._get_or_create_executor(executor_name)
+                kwargs = dict(task.kwargs)
+                if not isinstance(executor, ProcessPoolExecutor):
+                    kwargs['task_meta'] = task.task_meta
+                try:
+                    try:
+                        inner = executor.submit(task.callable_fn, *task.args, **kwargs)
+                    except BrokenExecutor:
+                        self.logger.warning(f"[{self.identifier}] Executor '{executor_name}' is broken. "
+                                            f"Recreating...")
+                        del self._executors[executor_name]
+                        executor.shutdown(wait=False)
+                        executor = self._get_or_create_executor(executor_name)
+                        inner = executor.submit(task.callable_fn, *task.args, **kwargs)
+                except BaseException as ex:
+                    failed.append((task, ex))
+                    continue
+                self._running_count[executor_name] = self._running_count.get(executor_name, 0) + 1
+                self._in_executor.add(task.future)
+                started.append((task, inner))
+        for task, ex in failed:
+            self._set_exception(task.future, ex)
+        for task, inner in started:
+            inner.add_done_callback(lambda f, t=task: self._inner_task_done(t, f))
+
+    def _inner_task_done(self, task: _ScheduledTask, inner: Future) -> None:
+        with self._thread_lock:
+            self._running_count[task.executor_name] -= 1
+            self._in_executor.discard(task.future)
+            if task.future.done():
+                self._release_coalesce_key(task.task_meta, task.future)
+        if inner.cancelled():
+            self._set_exception(task.future, TaskCancelledException())
+        elif inner.exception() is not None:
+            self._set_exception(task.future, inner.exception())
+        elif not task.future.done():
+            try:
+                task.future.set_result(inner.result())
+            except BaseException as ex:
+                self.logger.debug(f"[{self.identifier}] Discarding result of finished task: {ex}")
+        self._dispatch(task.executor_name)
+
+    def _expire_task(self, task: _ScheduledTask) -> None:
+        if task.future.done():
+            return
+        self.logger.warning(f"[{self.identifier}] Task [{task.task_meta.key}] exceeded its deadline of "
+                            f"{task.task_meta.timeout} seconds.")
+        self._set_exception(task.future, TaskTimeoutException(
+            f"Task '{task.task_meta.key}' exceeded its deadline of {task.task_meta.timeout} seconds."))
+        task.task_meta.cancellation_token.cancel()
+
+    def _set_exception(self, future: Future, ex: BaseException) -> None:
+        if future.done():
+            return
+        try:
+            future.set_exception(ex)
+        except BaseException as err:
+            self.logger.debug(f"[{self.identifier}] Task already finished: {err}")
 
     def _scheduled_task_completion_callback(self, future: Future):
-        future_id = id(future)
-        self.logger.debug(f"Background task notification callback [{future}]")
         if future.done():
-            self.logger.info(f"Background task complete [{future}]")
             with self._thread_lock:
-                self.logger.debug(f"Cleaning up background task [{future_id}]. "
-                                  f"Meta = {self._meta[future_id].__dict__}.")
+                task_key = self._future_keys.pop(future)
+                task_meta = self._meta.pop(task_key)
+                if task_meta.is_running:
+                    task_meta.set_finished(datetime.now())
+                if future not in self._in_executor:
+                    self._release_coalesce_key(task_meta, future)
+                metrics = self._metrics_for(task_meta.name)
+                if task_meta.run_time is not None:
+                    metrics.run_time.observe(task_meta.run_time)
+                metrics.record_outcome(_task_outcome(future))
+                if self.logger.isEnabledFor(DEBUG):
+                    self.logger.debug(f"Background task [{task_key}] complete. Meta = {task_meta.to_dict()}.")
                 self._futures.remove(future)
-                del self._meta[future_id]
+
+    def _release_coalesce_key(self, task_meta: TaskMetaData, future: Future) -> None:
+        if task_meta.coalesce_key and self._coalesced.get(task_meta.coalesce_key) is future:
+            del self._coalesced[task_meta.coalesce_key]
+
+    def _metrics_for(self, name: str) -> TaskMetrics:
+        metrics = self._task_metrics.get(name)
+        if metrics is None:
+            metrics = self._task_metrics[name] = TaskMetrics(window_size=self._metrics_window)
+        return metrics
+
+    def _get_or_create_executor(self, name: str) -> Executor:
+        if name in self._executors:
+            return self._executors[name]
+        options = self.executor_config(name)
+        executor_type = options.get('type', 'thread')
+        max_workers = int(options.get('max_workers') or 1)
+        if executor_type == 'thread':
+            executor = ThreadPoolExecutor(
+                max_workers=max_workers,
+                thread_name_prefix=f"{self.identifier}.{name}"
+            )
+        elif executor_type == 'process':
+            executor = ProcessPoolExecutor(
+                max_workers=max_workers,
+                mp_context=multiprocessing.get_context(options.get('mp_context'))
+            )
+        else:
+            raise ValueError(f"[{self.identifier}] Executor '{name}' has unsupported type '{executor_type}'.")
+        self._executors[name] = executor
+        self.logger.info(f"[{self.identifier}] Executor '{name}' created ({executor_type}, {max_workers} workers).")
+        return executor
@@ -1 +1,2 @@
 from .string_utils import generate_random_string
+from .digests import content_hash, repr_hash, unique_names, DIGEST_SIZE
@@ -0,0 +1,33 @@
+import hashlib
+from typing import Any, Dict, Final, Iterable, Iterator, Optional
+
+
+DIGEST_SIZE: Final = 16
+
+
+def repr_hash(value: Any) -> bytes:
+    """
+    :return: A digest of a value built of strings, numbers, None, and lists, tuples and dicts of these.
+    """
+    # The repr quotes and escapes every string, so that it is unambiguous, and is built in one call rather than one
+    # digest update per part.
+    return hashlib.blake2b(repr(value).encode(), digest_size=DIGEST_SIZE).digest()
+
+
+def content_hash(attributes: Dict[str, Optional[str]]) -> bytes:
+    """
+    :return: A digest of the attributes that does not depend on their order.
+    """
+    return repr_hash(sorted(attributes.items()))
+
+
+def unique_names(names: Iterable[Optional[str]]) -> Iterator[str]:
+    """
+    Tells repeated names apart by occurrence - 'NAME', 'NAME#2', ... - so that each can serve as a key. Missing
+    names are taken as empty.
+    """
+    seen: Dict[str, int] = {}
+    for name in names:
+        name = name or ''
+        seen[name] = seen.get(name, 0) + 1
+        yield name if seen[name] == 1 else f"{name}#{seen[name]}"
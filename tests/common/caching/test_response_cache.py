@@ -0,0 +1,48 @@
+import unittest
+from corelib.caching import ResponseCache
+
+
+class ResponseCacheTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.cache = ResponseCache(max_entries=3, max_bytes=10)
+
+    def test_get_or_render(self):
+        calls = []
+
+        def render():
+            calls.append(1)
+            return b'body'
+
+        self.assertEqual(self.cache.get_or_render(1, 'key', render), (b'body', False))
+        self.assertEqual(self.cache.get_or_render(1, 'key', render), (b'body', True))
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(self.cache.stats['hits'], 1)
+
+    def test_new_generation_invalidates(self):
+        self.cache.put(1, 'key', b'old')
+        self.assertIsNone(self.cache.get(2, 'key'))
+
+        self.cache.put(1, 'key', b'stale')
+        self.assertIsNone(self.cache.get(2, 'key'))
+        self.assertEqual(self.cache.size, 0)
+
+    def test_lru_eviction(self):
+        for key in ['a', 'b', 'c']:
+            self.cache.put(1, key, b'xx')
+        self.cache.get(1, 'a')
+        self.cache.put(1, 'd', b'xx')
+
+        self.assertIsNone(self.cache.get(1, 'b'))
+        self.assertEqual(self.cache.get(1, 'a'), b'xx')
+        self.cache.put(1, 'e', b'xxxxxxxx')
+        self.assertLessEqual(self.cache.size, 10)
+
+    def test_oversized_body_is_not_cached(self):
+        self.cache.put(1, 'big', b'x' * 11)
+
+        self.assertIsNone(self.cache.get(1, 'big'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,67 @@
+import bz2
+import gzip
+import lzma
+import os
+import tempfile
+import unittest
+from parameterized import parameterized
+from corelib.compression import open_source, detect_compression, GZIP_COMPRESSION, BZ2_COMPRESSION, \
+    LZMA_COMPRESSION
+
+CONTENT = 'DATACENTER|NODEGROUP\nSRV00|ÄÖÜ\r\nSRV01|B\n'.encode('utf-8') * 100
+
+
+class CompressedSourceTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _write(self, name: str, data: bytes) -> str:
+        path = os.path.join(self.tmp.name, name)
+        with open(path, 'wb') as out:
+            out.write(data)
+        return path
+
+    @parameterized.expand([
+        ('gzip', gzip.compress, GZIP_COMPRESSION),
+        ('bz2', bz2.compress, BZ2_COMPRESSION),
+        ('xz', lzma.compress, LZMA_COMPRESSION),
+        ('lzma', lambda data: lzma.compress(data, format=lzma.FORMAT_ALONE), LZMA_COMPRESSION),
+    ])
+    def test_compressed_sources_are_decompressed(self, _, compress, compression):
+        # The suffix is deliberately wrong: formats are recognized by their content.
+        path = self._write('source.txt', compress(CONTENT))
+
+        self.assertEqual(detect_compression(path), compression)
+        with open_source(path) as source:
+            self.assertEqual(source.read(), CONTENT)
+        with open_source(path, encoding='utf-8', newline='') as source:
+            self.assertEqual(source.readline(), 'DATACENTER|NODEGROUP\n')
+            self.assertEqual(source.readline(), 'SRV00|ÄÖÜ\r\n')
+
+    def test_plain_sources(self):
+        path = self._write('source.csv', CONTENT)
+
+        self.assertIsNone(detect_compression(path))
+        with open_source(path) as source:
+            self.assertEqual(source.read(), CONTENT)
+        with open_source(path, encoding='utf-8') as source:
+            self.assertEqual(source.read(), CONTENT.decode('utf-8').replace('\r\n', '\n'))
+
+    def test_empty_source(self):
+        path = self._write('empty', b'')
+
+        self.assertIsNone(detect_compression(path))
+        with open_source(path) as source:
+            self.assertEqual(source.read(), b'')
+
+    def test_missing_source(self):
+        with self.assertRaises(FileNotFoundError):
+            open_source(os.path.join(self.tmp.name, 'missing.gz'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,42 @@
+import gzip
+import unittest
+import zlib
+from parameterized import parameterized
+from corelib.compression import ResponseCompressor, GZIP_ENCODING, DEFLATE_ENCODING
+
+
+class ResponseCompressorTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.compressor = ResponseCompressor(min_size=100)
+
+    @parameterized.expand([
+        ([], None),
+        ([('gzip', 1)], GZIP_ENCODING),
+        ([('deflate', 1), ('gzip', 1)], GZIP_ENCODING),
+        ([('deflate', 1), ('gzip', 0.5)], DEFLATE_ENCODING),
+        ([('gzip', 0), ('*', 0.1)], DEFLATE_ENCODING),
+        ([('br', 1), ('identity', 1)], None),
+        ([('GZIP', 1)], GZIP_ENCODING),
+    ])
+    def test_negotiate(self, accept_encoding, expected):
+        self.assertEqual(self.compressor.negotiate(accept_encoding), expected)
+
+    def test_compress_round_trip(self):
+        body = b'{"jobs":[]}' * 100
+
+        self.assertEqual(gzip.decompress(self.compressor.compress(body, GZIP_ENCODING)), body)
+        self.assertEqual(zlib.decompress(self.compressor.compress(body, DEFLATE_ENCODING)), body)
+        self.assertEqual(self.compressor.compress(body, GZIP_ENCODING), self.compressor.compress(body, GZIP_ENCODING))
+
+    def test_threshold(self):
+        self.assertFalse(self.compressor.should_compress(99))
+        self.assertTrue(self.compressor.should_compress(100))
+
+    def test_unsupported_encoding(self):
+        with self.assertRaises(ValueError):
+            ResponseCompressor(encodings=['br'])
+
+
+if __name__ == '__main__':
+    unittest.main()
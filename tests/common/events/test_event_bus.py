@@ -0,0 +1,106 @@
+import logging
+import threading
+import unittest
+from corelib.events import EventBus
+
+
+class EventBusTestCase(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        logging.disable(logging.CRITICAL)
+
+    @classmethod
+    def tearDownClass(cls):
+        logging.disable(logging.NOTSET)
+
+    def test_subscribers_receive_events_in_order(self):
+        bus = EventBus()
+        with bus.subscribe() as first, bus.subscribe() as second:
+            bus.publish('a', {'n': 1})
+            bus.publish('b')
+
+            for subscription in (first, second):
+                events = [subscription.get(timeout=1), subscription.get(timeout=1)]
+                self.assertEqual([(e.id, e.type, e.data) for e in events], [(1, 'a', {'n': 1}), (2, 'b', {})])
+                self.assertIsNone(subscription.get(timeout=0))
+
+    def test_events_before_subscribing_are_not_delivered(self):
+        bus = EventBus()
+        bus.publish('before')
+
+        with bus.subscribe() as subscription:
+            self.assertIsNone(subscription.get(timeout=0))
+
+    def test_reconnect_replays_retained_events(self):
+        bus = EventBus(history_size=3)
+        for idx in range(5):
+            bus.publish(f"e{idx}")
+
+        with bus.subscribe(last_event_id=3) as subscription:
+            self.assertEqual([subscription.get(timeout=0).id for _ in range(2)], [4, 5])
+        with bus.subscribe(last_event_id=0) as subscription:
+            self.assertEqual(subscription.get(timeout=0).id, 3)
+
+    def test_max_subscribers(self):
+        bus = EventBus(max_subscribers=1)
+        subscription = bus.subscribe()
+
+        self.assertTrue(bus.is_full)
+        self.assertIsNone(bus.subscribe())
+        subscription.close()
+        self.assertEqual(bus.subscriber_count, 0)
+        self.assertIsNotNone(bus.subscribe())
+
+    def test_listeners_are_not_subscribers(self):
+        bus = EventBus(max_subscribers=1)
+        received = []
+        bus.add_listener(received.append)
+
+        with bus.subscribe() as subscription:
+            self.assertIsNotNone(subscription)
+            bus.publish('a')
+        bus.remove_listener(received.append)
+        bus.publish('b')
+
+        self.assertEqual(bus.subscriber_count, 0)
+        self.assertEqual([e.type for e in received], ['a'])
+
+    def test_slow_subscriber_drops_oldest_events(self):
+        bus = EventBus(max_queue_size=2)
+        with bus.subscribe() as subscription:
+            for idx in range(5):
+                bus.publish('tick', {'n': idx})
+
+            self.assertEqual(subscription.missed, 3)
+            self.assertEqual([subscription.get(timeout=0).data['n'] for _ in range(2)], [3, 4])
+
+    def test_close_wakes_waiting_get(self):
+        bus = EventBus()
+        subscription = bus.subscribe()
+        results = []
+        waiter = threading.Thread(target=lambda: results.append(subscription.get(timeout=10)))
+        waiter.start()
+
+        subscription.close()
+        waiter.join(timeout=5)
+
+        self.assertFalse(waiter.is_alive())
+        self.assertEqual(results, [None])
+
+    def test_failing_listener_does_not_stop_publishing(self):
+        bus = EventBus()
+        received = []
+
+        def failing_listener(event):
+            raise RuntimeError('boom')
+
+        bus.add_listener(failing_listener)
+        bus.add_listener(received.append)
+        bus.publish('a')
+
+        self.assertEqual([e.type for e in received], ['a'])
+
+
+if __name__ == '__main__':
+    unittest.main()
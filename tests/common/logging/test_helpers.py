@@ -0,0 +1,21 @@
+import logging
+import unittest
+from uuid import uuid4
+from corelib.logging import create_console_logger
+
+
+class CreateConsoleLoggerTestCase(unittest.TestCase):
+
+    def test_console_handler_is_added_once(self):
+        name = f"{__name__}_{uuid4()}"
+        logger = create_console_logger(name)
+        same_logger = create_console_logger(name, logging.INFO, logging.DEBUG)
+
+        self.assertIs(same_logger, logger)
+        self.assertEqual(len(logger.handlers), 1)
+        self.assertEqual(logger.level, logging.INFO)
+        self.assertEqual(logger.handlers[0].level, logging.DEBUG)
+
+
+if __name__ == '__main__':
+    unittest.main()
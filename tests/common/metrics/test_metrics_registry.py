@@ -0,0 +1,93 @@
+import logging
+import unittest
+from corelib.metrics import MetricsRegistry
+
+
+class MetricsRegistryTestCase(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        logging.disable(logging.CRITICAL)
+
+    @classmethod
+    def tearDownClass(cls):
+        logging.disable(logging.NOTSET)
+
+    def test_counter_and_gauge(self):
+        registry = MetricsRegistry()
+        requests = registry.counter('requests_total', 'Requests.', ('route', 'status'))
+        requests.labels('/a', '200').inc()
+        requests.labels('/a', '200').inc(2)
+        registry.gauge('ready', 'Readiness.').set(1)
+
+        self.assertEqual(registry.render(), '\n'.join([
+            '# HELP requests_total Requests.',
+            '# TYPE requests_total counter',
+            'requests_total{route="/a",status="200"} 3',
+            '# HELP ready Readiness.',
+            '# TYPE ready gauge',
+            'ready 1',
+        ]) + '\n')
+
+    def test_histogram_buckets_are_cumulative(self):
+        registry = MetricsRegistry()
+        latency = registry.histogram('latency_seconds', 'Latency.', ('route',), buckets=(0.1, 1.0))
+        for value in (0.05, 0.1, 0.5, 2.0):
+            latency.labels('/a').observe(value)
+
+        lines = registry.render().splitlines()
+
+        self.assertEqual(lines[2:], [
+            'latency_seconds_bucket{route="/a",le="0.1"} 2',
+            'latency_seconds_bucket{route="/a",le="1.0"} 3',
+            'latency_seconds_bucket{route="/a",le="+Inf"} 4',
+            'latency_seconds_sum{route="/a"} 2.65',
+            'latency_seconds_count{route="/a"} 4',
+        ])
+
+    def test_histogram_without_labels(self):
+        registry = MetricsRegistry()
+        registry.histogram('refresh_seconds', 'Refreshes.', buckets=(10,)).observe(3)
+
+        self.assertIn('refresh_seconds_bucket{le="10"} 1', registry.render())
+
+    def test_label_values_are_escaped(self):
+        registry = MetricsRegistry()
+        registry.counter('errors_total', 'Errors.', ('message',)).labels('a "b"\\\n').inc()
+
+        self.assertIn('errors_total{message="a \\"b\\"\\\\\\n"} 1', registry.render())
+
+    def test_collectors_run_before_rendering(self):
+        registry = MetricsRegistry()
+        depth = registry.gauge('queue_depth', 'Depth.')
+        values = iter([3, 5])
+        registry.register_collector(lambda: depth.set(next(values)))
+
+        self.assertIn('queue_depth 3', registry.render())
+        self.assertIn('queue_depth 5', registry.render())
+
+    def test_failing_collector_does_not_break_rendering(self):
+        registry = MetricsRegistry()
+        registry.gauge('up', 'Up.').set(1)
+        registry.register_collector(lambda: 1 / 0)
+
+        self.assertIn('up 1', registry.render())
+
+    def test_registration(self):
+        registry = MetricsRegistry()
+        counter = registry.counter('hits_total', 'Hits.', ('route',))
+
+        self.assertIs(registry.counter('hits_total', 'Hits.', ('route',)), counter)
+        self.assertIs(registry.get('hits_total'), counter)
+        with self.assertRaises(ValueError):
+            registry.gauge('hits_total', 'Hits.')
+        with self.assertRaises(ValueError):
+            counter.labels('/a', '200')
+        with self.assertRaises(ValueError):
+            counter.labels('/a').inc(-1)
+        with self.assertRaises(NameError):
+            registry.get('misses_total')
+
+
+if __name__ == '__main__':
+    unittest.main()
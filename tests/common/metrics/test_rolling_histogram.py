@@ -0,0 +1,48 @@
+import time
+import unittest
+from corelib.metrics import RollingHistogram
+
+
+class RollingHistogramTestCase(unittest.TestCase):
+
+    def test_snapshot(self):
+        histogram = RollingHistogram(buckets=[1, 10])
+        for value in range(1, 101):
+            histogram.observe(value / 10)
+
+        snapshot = histogram.snapshot()
+
+        self.assertEqual(snapshot['count'], 100)
+        self.assertEqual(snapshot['min'], 0.1)
+        self.assertEqual(snapshot['max'], 10.0)
+        self.assertEqual(snapshot['p50'], 5.0)
+        self.assertEqual(snapshot['p99'], 9.9)
+        self.assertEqual(snapshot['buckets'], {'1': 10, '10': 100, '+Inf': 100})
+
+    def test_window_keeps_recent_samples(self):
+        histogram = RollingHistogram(window_size=3)
+        for value in [100, 1, 2, 3]:
+            histogram.observe(value)
+
+        self.assertEqual(histogram.values(), [1, 2, 3])
+        self.assertEqual(histogram.total_count, 4)
+        self.assertEqual(histogram.total_sum, 106)
+
+    def test_max_age(self):
+        histogram = RollingHistogram(max_age=0.05)
+        histogram.observe(1)
+        time.sleep(0.1)
+        histogram.observe(2)
+
+        self.assertEqual(histogram.values(), [2])
+
+    def test_empty(self):
+        snapshot = RollingHistogram().snapshot()
+
+        self.assertEqual(snapshot['count'], 0)
+        self.assertIsNone(snapshot['p90'])
+        self.assertEqual(snapshot['buckets']['+Inf'], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
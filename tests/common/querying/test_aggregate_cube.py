@@ -0,0 +1,87 @@
+import unittest
+from corelib.querying import AggregateCube
+
+
+def _cube() -> AggregateCube:
+    cube = AggregateCube(('server', 'app', 'type'), ('jobs',), ('folders',))
+    cube.add(('S1', 'A', 'Job'), (3,), ('F1',))
+    cube.add(('S1', 'A', 'Dummy'), (1,), ('F1',))
+    cube.add(('S1', 'B', 'Job'), (2,), ('F2',))
+    cube.add(('S1', 'B', 'Job'), (2,), ('F3',))
+    cube.add(('S2', None, 'Job'), (5,), ('F4',))
+    return cube.build()
+
+
+class AggregateCubeTestCase(unittest.TestCase):
+
+    def test_grand_total(self):
+        self.assertEqual(_cube().cell(), {'jobs': 13, 'folders': 4})
+
+    def test_distinct_measures_are_not_summed(self):
+        cube = _cube()
+
+        self.assertEqual(cube.cell({'server': 'S1', 'app': 'A'}), {'server': 'S1', 'app': 'A', 'jobs': 4, 'folders': 1})
+        self.assertEqual(cube.cells(['type']), [
+            {'type': 'Dummy', 'jobs': 1, 'folders': 1},
+            {'type': 'Job', 'jobs': 12, 'folders': 4},
+        ])
+
+    def test_missing_cell_is_zero(self):
+        self.assertEqual(_cube().cell({'server': 'S3'}), {'server': 'S3', 'jobs': 0, 'folders': 0})
+
+    def test_drill_down_within_slice(self):
+        cells = _cube().cells(['app'], where={'server': 'S1'})
+
+        self.assertEqual(cells, [
+            {'server': 'S1', 'app': 'A', 'jobs': 4, 'folders': 1},
+            {'server': 'S1', 'app': 'B', 'jobs': 4, 'folders': 2},
+        ])
+
+    def test_none_coordinates(self):
+        cube = _cube()
+
+        self.assertEqual(cube.cells(['server', 'app'])[0], {'server': 'S1', 'app': 'A', 'jobs': 4, 'folders': 1})
+        self.assertEqual(cube.cells(['app'])[0]['app'], None)
+        self.assertEqual(cube.cells(['type'], where={'app': None}), [{'app': None, 'type': 'Job', 'jobs': 5,
+                                                                     'folders': 1}])
+
+    def test_top_k(self):
+        cube = _cube()
+
+        self.assertEqual(cube.cells(['server', 'app'], order_by='jobs', top=2), [
+            {'server': 'S2', 'app': None, 'jobs': 5, 'folders': 1},
+            {'server': 'S1', 'app': 'A', 'jobs': 4, 'folders': 1},
+        ])
+        self.assertEqual([cell['app'] for cell in cube.cells(['app'], order_by='folders', top=1)], ['B'])
+        self.assertEqual(cube.cells(['app'], order_by='jobs', top=0), [])
+
+    def test_invalid_queries(self):
+        cube = _cube()
+
+        for query in [lambda: cube.cells(['node']),
+                      lambda: cube.cells(['app'], where={'node': 'N'}),
+                      lambda: cube.cells(['app'], order_by='hosts'),
+                      lambda: cube.cells(['app'], top=-1),
+                      lambda: cube.add(('S1', 'A', 'Job'), (1,), ('F1',))]:
+            with self.assertRaises(ValueError):
+                query()
+
+    def test_fact_shape_is_checked(self):
+        cube = AggregateCube(('server',), ('jobs',))
+
+        with self.assertRaises(ValueError):
+            cube.add(('S1', 'A'), (1,))
+        with self.assertRaises(ValueError):
+            AggregateCube(('jobs',), ('jobs',))
+
+    def test_unbuilt_cube_cannot_be_queried(self):
+        cube = AggregateCube(('server',), ('jobs',))
+        cube.add(('S1',), (1,))
+
+        with self.assertRaises(ValueError):
+            cube.cell()
+        self.assertEqual(cube.build().cell({'server': 'S1'}), {'server': 'S1', 'jobs': 1})
+
+
+if __name__ == '__main__':
+    unittest.main()
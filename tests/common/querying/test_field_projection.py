@@ -0,0 +1,63 @@
+import unittest
+from corelib.querying import parse_fields, project
+
+
+class _Job:
+
+    def __init__(self, job_name: str):
+        self._owner: str = 'ctm'
+        self.job_name: str = job_name
+        self.variables: list = []
+
+
+class _Folder:
+
+    def __init__(self, name: str, jobs: list):
+        self.name: str = name
+        self.jobs: list = jobs
+        self.nodes: dict = {'N1': _Job('node-job')}
+
+
+class FieldProjectionTestCase(unittest.TestCase):
+
+    def test_parse_nested_fields(self):
+        self.assertEqual(parse_fields('name, jobs.job_name,jobs.variables'),
+                         {'name': {}, 'jobs': {'job_name': {}, 'variables': {}}})
+        self.assertIsNone(parse_fields(''))
+        self.assertIsNone(parse_fields(None))
+
+    def test_parent_field_selects_whole_value(self):
+        self.assertEqual(parse_fields('jobs,jobs.job_name'), {'jobs': {}})
+        self.assertEqual(parse_fields('jobs.job_name,jobs'), {'jobs': {}})
+
+    def test_parse_rejects_private_and_empty_names(self):
+        for fields in ['_owner', 'jobs._owner', 'name,', 'jobs..job_name']:
+            with self.assertRaises(ValueError, msg=fields):
+                parse_fields(fields)
+
+    def test_project_object(self):
+        folder = _Folder('F1', [_Job('J1'), _Job('J2')])
+
+        self.assertEqual(project(folder, parse_fields('name,jobs.job_name')),
+                         {'name': 'F1', 'jobs': [{'job_name': 'J1'}, {'job_name': 'J2'}]})
+
+    def test_project_dictionary_values_below_item(self):
+        folder = _Folder('F1', [])
+
+        self.assertEqual(project(folder, parse_fields('nodes.job_name')), {'nodes': {'N1': {'job_name': 'node-job'}}})
+        self.assertEqual(project({'name': 'F1', 'size': 3}, parse_fields('size')), {'size': 3})
+
+    def test_project_without_fields_returns_item(self):
+        folder = _Folder('F1', [])
+
+        self.assertIs(project(folder, None), folder)
+
+    def test_project_rejects_unknown_fields(self):
+        folder = _Folder('F1', [_Job('J1')])
+        for fields in ['missing', 'jobs.missing', 'name.length', '__class__']:
+            with self.assertRaises(ValueError, msg=fields):
+                project(folder, parse_fields(fields))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,84 @@
+import unittest
+from corelib.querying import CollectionQuery, decode_cursor, encode_cursor, paginate
+
+
+def _key(item: tuple) -> str:
+    return item[0]
+
+
+def _pages(items: list, limit: int, key=_key) -> list:
+    pages, cursor = [], None
+    while True:
+        page, cursor = paginate(items, key, limit, cursor)
+        pages.append(list(page))
+        if cursor is None:
+            return pages
+
+
+class PaginationTestCase(unittest.TestCase):
+
+    def test_pages_cover_items_once(self):
+        items = [(f"F{idx:03}", idx) for idx in range(25)]
+
+        pages = _pages(items, 10)
+
+        self.assertEqual([len(page) for page in pages], [10, 10, 5])
+        self.assertEqual([item for page in pages for item in page], items)
+
+    def test_duplicate_keys_span_pages(self):
+        items = [('A', 1), ('B', 1), ('B', 2), ('B', 3), ('B', 4), ('C', 1)]
+
+        pages = _pages(items, 2)
+
+        self.assertEqual([item for page in pages for item in page], items)
+
+    def test_last_full_page_has_no_cursor(self):
+        page, cursor = paginate([('A', 1), ('B', 1)], _key, 2)
+
+        self.assertEqual(len(page), 2)
+        self.assertIsNone(cursor)
+
+    def test_tuple_keys_round_trip(self):
+        self.assertEqual(decode_cursor(encode_cursor(('DC1', 'F1'), 2)), (('DC1', 'F1'), 2))
+
+        items = [(('DC1', f"F{idx}"), idx) for idx in range(5)]
+        self.assertEqual([item for page in _pages(items, 2) for item in page], items)
+
+    def test_invalid_cursors(self):
+        for cursor in ['not-base64!', encode_cursor('A', -1), 'bnVsbA', encode_cursor(1, 0)]:
+            with self.assertRaises(ValueError, msg=cursor):
+                paginate([('A', 1)], _key, 1, cursor)
+
+
+class CollectionQueryTestCase(unittest.TestCase):
+
+    def test_from_args(self):
+        self.assertIsNone(CollectionQuery.from_args({}))
+        query = CollectionQuery.from_args({'fields': 'name', 'limit': '5'})
+
+        self.assertEqual((query.fields, query.limit, query.cursor, query.is_paginated), ('name', 5, None, True))
+        self.assertFalse(CollectionQuery.from_args({'fields': 'name'}).is_paginated)
+
+    def test_from_args_rejects_bad_limits(self):
+        for limit in ['ten', '0', '-1']:
+            with self.assertRaises(ValueError, msg=limit):
+                CollectionQuery.from_args({'limit': limit})
+
+    def test_apply_sorts_unless_presorted(self):
+        query = CollectionQuery(limit=2)
+
+        self.assertEqual(query.apply(['c', 'a', 'b']).items, ['a', 'b'])
+        self.assertEqual(query.apply(['c', 'a', 'b'], presorted=True).items, ['c', 'a'])
+
+    def test_apply_mapping_pages_keys(self):
+        mapping = {'b': {'name': 'B', 'size': 2}, 'a': {'name': 'A', 'size': 1}, 'c': {'name': 'C', 'size': 3}}
+
+        page = CollectionQuery(fields='size', limit=2).apply_mapping(mapping)
+        last = CollectionQuery(fields='size', limit=2, cursor=page.next_cursor).apply_mapping(mapping)
+
+        self.assertEqual(page.items, {'a': {'size': 1}, 'b': {'size': 2}})
+        self.assertEqual((last.items, last.next_cursor), ({'c': {'size': 3}}, None))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,87 @@
+import enum
+import json
+import unittest
+from datetime import datetime
+from parameterized import parameterized
+from corelib.serialization import JsonSerializer, ORJSON_BACKEND, STDLIB_BACKEND
+from corelib.serialization import json_serializer
+
+BACKENDS = [(STDLIB_BACKEND,)] + ([(ORJSON_BACKEND,)] if json_serializer.orjson else [])
+
+
+class _Color (enum.Enum):
+    RED = 'red'
+
+
+class _Item:
+
+    def __init__(self, name: str = None):
+        self._secret: str = 'hidden'
+        self.name: str = name
+        self.tags: set = set()
+        self.children: list = []
+
+
+class JsonSerializerTestCase(unittest.TestCase):
+
+    @parameterized.expand(BACKENDS)
+    def test_registered_type_emits_public_fields(self, backend: str):
+        serializer = JsonSerializer(backend=backend)
+        serializer.register_prototype(_Item())
+        item = _Item('parent')
+        item.children.append(_Item('child'))
+
+        data = serializer.dumps({'item': item})
+
+        self.assertTrue(data.endswith(b'\n'))
+        self.assertNotIn(b'_secret', data)
+        self.assertEqual(json.loads(data), {'item': {'name': 'parent', 'tags': [], 'children': [
+            {'name': 'child', 'tags': [], 'children': []}]}})
+
+    @parameterized.expand(BACKENDS)
+    def test_instances_with_other_attributes_use_field_list(self, backend: str):
+        serializer = JsonSerializer(backend=backend)
+        serializer.register_prototype(_Item())
+        item = _Item('extended')
+        item.extra = 'not registered'
+
+        self.assertEqual(json.loads(serializer.dumps(item)), {'name': 'extended', 'tags': [], 'children': []})
+
+    @parameterized.expand(BACKENDS)
+    def test_output_matches_jsonify_format(self, backend: str):
+        serializer = JsonSerializer(backend=backend)
+        payload = {'b': [1, 2.5, None], 'a': {'z': True, 'y': 'text'}}
+
+        self.assertEqual(serializer.dumps(payload),
+                         (json.dumps(payload, sort_keys=True, separators=(',', ':')) + '\n').encode('utf-8'))
+
+    @parameterized.expand(BACKENDS)
+    def test_builtin_fallbacks(self, backend: str):
+        serializer = JsonSerializer(backend=backend)
+        moment = datetime(2022, 1, 2, 3, 4, 5, 600)
+
+        data = json.loads(serializer.dumps({'at': moment, 'color': _Color.RED, 'set': {1}, 'item': _Item('x')}))
+
+        self.assertEqual(data, {'at': moment.isoformat(), 'color': 'red', 'set': [1],
+                                'item': {'name': 'x', 'tags': [], 'children': []}})
+
+    @parameterized.expand(BACKENDS)
+    def test_iterencode_matches_dumps(self, backend: str):
+        serializer = JsonSerializer(backend=backend)
+        serializer.register_prototype(_Item())
+        parent = _Item('parent')
+        parent.children.extend([_Item('a'), _Item('b')])
+        payload = {'z': [parent, {'nested': (1, 2)}], 'a': None, 'when': datetime(2022, 1, 2)}
+
+        for depth in range(4):
+            pieces = list(serializer.iterencode(payload, depth))
+            self.assertEqual(b''.join(pieces), serializer.dumps(payload), depth)
+        self.assertGreater(len(list(serializer.iterencode(payload, 3))), len(list(serializer.iterencode(payload, 1))))
+
+    def test_unknown_backend(self):
+        with self.assertRaises(ValueError):
+            JsonSerializer(backend='yaml')
+
+
+if __name__ == '__main__':
+    unittest.main()
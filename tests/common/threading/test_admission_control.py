@@ -0,0 +1,184 @@
+import asyncio
+import threading
+import unittest
+from corelib.threading import AdmissionController, ConcurrencyLimiter, SingleFlight, TokenBucket
+
+
+class TokenBucketTestCase(unittest.TestCase):
+
+    def test_burst_then_refill(self):
+        now = [0.0]
+        bucket = TokenBucket(capacity=2, refill_interval=10, clock=lambda: now[0])
+
+        self.assertTrue(bucket.try_acquire())
+        self.assertTrue(bucket.try_acquire())
+        self.assertFalse(bucket.try_acquire())
+        self.assertAlmostEqual(bucket.retry_after, 10)
+
+        now[0] = 4.0
+        self.assertFalse(bucket.try_acquire())
+        self.assertAlmostEqual(bucket.retry_after, 6)
+
+        now[0] = 10.0
+        self.assertTrue(bucket.try_acquire())
+        self.assertEqual(bucket.stats['admitted'], 3)
+        self.assertEqual(bucket.stats['rejected'], 2)
+
+    def test_tokens_do_not_exceed_capacity(self):
+        now = [0.0]
+        bucket = TokenBucket(capacity=1, refill_interval=1, clock=lambda: now[0])
+        now[0] = 100.0
+
+        self.assertTrue(bucket.try_acquire())
+        self.assertFalse(bucket.try_acquire())
+
+    def test_invalid_arguments(self):
+        with self.assertRaises(ValueError):
+            TokenBucket(capacity=-1)
+        with self.assertRaises(ValueError):
+            TokenBucket(refill_interval=-1)
+        with self.assertRaises(ValueError):
+            TokenBucket(capacity=0)
+
+
+class ConcurrencyLimiterTestCase(unittest.TestCase):
+
+    def test_rejects_when_wait_queue_is_full(self):
+        limiter = ConcurrencyLimiter(max_concurrent=1, max_waiting=0)
+
+        self.assertTrue(limiter.acquire())
+        self.assertFalse(limiter.acquire())
+        limiter.release()
+        self.assertTrue(limiter.acquire())
+        self.assertEqual(limiter.stats['rejected'], 1)
+
+    def test_waiter_times_out(self):
+        limiter = ConcurrencyLimiter(max_concurrent=1, max_waiting=1, wait_timeout=0.05)
+        limiter.acquire()
+
+        self.assertFalse(limiter.acquire())
+        self.assertEqual(limiter.waiting, 0)
+        self.assertEqual(limiter.running, 1)
+
+    def test_zero_wait_timeout_sheds_at_once(self):
+        limiter = ConcurrencyLimiter(max_concurrent=1, max_waiting=1, wait_timeout=0)
+        limiter.acquire()
+
+        self.assertEqual(limiter.wait_timeout, 0)
+        self.assertFalse(limiter.acquire())
+        self.assertEqual(limiter.waiting, 0)
+
+    def test_invalid_arguments(self):
+        for options in ({'max_concurrent': 0}, {'max_waiting': -1}, {'wait_timeout': -1}):
+            with self.assertRaises(ValueError, msg=options):
+                ConcurrencyLimiter(**options)
+
+    def test_released_slot_is_handed_to_waiter(self):
+        limiter = ConcurrencyLimiter(max_concurrent=1, max_waiting=1, wait_timeout=5)
+        limiter.acquire()
+        results = []
+        waiter = threading.Thread(target=lambda: results.append(limiter.acquire()))
+        waiter.start()
+        while limiter.waiting == 0:
+            pass
+
+        self.assertFalse(limiter.acquire())
+        limiter.release()
+        waiter.join()
+
+        self.assertEqual(results, [True])
+        self.assertEqual(limiter.running, 1)
+        limiter.release()
+        self.assertEqual(limiter.running, 0)
+
+    def test_coroutines_wait_for_slots(self):
+        limiter = ConcurrencyLimiter(max_concurrent=1, max_waiting=2, wait_timeout=5)
+        order = []
+
+        async def call(name: str):
+            self.assertTrue(await limiter.acquire_async())
+            order.append(name)
+            await asyncio.sleep(0.01)
+            limiter.release()
+
+        async def main():
+            await asyncio.gather(call('a'), call('b'), call('c'))
+            return await asyncio.gather(call('d'), call('e'), call('f'), call('g'), return_exceptions=True)
+
+        results = asyncio.run(main())
+
+        self.assertEqual(order[:3], ['a', 'b', 'c'])
+        self.assertEqual(sum(1 for result in results if isinstance(result, AssertionError)), 1)
+        self.assertEqual(limiter.running, 0)
+
+
+class SingleFlightTestCase(unittest.TestCase):
+
+    def test_concurrent_calls_share_one_computation(self):
+        single_flight = SingleFlight()
+        started = threading.Event()
+        release = threading.Event()
+        calls = []
+
+        def compute():
+            calls.append(1)
+            started.set()
+            release.wait()
+            return 'value'
+
+        results = []
+        leader = threading.Thread(target=lambda: results.append(single_flight.do('key', compute)))
+        leader.start()
+        started.wait()
+        followers = [threading.Thread(target=lambda: results.append(single_flight.do('key', compute)))
+                     for _ in range(3)]
+        for follower in followers:
+            follower.start()
+        while single_flight.stats['shared'] < 3:
+            pass
+        release.set()
+        for thread in [leader] + followers:
+            thread.join()
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(sorted(results), [('value', False)] + [('value', True)] * 3)
+        self.assertEqual(single_flight.do('key', lambda: 'next'), ('next', False))
+
+    def test_errors_are_raised_and_not_kept(self):
+        single_flight = SingleFlight()
+
+        with self.assertRaises(KeyError):
+            single_flight.do('key', lambda: {}['missing'])
+        self.assertEqual(single_flight.do('key', lambda: 1), (1, False))
+
+    def test_coroutines_share_one_computation(self):
+        single_flight = SingleFlight()
+        calls = []
+
+        async def compute():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            return 'value'
+
+        async def main():
+            return await asyncio.gather(*[single_flight.do_async('key', compute) for _ in range(4)])
+
+        results = asyncio.run(main())
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results, [('value', False)] + [('value', True)] * 3)
+        self.assertEqual(single_flight.stats['inFlight'], 0)
+
+
+class AdmissionControllerTestCase(unittest.TestCase):
+
+    def test_limiters_per_route(self):
+        controller = AdmissionController(routes={'/a': {'max_concurrent': 2, 'max_waiting': 1}})
+
+        self.assertIsNone(controller.limiter('/b'))
+        self.assertEqual(controller.stats['routes']['/a']['maxConcurrent'], 2)
+        self.assertIsInstance(controller.limiter('/a'), ConcurrencyLimiter)
+
+
+if __name__ == '__main__':
+    unittest.main()
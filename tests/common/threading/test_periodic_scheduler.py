@@ -0,0 +1,166 @@
+import threading
+import unittest
+from datetime import datetime, timedelta
+from corelib.threading import TaskRunner, TaskMetaData, PeriodicJob, PeriodicScheduler, IntervalSchedule, \
+    CronSchedule, create_schedule
+
+
+class CronScheduleTestCase(unittest.TestCase):
+
+    def test_every_five_minutes(self):
+        schedule = CronSchedule('*/5 * * * *')
+
+        self.assertEqual(schedule.next_run_after(datetime(2022, 8, 3, 10, 2, 30)), datetime(2022, 8, 3, 10, 5))
+        self.assertEqual(schedule.next_run_after(datetime(2022, 8, 3, 10, 5)), datetime(2022, 8, 3, 10, 10))
+
+    def test_rolls_over_day_month_and_year(self):
+        schedule = CronSchedule('30 2 1 1 *')
+
+        self.assertEqual(schedule.next_run_after(datetime(2022, 8, 3, 10, 0)), datetime(2023, 1, 1, 2, 30))
+
+    def test_weekday(self):
+        schedule = CronSchedule('0 6 * * 1-5')
+
+        # 2022-08-06 is a Saturday
+        self.assertEqual(schedule.next_run_after(datetime(2022, 8, 5, 7, 0)), datetime(2022, 8, 8, 6, 0))
+        self.assertEqual(CronSchedule('0 0 * * 7').next_run_after(datetime(2022, 8, 3)), datetime(2022, 8, 7))
+
+    def test_restricted_day_fields_match_either(self):
+        schedule = CronSchedule('0 0 15 * 1')
+
+        self.assertEqual(schedule.next_run_after(datetime(2022, 8, 3)), datetime(2022, 8, 8))
+        self.assertEqual(schedule.next_run_after(datetime(2022, 8, 13)), datetime(2022, 8, 15))
+
+    def test_invalid_expressions(self):
+        for expression in ['* * * *', '60 * * * *', '*/0 * * * *', '5-1 * * * *']:
+            with self.assertRaises(ValueError, msg=expression):
+                CronSchedule(expression)
+        with self.assertRaises(ValueError):
+            create_schedule(interval=10, cron='* * * * *')
+
+    def test_create_schedule(self):
+        self.assertIsInstance(create_schedule(interval=10), IntervalSchedule)
+        self.assertIsInstance(create_schedule(cron='0 * * * *'), CronSchedule)
+
+
+class PeriodicSchedulerTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.runner = TaskRunner()
+        self.scheduler = PeriodicScheduler(task_runner=self.runner)
+
+    def tearDown(self):
+        self.scheduler.stop()
+        self.runner.shutdown(wait=True)
+
+    def _wait_for(self, predicate, timeout: float = 5.0) -> bool:
+        deadline = datetime.now() + timedelta(seconds=timeout)
+        while datetime.now() < deadline:
+            if predicate():
+                return True
+            threading.Event().wait(0.01)
+        return predicate()
+
+    def test_runs_on_interval(self):
+        runs = []
+
+        def job(task_meta: TaskMetaData = None):
+            runs.append(task_meta.description)
+
+        self.scheduler.register_job(PeriodicJob('ticker', job, IntervalSchedule(0.05)))
+        self.scheduler.start()
+
+        self.assertTrue(self._wait_for(lambda: len(runs) >= 3))
+        state = self.scheduler.jobs[0].to_dict()
+        self.assertEqual(state['lastStatus'], 'SUCCESS')
+        self.assertGreater(state['nextRunAt'], state['lastRunStartedAt'])
+
+    def test_duplicate_job(self):
+        self.scheduler.register_job(PeriodicJob('job', lambda task_meta=None: None, IntervalSchedule(60)))
+
+        with self.assertRaises(NameError):
+            self.scheduler.register_job(PeriodicJob('job', lambda task_meta=None: None, IntervalSchedule(60)))
+
+    def test_backoff_after_failures(self):
+        def job(task_meta: TaskMetaData = None):
+            raise ValueError('refresh failed')
+
+        periodic_job = self.scheduler.register_job(
+            PeriodicJob('failing', job, IntervalSchedule(0.01), backoff_base=0.1, backoff_max=0.2),
+            run_immediately=True)
+        self.scheduler.start()
+
+        self.assertTrue(self._wait_for(lambda: periodic_job.consecutive_failures >= 3))
+        self.assertEqual(periodic_job.last_status, 'FAILURE')
+        self.assertEqual(periodic_job.last_error, 'refresh failed')
+        self.assertEqual(periodic_job.backoff_delay(), 0.2)
+        self.assertLess(periodic_job.runs_count, 10)
+
+    def test_retries_before_next_regular_run(self):
+        def job(task_meta: TaskMetaData = None):
+            raise ValueError('refresh failed')
+
+        hourly = self.scheduler.register_job(
+            PeriodicJob('hourly', job, IntervalSchedule(3600), backoff_base=0.05, backoff_max=0.1),
+            run_immediately=True)
+        nightly = self.scheduler.register_job(
+            PeriodicJob('nightly', job, CronSchedule('0 2 * * *'), backoff_base=0.05, backoff_max=0.1),
+            run_immediately=True)
+        self.scheduler.start()
+
+        self.assertTrue(self._wait_for(lambda: hourly.consecutive_failures >= 3 and nightly.consecutive_failures >= 3))
+        for periodic_job in (hourly, nightly):
+            self.assertLessEqual(periodic_job.next_run_at, datetime.now() + timedelta(seconds=1))
+
+    def test_skips_while_running(self):
+        release = threading.Event()
+
+        def job(task_meta: TaskMetaData = None):
+            task_meta.invalidate_thread()
+            release.wait(5)
+
+        periodic_job = self.scheduler.register_job(PeriodicJob('slow', job, IntervalSchedule(0.02)),
+                                                   run_immediately=True)
+        self.scheduler.start()
+
+        self.assertTrue(self._wait_for(lambda: periodic_job.skipped_count >= 2))
+        self.assertEqual(periodic_job.runs_count, 1)
+        release.set()
+        self.assertTrue(self._wait_for(lambda: periodic_job.runs_count >= 2))
+
+    def test_submits_jobs_without_scheduler_lock(self):
+        blocked = []
+        test = self
+
+        class ProbingTaskRunner (TaskRunner):
+            # Reads the scheduler's jobs from another thread while a job is submitted, which waits if the
+            # scheduler is holding its lock.
+            def schedule_task_on(self, executor_name, callable_fn, *args, **kwargs):
+                other = threading.Thread(target=lambda: test.scheduler.jobs, daemon=True)
+                other.start()
+                other.join(1)
+                blocked.append(other.is_alive())
+                return super().schedule_task_on(executor_name, callable_fn, *args, **kwargs)
+
+        self.scheduler.stop()
+        self.runner.shutdown(wait=True)
+        self.runner = ProbingTaskRunner()
+        self.scheduler = PeriodicScheduler(task_runner=self.runner)
+        periodic_job = self.scheduler.register_job(
+            PeriodicJob('probed', lambda task_meta=None: None, IntervalSchedule(60)), run_immediately=True)
+        self.scheduler.start()
+
+        self.assertTrue(self._wait_for(lambda: periodic_job.last_status == 'SUCCESS'))
+        self.assertEqual(blocked, [False])
+
+    def test_jitter_delays_next_run(self):
+        before = datetime.now()
+        periodic_job = self.scheduler.register_job(
+            PeriodicJob('jittered', lambda task_meta=None: None, IntervalSchedule(60), jitter=30))
+
+        self.assertGreaterEqual(periodic_job.next_run_at, before + timedelta(seconds=60))
+        self.assertLessEqual(periodic_job.next_run_at, datetime.now() + timedelta(seconds=90))
+
+
+if __name__ == '__main__':
+    unittest.main()
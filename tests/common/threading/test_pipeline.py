@@ -0,0 +1,46 @@
+import unittest
+from corelib.threading import BoundedPipeline
+
+
+class BoundedPipelineTestCase(unittest.TestCase):
+
+    def test_items_flow_through_stages_in_order(self):
+        results = []
+        pipeline = BoundedPipeline(queue_size=2)
+        pipeline.run(range(100), lambda x: x * 2, lambda x: x + 1, sink=results.append)
+
+        self.assertEqual(results, [x * 2 + 1 for x in range(100)])
+
+    def test_stage_returning_none_drops_item(self):
+        results = []
+        pipeline = BoundedPipeline(queue_size=4)
+        pipeline.run(range(10), lambda x: x if x % 2 else None, sink=results.append)
+
+        self.assertEqual(results, [1, 3, 5, 7, 9])
+
+    def test_stage_error_is_raised(self):
+        def failing_stage(x):
+            if x == 5:
+                raise ValueError('boom')
+            return x
+
+        pipeline = BoundedPipeline(queue_size=1)
+        with self.assertRaises(ValueError):
+            pipeline.run(range(1000), failing_stage, sink=lambda _: None)
+
+    def test_source_error_is_raised(self):
+        def failing_source():
+            yield 1
+            raise KeyError('source')
+
+        pipeline = BoundedPipeline(queue_size=1)
+        with self.assertRaises(KeyError):
+            pipeline.run(failing_source(), lambda x: x, sink=lambda _: None)
+
+    def test_invalid_queue_size(self):
+        with self.assertRaises(ValueError):
+            BoundedPipeline(queue_size=0)
+
+
+if __name__ == '__main__':
+    unittest.main()
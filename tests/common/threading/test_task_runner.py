@@ -0,0 +1,250 @@
+import os
+import threading
+import time
+import unittest
+from concurrent.futures import CancelledError
+from corelib.threading import TaskRunner, TaskMetaData, TaskPriority, task_executor, TaskTimeoutException, \
+    TaskCancelledException, IO_EXECUTOR, CPU_EXECUTOR
+
+
+def _current_pid(*args, **kwargs) -> int:
+    return os.getpid()
+
+
+@task_executor(CPU_EXECUTOR)
+def _cpu_square(value: int) -> int:
+    return value * value
+
+
+@task_executor(CPU_EXECUTOR)
+def _cpu_fail():
+    raise ValueError('cpu failure')
+
+
+class TaskRunnerTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.runner = TaskRunner(executors={
+            IO_EXECUTOR: {'max_workers': 2},
+            CPU_EXECUTOR: {'max_workers': 1},
+        })
+
+    def tearDown(self):
+        self.runner.shutdown(wait=True)
+
+    def test_default_executor_is_io_thread_pool(self):
+        def task(task_meta: TaskMetaData = None):
+            task_meta.invalidate_thread()
+            return threading.current_thread().name
+
+        future = self.runner.schedule_task(task)
+
+        self.assertTrue(future.result(timeout=5).startswith(f"{self.runner.identifier}.{IO_EXECUTOR}"))
+
+    def test_executor_config_merges_defaults(self):
+        config = self.runner.executor_config(CPU_EXECUTOR)
+
+        self.assertEqual(config['type'], 'process')
+        self.assertEqual(config['max_workers'], 1)
+        self.assertIn(IO_EXECUTOR, self.runner.executor_names)
+
+    def test_unknown_executor(self):
+        with self.assertRaises(NameError):
+            self.runner.schedule_task_on('gpu', _current_pid)
+
+    def test_declared_process_executor(self):
+        future = self.runner.schedule_task(_cpu_square, 12)
+
+        self.assertEqual(future.result(timeout=60), 144)
+        self.assertNotEqual(self.runner.schedule_task(_current_pid).result(timeout=5), 0)
+
+    def test_process_executor_exception(self):
+        future = self.runner.schedule_task(_cpu_fail)
+
+        with self.assertRaises(ValueError):
+            future.result(timeout=60)
+
+    def test_meta_data_records_executor(self):
+        task_meta = TaskMetaData()
+        self.runner.schedule_task(_cpu_square, 3, task_meta=task_meta).result(timeout=60)
+
+        self.assertEqual(task_meta.executor, CPU_EXECUTOR)
+
+    def _block_single_worker(self) -> threading.Event:
+        # Replaces the runner from setUp, which is shut down first, so that its executors do not outlive the test.
+        self.runner.shutdown(wait=True)
+        self.runner = TaskRunner(executors={IO_EXECUTOR: {'max_workers': 1}})
+        release = threading.Event()
+        self.runner.schedule_task(lambda task_meta=None: release.wait(5))
+        return release
+
+    def test_coalesced_tasks_share_future(self):
+        release = self._block_single_worker()
+        f1 = self.runner.schedule_task(lambda task_meta=None: 1, task_meta=TaskMetaData(coalesce_key='same'))
+        f2 = self.runner.schedule_task(lambda task_meta=None: 2, task_meta=TaskMetaData(coalesce_key='same'))
+        release.set()
+
+        self.assertIs(f1, f2)
+        self.assertEqual(f1.result(timeout=5), 1)
+        f3 = self.runner.schedule_task(lambda task_meta=None: 3, task_meta=TaskMetaData(coalesce_key='same'))
+        self.assertEqual(f3.result(timeout=5), 3)
+
+    def test_priority_order(self):
+        release = self._block_single_worker()
+        order = []
+        futures = [
+            self.runner.schedule_task(lambda task_meta=None, p=p: order.append(p), task_meta=TaskMetaData(priority=p))
+            for p in [TaskPriority.LOW, TaskPriority.NORMAL, TaskPriority.HIGH, TaskPriority.LOW]
+        ]
+        release.set()
+        for f in futures:
+            f.result(timeout=5)
+
+        self.assertEqual(order, [TaskPriority.HIGH, TaskPriority.NORMAL, TaskPriority.LOW, TaskPriority.LOW])
+
+    def test_cancel_pending_task(self):
+        release = self._block_single_worker()
+        future = self.runner.schedule_task(lambda task_meta=None: 1)
+
+        self.assertTrue(self.runner.cancel_task(future))
+        release.set()
+        with self.assertRaises(CancelledError):
+            future.result(timeout=5)
+
+    def test_cancel_running_task_cooperatively(self):
+        started = threading.Event()
+
+        def task(task_meta: TaskMetaData = None):
+            started.set()
+            task_meta.cancellation_token.wait(5)
+            task_meta.cancellation_token.raise_if_cancelled()
+
+        future = self.runner.schedule_task(task)
+        started.wait(5)
+
+        self.assertFalse(self.runner.cancel_task(future))
+        with self.assertRaises(TaskCancelledException):
+            future.result(timeout=5)
+
+    def test_deadline_fails_future(self):
+        cancelled = threading.Event()
+
+        def task(task_meta: TaskMetaData = None):
+            if task_meta.cancellation_token.wait(5):
+                cancelled.set()
+
+        future = self.runner.schedule_task(task, task_meta=TaskMetaData(timeout=0.1))
+
+        with self.assertRaises(TaskTimeoutException):
+            future.result(timeout=5)
+        self.assertTrue(cancelled.wait(5))
+
+    def test_expired_task_keeps_coalesce_key_until_it_returns(self):
+        release = threading.Event()
+        calls = []
+
+        def task(task_meta: TaskMetaData = None):
+            calls.append(1)
+            release.wait(5)
+
+        expired = self.runner.schedule_task(task, task_meta=TaskMetaData(coalesce_key='same', timeout=0.1))
+        with self.assertRaises(TaskTimeoutException):
+            expired.result(timeout=5)
+
+        self.assertIs(self.runner.schedule_task(task, task_meta=TaskMetaData(coalesce_key='same')), expired)
+        release.set()
+        for _ in range(500):
+            if self.runner.metrics['executors'][IO_EXECUTOR]['running'] == 0:
+                break
+            time.sleep(0.01)
+        self.runner.schedule_task(task, task_meta=TaskMetaData(coalesce_key='same')).result(timeout=5)
+        self.assertEqual(len(calls), 2)
+
+    def _callback_blocks_runner(self, future) -> threading.Event:
+        # Done callbacks may take locks of their own, so the runner must not hold its lock while running them: a
+        # thread using the runner from within a callback would otherwise wait for the callback's thread.
+        blocked = threading.Event()
+
+        def callback(_):
+            other = threading.Thread(target=lambda: self.runner.metrics, daemon=True)
+            other.start()
+            other.join(1)
+            if other.is_alive():
+                blocked.set()
+
+        done = threading.Event()
+        future.add_done_callback(callback)
+        future.add_done_callback(lambda _: done.set())
+        self.assertTrue(done.wait(5))
+        return blocked
+
+    def test_expired_task_callbacks_run_without_runner_lock(self):
+        future = self.runner.schedule_task(lambda task_meta=None: task_meta.cancellation_token.wait(5),
+                                           task_meta=TaskMetaData(timeout=0.1))
+
+        self.assertFalse(self._callback_blocks_runner(future).is_set())
+
+    def test_failed_submission_callbacks_run_without_runner_lock(self):
+        release = self._block_single_worker()
+        future = self.runner.schedule_task(lambda task_meta=None: 1)
+        self.runner._get_or_create_executor(IO_EXECUTOR).shutdown(wait=False)
+        release.set()
+
+        self.assertFalse(self._callback_blocks_runner(future).is_set())
+        with self.assertRaises(RuntimeError):
+            future.result(timeout=5)
+
+    def _wait_until_idle(self) -> None:
+        for _ in range(500):
+            if not self.runner.tasks_meta_data:
+                return
+            time.sleep(0.01)
+
+    def test_meta_data_keyed_by_task_key(self):
+        release = self._block_single_worker()
+        task_meta = TaskMetaData(key='known-key')
+        future = self.runner.schedule_task(lambda task_meta=None: 1, task_meta=task_meta)
+
+        self.assertIs(self.runner.tasks_meta_data['known-key'], task_meta)
+        self.assertIsNotNone(task_meta.enqueued_at)
+        self.assertIsNone(task_meta.started_at)
+        with self.assertRaises(ValueError):
+            self.runner.schedule_task(lambda task_meta=None: 2, task_meta=task_meta)
+        release.set()
+        future.result(timeout=5)
+        self._wait_until_idle()
+        self.assertNotIn('known-key', self.runner.tasks_meta_data)
+        self.assertGreaterEqual(task_meta.queue_wait, 0)
+        self.assertGreaterEqual(task_meta.run_time, 0)
+
+    def test_metrics(self):
+        release = self._block_single_worker()
+
+        def fail(task_meta: TaskMetaData = None):
+            raise ValueError('failure')
+
+        succeeded = self.runner.schedule_task(lambda task_meta=None: 1, task_meta=TaskMetaData(name='ok'))
+        failed = self.runner.schedule_task(fail)
+        cancelled = self.runner.schedule_task(lambda task_meta=None: 1, task_meta=TaskMetaData(name='ok'))
+        self.runner.cancel_task(cancelled)
+        release.set()
+        succeeded.result(timeout=5)
+        with self.assertRaises(ValueError):
+            failed.result(timeout=5)
+        self._wait_until_idle()
+
+        metrics = self.runner.metrics
+        self.assertEqual(metrics['totals'], {'completed': 2, 'failed': 1, 'cancelled': 1})
+        self.assertEqual(metrics['executors'][IO_EXECUTOR]['maxPending'], 3)
+        self.assertEqual(metrics['executors'][IO_EXECUTOR]['pending'], 0)
+        ok = self.runner.get_task_metrics('ok')
+        self.assertEqual((ok.completed, ok.cancelled), (1, 1))
+        self.assertEqual(ok.queue_wait.total_count, 1)
+        self.assertGreater(ok.queue_wait.values()[0], 0)
+        self.assertEqual(self.runner.get_task_metrics(f"{__name__}.{fail.__qualname__}").failed, 1)
+        with self.assertRaises(NameError):
+            self.runner.get_task_metrics('unknown')
+
+
+if __name__ == '__main__':
+    unittest.main()
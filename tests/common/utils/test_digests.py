@@ -0,0 +1,26 @@
+import unittest
+from corelib.utils import content_hash, repr_hash, unique_names, DIGEST_SIZE
+
+
+class DigestsTestCase(unittest.TestCase):
+
+    def test_content_hash_ignores_attribute_order(self):
+        self.assertEqual(content_hash({'a': '1', 'b': None}), content_hash({'b': None, 'a': '1'}))
+        self.assertEqual(len(content_hash({})), DIGEST_SIZE)
+
+    def test_content_hash_is_unambiguous(self):
+        self.assertNotEqual(content_hash({'a': '1', 'b': None}), content_hash({'a': '1', 'b': ''}))
+        self.assertNotEqual(content_hash({'a': '1b'}), content_hash({'a1': 'b'}))
+        self.assertNotEqual(content_hash({'a': "1', 'b"}), content_hash({'a': '1', 'b': ''}))
+
+    def test_repr_hash(self):
+        self.assertEqual(repr_hash({'a': ['1', None]}), repr_hash({'a': ['1', None]}))
+        self.assertNotEqual(repr_hash({'a': '1', 'b': '2'}), repr_hash({'b': '2', 'a': '1'}))
+        self.assertNotEqual(repr_hash(['1']), repr_hash([1]))
+
+    def test_unique_names(self):
+        self.assertEqual(list(unique_names(['A', 'B', 'A', None, 'A', ''])), ['A', 'B', 'A#2', '', 'A#3', '#2'])
+
+
+if __name__ == '__main__':
+    unittest.main()
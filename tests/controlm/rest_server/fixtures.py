@@ -0,0 +1,80 @@
+import asyncio
+import logging
+import os
+import tempfile
+import unittest
+import yaml
+from benchmarks.synthetic_export import write_synthetic_export, write_synthetic_nodes_csv
+from controlm.rest_server import CtmRestServer
+from controlm.rest_server.ctm_asgi_server import CtmAsgiServer
+
+
+def write_synthetic_config(directory: str, folders_per_server: int = 10, sections: dict = None) -> str:
+    """
+    Writes a small synthetic export, node list and a config.yml pointing the cache manager at them.
+    :param sections: Further top-level config sections.
+    :return: The path of the written config.yml.
+    """
+    config_path = os.path.join(directory, 'config.yml')
+    with open(config_path, 'w') as out:
+        yaml.safe_dump(dict(sections or {}, cache_manager={
+            'xml_path': write_synthetic_export(os.path.join(directory, 'export.xml'), servers=2,
+                                               folders_per_server=folders_per_server, jobs_per_folder=3,
+                                               nodes_per_server=3),
+            'csv_path': write_synthetic_nodes_csv(os.path.join(directory, 'nodes.csv'), servers=2,
+                                                  nodes_per_server=3),
+        }), out)
+    return config_path
+
+
+def asgi_get(app, path: str, method: str = 'GET', headers: list = None, body: bytes = b''):
+    """
+    Sends one HTTP request to the ASGI application.
+    :param path: The path, optionally with a query string.
+    :return: The status, body and headers of the response.
+    """
+    messages = []
+
+    async def receive():
+        return {'type': 'http.request', 'body': body, 'more_body': False}
+
+    async def send(message):
+        messages.append(message)
+
+    path, _, query_string = path.partition('?')
+    scope = {'type': 'http', 'method': method, 'path': path, 'query_string': query_string.encode('latin-1'),
+             'headers': headers or []}
+    asyncio.run(app(scope, receive, send))
+    response_headers = dict(messages[0]['headers'])
+    return messages[0]['status'], b''.join(m.get('body', b'') for m in messages[1:]), response_headers
+
+
+class RestServerTestCase (unittest.TestCase):
+    """
+    Serves a synthetic config with a CtmRestServer and a CtmAsgiServer, shared by the tests of the class: ``server``,
+    ``client`` and ``cache_manager`` are the Flask server's, ``asgi_server`` and ``asgi_cache_manager`` the ASGI
+    server's.
+    """
+    folders_per_server: int = 10
+    # Populate both caches before the tests; cold start tests do it themselves.
+    preload: bool = True
+
+    @classmethod
+    def setUpClass(cls):
+        logging.disable(logging.CRITICAL)
+        cls.tmp = tempfile.TemporaryDirectory()
+        config_path = write_synthetic_config(cls.tmp.name, folders_per_server=cls.folders_per_server)
+        cls.server = CtmRestServer(config_path=config_path)
+        cls.cache_manager = cls.server.di.shared_cache_manager()
+        cls.client = cls.server.app.test_client()
+        cls.asgi_server = CtmAsgiServer(config_path=config_path)
+        cls.asgi_cache_manager = cls.asgi_server.di.shared_cache_manager()
+        if cls.preload:
+            cls.cache_manager.preload_cache()
+            cls.asgi_cache_manager.preload_cache()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.asgi_server.shutdown()
+        cls.tmp.cleanup()
+        logging.disable(logging.NOTSET)
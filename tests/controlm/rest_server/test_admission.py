@@ -0,0 +1,145 @@
+import logging
+import tempfile
+import threading
+import unittest
+from unittest import mock
+from controlm.rest_server import CtmRestServer
+from controlm.rest_server.ctm_asgi_server import CtmAsgiServer
+from controlm.services import CtmRepository
+from tests.controlm.rest_server.fixtures import asgi_get, write_synthetic_config
+
+ADMISSION_CONFIG = {
+    'admission': {
+        'routes': {
+            '/servers-raw': {'max_concurrent': 1, 'max_waiting': 0, 'wait_timeout': 2},
+            '/servers/<server>/nodes/stats': {'max_concurrent': 1, 'max_waiting': 0},
+        },
+        'refresh': {'capacity': 1, 'refill_interval': 600},
+    }
+}
+
+
+class AdmissionControlTestCase(unittest.TestCase):
+
+    def setUp(self):
+        logging.disable(logging.CRITICAL)
+        self.tmp = tempfile.TemporaryDirectory()
+        config_path = write_synthetic_config(self.tmp.name, sections=ADMISSION_CONFIG)
+        self.server = CtmRestServer(config_path=config_path)
+        self.server.di.shared_cache_manager().preload_cache()
+        self.client = self.server.app.test_client()
+        self.asgi_server = CtmAsgiServer(config_path=config_path)
+        self.asgi_server.di.shared_cache_manager().preload_cache()
+
+    def tearDown(self):
+        self.asgi_server.shutdown()
+        self.tmp.cleanup()
+        logging.disable(logging.NOTSET)
+
+    def test_refresh_triggers_are_rate_limited(self):
+        self.assertEqual(self.client.get('/cache/populate').status_code, 405)
+        self.assertEqual(self.client.post('/cache/populate').status_code, 200)
+
+        response = self.client.post('/cache/populate')
+
+        self.assertEqual(response.status_code, 429)
+        self.assertGreater(int(response.headers['Retry-After']), 0)
+
+    def test_asgi_refresh_triggers_are_rate_limited(self):
+        self.assertEqual(asgi_get(self.asgi_server, '/cache/populate')[0], 405)
+        self.assertEqual(asgi_get(self.asgi_server, '/cache/populate', method='POST')[0], 200)
+
+        status, _, headers = asgi_get(self.asgi_server, '/cache/populate', method='POST')
+
+        self.assertEqual(status, 429)
+        self.assertIn(b'retry-after', headers)
+
+    def test_requests_without_a_slot_are_shed(self):
+        limiter = self.server.di.admission_controller().limiter('/servers-raw')
+        limiter.acquire()
+        try:
+            response = self.client.get('/servers-raw')
+            self.assertEqual(response.status_code, 503)
+            self.assertEqual(response.headers['Retry-After'], '2')
+            self.assertEqual(response.get_json()['status'], 503)
+        finally:
+            limiter.release()
+
+        self.assertEqual(self.client.get('/servers-raw').status_code, 200)
+        limiter.acquire()
+        try:
+            self.assertEqual(self.client.get('/servers-raw').status_code, 200, 'Cached bodies need no slot.')
+        finally:
+            limiter.release()
+
+    def test_asgi_requests_without_a_slot_are_shed(self):
+        limiter = self.asgi_server.di.admission_controller().limiter('/servers-raw')
+        limiter.acquire()
+        try:
+            status, _, headers = asgi_get(self.asgi_server, '/servers-raw')
+            self.assertEqual(status, 503)
+            self.assertEqual(headers[b'retry-after'], b'2')
+        finally:
+            limiter.release()
+
+        self.assertEqual(asgi_get(self.asgi_server, '/servers-raw')[0], 200)
+
+    def test_streamed_responses_hold_a_slot_until_closed(self):
+        limiter = self.server.di.admission_controller().limiter('/servers/<server>/nodes/stats')
+        response = self.client.get('/servers/SRV00/nodes/stats', headers={'Accept': 'application/x-ndjson'},
+                                   buffered=False)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(limiter.running, 1)
+        self.assertEqual(self.client.get('/servers/SRV00/nodes/stats', headers={
+            'Accept': 'application/x-ndjson'}).status_code, 503)
+
+        response.get_data()
+        response.close()
+
+        self.assertEqual(limiter.running, 0)
+
+    def test_asgi_streamed_responses_release_their_slot(self):
+        limiter = self.asgi_server.di.admission_controller().limiter('/servers/<server>/nodes/stats')
+
+        status, _, _ = asgi_get(self.asgi_server, '/servers/SRV00/nodes/stats',
+                                 headers=[(b'accept', b'application/x-ndjson')])
+
+        self.assertEqual(status, 200)
+        self.assertEqual(limiter.running, 0)
+
+    def test_concurrent_identical_requests_share_one_computation(self):
+        started = threading.Event()
+        release = threading.Event()
+        fetch_node_stats = CtmRepository.fetch_node_stats
+        calls = []
+
+        def slow_fetch_node_stats(repository, *args, **kwargs):
+            calls.append(1)
+            started.set()
+            release.wait(5)
+            return fetch_node_stats(repository, *args, **kwargs)
+
+        single_flight = self.server.di.admission_controller().single_flight
+        statuses = []
+
+        def get():
+            statuses.append(self.server.app.test_client().get('/servers/SRV01/nodes/stats').status_code)
+
+        with mock.patch.object(CtmRepository, 'fetch_node_stats', slow_fetch_node_stats):
+            threads = [threading.Thread(target=get) for _ in range(4)]
+            threads[0].start()
+            started.wait(5)
+            for thread in threads[1:]:
+                thread.start()
+            while single_flight.stats['shared'] < 3:
+                pass
+            release.set()
+            for thread in threads:
+                thread.join()
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(statuses, [200] * 4)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,81 @@
+import json
+import unittest
+from tests.controlm.rest_server.fixtures import RestServerTestCase, asgi_get
+
+
+class BatchEndpointTestCase(RestServerTestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.folder = cls.client.get('/servers/SRV00/folders/all').get_json()[0]['name']
+        cls.node = cls.client.get('/servers/SRV00/nodes').get_json()[0]
+
+    def _batch(self, lookups):
+        response = self.client.post('/batch', json={'lookups': lookups})
+        self.assertEqual(response.status_code, 200)
+        return response.get_json()['results']
+
+    def test_results_match_single_lookups(self):
+        results = self._batch([
+            {'id': 'folder', 'type': 'folder', 'server': 'SRV00', 'folder': self.folder},
+            {'id': 'node', 'type': 'node', 'server': 'SRV00', 'host': self.node},
+            {'id': 'stats', 'type': 'server', 'server': 'SRV01'},
+        ])
+
+        for lookup_id, path in [('folder', f"/servers/SRV00/folder/{self.folder}"),
+                                ('node', f"/servers/SRV00/node/{self.node}"),
+                                ('stats', '/servers/SRV01/stats')]:
+            self.assertEqual(results[lookup_id], {'status': 200, 'data': self.client.get(path).get_json()}, lookup_id)
+
+    def test_host_lookup_and_fields(self):
+        host = self.client.get(f"/servers/SRV00/node/{self.node}").get_json()['hosts'][0]['host']
+
+        results = self._batch([{'type': 'host', 'server': 'SRV00', 'host': host},
+                               {'type': 'folder', 'server': 'SRV00', 'folder': self.folder, 'fields': 'name'}])
+
+        self.assertEqual(results['0'], {'status': 200, 'data': {'server': 'SRV00', 'group': self.node, 'host': host}})
+        self.assertEqual(results['1'], {'status': 200, 'data': {'name': self.folder}})
+
+    def test_per_item_errors(self):
+        results = self._batch([
+            {'id': 'no-server', 'type': 'folder', 'server': 'NONE', 'folder': self.folder},
+            {'id': 'no-folder', 'type': 'folder', 'server': 'SRV00', 'folder': 'NONE'},
+            {'id': 'no-host', 'type': 'host', 'server': 'SRV00', 'host': 'NONE'},
+            {'id': 'bad-type', 'type': 'job', 'server': 'SRV00'},
+            {'id': 'missing-arg', 'type': 'node', 'server': 'SRV00'},
+            {'id': 'bad-fields', 'type': 'server', 'server': 'SRV00', 'fields': 'missing'},
+            {'id': 'ok', 'type': 'server', 'server': 'SRV00'},
+        ])
+
+        self.assertEqual({lookup_id: result['status'] for lookup_id, result in results.items()}, {
+            'no-server': 404, 'no-folder': 404, 'no-host': 404,
+            'bad-type': 400, 'missing-arg': 400, 'bad-fields': 400, 'ok': 200,
+        })
+
+    def test_invalid_batches(self):
+        for body in [{'lookups': [{'id': 'a', 'type': 'server', 'server': 'SRV00'}] * 2},
+                     {'lookups': 'folders'},
+                     {'lookups': [{'type': 'server', 'server': 'SRV00'}] * 1001},
+                     ['folders']]:
+            self.assertEqual(self.client.post('/batch', json=body).status_code, 400)
+        self.assertEqual(self.client.post('/batch', data='{', content_type='application/json').status_code, 400)
+        self.assertEqual(self.client.get('/batch').status_code, 405)
+
+    def test_asgi_parity(self):
+        body = json.dumps({'lookups': [
+            {'type': 'folder', 'server': 'SRV01', 'folder': self.folder.replace('SRV00', 'SRV01')},
+            {'type': 'node', 'server': 'SRV00', 'host': self.node, 'fields': 'hosts.host'},
+            {'type': 'host', 'server': 'SRV00', 'host': 'NONE'},
+        ]}).encode()
+
+        status, asgi_body, _ = asgi_get(self.asgi_server, '/batch', method='POST', body=body)
+        response = self.client.post('/batch', data=body, content_type='application/json')
+
+        self.assertEqual(status, 200)
+        self.assertEqual(asgi_body, response.get_data())
+        self.assertEqual(asgi_get(self.asgi_server, '/batch', method='POST', body=b'[')[0], 400)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,142 @@
+import asyncio
+import json
+import unittest
+from unittest import mock
+from controlm.services import CtmCacheManagerEvents
+from tests.controlm.rest_server.fixtures import RestServerTestCase
+
+
+def _parse_events(chunks: bytes) -> list:
+    events = []
+    for block in chunks.decode('utf-8').split('\n\n'):
+        fields = dict(line.split(': ', 1) for line in block.splitlines() if ': ' in line and not line.startswith(':'))
+        if 'event' in fields:
+            events.append((fields.get('id'), fields['event'], json.loads(fields['data'])))
+    return events
+
+
+REFRESH_EVENTS = [
+    CtmCacheManagerEvents.REFRESH_STARTED,
+    CtmCacheManagerEvents.REFRESH_PROGRESS,
+    CtmCacheManagerEvents.REFRESH_PROGRESS,
+    CtmCacheManagerEvents.REFRESH_PROGRESS,
+    CtmCacheManagerEvents.GENERATION_PUBLISHED,
+    CtmCacheManagerEvents.REFRESH_COMPLETED,
+]
+
+
+class CacheEventsTestCase(RestServerTestCase):
+
+    def _open_stream(self, headers: dict = None):
+        response = self.client.get('/cache/events', headers=headers or {}, buffered=False)
+        return response, iter(response.response)
+
+    def test_stream_starts_with_state_snapshot(self):
+        response, chunks = self._open_stream()
+        try:
+            self.assertEqual(response.mimetype, 'text/event-stream')
+            self.assertEqual(response.headers['Cache-Control'], 'no-cache')
+            events = _parse_events(next(chunks))
+            self.assertEqual(events, [(None, 'cache.state', {
+                'state': 'CtmCacheManagerState.COMPLETE',
+                'ready': True,
+                'generation': self.cache_manager.cache_generation,
+            })])
+        finally:
+            response.close()
+
+    def test_refresh_pushes_progress_and_new_generation(self):
+        response, chunks = self._open_stream()
+        try:
+            next(chunks)
+            self.cache_manager.preload_cache()
+            events = _parse_events(b''.join(next(chunks) for _ in REFRESH_EVENTS))
+
+            self.assertEqual([event_type for _, event_type, _ in events], REFRESH_EVENTS)
+            self.assertEqual([data['stage'] for _, _, data in events[1:4]], ['loading', 'loaded', 'indexing'])
+            self.assertEqual(events[4][2]['generation'], self.cache_manager.cache_generation)
+            self.assertEqual(events[5][2]['generation'], self.cache_manager.cache_generation)
+            self.assertEqual([int(event_id) for event_id, _, _ in events],
+                             sorted(int(event_id) for event_id, _, _ in events))
+        finally:
+            response.close()
+
+    def test_closing_stream_unsubscribes(self):
+        event_bus = self.server.di.shared_event_bus()
+        response, chunks = self._open_stream()
+        next(chunks)
+        subscribers = event_bus.subscriber_count
+
+        response.close()
+
+        self.assertEqual(event_bus.subscriber_count, subscribers - 1)
+
+    def test_reconnect_replays_missed_events(self):
+        event_bus = self.server.di.shared_event_bus()
+        last_event_id = event_bus.publish(CtmCacheManagerEvents.REFRESH_STARTED, {'generation': 0}).id
+        event_bus.publish(CtmCacheManagerEvents.REFRESH_FAILED, {'error': 'boom'})
+
+        response, chunks = self._open_stream({'Last-Event-ID': str(last_event_id)})
+        try:
+            next(chunks)
+            self.assertEqual(_parse_events(next(chunks))[0][1:], (CtmCacheManagerEvents.REFRESH_FAILED,
+                                                                 {'error': 'boom',
+                                                                  'timestamp': mock.ANY}))
+        finally:
+            response.close()
+
+    def test_too_many_subscribers(self):
+        event_bus = self.server.di.shared_event_bus()
+        subscriptions = []
+        while not event_bus.is_full:
+            subscriptions.append(event_bus.subscribe())
+        try:
+            self.assertEqual(self.client.get('/cache/events').status_code, 503)
+        finally:
+            for subscription in subscriptions:
+                subscription.close()
+
+    def test_asgi_stream(self):
+        event_bus = self.asgi_server.di.shared_event_bus()
+        messages = []
+
+        async def run():
+            disconnect = asyncio.Event()
+            body_received = asyncio.Event()
+            requested = False
+
+            async def receive():
+                nonlocal requested
+                if not requested:
+                    requested = True
+                    return {'type': 'http.request', 'body': b'', 'more_body': False}
+                await disconnect.wait()
+                return {'type': 'http.disconnect'}
+
+            async def send(message):
+                messages.append(message)
+                if message.get('more_body') and len(messages) == 3:
+                    body_received.set()
+
+            scope = {'type': 'http', 'method': 'GET', 'path': '/cache/events', 'query_string': b'', 'headers': []}
+            app = asyncio.ensure_future(self.asgi_server(scope, receive, send))
+            while len(messages) < 2:
+                await asyncio.sleep(0.01)
+            await asyncio.get_running_loop().run_in_executor(
+                None, lambda: event_bus.publish(CtmCacheManagerEvents.GENERATION_PUBLISHED, {'generation': 7}))
+            await asyncio.wait_for(body_received.wait(), timeout=5)
+            disconnect.set()
+            await asyncio.wait_for(app, timeout=5)
+
+        asyncio.run(run())
+
+        self.assertEqual(dict(messages[0]['headers'])[b'content-type'], b'text/event-stream')
+        events = _parse_events(b''.join(m.get('body', b'') for m in messages[1:]))
+        self.assertEqual([event_type for _, event_type, _ in events],
+                         ['cache.state', CtmCacheManagerEvents.GENERATION_PUBLISHED])
+        self.assertEqual(events[1][2]['generation'], 7)
+        self.assertEqual(event_bus.subscriber_count, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,54 @@
+import json
+import unittest
+from datetime import date
+from tests.controlm.rest_server.fixtures import RestServerTestCase, asgi_get
+
+
+class CalendarEndpointsTestCase(RestServerTestCase):
+
+    def test_jobs_scheduled_on_day(self):
+        expected = self.cache_manager.get_cached_schedule_calendar(2026).jobs_on(date(2026, 6, 1), server='SRV00')
+
+        response = self.client.get('/calendar/2026-06-01/jobs?server=SRV00')
+
+        self.assertEqual(response.status_code, 200)
+        jobs = response.get_json()
+        self.assertTrue(jobs)
+        self.assertEqual(sorted(jobs, key=lambda job: (job['folder'], job['job'])),
+                         sorted(expected, key=lambda job: (job['folder'], job['job'])))
+        self.assertEqual(self.client.get('/calendar/20260601/jobs?server=SRV00').get_json(), jobs)
+
+    def test_jobs_are_paginated(self):
+        jobs = self.client.get('/calendar/2026-06-01/jobs').get_json()
+
+        page = self.client.get('/calendar/2026-06-01/jobs?limit=5&fields=job')
+
+        self.assertEqual(page.get_json()['items'], [{'job': job['job']} for job in jobs[:5]])
+        self.assertIsNotNone(page.get_json()['next_cursor'])
+
+    def test_busiest_days(self):
+        document = self.client.get('/calendar/2026/busiest-days?top=3&server=SRV01').get_json()
+
+        self.assertEqual((document['year'], document['top'], document['unresolvedCalendars']), (2026, 3, []))
+        self.assertTrue(document['nodes'])
+        for node in document['nodes']:
+            self.assertEqual(node['server'], 'SRV01')
+            counts = [day['jobsCount'] for day in node['days']]
+            self.assertEqual(counts, sorted(counts, reverse=True))
+            self.assertLessEqual(len(counts), 3)
+
+    def test_invalid_arguments(self):
+        for path in ['/calendar/June/jobs', '/calendar/2026-02-30/jobs', '/calendar/2026/busiest-days?top=x',
+                     '/calendar/2026/busiest-days?top=-1', '/calendar/0/busiest-days']:
+            self.assertEqual(self.client.get(path).status_code, 400, path)
+
+    def test_asgi_matches_flask(self):
+        for path in ['/calendar/2026-06-01/jobs?node=SRV00_NODE_001', '/calendar/2026/busiest-days?top=2']:
+            status, body, _ = asgi_get(self.asgi_server, path)
+
+            self.assertEqual(status, 200, path)
+            self.assertEqual(json.loads(body), self.client.get(path).get_json(), path)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,60 @@
+import copy
+import json
+import unittest
+from controlm.services import CtmCacheManager, CtmCacheManagerKeys
+from tests.controlm.rest_server.fixtures import RestServerTestCase, asgi_get
+
+
+def _republish_with_one_job_removed(cache_manager: CtmCacheManager) -> dict:
+    def_table = copy.deepcopy(cache_manager.cache.get_item(CtmCacheManagerKeys.CONTROL_M_ALL_FOLDERS))
+    folder = def_table.items[0]
+    job = folder.jobs.pop()
+    cache_manager.set_caching_complete(cache_manager.cache.get_item(CtmCacheManagerKeys.CONTROL_M_HOST_INFOS),
+                                       def_table)
+    return {'server': folder.data_center, 'folder': folder.folder_name, 'job': job.job_name}
+
+
+class ChangesEndpointTestCase(RestServerTestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.removed_job = _republish_with_one_job_removed(cls.cache_manager)
+        _republish_with_one_job_removed(cls.asgi_cache_manager)
+
+    def test_changes_since(self):
+        generation = self.cache_manager.cache_generation
+
+        response = self.client.get(f"/changes?since={generation - 1}")
+        unchanged = self.client.get(f"/changes?since={generation}").get_json()
+
+        self.assertEqual(response.status_code, 200)
+        document = response.get_json()
+        self.assertEqual((document['since'], document['generation'], document['resync']),
+                         (generation - 1, generation, False))
+        self.assertEqual(document['jobs'], {'added': [], 'changed': [], 'removed': [self.removed_job]})
+        self.assertEqual(document['folders'], {'added': [], 'changed': [], 'removed': []})
+        self.assertEqual(unchanged['jobs']['removed'], [])
+
+    def test_resync(self):
+        response = self.client.get('/changes?since=0')
+
+        self.assertEqual(response.status_code, 410)
+        document = response.get_json()
+        self.assertEqual((document['resync'], document['oldestGeneration']),
+                         (True, self.cache_manager.cache_generation - 1))
+
+    def test_invalid_since(self):
+        for path in ('/changes', '/changes?since=x', f"/changes?since={self.cache_manager.cache_generation + 1}"):
+            self.assertEqual(self.client.get(path).status_code, 400, path)
+
+    def test_asgi_matches_flask(self):
+        for path in ('/changes?since=1', '/changes?since=0', '/changes?since=x'):
+            flask_response = self.client.get(path)
+            status, body, _ = asgi_get(self.asgi_server, path)
+            self.assertEqual(status, flask_response.status_code, path)
+            self.assertEqual(json.loads(body), flask_response.get_json(), path)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,70 @@
+import os
+import subprocess
+import sys
+import unittest
+from controlm.rest_server.ctm_rest_server import WIRED_MODULES
+from tests.controlm.rest_server.fixtures import RestServerTestCase, asgi_get
+
+
+class ColdStartTestCase(unittest.TestCase):
+
+    def test_services_do_not_import_lxml(self):
+        result = subprocess.run([sys.executable, '-c', 'import sys, controlm.rest_server, controlm.services; '
+                                                       'print("lxml" in sys.modules)'],
+                                capture_output=True, text=True, check=True)
+
+        self.assertEqual(result.stdout.strip(), 'False')
+
+    def test_parser_is_imported_on_access(self):
+        from controlm.services import CtmXmlParser, CtmXmlParserException
+
+        self.assertEqual(CtmXmlParser.__module__, 'controlm.services.ctm_xml_parser')
+        self.assertTrue(issubclass(CtmXmlParserException, BaseException))
+
+    def test_injected_modules_are_wired(self):
+        package_dir = os.path.dirname(sys.modules['controlm.rest_server'].__file__)
+        injected = set()
+        for directory, _, files in os.walk(package_dir):
+            for file in files:
+                if file.endswith('.py'):
+                    with open(os.path.join(directory, file)) as source:
+                        if 'Provide[' in source.read():
+                            relative = os.path.relpath(os.path.join(directory, file[:-3]), package_dir)
+                            injected.add('controlm.rest_server.' + relative.replace(os.sep, '.'))
+
+        self.assertEqual(injected - set(WIRED_MODULES), set())
+
+
+class HealthProbesTestCase(RestServerTestCase):
+    preload = False
+
+    def test_probes(self):
+        self.assertEqual(self.client.get('/healthz').status_code, 200)
+        response = self.client.get('/readyz')
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response.get_json()['generation'], 0)
+
+        self.server.di.shared_cache_manager().preload_cache()
+        response = self.client.get('/readyz')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get_json()['status'], 'ready')
+        self.server.di.shared_cache_manager().set_caching_in_progress()
+        self.assertEqual(self.client.get('/readyz').status_code, 200)
+        self.server.di.shared_cache_manager().set_caching_failed(ValueError('refresh failed'))
+        self.assertEqual(self.client.get('/readyz').status_code, 200)
+        self.assertEqual(self.client.get('/healthz').get_json(), {'status': 'ok'})
+
+    def test_asgi_probes(self):
+        self.assertEqual(asgi_get(self.asgi_server, '/healthz')[0], 200)
+        self.assertEqual(asgi_get(self.asgi_server, '/readyz')[0], 503)
+
+        self.asgi_server.di.shared_cache_manager().preload_cache()
+
+        self.assertEqual(asgi_get(self.asgi_server, '/readyz')[0], 200)
+        self.asgi_server.di.shared_cache_manager().set_caching_in_progress()
+        self.assertEqual(asgi_get(self.asgi_server, '/readyz')[0], 200)
+
+
+if __name__ == '__main__':
+    unittest.main()
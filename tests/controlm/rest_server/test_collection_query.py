@@ -0,0 +1,102 @@
+import json
+import unittest
+from tests.controlm.rest_server.fixtures import RestServerTestCase, asgi_get
+
+NDJSON = 'application/x-ndjson'
+
+
+class CollectionQueryEndpointsTestCase(RestServerTestCase):
+    folders_per_server = 25
+
+    def _all_pages(self, path: str, limit: int) -> list:
+        items, cursor = [], None
+        while True:
+            query = f"limit={limit}" + (f"&cursor={cursor}" if cursor else '')
+            page = self.client.get(f"{path}{'&' if '?' in path else '?'}{query}").get_json()
+            items.extend(page['items'])
+            cursor = page['next_cursor']
+            if cursor is None:
+                return items
+
+    def test_folder_fields(self):
+        folders = self.client.get('/servers/SRV00/folders/all?fields=name,jobs.job_name').get_json()
+        full = self.client.get('/servers/SRV00/folders/all').get_json()
+
+        self.assertEqual(folders, [{'name': f['name'], 'jobs': [{'job_name': j['job_name']} for j in f['jobs']]}
+                                   for f in full])
+
+    def test_folder_pages_cover_collection_in_name_order(self):
+        full = self.client.get('/servers/SRV00/folders/all').get_json()
+
+        items = self._all_pages('/servers/SRV00/folders/all', 7)
+
+        self.assertEqual(items, sorted(full, key=lambda f: f['name']))
+        self.assertEqual(len(items), 25)
+
+    def test_pages_of_every_collection(self):
+        for path, expected in [
+            ('/server-names', self.client.get('/server-names').get_json()),
+            ('/servers/SRV00/nodes', sorted(self.client.get('/servers/SRV00/nodes').get_json())),
+            ('/servers-raw?fields=folder_name', [{'folder_name': i['folder_name']}
+                                                 for i in self.client.get('/servers-raw').get_json()['items']]),
+        ]:
+            self.assertEqual(self._all_pages(path, 2), expected, path)
+
+    def test_mapping_pages(self):
+        stats = self.client.get('/servers/SRV00/nodes/stats').get_json()
+        page = self.client.get('/servers/SRV00/nodes/stats?limit=2&fields=activeCount').get_json()
+
+        self.assertEqual(page['items'], {node: {'activeCount': stats[node]['activeCount']}
+                                         for node in sorted(stats)[:2]})
+        self.assertIsNotNone(page['next_cursor'])
+        self.assertEqual(list(self.client.get('/servers?limit=1').get_json()['items']), ['SRV00'])
+
+    def test_single_folder_and_node_fields(self):
+        folder_name = self.client.get('/servers/SRV00/folders/all?limit=1').get_json()['items'][0]['name']
+        node = self.client.get('/servers/SRV00/nodes').get_json()[0]
+
+        self.assertEqual(self.client.get(f"/servers/SRV00/folder/{folder_name}?fields=name").get_json(),
+                         {'name': folder_name})
+        self.assertEqual(list(self.client.get(f"/servers/SRV00/node/{node}?fields=hosts").get_json()), ['hosts'])
+
+    def test_invalid_queries(self):
+        for path in ['/servers/SRV00/folders/all?fields=missing',
+                     '/servers/SRV00/folders/all?fields=_private',
+                     '/servers/SRV00/folders/all?limit=0',
+                     '/servers/SRV00/folders/all?cursor=garbage',
+                     '/servers?limit=ten',
+                     '/server-names?fields=name']:
+            response = self.client.get(path)
+
+            self.assertEqual(response.status_code, 400, path)
+            self.assertEqual(response.get_json()['status'], 400, path)
+
+    def test_ndjson_page_sends_cursor_header(self):
+        response = self.client.get('/servers/SRV00/folders/all?limit=10&fields=name', headers={'Accept': NDJSON})
+        lines = [json.loads(line) for line in response.get_data().splitlines()]
+        page = self.client.get('/servers/SRV00/folders/all?limit=10&fields=name').get_json()
+
+        self.assertEqual(lines, page['items'])
+        self.assertEqual(response.headers['X-Next-Cursor'], page['next_cursor'])
+
+    def test_asgi_parity(self):
+        cursor = self.client.get('/servers/SRV01/folders/all?limit=5').get_json()['next_cursor']
+        for path in ['/servers/SRV01/folders/all?fields=name,jobs.job_name',
+                     f"/servers/SRV01/folders/all?limit=5&cursor={cursor}",
+                     '/servers?limit=1&fields=name',
+                     '/servers-raw?limit=3',
+                     '/servers/SRV01/nodes/stats?limit=1',
+                     '/servers/SRV01/folders/all?fields=missing']:
+            status, body, _ = asgi_get(self.asgi_server, path)
+            response = self.client.get(path)
+
+            self.assertEqual(status, response.status_code, path)
+            self.assertEqual(body, response.get_data(), path)
+
+        status, body, headers = asgi_get(self.asgi_server, '/servers/SRV01/folders/all?limit=5',
+                                          headers=[(b'accept', NDJSON.encode())])
+        self.assertEqual(headers[b'x-next-cursor'].decode(), cursor)
+
+
+if __name__ == '__main__':
+    unittest.main()
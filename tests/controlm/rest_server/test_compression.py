@@ -0,0 +1,56 @@
+import gzip
+import unittest
+import zlib
+from unittest import mock
+from corelib.compression import ResponseCompressor
+from tests.controlm.rest_server.fixtures import RestServerTestCase, asgi_get
+
+
+class ResponseCompressionTestCase(RestServerTestCase):
+
+    def test_cached_body_is_compressed_once_per_generation(self):
+        identity = self.client.get('/servers/SRV01/folders/all')
+        with mock.patch.object(ResponseCompressor, 'compress', autospec=True,
+                               side_effect=lambda self, body, encoding: gzip.compress(body)) as compress:
+            first = self.client.get('/servers/SRV01/folders/all', headers={'Accept-Encoding': 'gzip'})
+            second = self.client.get('/servers/SRV01/folders/all', headers={'Accept-Encoding': 'gzip'})
+
+        self.assertEqual(compress.call_count, 1)
+        self.assertEqual(first.headers['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', first.headers['Vary'])
+        self.assertEqual(gzip.decompress(second.get_data()), identity.get_data())
+        self.assertNotEqual(first.headers['ETag'], identity.headers['ETag'])
+        self.assertEqual(self.client.get('/servers/SRV01/folders/all', headers={
+            'Accept-Encoding': 'gzip', 'If-None-Match': first.headers['ETag']}).status_code, 304)
+
+    def test_deflate(self):
+        response = self.client.get('/servers', headers={'Accept-Encoding': 'deflate'})
+
+        self.assertEqual(response.headers['Content-Encoding'], 'deflate')
+        self.assertEqual(zlib.decompress(response.get_data()), self.client.get('/servers').get_data())
+
+    def test_small_bodies_are_not_compressed(self):
+        response = self.client.get('/server-names', headers={'Accept-Encoding': 'gzip'})
+
+        self.assertNotIn('Content-Encoding', response.headers)
+        self.assertEqual(response.get_json(), ['SRV00', 'SRV01'])
+
+    def test_uncached_routes_are_compressed(self):
+        response = self.client.get('/discover', headers={'Accept-Encoding': 'gzip'})
+
+        self.assertEqual(response.headers['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(response.get_data()), self.client.get('/discover').get_data())
+
+    def test_asgi_serves_same_compressed_body(self):
+        for path in ['/servers', '/servers/SRV00/folders/active']:
+            expected = self.client.get(path, headers={'Accept-Encoding': 'gzip'})
+            status, body, headers = asgi_get(self.asgi_server, path, headers=[(b'accept-encoding', b'gzip')])
+
+            self.assertEqual(status, 200, path)
+            self.assertEqual(headers[b'content-encoding'], b'gzip', path)
+            self.assertEqual(headers[b'etag'], expected.headers['ETag'].encode(), path)
+            self.assertEqual(gzip.decompress(body), gzip.decompress(expected.get_data()), path)
+
+
+if __name__ == '__main__':
+    unittest.main()
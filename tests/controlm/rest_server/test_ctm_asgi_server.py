@@ -0,0 +1,76 @@
+import asyncio
+import json
+import unittest
+from controlm.services import CtmCacheManagerKeys, CtmCacheManagerState
+from tests.controlm.rest_server.fixtures import RestServerTestCase, asgi_get
+
+
+class CtmAsgiServerTestCase(RestServerTestCase):
+
+    def test_same_documents_as_flask(self):
+        for path in ['/', '/server-names', '/servers', '/servers-raw', '/servers/SRV00/stats',
+                     '/servers/SRV00/folders/all', '/servers/SRV00/folders/active',
+                     '/servers/SRV01/folders/disabled', '/servers/SRV00/nodes', '/servers/SRV00/nodes/stats',
+                     '/servers/SRV00/node/SRV00_NODE_001', '/servers/NONE/stats', '/servers/NONE/nodes/stats']:
+            expected = self.client.get(path)
+            status, body, _ = asgi_get(self.asgi_server, path)
+
+            self.assertEqual(status, expected.status_code, path)
+            self.assertEqual(json.loads(body), expected.get_json(), path)
+
+    def test_unknown_route_and_method(self):
+        status, body, _ = asgi_get(self.asgi_server, '/unknown')
+        self.assertEqual(status, 404)
+        self.assertEqual(json.loads(body)['status'], 404)
+
+        status, _, _ = asgi_get(self.asgi_server, '/servers', method='DELETE')
+        self.assertEqual(status, 405)
+
+    def test_websocket_is_closed_and_other_scopes_ignored(self):
+        messages = []
+
+        async def receive():
+            return {'type': 'websocket.connect'}
+
+        async def send(message):
+            messages.append(message)
+
+        asyncio.run(self.asgi_server({'type': 'websocket', 'path': '/servers', 'headers': []}, receive, send))
+        asyncio.run(self.asgi_server({'type': 'unknown'}, receive, send))
+
+        self.assertEqual(messages, [{'type': 'websocket.close', 'code': 1000}])
+
+    def test_executor_calls_are_recorded(self):
+        asgi_get(self.asgi_server, '/servers/SRV00/nodes/stats')
+        status, body, _ = asgi_get(self.asgi_server, '/tasks/metrics')
+
+        self.assertEqual(status, 200)
+        self.assertIn('controlm.services.ctm_repository.CtmRepository.fetch_node_stats', json.loads(body)['tasks'])
+
+    def test_etag_and_not_modified(self):
+        status, body, headers = asgi_get(self.asgi_server, '/servers')
+        etag = headers[b'etag']
+
+        self.assertEqual(status, 200)
+        self.assertEqual(etag, self.client.get('/servers').headers['ETag'].encode())
+        status, not_modified, _ = asgi_get(self.asgi_server, '/servers', headers=[(b'if-none-match', etag)])
+        self.assertEqual(status, 304)
+        self.assertEqual(not_modified, b'')
+        self.assertNotIn(b'etag', asgi_get(self.asgi_server, '/servers/NONE/stats')[2])
+
+    def test_published_generation_is_validated_during_a_refresh(self):
+        etag = asgi_get(self.asgi_server, '/servers')[2][b'etag']
+        self.asgi_cache_manager.set_caching_in_progress()
+        try:
+            status, body, headers = asgi_get(self.asgi_server, '/servers', headers=[(b'if-none-match', etag)])
+        finally:
+            self.asgi_cache_manager.cache.set_items_from_dict({
+                CtmCacheManagerKeys.CACHE_STATE: CtmCacheManagerState.COMPLETE
+            })
+
+        self.assertEqual((status, body), (304, b''))
+        self.assertEqual(headers[b'etag'], etag)
+
+
+if __name__ == '__main__':
+    unittest.main()
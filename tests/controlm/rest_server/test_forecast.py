@@ -0,0 +1,57 @@
+import json
+import unittest
+from datetime import date
+from tests.controlm.rest_server.fixtures import RestServerTestCase, asgi_get
+
+
+class ForecastEndpointsTestCase(RestServerTestCase):
+
+    def test_heatmap(self):
+        document = self.client.get('/forecast/heatmap?slot=60&server=SRV00').get_json()
+
+        self.assertEqual((document['by'], document['slotMinutes'], document['date']), ('node', 60, None))
+        self.assertEqual(document['slots'][:2], ['00:00', '01:00'])
+        self.assertTrue(document['rows'])
+        for row in document['rows']:
+            self.assertEqual(row['server'], 'SRV00')
+            self.assertEqual((len(row['eligible']), len(row['runs'])), (24, 24))
+        jobs_count = self.cache_manager.get_cached_load_forecast().jobs_count
+        everything = self.client.get('/forecast/heatmap?slot=1440').get_json()
+        self.assertEqual(sum(row['eligible'][0] for row in everything['rows']), jobs_count)
+
+    def test_heatmap_by_group_and_date(self):
+        by_group = self.client.get('/forecast/heatmap?by=group&slot=1440').get_json()
+        scheduled = self.cache_manager.get_cached_schedule_calendar(2026).jobs_on(date(2026, 6, 1))
+
+        on_day = self.client.get('/forecast/heatmap?by=group&slot=1440&date=2026-06-01').get_json()
+
+        self.assertTrue(all('group' in row for row in by_group['rows']))
+        self.assertEqual(on_day['date'], '2026-06-01')
+        self.assertEqual(sum(row['eligible'][0] for row in on_day['rows']), len(scheduled))
+        self.assertLess(len(scheduled), sum(row['eligible'][0] for row in by_group['rows']))
+
+    def test_peaks(self):
+        document = self.client.get('/forecast/peaks?top=3&node=SRV01_NODE_001').get_json()
+
+        self.assertEqual((document['top'], document['slotMinutes']), (3, 15))
+        self.assertEqual([(row['server'], row['node']) for row in document['rows']], [('SRV01', 'SRV01_NODE_001')])
+        peaks = document['rows'][0]['peaks']
+        self.assertEqual(len(peaks), 3)
+        self.assertEqual([peak['eligible'] for peak in peaks], sorted((peak['eligible'] for peak in peaks),
+                                                                      reverse=True))
+
+    def test_invalid_arguments(self):
+        for path in ['/forecast/heatmap?slot=7', '/forecast/heatmap?slot=x', '/forecast/heatmap?by=host',
+                     '/forecast/heatmap?date=June', '/forecast/peaks?top=-1', '/forecast/peaks?top=x']:
+            self.assertEqual(self.client.get(path).status_code, 400, path)
+
+    def test_asgi_matches_flask(self):
+        for path in ['/forecast/heatmap?slot=30&by=group', '/forecast/peaks?top=2&date=2026-06-01']:
+            status, body, _ = asgi_get(self.asgi_server, path)
+
+            self.assertEqual(status, 200, path)
+            self.assertEqual(json.loads(body), self.client.get(path).get_json(), path)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,46 @@
+import json
+import logging
+import tempfile
+import unittest
+from controlm.model import CtmJobData, CtmVarData
+from controlm.rest_server import CtmRestServer
+from controlm.rest_server.json_serialization import CTM_JSON_SERIALIZER
+from controlm.services.dto import DtoFolderInfo
+from tests.controlm.rest_server.fixtures import write_synthetic_config
+
+
+class CtmJsonSerializationTestCase(unittest.TestCase):
+
+    def test_model_emits_public_fields(self):
+        job = CtmJobData('JOB')
+        job.job_name = 'JOB_01'
+        variable = CtmVarData()
+        variable.name, variable.value = '%%NAME', 'value'
+        job.variables.append(variable)
+
+        data = json.loads(CTM_JSON_SERIALIZER.dumps(job))
+
+        self.assertEqual(data['job_name'], 'JOB_01')
+        self.assertEqual(data['variables'], [{'name': '%%NAME', 'value': 'value'}])
+        self.assertEqual(set(data), {name for name in vars(job) if not name.startswith('_')})
+
+    def test_simple_folder_dto_has_variables(self):
+        self.assertEqual(json.loads(CTM_JSON_SERIALIZER.dumps(DtoFolderInfo()))['variables'], [])
+
+    def test_servers_raw_omits_private_fields(self):
+        logging.disable(logging.CRITICAL)
+        try:
+            with tempfile.TemporaryDirectory() as tmp:
+                server = CtmRestServer(config_path=write_synthetic_config(tmp, folders_per_server=2))
+                server.di.shared_cache_manager().preload_cache()
+                response = server.app.test_client().get('/servers-raw')
+        finally:
+            logging.disable(logging.NOTSET)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn(b'_tag_name', response.get_data())
+        self.assertTrue(json.loads(response.get_data())['items'][0]['jobs'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,109 @@
+import unittest
+from controlm.services import CtmCacheManagerKeys, CtmCacheManagerState
+from corelib.metrics import PROMETHEUS_CONTENT_TYPE
+from tests.controlm.rest_server.fixtures import RestServerTestCase, asgi_get
+
+
+NOT_READY_SERIES = 'ctm_http_requests_cache_not_ready_total{route="/server-names"}'
+
+
+def _sample(exposition: str, series: str) -> float:
+    for line in exposition.splitlines():
+        if line.startswith(series + ' '):
+            return float(line.rsplit(' ', 1)[1])
+    raise AssertionError(f"{series} not found in metrics.")
+
+
+class MetricsEndpointTestCase(RestServerTestCase):
+
+    def _metrics(self) -> str:
+        response = self.client.get('/metrics')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.headers['Content-Type'], PROMETHEUS_CONTENT_TYPE)
+        return response.get_data(as_text=True)
+
+    def test_requests_are_counted_per_route_template(self):
+        series = 'ctm_http_requests_total{method="GET",route="/servers/<server>/stats",status="200"}'
+        before = self._metrics()
+        initial = _sample(before, series) if series in before else 0
+
+        for server in ('SRV00', 'SRV01'):
+            self.assertEqual(self.client.get(f"/servers/{server}/stats").status_code, 200)
+        exposition = self._metrics()
+
+        self.assertEqual(_sample(exposition, series), initial + 2)
+        self.assertGreaterEqual(_sample(
+            exposition, 'ctm_http_request_duration_seconds_count{method="GET",route="/servers/<server>/stats"}'), 2)
+        self.assertGreater(_sample(
+            exposition, 'ctm_http_response_size_bytes_sum{method="GET",route="/servers/<server>/stats"}'), 0)
+
+    def test_status_codes_and_unmatched_routes(self):
+        self.client.get('/servers/MISSING/stats')
+        self.client.get('/no/such/path')
+        exposition = self._metrics()
+
+        self.assertGreaterEqual(_sample(
+            exposition, 'ctm_http_requests_total{method="GET",route="/servers/<server>/stats",status="404"}'), 1)
+        self.assertGreaterEqual(_sample(
+            exposition, 'ctm_http_requests_total{method="GET",route="<unmatched>",status="404"}'), 1)
+
+    def test_cache_and_task_runner_metrics(self):
+        cache_manager = self.server.di.shared_cache_manager()
+        exposition = self._metrics()
+
+        self.assertEqual(_sample(exposition, 'ctm_cache_generation'), cache_manager.cache_generation)
+        self.assertEqual(_sample(exposition, 'ctm_cache_ready'), 1)
+        self.assertGreaterEqual(_sample(exposition, 'ctm_cache_generation_age_seconds'), 0)
+        self.assertGreaterEqual(_sample(exposition, 'ctm_cache_refreshes_total{outcome="completed"}'), 1)
+        self.assertGreaterEqual(_sample(exposition, 'ctm_cache_refresh_duration_seconds_count'), 1)
+        self.assertIn('ctm_task_executor_workers{executor=', exposition)
+        self.assertIn('ctm_response_cache_entries ', exposition)
+
+    def test_refresh_updates_cache_metrics(self):
+        cache_manager = self.server.di.shared_cache_manager()
+        refreshes = _sample(self._metrics(), 'ctm_cache_refreshes_total{outcome="completed"}')
+
+        cache_manager.preload_cache()
+        exposition = self._metrics()
+
+        self.assertEqual(_sample(exposition, 'ctm_cache_refreshes_total{outcome="completed"}'), refreshes + 1)
+        self.assertEqual(_sample(exposition, 'ctm_cache_generation'), cache_manager.cache_generation)
+
+    def test_requests_served_from_a_published_generation_are_not_counted_as_not_ready(self):
+        self.cache_manager.set_caching_in_progress()
+        try:
+            self.assertEqual(self.client.get('/server-names').status_code, 200)
+            self.cache_manager.set_caching_failed(ValueError('refresh failed'))
+            self.assertEqual(self.client.get('/server-names').status_code, 200)
+        finally:
+            self.cache_manager.cache.set_items_from_dict({
+                CtmCacheManagerKeys.CACHE_STATE: CtmCacheManagerState.COMPLETE
+            })
+
+        self.assertNotIn(NOT_READY_SERIES, self._metrics())
+
+    def test_asgi_metrics(self):
+        status, _, _ = asgi_get(self.asgi_server, '/servers/SRV00/stats')
+        self.assertEqual(status, 200)
+
+        status, body, headers = asgi_get(self.asgi_server, '/metrics')
+
+        self.assertEqual(status, 200)
+        self.assertEqual(headers[b'content-type'], PROMETHEUS_CONTENT_TYPE.encode('latin-1'))
+        self.assertGreaterEqual(_sample(
+            body.decode('utf-8'),
+            'ctm_http_requests_total{method="GET",route="/servers/<server>/stats",status="200"}'), 1)
+
+
+
+class ColdStartMetricsTestCase(RestServerTestCase):
+    preload = False
+
+    def test_requests_before_the_first_generation_are_counted_as_not_ready(self):
+        self.client.get('/server-names')
+
+        self.assertEqual(_sample(self.client.get('/metrics').get_data(as_text=True), NOT_READY_SERIES), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,150 @@
+import http.client
+import json
+import logging
+import multiprocessing
+import os
+import signal
+import tempfile
+import threading
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from controlm.rest_server import CtmRestServer
+from controlm.rest_server.prefork_server import BoundedThreadWSGIServer, PreforkWsgiServer
+from tests.controlm.rest_server.fixtures import write_synthetic_config
+
+
+_preloaded = {}
+
+
+def _preload():
+    _preloaded['master_pid'] = os.getpid()
+
+
+def _pid_app(environ, start_response):
+    delay = float(environ.get('QUERY_STRING') or 0)
+    time.sleep(delay)
+    body = json.dumps({'pid': os.getpid(), 'preloaded_by': _preloaded.get('master_pid')}).encode()
+    start_response('200 OK', [('Content-Type', 'application/json'), ('Content-Length', str(len(body)))])
+    return [body]
+
+
+def _get(address, path: str = '/', timeout: float = 10, method: str = 'GET'):
+    connection = http.client.HTTPConnection(*address, timeout=timeout)
+    try:
+        connection.request(method, path)
+        return json.loads(connection.getresponse().read())
+    finally:
+        connection.close()
+
+
+class BoundedThreadWSGIServerTestCase(unittest.TestCase):
+
+    def test_concurrency_is_bounded_and_keep_alive(self):
+        lock = threading.Lock()
+        active = [0, 0]
+
+        def app(environ, start_response):
+            with lock:
+                active[0] += 1
+                active[1] = max(active[1], active[0])
+            time.sleep(0.1)
+            with lock:
+                active[0] -= 1
+            start_response('200 OK', [('Content-Length', '2')])
+            return [b'ok']
+
+        server = BoundedThreadWSGIServer('127.0.0.1', 0, app, threads=2)
+        serve_thread = threading.Thread(target=server.serve_forever, daemon=True)
+        serve_thread.start()
+        try:
+            address = server.server_address
+            with ThreadPoolExecutor(max_workers=6) as pool:
+                statuses = list(pool.map(lambda _: self._status(address), range(6)))
+            self.assertEqual(statuses, [200] * 6)
+            self.assertEqual(active[1], 2)
+
+            connection = http.client.HTTPConnection(*address, timeout=5)
+            for _ in range(2):
+                connection.request('GET', '/')
+                response = connection.getresponse()
+                response.read()
+                self.assertEqual(response.version, 11)
+                self.assertFalse(response.will_close)
+            connection.close()
+        finally:
+            server.drain()
+            serve_thread.join(5)
+
+    @staticmethod
+    def _status(address) -> int:
+        connection = http.client.HTTPConnection(*address, timeout=5)
+        try:
+            connection.request('GET', '/')
+            response = connection.getresponse()
+            response.read()
+            return response.status
+        finally:
+            connection.close()
+
+
+@unittest.skipUnless(hasattr(os, 'fork'), 'Pre-fork serving requires os.fork')
+class PreforkWsgiServerTestCase(unittest.TestCase):
+
+    def test_preload_serve_and_drain(self):
+        server = PreforkWsgiServer(_pid_app, host='127.0.0.1', port=0, workers=2, threads=2,
+                                   graceful_timeout=10, preload=_preload)
+        address = server.bind()
+        master = multiprocessing.get_context('fork').Process(target=server.serve_forever, kwargs={'poll_interval': 0.05})
+        master.start()
+        try:
+            response = _get(address)
+            self.assertEqual(response['preloaded_by'], master.pid)
+            self.assertNotEqual(response['pid'], master.pid)
+
+            with ThreadPoolExecutor(max_workers=1) as pool:
+                slow = pool.submit(_get, address, '/?0.5')
+                time.sleep(0.2)
+                os.kill(master.pid, signal.SIGTERM)
+                self.assertEqual(slow.result(timeout=10)['preloaded_by'], master.pid)
+            master.join(15)
+            self.assertEqual(master.exitcode, 0)
+        finally:
+            if master.is_alive():
+                master.kill()
+            server.stop()
+
+
+    def test_populate_trigger_reloads_all_workers(self):
+        logging.disable(logging.CRITICAL)
+        tmp = tempfile.TemporaryDirectory()
+        rest_server = CtmRestServer(config_path=write_synthetic_config(tmp.name))
+        server = PreforkWsgiServer(rest_server.app, host='127.0.0.1', port=0, workers=2, threads=2,
+                                   graceful_timeout=10, preload=rest_server.di.shared_cache_manager().preload_cache)
+        address = server.bind()
+        master = multiprocessing.get_context('fork').Process(target=server.serve_forever,
+                                                             kwargs={'poll_interval': 0.05})
+        master.start()
+        try:
+            self.assertEqual(_get(address, '/readyz')['generation'], 1)
+
+            self.assertEqual(_get(address, '/cache/populate', method='POST'), {'task_started': True})
+
+            deadline = time.monotonic() + 15
+            while _get(address, '/readyz')['generation'] != 2 and time.monotonic() < deadline:
+                time.sleep(0.05)
+            # The master reloaded and drained the workers of generation 1, so every worker serves generation 2.
+            self.assertEqual({_get(address, '/readyz')['generation'] for _ in range(20)}, {2})
+        finally:
+            # Stopped with SIGTERM, so that the master stops its workers too.
+            os.kill(master.pid, signal.SIGTERM)
+            master.join(15)
+            if master.is_alive():
+                master.kill()
+            server.stop()
+            tmp.cleanup()
+            logging.disable(logging.NOTSET)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,59 @@
+import unittest
+from unittest import mock
+from controlm.services import CtmCacheManagerKeys, CtmCacheManagerState, CtmRepository
+from tests.controlm.rest_server.fixtures import RestServerTestCase
+
+
+class CachedResponseTestCase(RestServerTestCase):
+
+    def test_body_is_rendered_once_per_generation(self):
+        first = self.client.get('/servers/SRV00/folders/all')
+        with mock.patch.object(CtmRepository, 'fetch_folders', side_effect=AssertionError('not cached')):
+            second = self.client.get('/servers/SRV00/folders/all')
+
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(second.get_data(), first.get_data())
+        self.assertEqual(second.headers['ETag'], f'"ctm-{self.cache_manager.cache_generation}"')
+
+    def test_if_none_match_skips_repository(self):
+        etag = self.client.get('/servers').headers['ETag']
+        with mock.patch.object(CtmRepository, 'fetch_server_aggregate_stats',
+                               side_effect=AssertionError('repository touched')):
+            response = self.client.get('/servers', headers={'If-None-Match': etag})
+
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.headers['ETag'], etag)
+
+    def test_new_generation_changes_etag(self):
+        etag = self.client.get('/server-names').headers['ETag']
+        self.cache_manager.preload_cache()
+        response = self.client.get('/server-names', headers={'If-None-Match': etag})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response.headers['ETag'], etag)
+
+    def test_published_generation_is_validated_during_a_refresh(self):
+        etag = self.client.get('/servers').headers['ETag']
+        self.cache_manager.set_caching_in_progress()
+        try:
+            with mock.patch.object(CtmRepository, 'fetch_server_aggregate_stats',
+                                   side_effect=AssertionError('repository touched')):
+                not_modified = self.client.get('/servers', headers={'If-None-Match': etag})
+                cached = self.client.get('/servers')
+        finally:
+            self.cache_manager.cache.set_items_from_dict({
+                CtmCacheManagerKeys.CACHE_STATE: CtmCacheManagerState.COMPLETE
+            })
+
+        self.assertEqual(not_modified.status_code, 304)
+        self.assertEqual((cached.status_code, cached.headers['ETag']), (200, etag))
+
+    def test_errors_are_not_cached(self):
+        response = self.client.get('/servers/NONE/stats')
+
+        self.assertEqual(response.status_code, 404)
+        self.assertNotIn('ETag', response.headers)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,79 @@
+import json
+import unittest
+from collections import Counter
+from tests.controlm.rest_server.fixtures import RestServerTestCase, asgi_get
+
+
+class StatsCubeTestCase(RestServerTestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.server_infos = cls.cache_manager.get_cached_server_infos_dto()
+
+    def _jobs(self):
+        return [(server, folder, job) for server, info in self.server_infos.items()
+                for folder in info.folders for job in folder.jobs]
+
+    def _cube(self, query: str = '') -> dict:
+        response = self.client.get(f"/stats/cube{query}")
+        self.assertEqual(response.status_code, 200)
+        return response.get_json()
+
+    def test_total_matches_folders(self):
+        total = self._cube()['total']
+
+        self.assertEqual(total['jobsCount'], len(self._jobs()))
+        self.assertEqual(total['foldersCount'], sum(len(info.folders) for info in self.server_infos.values()))
+        self.assertEqual(total['cyclicCount'], sum(job.is_cyclic for _, _, job in self._jobs()))
+        self.assertEqual(total['dummyCount'], sum(job.is_run_as_dummy for _, _, job in self._jobs()))
+
+    def test_roll_up_by_task_type(self):
+        expected = Counter(job.task_type for _, _, job in self._jobs())
+
+        cells = self._cube('?by=taskType')['cells']
+
+        self.assertEqual({cell['taskType']: cell['jobsCount'] for cell in cells}, dict(expected))
+
+    def test_drill_down_into_server(self):
+        expected = Counter(job.application or folder.application
+                           for server, folder, job in self._jobs() if server == 'SRV00')
+
+        document = self._cube('?by=application&server=SRV00')
+
+        self.assertEqual({cell['application']: cell['jobsCount'] for cell in document['cells']}, dict(expected))
+        self.assertTrue(all(cell['server'] == 'SRV00' for cell in document['cells']))
+        self.assertEqual(document['total']['jobsCount'], sum(expected.values()))
+
+    def test_top_k(self):
+        cells = self._cube('?by=server,node&sort=jobsCount&top=3')['cells']
+
+        self.assertEqual(len(cells), 3)
+        self.assertEqual([cell['jobsCount'] for cell in cells],
+                         sorted((cell['jobsCount'] for cell in cells), reverse=True))
+        self.assertEqual(cells[0]['jobsCount'], max(Counter(
+            (server, job.node_id or folder.node_id) for server, folder, job in self._jobs()).values()))
+
+    def test_invalid_queries(self):
+        for query in ['?by=job', '?sort=hosts', '?top=many', '?top=-1']:
+            self.assertEqual(self.client.get(f"/stats/cube{query}").status_code, 400, query)
+
+    def test_asgi_matches_flask(self):
+        query = '?by=application,taskType&server=SRV01&sort=foldersCount&top=5'
+
+        status, body, _ = asgi_get(self.asgi_server, f"/stats/cube{query}")
+
+        self.assertEqual(status, 200)
+        self.assertEqual(json.loads(body), self._cube(query))
+
+    def test_server_stats_count_sub_applications(self):
+        info = self.server_infos['SRV00']
+
+        stats = self.client.get('/servers/SRV00/stats').get_json()
+
+        self.assertEqual(stats['subApplicationsCount'], len(info.sub_application_keys))
+        self.assertEqual(stats['applicationsCount'], len(info.application_keys))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,59 @@
+import json
+import unittest
+from tests.controlm.rest_server.fixtures import RestServerTestCase, asgi_get
+
+NDJSON = 'application/x-ndjson'
+
+
+class NdjsonStreamingTestCase(RestServerTestCase):
+
+    def _ndjson(self, path: str):
+        response = self.client.get(path, headers={'Accept': NDJSON})
+        return response, [json.loads(line) for line in response.get_data().splitlines()]
+
+    def test_lines_match_json_items(self):
+        for path, items_of in [('/servers/SRV00/folders/all', lambda d: d),
+                               ('/servers', lambda d: list(d.values())),
+                               ('/servers-raw', lambda d: d['items'])]:
+            response, lines = self._ndjson(path)
+
+            self.assertNotIn('Content-Length', response.headers, path)
+            self.assertEqual(response.mimetype, NDJSON, path)
+            self.assertEqual(lines, items_of(self.client.get(path).get_json()), path)
+
+    def test_json_is_default(self):
+        for accept in [None, '*/*', 'application/json, application/x-ndjson;q=0.5']:
+            response = self.client.get('/servers/SRV00/folders/active', headers={'Accept': accept} if accept else {})
+
+            self.assertEqual(response.mimetype, 'application/json', accept)
+            self.assertIn('Content-Length', response.headers, accept)
+
+    def test_representations_have_own_etags(self):
+        json_etag = self.client.get('/servers').headers['ETag']
+        response, _ = self._ndjson('/servers')
+        ndjson_etag = response.headers['ETag']
+
+        self.assertNotEqual(json_etag, ndjson_etag)
+        self.assertIn('Accept', response.headers['Vary'])
+        self.assertEqual(self.client.get('/servers', headers={'Accept': NDJSON, 'If-None-Match': ndjson_etag})
+                         .status_code, 304)
+        self.assertEqual(self.client.get('/servers', headers={'If-None-Match': ndjson_etag}).status_code, 200)
+
+    def test_unknown_server_is_not_streamed(self):
+        response = self.client.get('/servers/NONE/folders/all', headers={'Accept': NDJSON})
+
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(response.mimetype, 'application/json')
+
+    def test_asgi_streams_same_lines(self):
+        for path in ['/servers', '/servers-raw', '/servers/SRV01/folders/disabled']:
+            status, body, headers = asgi_get(self.asgi_server, path, headers=[(b'accept', NDJSON.encode())])
+
+            self.assertEqual(status, 200, path)
+            self.assertEqual(headers[b'content-type'], NDJSON.encode(), path)
+            self.assertNotIn(b'content-length', headers, path)
+            self.assertEqual(body, self.client.get(path, headers={'Accept': NDJSON}).get_data(), path)
+
+
+if __name__ == '__main__':
+    unittest.main()
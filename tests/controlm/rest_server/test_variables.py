@@ -0,0 +1,58 @@
+import json
+import unittest
+from tests.controlm.rest_server.fixtures import RestServerTestCase, asgi_get
+
+
+class VariablesEndpointsTestCase(RestServerTestCase):
+
+    def test_variable_names(self):
+        self.assertEqual(self.client.get('/variables').get_json(), ['%%FOLDER_HOME', '%%JOB_ARGS', '%%ODATE'])
+        self.assertEqual(self.client.get('/variables?limit=1').get_json()['items'], ['%%FOLDER_HOME'])
+
+    def test_variable(self):
+        document = self.client.get('/variables/FOLDER_HOME?server=SRV00').get_json()
+
+        self.assertEqual(document['variable'], '%%FOLDER_HOME')
+        self.assertEqual(document['server'], 'SRV00')
+        self.assertEqual(document['referencesCount'], 30)
+        self.assertEqual(self.client.get('/variables/FOLDER_HOME').get_json()['referencesCount'], 60)
+        self.assertEqual(self.client.get('/variables/%25%25FOLDER_HOME').get_json()['variable'], '%%FOLDER_HOME')
+        self.assertEqual(self.client.get('/variables/MISSING').status_code, 404)
+
+    def test_definitions(self):
+        definitions = self.client.get('/variables/JOB_ARGS/definitions?server=SRV01').get_json()
+
+        self.assertEqual(len(definitions), 30)
+        self.assertTrue(all(definition['server'] == 'SRV01' for definition in definitions))
+        self.assertEqual(definitions[0]['value'], f"--job {definitions[0]['job']}")
+        folder_home = self.client.get('/variables/FOLDER_HOME/definitions').get_json()
+        self.assertTrue(all(definition['job'] is None for definition in folder_home))
+
+    def test_references_pages(self):
+        references = self.client.get('/variables/ODATE/references').get_json()
+        paged, cursor = [], None
+        while True:
+            page = self.client.get('/variables/ODATE/references?limit=7&fields=job'
+                                   + (f"&cursor={cursor}" if cursor else '')).get_json()
+            paged.extend(page['items'])
+            cursor = page['next_cursor']
+            if cursor is None:
+                break
+
+        self.assertEqual(len(references), 60)
+        self.assertEqual(references[0]['fields'], ['CMDLINE'])
+        self.assertEqual(paged, [{'job': reference['job']} for reference in references])
+        self.assertEqual(self.client.get('/variables/ODATE/references?cursor=bad').status_code, 400)
+        self.assertEqual(self.client.get('/variables/MISSING/references').status_code, 404)
+
+    def test_asgi_matches_flask(self):
+        for path in ('/variables', '/variables/ODATE', '/variables/JOB_ARGS/definitions?server=SRV00',
+                     '/variables/ODATE/references?limit=3', '/variables/MISSING/references'):
+            flask_response = self.client.get(path)
+            status, body, _ = asgi_get(self.asgi_server, path)
+            self.assertEqual(status, flask_response.status_code, path)
+            self.assertEqual(json.loads(body), flask_response.get_json(), path)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,101 @@
+import bz2
+import gc
+import gzip
+import logging
+import lzma
+import os
+import shutil
+import tempfile
+import unittest
+import warnings
+from parameterized import parameterized
+from controlm.services import CtmCacheManager, CtmCsvParser, CtmXmlParser
+from corelib.caching import CacheStore
+from corelib.threading import TaskRunner
+from benchmarks.synthetic_export import write_synthetic_export, write_synthetic_nodes_csv
+
+COMPRESSORS = [
+    ('gz', gzip.open),
+    ('bz2', bz2.open),
+    ('xz', lzma.open),
+]
+
+
+def _compress(path: str, suffix: str, open_compressed) -> str:
+    compressed_path = f"{path}.{suffix}"
+    with open(path, 'rb') as source, open_compressed(compressed_path, 'wb') as target:
+        shutil.copyfileobj(source, target)
+    return compressed_path
+
+
+def _folder_names(items) -> list:
+    return [(item.tag_name, item.folder_name) for item in items]
+
+
+class CompressedSourcesTestCase(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        logging.disable(logging.CRITICAL)
+        cls.tmp = tempfile.TemporaryDirectory()
+        cls.xml_path = write_synthetic_export(os.path.join(cls.tmp.name, 'export.xml'), servers=2,
+                                              folders_per_server=5, jobs_per_folder=2, nodes_per_server=2)
+        cls.csv_path = write_synthetic_nodes_csv(os.path.join(cls.tmp.name, 'nodes.csv'), servers=2,
+                                                 nodes_per_server=2)
+        cls.parser = CtmXmlParser()
+        cls.expected_items = _folder_names(cls.parser.iter_def_table_items(cls.xml_path))
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.tmp.cleanup()
+        logging.disable(logging.NOTSET)
+
+    @parameterized.expand(COMPRESSORS)
+    def test_xml_is_decompressed_while_parsed(self, suffix, open_compressed):
+        xml_path = _compress(self.xml_path, suffix, open_compressed)
+
+        self.assertEqual(_folder_names(self.parser.iter_def_table_items(xml_path)), self.expected_items)
+        self.assertEqual(_folder_names(self.parser.parse_xml(xml_path).items), self.expected_items)
+        self.assertTrue(self.parser.validate_xml(xml_path))
+
+    @parameterized.expand([('plain', None)] + COMPRESSORS)
+    def test_stopping_early_closes_the_source(self, suffix, open_compressed):
+        xml_path = self.xml_path if open_compressed is None else _compress(self.xml_path, suffix, open_compressed)
+        elements = self.parser.iter_def_table_elements(xml_path)
+        next(elements)
+
+        with warnings.catch_warnings(record=True) as caught:
+            warnings.simplefilter('always', ResourceWarning)
+            elements.close()
+            del elements
+            gc.collect()
+
+        self.assertEqual([str(w.message) for w in caught if issubclass(w.category, ResourceWarning)], [])
+
+    @parameterized.expand(COMPRESSORS)
+    def test_csv_is_decompressed_while_parsed(self, suffix, open_compressed):
+        csv_path = _compress(self.csv_path, suffix, open_compressed)
+
+        self.assertEqual([vars(h) for h in CtmCsvParser().parse_node_ids(csv_path)],
+                         [vars(h) for h in CtmCsvParser().parse_node_ids(self.csv_path)])
+
+    def test_cache_is_populated_from_compressed_sources(self):
+        task_runner = TaskRunner()
+        try:
+            cache_manager = CtmCacheManager(cache=CacheStore(), task_runner=task_runner,
+                                            xml_path=_compress(self.xml_path, 'xz', lzma.open),
+                                            csv_path=_compress(self.csv_path, 'bz2', bz2.open))
+            cache_manager.preload_cache()
+
+            self.assertTrue(cache_manager.is_cache_ready)
+            self.assertEqual(sum(len(server_info.folders)
+                                 for server_info in cache_manager.get_cached_server_infos_dto().values()),
+                             len(self.expected_items))
+            self.assertEqual(len(cache_manager.get_cached_host_infos_dto()),
+                             len(CtmCsvParser().parse_node_ids(self.csv_path)))
+        finally:
+            task_runner.shutdown()
+
+
+if __name__ == '__main__':
+    unittest.main()
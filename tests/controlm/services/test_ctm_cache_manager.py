@@ -0,0 +1,101 @@
+import logging
+import os
+import tempfile
+import unittest
+from unittest import mock
+from controlm.services import CtmCacheManager, CtmRepository
+from controlm.services.ctm_cache_manager import def_table_item_sort_key
+from corelib.caching import CacheStore
+from corelib.querying import CollectionQuery
+from corelib.threading import TaskRunner
+from benchmarks.synthetic_export import write_synthetic_export, write_synthetic_nodes_csv
+
+
+class CtmCacheManagerTestCase(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        logging.disable(logging.CRITICAL)
+        cls.tmp = tempfile.TemporaryDirectory()
+        cls.xml_path = write_synthetic_export(os.path.join(cls.tmp.name, 'export.xml'), servers=2,
+                                              folders_per_server=5, jobs_per_folder=2, nodes_per_server=2)
+        cls.csv_path = write_synthetic_nodes_csv(os.path.join(cls.tmp.name, 'nodes.csv'), servers=2,
+                                                 nodes_per_server=2)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.tmp.cleanup()
+        logging.disable(logging.NOTSET)
+
+    def setUp(self):
+        self.task_runner = TaskRunner()
+        self.cache_manager = CtmCacheManager(cache=CacheStore(), task_runner=self.task_runner,
+                                             xml_path=self.xml_path, csv_path=self.csv_path)
+
+    def tearDown(self):
+        self.task_runner.shutdown()
+
+    def test_nothing_is_served_before_the_first_generation(self):
+        self.cache_manager.set_caching_in_progress()
+
+        self.assertFalse(self.cache_manager.has_cache_generation)
+        self.assertEqual(self.cache_manager.get_cached_server_names(), [])
+        self.assertEqual(self.cache_manager.get_cached_sorted_def_table_items(), [])
+        self.assertIsNone(self.cache_manager.get_cached_stats_cube())
+        self.assertIsNone(self.cache_manager.get_cached_load_forecast())
+        self.assertEqual(self.cache_manager.get_cached_load_forecast_and_calendar(2026), (None, None))
+
+    def test_def_table_items_are_sorted_once_per_generation(self):
+        node_ids, def_table, mapped = self.cache_manager.load_sources()
+        def_table.items.reverse()
+        self.cache_manager.set_caching_complete(node_ids, def_table, mapped)
+        expected = sorted(def_table.items, key=def_table_item_sort_key)
+
+        self.assertEqual(self.cache_manager.get_cached_sorted_def_table_items(), expected)
+        page = CtmRepository(self.cache_manager).fetch_def_table(CollectionQuery(limit=3))
+        self.assertEqual(page.items, expected[:3])
+        self.assertEqual(CtmRepository(self.cache_manager).fetch_def_table(CollectionQuery()).items, def_table.items)
+
+    def test_previous_generation_is_served_during_and_after_a_failed_refresh(self):
+        self.cache_manager.preload_cache()
+        server_names = self.cache_manager.get_cached_server_names()
+        variable_index = self.cache_manager.get_cached_variable_index()
+
+        for set_caching_state in (self.cache_manager.set_caching_in_progress,
+                                  lambda: self.cache_manager.set_caching_failed(ValueError('refresh failed'))):
+            set_caching_state()
+
+            self.assertFalse(self.cache_manager.is_cache_ready)
+            self.assertTrue(self.cache_manager.has_cache_generation)
+            self.assertEqual(self.cache_manager.get_cached_server_names(), server_names)
+            self.assertIs(self.cache_manager.get_cached_variable_index(), variable_index)
+            self.assertIsNotNone(self.cache_manager.get_cached_schedule_calendar(2022))
+
+    def test_load_forecast_and_calendar_are_of_one_generation(self):
+        self.cache_manager.preload_cache()
+        forecast, schedule_calendar = self.cache_manager.get_cached_load_forecast_and_calendar(2026)
+
+        self.assertIs(forecast, self.cache_manager.get_cached_load_forecast())
+        self.assertIs(schedule_calendar, self.cache_manager.get_cached_schedule_calendar(2026))
+        self.cache_manager.preload_cache()
+        next_forecast, next_schedule_calendar = self.cache_manager.get_cached_load_forecast_and_calendar(2026)
+        self.assertIsNot(next_forecast, forecast)
+        self.assertIsNot(next_schedule_calendar, schedule_calendar)
+        self.assertIs(next_schedule_calendar, self.cache_manager.get_cached_schedule_calendar(2026))
+
+    def test_change_feed_is_committed_only_once_a_generation_is_published(self):
+        self.cache_manager.preload_cache()
+        node_ids, def_table, mapped = self.cache_manager.load_sources()
+
+        with mock.patch.object(self.cache_manager.cache, 'set_items_from_dict', side_effect=MemoryError()):
+            with self.assertRaises(MemoryError):
+                self.cache_manager.set_caching_complete(node_ids, def_table, mapped)
+
+        self.assertEqual((self.cache_manager.cache_generation, self.cache_manager.change_feed.generation), (1, 1))
+        self.cache_manager.set_caching_complete(node_ids, def_table, mapped)
+        self.assertEqual((self.cache_manager.cache_generation, self.cache_manager.change_feed.generation), (2, 2))
+        self.assertEqual(self.cache_manager.change_feed.oldest_generation, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
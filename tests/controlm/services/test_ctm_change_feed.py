@@ -0,0 +1,118 @@
+import copy
+import logging
+import os
+import tempfile
+import unittest
+from controlm.services import CtmChangeFeed, CtmXmlParser
+from benchmarks.synthetic_export import write_synthetic_export
+
+
+class CtmChangeFeedTestCase(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        logging.disable(logging.CRITICAL)
+        with tempfile.TemporaryDirectory() as tmp:
+            xml_path = write_synthetic_export(os.path.join(tmp, 'export.xml'), servers=1, folders_per_server=3,
+                                              jobs_per_folder=2)
+            cls.def_table = CtmXmlParser().parse_xml(xml_path)
+
+    @classmethod
+    def tearDownClass(cls):
+        logging.disable(logging.NOTSET)
+
+    def _edited(self, def_table, folder: int = None, job: int = None, drop_job: int = None, drop_folder: int = None):
+        def_table = copy.deepcopy(def_table)
+        if job is not None:
+            def_table.items[folder].jobs[job].cmd_line = 'edited.sh'
+        if drop_job is not None:
+            del def_table.items[folder].jobs[drop_job]
+        if drop_folder is not None:
+            del def_table.items[drop_folder]
+        return def_table
+
+    def test_record(self):
+        feed = CtmChangeFeed(max_generations=4)
+        self.assertIsNone(feed.record(1, self.def_table))
+
+        delta = feed.record(2, self._edited(self.def_table, folder=0, job=1, drop_folder=2))
+
+        self.assertEqual(delta.generation, 2)
+        self.assertEqual(list(delta.folders), [('SRV00', 'SRV00_FOLDER_00002')])
+        self.assertEqual(sorted(delta.jobs), [('SRV00', 'SRV00_FOLDER_00000', 'SRV00_FOLDER_00000_JOB_0001'),
+                                              ('SRV00', 'SRV00_FOLDER_00002', 'SRV00_FOLDER_00002_JOB_0000'),
+                                              ('SRV00', 'SRV00_FOLDER_00002', 'SRV00_FOLDER_00002_JOB_0001')])
+        self.assertEqual((feed.generation, feed.oldest_generation), (2, 1))
+
+    def test_prepare_records_nothing_until_committed(self):
+        feed = CtmChangeFeed()
+        feed.record(1, self.def_table)
+        pending = feed.prepare(2, self._edited(self.def_table, drop_folder=1))
+
+        self.assertEqual(feed.generation, 1)
+        self.assertEqual(feed.changes_since(1)['generation'], 1)
+        self.assertIs(feed.commit(pending), pending.delta)
+        self.assertEqual(feed.generation, 2)
+        self.assertEqual(len(feed.changes_since(1)['folders']['removed']), 1)
+
+    def test_commit_prepared_against_another_generation_starts_over(self):
+        feed = CtmChangeFeed()
+        feed.record(1, self.def_table)
+        stale = feed.prepare(2, self.def_table)
+        feed.record(2, self.def_table)
+
+        self.assertIsNone(feed.commit(stale))
+        self.assertEqual((feed.generation, feed.oldest_generation), (2, 2))
+
+    def test_changes_since(self):
+        feed = CtmChangeFeed(max_generations=4)
+        edited = self._edited(self.def_table, folder=0, job=1)
+        feed.record(1, self.def_table)
+        feed.record(2, edited)
+        feed.record(3, self._edited(edited, folder=1, drop_job=0))
+
+        changes = feed.changes_since(1)
+
+        self.assertEqual((changes['since'], changes['generation']), (1, 3))
+        self.assertEqual(changes['folders'], {'added': [], 'changed': [], 'removed': []})
+        self.assertEqual(changes['jobs']['changed'], [
+            {'server': 'SRV00', 'folder': 'SRV00_FOLDER_00000', 'job': 'SRV00_FOLDER_00000_JOB_0001'}])
+        self.assertEqual(changes['jobs']['removed'], [
+            {'server': 'SRV00', 'folder': 'SRV00_FOLDER_00001', 'job': 'SRV00_FOLDER_00001_JOB_0000'}])
+        self.assertEqual(feed.changes_since(2)['jobs']['changed'], [])
+        self.assertEqual(feed.changes_since(3)['jobs'], {'added': [], 'changed': [], 'removed': []})
+
+    def test_changes_that_cancel_out(self):
+        feed = CtmChangeFeed()
+        feed.record(1, self.def_table)
+        feed.record(2, self._edited(self.def_table, drop_folder=1))
+        feed.record(3, self.def_table)
+
+        changes = feed.changes_since(1)
+
+        self.assertEqual(changes['folders'], {'added': [], 'changed': [], 'removed': []})
+        self.assertEqual(changes['jobs'], {'added': [], 'changed': [], 'removed': []})
+        self.assertEqual(len(feed.changes_since(2)['folders']['added']), 1)
+
+    def test_resync(self):
+        feed = CtmChangeFeed(max_generations=2)
+        for generation in range(1, 5):
+            feed.record(generation, self.def_table)
+
+        self.assertEqual(feed.oldest_generation, 2)
+        self.assertIsNone(feed.changes_since(1))
+        self.assertIsNotNone(feed.changes_since(2))
+        with self.assertRaises(ValueError):
+            feed.changes_since(5)
+        with self.assertRaises(ValueError):
+            feed.changes_since(-1)
+
+        feed.record(7, self.def_table)
+
+        self.assertEqual(feed.oldest_generation, 7)
+        self.assertIsNone(feed.changes_since(4))
+        self.assertEqual(feed.changes_since(7)['generation'], 7)
+
+
+if __name__ == '__main__':
+    unittest.main()
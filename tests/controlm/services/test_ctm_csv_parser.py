@@ -0,0 +1,85 @@
+import gzip
+import logging
+import os
+import tempfile
+import types
+import unittest
+from controlm.services import CtmCsvParser
+
+NODES_CSV = '\n'.join([
+    'DATACENTER|NODEGROUP|NODEID|APPLTYPE',
+    '----------|---------|------|--------',
+    'SRV00 | GROUP_A | host1.local | OS',
+    'SRV00|GROUP_A|host2.local|OS',
+    'SRV00|"GROUP|B"|host1.local|OS',
+    'SRV01|GROUP_A|host3.local|OS',
+    'SRV01|GROUP_A|too-short',
+    '',
+]) + '\n'
+
+
+class CtmCsvParserTestCase(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        logging.disable(logging.CRITICAL)
+
+    @classmethod
+    def tearDownClass(cls):
+        logging.disable(logging.NOTSET)
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.csv_path = os.path.join(self.tmp.name, 'nodes.csv')
+        with open(self.csv_path, 'w', encoding='utf-8') as out:
+            out.write(NODES_CSV)
+        self.parser = CtmCsvParser()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_rows_are_streamed(self):
+        host_infos = self.parser.iter_host_infos(self.csv_path)
+
+        self.assertIsInstance(host_infos, types.GeneratorType)
+        self.assertEqual([(h.server, h.group, h.host) for h in host_infos], [
+            ('SRV00', 'GROUP_A', 'host1.local'),
+            ('SRV00', 'GROUP_A', 'host2.local'),
+            ('SRV00', 'GROUP|B', 'host1.local'),
+            ('SRV01', 'GROUP_A', 'host3.local'),
+        ])
+
+    def test_header_lines_are_configurable(self):
+        host_infos = self.parser.parse_node_ids(self.csv_path, skip_lines_count=3)
+
+        self.assertEqual([h.host for h in host_infos], ['host2.local', 'host1.local', 'host3.local'])
+
+    def test_values_are_interned(self):
+        first, second = self.parser.parse_node_ids(self.csv_path)[:2]
+
+        self.assertIs(first.server, second.server)
+        self.assertIs(first.group, second.group)
+
+    def test_inventory_is_indexed(self):
+        inventory = self.parser.parse_host_inventory(self.csv_path)
+
+        self.assertEqual(len(inventory), 4)
+        self.assertEqual(inventory.by_host[('SRV00', 'host1.local')].group, 'GROUP_A')
+        self.assertEqual([h.host for h in inventory.by_group[('SRV00', 'GROUP_A')]], ['host1.local', 'host2.local'])
+        self.assertNotIn(('SRV01', 'too-short'), inventory.by_host)
+
+    def test_gzip_source(self):
+        gz_path = self.csv_path + '.gz'
+        with gzip.open(gz_path, 'wt', encoding='utf-8') as out:
+            out.write(NODES_CSV)
+
+        self.assertEqual([vars(h) for h in self.parser.parse_node_ids(gz_path)],
+                         [vars(h) for h in self.parser.parse_node_ids(self.csv_path)])
+
+    def test_missing_file(self):
+        with self.assertRaises(FileNotFoundError):
+            self.parser.parse_node_ids(os.path.join(self.tmp.name, 'missing.csv'))
+
+
+if __name__ == '__main__':
+    unittest.main()
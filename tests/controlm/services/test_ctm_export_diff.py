@@ -0,0 +1,122 @@
+import contextlib
+import gzip
+import io
+import json
+import logging
+import os
+import tempfile
+import unittest
+from controlm.services import CtmExportDiffer
+from controlm.services.ctm_export_diff import main
+from benchmarks.synthetic_export import write_synthetic_export
+
+OLD_XML = '''<?xml version="1.0" encoding="utf-8"?>
+<DEFTABLE>
+  <SMART_FOLDER DATACENTER="SRV" FOLDER_NAME="KEPT" JOBNAME="KEPT" APPLICATION="APP">
+    <VARIABLE NAME="%%HOME" VALUE="/opt/kept"/>
+    <JOB JOBNAME="SAME" CMDLINE="run.sh"/>
+    <JOB JOBNAME="EDITED" CMDLINE="run.sh" NODEID="N1">
+      <VARIABLE NAME="%%ARGS" VALUE="--old"/>
+    </JOB>
+    <JOB JOBNAME="DROPPED" CMDLINE="run.sh"/>
+  </SMART_FOLDER>
+  <FOLDER DATACENTER="SRV" FOLDER_NAME="GONE">
+    <JOB JOBNAME="J1"/>
+  </FOLDER>
+  <FOLDER DATACENTER="SRV" FOLDER_NAME="STABLE">
+    <JOB JOBNAME="J1"/>
+  </FOLDER>
+</DEFTABLE>
+'''
+
+NEW_XML = '''<?xml version="1.0" encoding="utf-8"?>
+<DEFTABLE>
+  <FOLDER DATACENTER="SRV" FOLDER_NAME="STABLE">
+    <JOB JOBNAME="J1"/>
+  </FOLDER>
+  <SMART_FOLDER DATACENTER="SRV" FOLDER_NAME="KEPT" JOBNAME="KEPT" APPLICATION="APP2">
+    <VARIABLE NAME="%%HOME" VALUE="/opt/kept"/>
+    <JOB JOBNAME="EDITED" CMDLINE="run.sh" NODEID="N2">
+      <VARIABLE NAME="%%ARGS" VALUE="--new"/>
+    </JOB>
+    <JOB JOBNAME="SAME" CMDLINE="run.sh"/>
+    <JOB JOBNAME="ADDED"/>
+  </SMART_FOLDER>
+  <FOLDER DATACENTER="OTHER" FOLDER_NAME="GONE">
+    <JOB JOBNAME="J1"/>
+  </FOLDER>
+</DEFTABLE>
+'''
+
+
+def _write(directory: str, name: str, xml: str) -> str:
+    path = os.path.join(directory, name)
+    with (gzip.open if name.endswith('.gz') else open)(path, 'wt', encoding='utf-8') as out:
+        out.write(xml)
+    return path
+
+
+class CtmExportDifferTestCase(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        logging.disable(logging.CRITICAL)
+        cls.tmp = tempfile.TemporaryDirectory()
+        cls.old_path = _write(cls.tmp.name, 'old.xml', OLD_XML)
+        cls.new_path = _write(cls.tmp.name, 'new.xml.gz', NEW_XML)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.tmp.cleanup()
+        logging.disable(logging.NOTSET)
+
+    def test_diff(self):
+        result = CtmExportDiffer().diff(self.old_path, self.new_path).to_dict()
+
+        self.assertEqual(result['summary'], {
+            'foldersAdded': 1, 'foldersRemoved': 1, 'foldersChanged': 1, 'foldersUnchanged': 1,
+            'jobsAdded': 2, 'jobsRemoved': 2, 'jobsChanged': 1, 'jobsUnchanged': 2})
+        self.assertEqual(result['folders']['added'], [{'server': 'OTHER', 'folder': 'GONE'}])
+        self.assertEqual(result['folders']['removed'], [{'server': 'SRV', 'folder': 'GONE'}])
+        self.assertEqual(result['folders']['changed'], [{'server': 'SRV', 'folder': 'KEPT', 'changes': [
+            {'attribute': 'APPLICATION', 'old': 'APP', 'new': 'APP2'}]}])
+        self.assertEqual(sorted((job['folder'], job['job']) for job in result['jobs']['added']),
+                         [('GONE', 'J1'), ('KEPT', 'ADDED')])
+        self.assertEqual(sorted((job['folder'], job['job']) for job in result['jobs']['removed']),
+                         [('GONE', 'J1'), ('KEPT', 'DROPPED')])
+        self.assertEqual(result['jobs']['changed'], [{'server': 'SRV', 'folder': 'KEPT', 'job': 'EDITED', 'changes': [
+            {'attribute': 'NODEID', 'old': 'N1', 'new': 'N2'},
+            {'attribute': 'VARIABLE[%%ARGS].VALUE', 'old': '--old', 'new': '--new'}]}])
+
+    def test_identical_exports(self):
+        xml_path = write_synthetic_export(os.path.join(self.tmp.name, 'synthetic.xml'), servers=2,
+                                          folders_per_server=5, jobs_per_folder=4)
+
+        result = CtmExportDiffer().diff(xml_path, xml_path)
+
+        self.assertTrue(result.is_empty)
+        self.assertEqual((result.folders_unchanged, result.jobs_unchanged), (10, 40))
+
+    def test_repeated_job_names(self):
+        xml = OLD_XML.replace('<JOB JOBNAME="DROPPED" CMDLINE="run.sh"/>', '<JOB JOBNAME="SAME" CMDLINE="again.sh"/>')
+        new_path = _write(self.tmp.name, 'repeated.xml', xml)
+
+        result = CtmExportDiffer().diff(self.old_path, new_path)
+
+        self.assertEqual(result.jobs_added, [{'server': 'SRV', 'folder': 'KEPT', 'job': 'SAME#2'}])
+        self.assertEqual(result.jobs_removed, [{'server': 'SRV', 'folder': 'KEPT', 'job': 'DROPPED'}])
+
+    def test_cli(self):
+        out = io.StringIO()
+        with contextlib.redirect_stdout(out):
+            self.assertEqual(main([self.old_path, self.new_path, '--json']), 1)
+            self.assertEqual(main([self.old_path, self.old_path, '--summary']), 0)
+        document = json.loads(out.getvalue().split('\n}\n')[0] + '}')
+        self.assertEqual(document['summary']['jobsChanged'], 1)
+        self.assertTrue(out.getvalue().rstrip().endswith('jobsUnchanged=5'))
+        with contextlib.redirect_stderr(io.StringIO()):
+            self.assertEqual(main([self.old_path, os.path.join(self.tmp.name, 'missing.xml')]), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,133 @@
+import logging
+import unittest
+import numpy as np
+from controlm.model import CtmDefTable, CtmJobData, CtmSimpleFolder
+from controlm.services import CtmJobTiming, CtmLoadForecast
+from controlm.services.ctm_load_forecast import parse_ctm_interval, parse_ctm_time
+from controlm.services.dto import DtoHostInfo
+
+
+def _job(name: str, node: str = 'NODE', **timing) -> CtmJobData:
+    job = CtmJobData('JOB')
+    job.job_name = name
+    job.node_id = node
+    for key, value in timing.items():
+        setattr(job, key, value)
+    return job
+
+
+def _forecast(*jobs: CtmJobData, server: str = 'SRV', host_index: dict = None) -> CtmLoadForecast:
+    folder = CtmSimpleFolder('FOLDER')
+    folder.data_center = server
+    folder.folder_name = 'FOLDER'
+    folder.jobs = list(jobs)
+    def_table = CtmDefTable()
+    def_table.items = [folder]
+    return CtmLoadForecast(def_table, host_index)
+
+
+def _runs(timing: CtmJobTiming) -> list:
+    start, _ = timing.window()
+    return sorted(((start + timing.run_offsets()) % 1440).tolist())
+
+
+class CtmLoadForecastTestCase(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        logging.disable(logging.CRITICAL)
+
+    @classmethod
+    def tearDownClass(cls):
+        logging.disable(logging.NOTSET)
+
+    def test_parse_times_and_intervals(self):
+        self.assertEqual([parse_ctm_time(value) for value in ['0000', '0930', '2359', '2400', '>', None, '93']],
+                         [0, 570, 1439, None, None, None, None])
+        self.assertEqual([parse_ctm_interval(value) for value in ['00005M', '00002H', '00001D', '+30M', '15',
+                                                                   '00000M', 'M', None]],
+                         [5, 120, 1440, 30, 15, None, None, None])
+
+    def test_windows(self):
+        self.assertEqual(CtmJobTiming.of(_job('J')).window(), (0, 1440))
+        self.assertEqual(CtmJobTiming.of(_job('J', time_from='0800', time_to='>')).window(), (480, 960))
+        self.assertEqual(CtmJobTiming.of(_job('J', time_from='0800', time_to='0959')).window(), (480, 120))
+        # Windows ending before they start run past midnight.
+        self.assertEqual(CtmJobTiming.of(_job('J', time_from='2300', time_to='0059')).window(), (1380, 120))
+
+    def test_run_starts(self):
+        self.assertEqual(_runs(CtmJobTiming.of(_job('J', time_from='0800', interval='00005M'))), [480])
+        self.assertEqual(_runs(CtmJobTiming.of(_job('J', time_from='0800', time_to='0900', cyclic='1',
+                                                    interval='00030M'))), [480, 510, 540])
+        self.assertEqual(_runs(CtmJobTiming.of(_job('J', time_from='2330', time_to='0030', cyclic='1',
+                                                    interval='00020M'))), [10, 30, 1410, 1430])
+        self.assertEqual(_runs(CtmJobTiming.of(_job('J', time_from='0800', time_to='0900', cyclic='1',
+                                                    cyclic_type='V', cyclic_interval_sequence='+10M,+20M'))),
+                         [480, 490, 510, 520, 540])
+        self.assertEqual(_runs(CtmJobTiming.of(_job('J', time_from='0800', time_to='1200', cyclic='1',
+                                                    cyclic_type='S', cyclic_times_sequence='0700,0815,1130'))),
+                         [495, 690])
+
+    def test_shared_timings_share_a_profile(self):
+        forecast = _forecast(*[_job(f"J{idx}", time_from='0800') for idx in range(10)], _job('K', time_from='0900'))
+
+        self.assertEqual(forecast.window_profiles.shape, (2, 1440))
+        self.assertEqual(forecast.job_profiles.tolist(), [0] * 10 + [1])
+
+    def test_totals_per_slot(self):
+        forecast = _forecast(_job('A', node='N1', time_from='0800', time_to='0859'),
+                             _job('B', node='N1', time_from='0830', time_to='0929', cyclic='1', interval='00015M'),
+                             _job('C', node='N2', time_from='0800', time_to='0814'))
+
+        eligible, runs = forecast.totals(60)
+
+        self.assertEqual(forecast.groups(), [('SRV', 'N1'), ('SRV', 'N2')])
+        self.assertEqual((eligible[0, 8], eligible[0, 9], eligible[1, 8], eligible[1, 9]), (2, 1, 1, 0))
+        self.assertEqual((runs[0, 8], runs[0, 9], runs[1, 8]), (3, 2, 1))
+        self.assertEqual(eligible.sum(), 4)
+        self.assertIs(forecast.totals(60)[0], eligible)
+
+    def test_jobs_mask(self):
+        forecast = _forecast(_job('A', time_from='0800'), _job('B', time_from='0800'))
+
+        eligible, _ = forecast.totals(1440, jobs=np.array([True, False]))
+
+        self.assertEqual(eligible.tolist(), [[1]])
+        with self.assertRaises(ValueError):
+            forecast.totals(1440, jobs=np.array([True]))
+
+    def test_host_groups(self):
+        host_index = {('SRV', 'host1'): DtoHostInfo(server='SRV', group='GROUP', host='host1')}
+        forecast = _forecast(_job('A', node='host1', time_from='0800'), _job('B', node='GROUP', time_from='0800'),
+                             host_index=host_index)
+
+        self.assertEqual(forecast.heatmap(1440, by='group'), [{'server': 'SRV', 'group': 'GROUP',
+                                                               'eligible': [2], 'runs': [2]}])
+        self.assertEqual(len(forecast.heatmap(1440, by='node')), 2)
+
+    def test_peaks(self):
+        forecast = _forecast(_job('A', node='N1', time_from='0800', time_to='0829'),
+                             _job('B', node='N1', time_from='0815', time_to='0844', cyclic='1', interval='00005M'),
+                             _job('C', node='N2', time_from='2345', time_to='>'))
+
+        peaks = forecast.peaks(2, 15, server='SRV')
+
+        self.assertEqual(peaks, [
+            {'server': 'SRV', 'node': 'N1', 'peaks': [{'start': '08:15', 'end': '08:30', 'eligible': 2, 'runs': 3},
+                                                      {'start': '08:30', 'end': '08:45', 'eligible': 1, 'runs': 3}]},
+            {'server': 'SRV', 'node': 'N2', 'peaks': [{'start': '23:45', 'end': '00:00', 'eligible': 1, 'runs': 1}]},
+        ])
+        self.assertEqual(forecast.peaks(1, 15, node='N2')[0]['node'], 'N2')
+
+    def test_invalid_arguments(self):
+        forecast = _forecast(_job('A'))
+
+        for kwargs in [{'slot_minutes': 7}, {'slot_minutes': 0}, {'by': 'host'}]:
+            with self.assertRaises(ValueError):
+                forecast.heatmap(**kwargs)
+        with self.assertRaises(ValueError):
+            forecast.peaks(-1)
+
+
+if __name__ == '__main__':
+    unittest.main()
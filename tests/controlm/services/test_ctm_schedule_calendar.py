@@ -0,0 +1,176 @@
+import logging
+import os
+import tempfile
+import unittest
+from datetime import date, timedelta
+from controlm.model import CtmDefTable, CtmJobData, CtmSimpleFolder, CtmSmartFolder, CtmTagData
+from controlm.services import CtmScheduleCalendar, CtmXmlParser
+
+ALL_MONTHS = {m: '1' for m in ('jan', 'feb', 'mar', 'apr', 'may', 'jun', 'jul', 'aug', 'sep', 'oct', 'nov', 'dec')}
+
+
+def _job(name: str, node: str = 'NODE', months: dict = None, **criteria) -> CtmJobData:
+    job = CtmJobData('JOB')
+    job.job_name = name
+    job.node_id = node
+    for key, value in dict(ALL_MONTHS if months is None else months, **criteria).items():
+        setattr(job, key, value)
+    return job
+
+
+def _folder(*jobs: CtmJobData, server: str = 'SRV', name: str = 'FOLDER', calendars=()) -> CtmSimpleFolder:
+    folder = CtmSmartFolder('SMART_FOLDER') if calendars else CtmSimpleFolder('FOLDER')
+    folder.data_center = server
+    folder.folder_name = name
+    folder.jobs = list(jobs)
+    if calendars:
+        folder.rule_based_calendars = list(calendars)
+    return folder
+
+
+def _calendar_tag(name: str, **criteria) -> CtmTagData:
+    tag = CtmTagData('RULE_BASED_CALENDAR')
+    tag.name = name
+    for key, value in dict(ALL_MONTHS, **criteria).items():
+        setattr(tag, key, value)
+    return tag
+
+
+def _compile(*folders, year: int = 2026, calendars: dict = None) -> CtmScheduleCalendar:
+    def_table = CtmDefTable()
+    def_table.items = list(folders)
+    return CtmScheduleCalendar(def_table, year, calendars=calendars)
+
+
+def _days(schedule: CtmScheduleCalendar, job_idx: int = 0) -> list:
+    first = date(schedule.year, 1, 1)
+    return [first + timedelta(days=int(day)) for day in schedule.matrix[job_idx].nonzero()[0]]
+
+
+class CtmScheduleCalendarTestCase(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        logging.disable(logging.CRITICAL)
+
+    @classmethod
+    def tearDownClass(cls):
+        logging.disable(logging.NOTSET)
+
+    def test_days_of_month_in_selected_months(self):
+        schedule = _compile(_folder(_job('J', months={'feb': '1', 'may': '1'}, days='1,15')))
+
+        self.assertEqual(_days(schedule), [date(2026, 2, 1), date(2026, 2, 15), date(2026, 5, 1), date(2026, 5, 15)])
+
+    def test_last_days_and_exclusions(self):
+        schedule = _compile(_folder(_job('LAST', months={'feb': '1'}, days='L1,L2'),
+                                    _job('EXCEPT', months={'jan': '1'}, days='-1,-L1')), year=2024)
+
+        self.assertEqual(_days(schedule, 0), [date(2024, 2, 28), date(2024, 2, 29)])
+        self.assertEqual(len(_days(schedule, 1)), 29)
+        self.assertNotIn(date(2024, 1, 31), _days(schedule, 1))
+
+    def test_weekdays_and_or(self):
+        schedule = _compile(_folder(_job('OR', months={'mar': '1'}, days='1', weekdays='1', days_and_or='OR'),
+                                    _job('AND', months={'mar': '1'}, days='ALL', weekdays='0,6', days_and_or='AND')))
+
+        self.assertEqual(_days(schedule, 0)[:3], [date(2026, 3, 1), date(2026, 3, 2), date(2026, 3, 9)])
+        self.assertTrue(all(day.weekday() >= 5 for day in _days(schedule, 1)))
+        self.assertEqual(len(_days(schedule, 1)), 9)
+
+    def test_no_months_or_no_days_never_run(self):
+        schedule = _compile(_folder(_job('NO_MONTHS', months={}, days='ALL'), _job('NO_DAYS')))
+
+        self.assertEqual(schedule.matrix.sum(), 0)
+
+    def test_dates_and_active_period(self):
+        schedule = _compile(_folder(_job('DATES', date='01310701'),
+                                    _job('ACTIVE', days='ALL', active_from='20260310', active_till='20260312')))
+
+        self.assertEqual(_days(schedule, 0), [date(2026, 1, 31), date(2026, 7, 1)])
+        self.assertEqual(_days(schedule, 1), [date(2026, 3, 10), date(2026, 3, 11), date(2026, 3, 12)])
+
+    def test_confirmation_calendar_shifts(self):
+        workdays = [date(2026, 1, 1) + timedelta(days=d) for d in range(365)]
+        workdays = [day for day in workdays if day.weekday() < 5]
+        jobs = [_job(name, months={'feb': '1'}, days='1', conf_cal='WORKDAYS', shift=shift, shift_num=shift_num)
+                for name, shift, shift_num in [('DROP', None, None), ('NEXT', '>', None), ('PREV', '<', None),
+                                               ('KEEP', '@', None), ('NEXT+1', '>', '+1')]]
+
+        schedule = _compile(_folder(*jobs), calendars={'WORKDAYS': workdays})
+
+        # 2026-02-01 is a Sunday.
+        self.assertEqual([_days(schedule, idx) for idx in range(5)], [
+            [], [date(2026, 2, 2)], [date(2026, 1, 30)], [date(2026, 2, 1)], [date(2026, 2, 3)]])
+        self.assertEqual(schedule.unresolved_calendars, [])
+
+    def test_missing_calendars_are_reported(self):
+        schedule = _compile(_folder(_job('J', days_cal='HOLIDAYS')))
+
+        self.assertEqual(len(_days(schedule)), 365)
+        self.assertEqual(schedule.unresolved_calendars, ['HOLIDAYS'])
+
+    def test_rule_based_calendars(self):
+        weekends = _calendar_tag('WEEKENDS', weekdays='0,6')
+        firsts = _calendar_tag('FIRSTS', days='1')
+        by_reference = _job('REF', months={})
+        by_reference.rule_based_calendars = ['FIRSTS']
+        combined = _job('AND', days='ALL', rule_based_calendar_relationship='A')
+        combined.rule_based_calendars = ['FIRSTS']
+        own = _job('OWN', days='ALL')
+
+        schedule = _compile(_folder(by_reference, combined, own, calendars=[weekends, firsts]))
+
+        # Jobs only run on days their folder is scheduled on: weekends or first days of the month.
+        self.assertEqual(len(_days(schedule, 0)), 12)
+        self.assertEqual(_days(schedule, 0), _days(schedule, 1))
+        self.assertEqual(len(_days(schedule, 2)), 104 + 12 - 4)
+
+    def test_shared_criteria_share_a_pattern(self):
+        schedule = _compile(_folder(*[_job(f"J{idx}", days='ALL') for idx in range(10)], _job('ONE', days='1')))
+
+        self.assertEqual(schedule.pattern_matrix.shape, (2, 366))
+        self.assertEqual(schedule.matrix.shape, (11, 366))
+
+    def test_queries(self):
+        schedule = _compile(_folder(_job('A', node='N1', days='1'), _job('B', node='N1', days='ALL'),
+                                    _job('C', node='N2', days='1,2')),
+                            _folder(_job('D', node='N1', days='2'), server='OTHER'))
+
+        self.assertEqual([job['job'] for job in schedule.jobs_on(date(2026, 3, 1))], ['A', 'B', 'C'])
+        self.assertEqual([job['job'] for job in schedule.jobs_on(date(2026, 3, 2), node='N1')], ['B', 'D'])
+        self.assertEqual(schedule.jobs_on(date(2026, 3, 2), server='OTHER'),
+                         [{'server': 'OTHER', 'folder': 'FOLDER', 'job': 'D', 'node': 'N1'}])
+        self.assertEqual(list(schedule.jobs_count_by_day(server='SRV')[:3]), [3, 2, 1])
+        self.assertEqual(schedule.busiest_days(2, server='SRV'), [
+            {'server': 'SRV', 'node': 'N1', 'days': [{'date': '2026-01-01', 'jobsCount': 2},
+                                                     {'date': '2026-02-01', 'jobsCount': 2}]},
+            {'server': 'SRV', 'node': 'N2', 'days': [{'date': '2026-01-01', 'jobsCount': 1},
+                                                     {'date': '2026-01-02', 'jobsCount': 1}]},
+        ])
+        with self.assertRaises(ValueError):
+            schedule.jobs_on(date(2025, 3, 1))
+
+    def test_parser_reads_scheduling_attributes(self):
+        xml = ('<?xml version="1.0" encoding="utf-8"?>\n<DEFTABLE>\n'
+               '  <SMART_FOLDER DATACENTER="SRV" FOLDER_NAME="F" JOBNAME="F">\n'
+               '    <RULE_BASED_CALENDAR NAME="FIRSTS" DAYS="1" MAY="1"/>\n'
+               '    <JOB JOBNAME="J" MAY="1" DAYS="ALL" DAYS_AND_OR="AND" CATEGORY="C" '
+               'RULE_BASED_CALENDAR_RELATIONSHIP="A">\n'
+               '      <RULE_BASED_CALENDARS NAME="FIRSTS"/>\n'
+               '    </JOB>\n'
+               '  </SMART_FOLDER>\n</DEFTABLE>\n')
+        with tempfile.TemporaryDirectory() as tmp:
+            xml_path = os.path.join(tmp, 'export.xml')
+            with open(xml_path, 'w') as out:
+                out.write(xml)
+            folder = next(iter(CtmXmlParser().iter_def_table_items(xml_path)))
+        job = folder.jobs[0]
+
+        self.assertEqual((job.may, job.days_and_or, job.category, job.rule_based_calendars),
+                         ('1', 'AND', 'C', ['FIRSTS']))
+        self.assertEqual(_days(_compile(folder)), [date(2026, 5, 1)])
+
+
+if __name__ == '__main__':
+    unittest.main()
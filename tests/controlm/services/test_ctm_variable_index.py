@@ -0,0 +1,76 @@
+import logging
+import os
+import tempfile
+import unittest
+from controlm.services import CtmVariableIndex, CtmXmlParser
+from controlm.services.ctm_variable_index import CtmVariableDefinition, CtmVariableReference, \
+    find_variable_references, variable_key
+
+XML = '''<?xml version="1.0" encoding="utf-8"?>
+<DEFTABLE>
+  <SMART_FOLDER DATACENTER="SRV" FOLDER_NAME="F1" JOBNAME="F1">
+    <VARIABLE NAME="%%HOME" VALUE="/opt/%%APP"/>
+    <JOB JOBNAME="J1" MEMNAME="%%{APP}.sh" CMDLINE="%%HOME/bin/run.sh %%$CALCDATE %%ODATE -1 %%HOME">
+      <VARIABLE NAME="%%ARGS" VALUE="--date %%ODATE"/>
+    </JOB>
+    <JOB JOBNAME="J2" CMDLINE="true">
+      <VARIABLE NAME="%%HOME" VALUE="/home/j2"/>
+    </JOB>
+  </SMART_FOLDER>
+  <FOLDER DATACENTER="OTHER" FOLDER_NAME="F2">
+    <JOB JOBNAME="J3" CMDLINE="run %%HOME.%%ARGS"/>
+  </FOLDER>
+</DEFTABLE>
+'''
+
+
+class CtmVariableIndexTestCase(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        logging.disable(logging.CRITICAL)
+        with tempfile.TemporaryDirectory() as tmp:
+            xml_path = os.path.join(tmp, 'export.xml')
+            with open(xml_path, 'w', encoding='utf-8') as out:
+                out.write(XML)
+            cls.index = CtmVariableIndex(CtmXmlParser().parse_xml(xml_path))
+
+    @classmethod
+    def tearDownClass(cls):
+        logging.disable(logging.NOTSET)
+
+    def test_find_variable_references(self):
+        self.assertEqual(find_variable_references('%%A.%%{B}x %%$CALCDATE %%A %%\\POOL\\VAR'),
+                         ['%%A', '%%B', '%%$CALCDATE', '%%\\POOL\\VAR'])
+        self.assertEqual(find_variable_references('no variables'), [])
+        self.assertEqual(find_variable_references(None), [])
+        self.assertEqual([variable_key(name) for name in ('HOME', '%%HOME', '%%{HOME}')], ['%%HOME'] * 3)
+
+    def test_names(self):
+        self.assertEqual(self.index.names, ['%%$CALCDATE', '%%APP', '%%ARGS', '%%HOME', '%%ODATE'])
+        self.assertIn('HOME', self.index)
+        self.assertNotIn('%%MISSING', self.index)
+
+    def test_definitions(self):
+        self.assertEqual(self.index.definitions('HOME'), [CtmVariableDefinition('SRV', 'F1', None, '/opt/%%APP'),
+                                                          CtmVariableDefinition('SRV', 'F1', 'J2', '/home/j2')])
+        self.assertEqual(self.index.definitions('%%APP'), [])
+
+    def test_references(self):
+        self.assertEqual(self.index.references('%%APP'),
+                         [CtmVariableReference('SRV', 'F1', None, ('VARIABLE[%%HOME]',)),
+                          CtmVariableReference('SRV', 'F1', 'J1', ('MEMNAME',))])
+        self.assertEqual(self.index.references('%%ODATE'),
+                         [CtmVariableReference('SRV', 'F1', 'J1', ('VARIABLE[%%ARGS]', 'CMDLINE'))])
+        self.assertEqual([(entry.server, entry.job) for entry in self.index.references('HOME')],
+                         [('OTHER', 'J3'), ('SRV', 'J1')])
+
+    def test_server_filter(self):
+        self.assertEqual([entry.job for entry in self.index.references('HOME', 'SRV')], ['J1'])
+        self.assertEqual([entry.job for entry in self.index.references('HOME', 'OTHER')], ['J3'])
+        self.assertEqual(self.index.references('HOME', 'NONE'), [])
+        self.assertEqual(len(self.index.definitions('HOME', 'SRV')), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()